@@ -81,11 +81,15 @@ class Settings(BaseSettings):
     QUEUE_VISIBILITY_TIMEOUT: int = Field(default=300)  # 5分钟
     QUEUE_MAX_RETRIES: int = Field(default=3)
     WORKER_HEARTBEAT_INTERVAL: int = Field(default=30)  # 30秒
+    WORKER_CONCURRENCY: int = Field(default=3)  # 每个Worker进程并发执行的任务槽位数
+    WORKER_DRAIN_TIMEOUT_SECONDS: float = Field(default=300.0)  # 关闭时等待进行中任务完成的最长时间
 
 
     # 队列轮询/清理间隔（秒）
     QUEUE_POLL_INTERVAL_SECONDS: float = Field(default=1.0)
     QUEUE_CLEANUP_INTERVAL_SECONDS: float = Field(default=60.0)
+    # 阻塞出队等待时间（秒），需小于 Redis socket_timeout
+    QUEUE_BLOCK_TIMEOUT_SECONDS: float = Field(default=5.0)
 
     # 并发控制
     DEFAULT_USER_CONCURRENT_LIMIT: int = Field(default=3)
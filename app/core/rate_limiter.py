@@ -1,24 +1,211 @@
 """
 速率限制器
 用于控制API调用频率，避免超过数据源的限流限制
+
+API、Worker、调度器等多个进程同时调用同一数据源时，配额必须在进程之间共享：
+- 滑动窗口日志保存在 Redis 有序集合中（键 ratelimit:<数据源>[:<接口>]），记录窗口内每次调用的时间，
+  判断与记录由 Lua 脚本原子完成，使用 Redis 服务器时间，不受各进程时钟偏差影响；
+  任意长度为 time_window 的时间段内最多放行 max_calls 次，与数据源的限流规则一致
+- Redis 连接使用进程级共享连接（app.core.redis_client.get_shared_redis）；未启用或连接失败时
+  回退到进程内滑动窗口（线程安全，异步/同步调用方共享）。连接池繁忙时不回退，
+  否则每个进程各自拥有完整配额
+- 批量同步（bulk）只能使用超出预留比例的配额，交互式分析（interactive）可以用满整个窗口，
+  批量任务持续占满配额时，交互式请求仍能立即获得许可
 """
 import asyncio
+import os
+import threading
 import time
+import uuid
 import logging
+import weakref
 from collections import deque
-from typing import Optional
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.redis_client import (
+    REDIS_RETRY_INTERVAL_SECONDS,
+    SharedRedisConnections,
+    get_shared_redis,
+    is_connection_failure,
+    is_pool_exhausted,
+)
 
 logger = logging.getLogger(__name__)
 
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+# 为交互式请求预留的配额比例
+DEFAULT_INTERACTIVE_RESERVE = 0.2
+RATE_LIMIT_KEY_PREFIX = "ratelimit:"
+MIN_WAIT_SECONDS = 0.01
+
+# KEYS[1]: 窗口键；ARGV: 窗口内最大调用次数, 窗口秒数, 请求次数, 放行后至少保留的次数, 本次调用的唯一ID
+# 返回 {需要等待的秒数, 剩余可用次数}（字符串，避免 Lua 数字转整数时截断）
+SLIDING_WINDOW_LUA = """
+-- Redis 5 之前需要显式开启按效果复制，才能在 TIME 之后写入
+if redis.replicate_commands then redis.replicate_commands() end
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local requested = math.min(math.ceil(tonumber(ARGV[3])), limit)
+local floor = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+local allowed = limit - floor
+if count + requested <= allowed then
+  for i = 1, requested do
+    redis.call('ZADD', KEYS[1], now, ARGV[5] .. ':' .. i)
+  end
+  redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000) + 1000)
+  return {'0', tostring(limit - count - requested)}
+end
+-- 等到足够多的最早记录移出窗口
+local need = math.ceil(count + requested - allowed)
+local oldest = redis.call('ZRANGE', KEYS[1], need - 1, need - 1, 'WITHSCORES')
+local wait = window
+if oldest[2] then
+  wait = tonumber(oldest[2]) + window - now
+end
+return {tostring(wait), tostring(limit - count)}
+"""
+
+
+class LocalSlidingWindow:
+    """进程内滑动窗口（Redis 不可用时的回退）"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._windows: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def take(self, key: str, limit: float, window: float, requested: float, floor: float) -> Tuple[float, float]:
+        """与 SLIDING_WINDOW_LUA 语义相同，返回 (需要等待的秒数, 剩余可用次数)"""
+        requested = min(int(-(-requested // 1)), int(limit))
+        with self._lock:
+            now = self._clock()
+            calls = self._windows.setdefault(key, deque())
+            while calls and calls[0] <= now - window:
+                calls.popleft()
+            count = len(calls)
+            allowed = limit - floor
+            if count + requested <= allowed:
+                calls.extend([now] * requested)
+                return 0.0, limit - count - requested
+            need = int(-(-(count + requested - allowed) // 1))
+            if need > count:
+                return window, limit - count
+            return calls[need - 1] + window - now, limit - count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+
+class RateLimitBackend:
+    """滑动窗口存储：Redis 优先，连接失败时回退到进程内滑动窗口"""
+
+    def __init__(self, redis_client=None, async_redis_client=None, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = (
+                redis_client is not None
+                or async_redis_client is not None
+                or os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
+            )
+        self.enabled = enabled
+        self.local = LocalSlidingWindow()
+        if redis_client is not None or async_redis_client is not None:
+            self._redis = SharedRedisConnections(redis_client, async_redis_client)
+        else:
+            self._redis = get_shared_redis()
+        self._script = None
+        self._async_scripts: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def _sync_script(self):
+        if self._script is None:
+            with self._lock:
+                if self._script is None:
+                    self._script = self._redis.client().register_script(SLIDING_WINDOW_LUA)
+        return self._script
+
+    def _loop_script(self):
+        """当前事件循环的异步脚本对象"""
+        loop = asyncio.get_running_loop()
+        script = self._async_scripts.get(loop)
+        if script is None:
+            script = self._async_scripts[loop] = self._redis.async_client().register_script(SLIDING_WINDOW_LUA)
+        return script
+
+    @property
+    def redis_active(self) -> bool:
+        return self.enabled and time.time() >= self._down_until
+
+    def _mark_down(self, e: Exception) -> None:
+        self._down_until = time.time() + REDIS_RETRY_INTERVAL_SECONDS
+        logger.warning(f"⚠️ [速率限制] Redis不可用，{REDIS_RETRY_INTERVAL_SECONDS}秒内使用进程内滑动窗口: {e}")
+
+    def _handle_error(self, e: Exception, key: str, limit: float, window: float, requested: float,
+                      floor: float) -> Tuple[float, float]:
+        if is_pool_exhausted(e):
+            # 仍然使用 Redis 中的共享配额，稍后重试
+            logger.debug(f"⏳ [速率限制] Redis连接池繁忙，稍后重试: {e}")
+            return MIN_WAIT_SECONDS, 0.0
+        if is_connection_failure(e):
+            self._mark_down(e)
+        else:
+            logger.warning(f"⚠️ [速率限制] Redis限流脚本执行失败，本次使用进程内滑动窗口: {e}")
+        return self.local.take(key, limit, window, requested, floor)
+
+    def take(self, key: str, limit: float, window: float, requested: float, floor: float) -> Tuple[float, float]:
+        if self.redis_active:
+            try:
+                wait, remaining = self._sync_script()(
+                    keys=[key], args=[limit, window, requested, floor, uuid.uuid4().hex]
+                )
+                return float(wait), float(remaining)
+            except Exception as e:
+                return self._handle_error(e, key, limit, window, requested, floor)
+        return self.local.take(key, limit, window, requested, floor)
+
+    async def take_async(self, key: str, limit: float, window: float, requested: float,
+                         floor: float) -> Tuple[float, float]:
+        if self.redis_active:
+            try:
+                wait, remaining = await self._loop_script()(
+                    keys=[key], args=[limit, window, requested, floor, uuid.uuid4().hex]
+                )
+                return float(wait), float(remaining)
+            except Exception as e:
+                return self._handle_error(e, key, limit, window, requested, floor)
+        return self.local.take(key, limit, window, requested, floor)
+
+
+_backend: Optional[RateLimitBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """进程级共享的滑动窗口存储"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = RateLimitBackend()
+    return _backend
+
 
 class RateLimiter:
     """
     滑动窗口速率限制器
     
-    使用滑动窗口算法精确控制API调用频率
+    任意 time_window 秒内最多放行 max_calls 次；同一 key 的限制器在所有进程和线程之间共享配额
     """
     
-    def __init__(self, max_calls: int, time_window: float, name: str = "RateLimiter"):
+    def __init__(self, max_calls: int, time_window: float, name: str = "RateLimiter",
+                 key: Optional[str] = None, interactive_reserve: float = DEFAULT_INTERACTIVE_RESERVE,
+                 backend: Optional[RateLimitBackend] = None):
         """
         初始化速率限制器
         
@@ -26,74 +213,134 @@ class RateLimiter:
             max_calls: 时间窗口内最大调用次数
             time_window: 时间窗口大小（秒）
             name: 限制器名称（用于日志）
+            key: 共享配额的键（通常为数据源名称），默认使用 name
+            interactive_reserve: 为交互式请求预留的配额比例，批量请求不能使用
+            backend: 滑动窗口存储，默认使用进程级共享实例
         """
         self.max_calls = max_calls
         self.time_window = time_window
         self.name = name
-        self.calls = deque()  # 存储调用时间戳
-        self.lock = asyncio.Lock()  # 确保线程安全
+        self.key = key or name
+        self.interactive_reserve = interactive_reserve
+        self._backend = backend
+        self._stats_lock = threading.Lock()
         
         # 统计信息
         self.total_calls = 0
         self.total_waits = 0
         self.total_wait_time = 0.0
+        self.calls_by_priority: Dict[str, int] = {}
+        # 最近一次放行时窗口内的剩余次数，get_stats 直接使用，不访问 Redis
+        self._last_remaining: Optional[Tuple[float, float]] = None
         
         logger.info(f"🔧 {self.name} 初始化: {max_calls}次/{time_window}秒")
+
+    @property
+    def backend(self) -> RateLimitBackend:
+        return self._backend or get_rate_limit_backend()
+
+    def _bucket_key(self, endpoint: Optional[str] = None) -> str:
+        key = f"{RATE_LIMIT_KEY_PREFIX}{self.key}"
+        return f"{key}:{endpoint}" if endpoint else key
+
+    def _floor(self, tokens: float, priority: str) -> float:
+        if priority != PRIORITY_BULK:
+            return 0.0
+        # 配额太小时不预留，否则批量请求永远拿不到许可
+        return max(0.0, min(self.max_calls * self.interactive_reserve, self.max_calls - tokens))
+
+    def _record(self, priority: str, waited: float, remaining: float, endpoint: Optional[str]) -> None:
+        with self._stats_lock:
+            self.total_calls += 1
+            self.calls_by_priority[priority] = self.calls_by_priority.get(priority, 0) + 1
+            if waited > 0:
+                self.total_waits += 1
+                self.total_wait_time += waited
+            if endpoint is None:
+                self._last_remaining = (remaining, time.monotonic())
     
-    async def acquire(self):
+    async def acquire(self, tokens: float = 1, priority: str = PRIORITY_INTERACTIVE, endpoint: Optional[str] = None):
         """
         获取调用许可
         如果超过速率限制，会等待直到可以调用
+        
+        Args:
+            tokens: 本次消耗的调用次数
+            priority: interactive（交互式分析）或 bulk（批量同步）
+            endpoint: 接口名，提供时按 数据源:接口 单独计算配额
         """
-        async with self.lock:
-            now = time.time()
-            
-            # 移除时间窗口外的旧调用记录
-            while self.calls and self.calls[0] <= now - self.time_window:
-                self.calls.popleft()
-            
-            # 如果当前窗口内调用次数已达上限，需要等待
-            if len(self.calls) >= self.max_calls:
-                # 计算需要等待的时间
-                oldest_call = self.calls[0]
-                wait_time = oldest_call + self.time_window - now + 0.01  # 加一点缓冲
-                
-                if wait_time > 0:
-                    self.total_waits += 1
-                    self.total_wait_time += wait_time
-                    
-                    logger.debug(f"⏳ {self.name} 达到速率限制，等待 {wait_time:.2f}秒")
-                    await asyncio.sleep(wait_time)
-                    
-                    # 重新获取当前时间
-                    now = time.time()
-                    
-                    # 再次清理旧记录
-                    while self.calls and self.calls[0] <= now - self.time_window:
-                        self.calls.popleft()
-            
-            # 记录本次调用
-            self.calls.append(now)
-            self.total_calls += 1
+        key = self._bucket_key(endpoint)
+        floor = self._floor(tokens, priority)
+        waited = 0.0
+        while True:
+            wait, remaining = await self.backend.take_async(key, self.max_calls, self.time_window, tokens, floor)
+            if wait <= 0:
+                break
+            wait = max(wait, MIN_WAIT_SECONDS)
+            logger.debug(f"⏳ {self.name} 达到速率限制（{priority}），等待 {wait:.2f}秒")
+            await asyncio.sleep(wait)
+            waited += wait
+        self._record(priority, waited, remaining, endpoint)
+
+    def acquire_sync(self, tokens: float = 1, priority: str = PRIORITY_INTERACTIVE, endpoint: Optional[str] = None):
+        """同步版本的 acquire（供线程中的同步数据源调用）"""
+        key = self._bucket_key(endpoint)
+        floor = self._floor(tokens, priority)
+        waited = 0.0
+        while True:
+            wait, remaining = self.backend.take(key, self.max_calls, self.time_window, tokens, floor)
+            if wait <= 0:
+                break
+            wait = max(wait, MIN_WAIT_SECONDS)
+            logger.debug(f"⏳ {self.name} 达到速率限制（{priority}），等待 {wait:.2f}秒")
+            time.sleep(wait)
+            waited += wait
+        self._record(priority, waited, remaining, endpoint)
+
+    def _build_stats(self, current_calls: int) -> dict:
+        with self._stats_lock:
+            return {
+                "name": self.name,
+                "max_calls": self.max_calls,
+                "time_window": self.time_window,
+                "current_calls": current_calls,
+                "total_calls": self.total_calls,
+                "total_waits": self.total_waits,
+                "total_wait_time": self.total_wait_time,
+                "avg_wait_time": self.total_wait_time / self.total_waits if self.total_waits > 0 else 0,
+                "calls_by_priority": dict(self.calls_by_priority),
+                "backend": "redis" if self.backend.redis_active else "local",
+            }
     
     def get_stats(self) -> dict:
-        """获取统计信息"""
-        return {
-            "name": self.name,
-            "max_calls": self.max_calls,
-            "time_window": self.time_window,
-            "current_calls": len(self.calls),
-            "total_calls": self.total_calls,
-            "total_waits": self.total_waits,
-            "total_wait_time": self.total_wait_time,
-            "avg_wait_time": self.total_wait_time / self.total_waits if self.total_waits > 0 else 0
-        }
+        """
+        获取统计信息（不访问 Redis，可以在协程中直接调用）
+
+        current_calls 取自本进程最近一次放行时的窗口状态，超过一个时间窗口未调用时视为 0
+        """
+        current_calls = 0
+        last = self._last_remaining
+        if last is not None and time.monotonic() - last[1] < self.time_window:
+            current_calls = max(0, int(round(self.max_calls - last[0])))
+        return self._build_stats(current_calls)
+
+    async def get_stats_async(self) -> dict:
+        """获取统计信息，current_calls 从共享窗口实时读取（包含其他进程的调用）"""
+        try:
+            # 请求 0 次只清理过期记录并读取窗口状态
+            _, remaining = await self.backend.take_async(self._bucket_key(), self.max_calls, self.time_window, 0, 0)
+            current_calls = max(0, int(round(self.max_calls - remaining)))
+        except Exception:
+            current_calls = 0
+        return self._build_stats(current_calls)
     
     def reset_stats(self):
         """重置统计信息"""
-        self.total_calls = 0
-        self.total_waits = 0
-        self.total_wait_time = 0.0
+        with self._stats_lock:
+            self.total_calls = 0
+            self.total_waits = 0
+            self.total_wait_time = 0.0
+            self.calls_by_priority = {}
         logger.info(f"🔄 {self.name} 统计信息已重置")
 
 
@@ -134,7 +381,8 @@ class TushareRateLimiter(RateLimiter):
         super().__init__(
             max_calls=max_calls,
             time_window=time_window,
-            name=f"TushareRateLimiter({tier})"
+            name=f"TushareRateLimiter({tier})",
+            key="tushare"
         )
         
         self.tier = tier
@@ -162,7 +410,8 @@ class AKShareRateLimiter(RateLimiter):
         super().__init__(
             max_calls=max_calls,
             time_window=time_window,
-            name="AKShareRateLimiter"
+            name="AKShareRateLimiter",
+            key="akshare"
         )
 
 
@@ -184,7 +433,8 @@ class BaoStockRateLimiter(RateLimiter):
         super().__init__(
             max_calls=max_calls,
             time_window=time_window,
-            name="BaoStockRateLimiter"
+            name="BaoStockRateLimiter",
+            key="baostock"
         )
 
 
@@ -192,6 +442,8 @@ class BaoStockRateLimiter(RateLimiter):
 _tushare_limiter: Optional[TushareRateLimiter] = None
 _akshare_limiter: Optional[AKShareRateLimiter] = None
 _baostock_limiter: Optional[BaoStockRateLimiter] = None
+_named_limiters: Dict[str, RateLimiter] = {}
+_named_limiters_lock = threading.Lock()
 
 
 def get_tushare_rate_limiter(tier: str = "standard", safety_margin: float = 0.8) -> TushareRateLimiter:
@@ -218,11 +470,31 @@ def get_baostock_rate_limiter() -> BaoStockRateLimiter:
     return _baostock_limiter
 
 
+def get_rate_limiter(key: str, max_calls: int, time_window: float) -> RateLimiter:
+    """
+    按键获取共享速率限制器（单例），用于数据源内部的单接口节流
+
+    例如 get_rate_limiter("akshare:eastmoney", 1, 0.5) 表示所有进程合计每0.5秒最多请求一次东方财富
+    """
+    limiter = _named_limiters.get(key)
+    if limiter is None:
+        with _named_limiters_lock:
+            limiter = _named_limiters.get(key)
+            if limiter is None:
+                limiter = _named_limiters[key] = RateLimiter(
+                    max_calls=max_calls, time_window=time_window, name=f"RateLimiter({key})", key=key
+                )
+    return limiter
+
+
 def reset_all_limiters():
     """重置所有速率限制器"""
     global _tushare_limiter, _akshare_limiter, _baostock_limiter
     _tushare_limiter = None
     _akshare_limiter = None
     _baostock_limiter = None
+    with _named_limiters_lock:
+        _named_limiters.clear()
+    get_rate_limit_backend().local.clear()
     logger.info("🔄 所有速率限制器已重置")
 
@@ -1,10 +1,19 @@
 """
 Redis客户端配置和连接管理
+
+- init_redis/get_redis：应用主事件循环上的异步客户端（FastAPI、Worker 启动时初始化）
+- SharedRedisConnections/get_shared_redis：不依赖 init_redis 的进程级共享连接，
+  同步客户端共享一个阻塞式连接池，异步客户端按事件循环各建一个；
+  进度存储、速率限制等在线程和多个事件循环中使用 Redis 的组件共用
 """
 
+import asyncio
 import redis.asyncio as redis
 import logging
-from typing import Optional
+import threading
+import weakref
+from typing import Any, Dict, Optional
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
 from .config import settings
 
 logger = logging.getLogger(__name__)
@@ -67,6 +76,89 @@ def get_redis() -> redis.Redis:
     return redis_client
 
 
+# Redis 连接失败后暂停尝试的时间，避免每次调用都等待连接超时
+REDIS_RETRY_INTERVAL_SECONDS = 30
+# 连接池耗尽时等待空闲连接的时间
+REDIS_POOL_TIMEOUT_SECONDS = 5
+
+CONNECTION_ERRORS = (RedisConnectionError, RedisTimeoutError, ConnectionError, TimeoutError, asyncio.TimeoutError)
+
+
+def is_pool_exhausted(e: Exception) -> bool:
+    """连接池没有空闲连接：只说明本进程并发高，不代表 Redis 服务不可用"""
+    message = str(e)
+    return type(e).__name__ == "MaxConnectionsError" or \
+        "No connection available" in message or "Too many connections" in message
+
+
+def is_connection_failure(e: Exception) -> bool:
+    """连接失败或超时（连接池耗尽除外），调用方应暂时停用 Redis"""
+    return isinstance(e, CONNECTION_ERRORS) and not is_pool_exhausted(e)
+
+
+def shared_connection_kwargs() -> Dict[str, Any]:
+    """共享连接池参数（与 init_redis 使用同一份 REDIS_* 配置）"""
+    kwargs: Dict[str, Any] = {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "db": settings.REDIS_DB,
+        "decode_responses": True,
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        # 阻塞式连接池：并发超过连接数时排队等待，而不是立即报错
+        "timeout": REDIS_POOL_TIMEOUT_SECONDS,
+        "socket_connect_timeout": 5,
+        "socket_timeout": 5,
+    }
+    if settings.REDIS_PASSWORD:
+        kwargs["password"] = settings.REDIS_PASSWORD
+    return kwargs
+
+
+class SharedRedisConnections:
+    """进程级共享的同步/异步 Redis 客户端（redis.asyncio 连接不能跨事件循环使用）"""
+
+    def __init__(self, redis_client=None, async_redis_client=None):
+        self._client = redis_client
+        self._async_client = async_redis_client
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def client(self):
+        """同步客户端（进程内共享连接池）"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import redis as sync_redis
+                    pool = sync_redis.BlockingConnectionPool(**shared_connection_kwargs())
+                    self._client = sync_redis.Redis(connection_pool=pool)
+        return self._client
+
+    def async_client(self):
+        """当前事件循环的异步客户端"""
+        if self._async_client is not None:
+            return self._async_client
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = redis.Redis(connection_pool=redis.BlockingConnectionPool(**shared_connection_kwargs()))
+            self._async_clients[loop] = client
+        return client
+
+
+_shared_redis: Optional[SharedRedisConnections] = None
+_shared_redis_lock = threading.Lock()
+
+
+def get_shared_redis() -> SharedRedisConnections:
+    """进程级单例"""
+    global _shared_redis
+    if _shared_redis is None:
+        with _shared_redis_lock:
+            if _shared_redis is None:
+                _shared_redis = SharedRedisConnections()
+    return _shared_redis
+
+
 class RedisKeys:
     """Redis键名常量"""
     
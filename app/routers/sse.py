@@ -10,104 +10,56 @@ from app.core.database import get_redis_client
 from app.core.config import settings
 
 from app.services.queue_service import get_queue_service, QueueService
+from app.services.progress.hub import get_progress_hub
 
 router = APIRouter()
 logger = logging.getLogger("webapi.sse")
 
 
 async def task_progress_generator(task_id: str, user_id: str):
-    """Generate SSE events for task progress updates"""
-    r = get_redis_client()
-    pubsub = None
-    channel = f"task_progress:{task_id}"
+    """Generate SSE events for task progress updates
+
+    进度消息来自进程级的 ProgressHub（单个 PSUBSCRIBE 连接多路复用），
+    不再为每个浏览器连接单独创建 PubSub 连接。
+    """
+    subscription = None
 
     try:
         # Load dynamic SSE settings
         try:
             from app.services.config_provider import provider as config_provider
             eff = await config_provider.get_effective_system_settings()
-            poll_timeout = float(eff.get("sse_poll_timeout_seconds", 1.0))
             heartbeat_every = int(eff.get("sse_heartbeat_interval_seconds", 10))
             max_idle_seconds = int(eff.get("sse_task_max_idle_seconds", 300))
         except Exception:
-            poll_timeout = float(getattr(settings, "SSE_POLL_TIMEOUT_SECONDS", 1.0))
             heartbeat_every = int(getattr(settings, "SSE_HEARTBEAT_INTERVAL_SECONDS", 10))
             max_idle_seconds = int(getattr(settings, "SSE_TASK_MAX_IDLE_SECONDS", 300))
 
-        # 🔥 修复：创建 PubSub 连接
-        pubsub = r.pubsub()
-        logger.info(f"📡 [SSE-Task] 创建 PubSub 连接: task={task_id}, user={user_id}")
-
-        # 🔥 修复：订阅频道（可能失败，需要确保 pubsub 被清理）
-        try:
-            await pubsub.subscribe(channel)
-            logger.info(f"✅ [SSE-Task] 订阅频道成功: {channel}")
-            # Send initial connection confirmation
-            yield f"event: connected\ndata: {{\"task_id\": \"{task_id}\", \"message\": \"已连接进度流\"}}\n\n"
-        except Exception as subscribe_error:
-            # 🔥 订阅失败时立即清理 pubsub 连接
-            logger.error(f"❌ [SSE-Task] 订阅频道失败: {subscribe_error}")
-            try:
-                await pubsub.close()
-                logger.info(f"🧹 [SSE-Task] 订阅失败后已关闭 PubSub 连接")
-            except Exception as close_error:
-                logger.error(f"❌ [SSE-Task] 关闭 PubSub 连接失败: {close_error}")
-            # 重新抛出异常，让外层 except 处理
-            raise
-
-        # Listen for progress updates
-        idle_elapsed = 0.0
-        last_hb = time.monotonic()
-
-        while idle_elapsed < max_idle_seconds:
-            try:
-                message = await asyncio.wait_for(pubsub.get_message(ignore_subscribe_messages=True), timeout=poll_timeout)
-                if message and message['type'] == 'message':
-                    # Reset idle timer on valid message
-                    idle_elapsed = 0.0
-                    try:
-                        progress_data = json.loads(message['data'])
-                        yield f"event: progress\ndata: {json.dumps(progress_data, ensure_ascii=False)}\n\n"
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON in progress message: {message['data']}")
-                else:
-                    # No update: accumulate idle time and send heartbeat if due
-                    idle_elapsed += poll_timeout
-                    now = time.monotonic()
-                    if now - last_hb >= heartbeat_every:
-                        yield f"event: heartbeat\ndata: {{\"timestamp\": \"{asyncio.get_event_loop().time()}\"}}\n\n"
-                        last_hb = now
+        subscription = await get_progress_hub(get_redis_client).subscribe(task_id)
+        logger.info(f"📡 [SSE-Task] 订阅任务进度: task={task_id}, user={user_id}")
+        # Send initial connection confirmation
+        yield f"event: connected\ndata: {{\"task_id\": \"{task_id}\", \"message\": \"已连接进度流\"}}\n\n"
 
-            except asyncio.TimeoutError:
-                idle_elapsed += poll_timeout
-                continue
+        # Listen for progress updates：没有消息时按心跳间隔醒来，而不是按 poll_timeout 轮询
+        last_message_at = time.monotonic()
+        while True:
+            idle = time.monotonic() - last_message_at
+            if idle >= max_idle_seconds:
+                break
+            progress_data = await subscription.get(timeout=max(1, min(heartbeat_every, max_idle_seconds - idle)))
+            if progress_data is not None:
+                last_message_at = time.monotonic()
+                yield f"event: progress\ndata: {json.dumps(progress_data, ensure_ascii=False)}\n\n"
+            else:
+                yield f"event: heartbeat\ndata: {{\"timestamp\": \"{asyncio.get_event_loop().time()}\"}}\n\n"
 
     except Exception as e:
         logger.exception(f"SSE error for task {task_id}: {e}")
         yield f"event: error\ndata: {{\"error\": \"连接异常: {str(e)}\"}}\n\n"
     finally:
-        # 🔥 修复：确保在所有情况下都释放连接
-        if pubsub:
-            logger.info(f"🧹 [SSE-Task] 清理 PubSub 连接: task={task_id}")
-
-            # 分步骤关闭，确保即使 unsubscribe 失败也能关闭连接
-            try:
-                await pubsub.unsubscribe(channel)
-                logger.debug(f"✅ [SSE-Task] 已取消订阅频道: {channel}")
-            except Exception as e:
-                logger.warning(f"⚠️ [SSE-Task] 取消订阅失败（将继续关闭连接）: {e}")
-
-            try:
-                await pubsub.close()
-                logger.info(f"✅ [SSE-Task] PubSub 连接已关闭: task={task_id}")
-            except Exception as e:
-                logger.error(f"❌ [SSE-Task] 关闭 PubSub 连接失败: {e}", exc_info=True)
-                # 即使关闭失败，也尝试重置连接
-                try:
-                    await pubsub.reset()
-                    logger.info(f"🔄 [SSE-Task] PubSub 连接已重置: task={task_id}")
-                except Exception as reset_error:
-                    logger.error(f"❌ [SSE-Task] 重置 PubSub 连接也失败: {reset_error}")
+        if subscription is not None:
+            subscription.close()
+            logger.info(f"🧹 [SSE-Task] 取消订阅任务进度: task={task_id}")
 
 
 async def batch_progress_generator(batch_id: str, user_id: str):
@@ -21,6 +21,7 @@ from tradingagents.utils.logging_init import init_logging
 init_logging()
 
 from tradingagents.graph.trading_graph import TradingAgentsGraph
+from tradingagents.graph.graph_pool import get_graph_pool
 from tradingagents.default_config import DEFAULT_CONFIG
 from app.services.simple_analysis_service import create_analysis_config, get_provider_by_model_name
 from app.models.analysis import (
@@ -52,7 +53,6 @@ class AnalysisService:
         self.queue_service = QueueService(redis_client)
         # 初始化使用统计服务
         self.usage_service = UsageStatisticsService()
-        self._trading_graph_cache = {}
         # 进度跟踪器缓存
         self._progress_trackers: Dict[str, RedisProgressTracker] = {}
 
@@ -80,21 +80,8 @@ class AnalysisService:
             return PyObjectId(new_object_id)
     
     def _get_trading_graph(self, config: Dict[str, Any]) -> TradingAgentsGraph:
-        """获取或创建TradingAgents图实例（带缓存）- 与单股分析保持一致"""
-        config_key = json.dumps(config, sort_keys=True)
-
-        if config_key not in self._trading_graph_cache:
-            # 直接使用完整配置，不再合并DEFAULT_CONFIG（因为create_analysis_config已经处理了）
-            # 这与单股分析服务和web目录的方式一致
-            self._trading_graph_cache[config_key] = TradingAgentsGraph(
-                selected_analysts=config.get("selected_analysts", ["market", "fundamentals"]),
-                debug=config.get("debug", False),
-                config=config
-            )
-
-            logger.info(f"创建新的TradingAgents实例: {config.get('llm_provider', 'default')}")
-
-        return self._trading_graph_cache[config_key]
+        """获取TradingAgents图实例（进程级编译图复用池，可在并发任务间共享）- 与单股分析保持一致"""
+        return get_graph_pool().get(config)
 
     def _execute_analysis_sync_with_progress(self, task: AnalysisTask, progress_tracker: RedisProgressTracker) -> AnalysisResult:
         """同步执行分析任务（在线程池中运行，带进度跟踪）"""
@@ -676,8 +663,8 @@ class AnalysisService:
             if progress_callback:
                 progress_callback(30, "创建分析图...")
             
-            # 获取TradingAgents实例
-            trading_graph = self._get_trading_graph(config)
+            # 从复用池获取TradingAgents实例（首次构建较慢，放到线程中执行）
+            trading_graph = await asyncio.to_thread(self._get_trading_graph, config)
             
             if progress_callback:
                 progress_callback(50, "执行股票分析...")
@@ -686,8 +673,8 @@ class AnalysisService:
             start_time = datetime.utcnow()
             analysis_date = task.parameters.analysis_date or datetime.now().strftime("%Y-%m-%d")
             
-            # 调用现有的分析方法
-            _, decision = trading_graph.propagate(task.symbol, analysis_date)
+            # 在线程中调用同步的分析方法，避免阻塞事件循环
+            _, decision = await asyncio.to_thread(trading_graph.propagate, task.symbol, analysis_date)
             
             execution_time = (datetime.utcnow() - start_time).total_seconds()
             
@@ -927,7 +914,8 @@ class AnalysisService:
                 currency=currency,
                 session_id=task.task_id,
                 analysis_type="stock_analysis",
-                stock_code=task.symbol
+                stock_code=task.symbol,
+                user_id=str(task.user_id) if task.user_id else None
             )
 
             # 保存到数据库
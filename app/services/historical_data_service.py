@@ -14,6 +14,9 @@ from app.core.database import get_database
 
 logger = logging.getLogger(__name__)
 
+# 单次 bulk_write 的操作数（过大容易超时）
+BULK_WRITE_BATCH_SIZE = 200
+
 
 class HistoricalDataService:
     """统一历史数据管理服务"""
@@ -62,6 +65,13 @@ class HistoricalDataService:
                 ("trade_date", -1)
             ], name="symbol_date_index", background=True)
 
+            # 5. 复合索引：数据源+股票代码+交易日期（批量查询各股票最新日期，$group 可走 DISTINCT_SCAN）
+            await self.collection.create_index([
+                ("data_source", 1),
+                ("symbol", 1),
+                ("trade_date", -1)
+            ], name="source_symbol_date_index", background=True)
+
             logger.info("✅ 历史数据索引检查完成")
         except Exception as e:
             # 索引创建失败不应该阻止服务启动
@@ -96,93 +106,25 @@ class HistoricalDataService:
                 logger.warning(f"⚠️ {symbol} 历史数据为空，跳过保存")
                 return 0
 
-            from datetime import datetime
             total_start = datetime.now()
 
             logger.info(f"💾 开始保存 {symbol} 历史数据: {len(data)}条记录 (数据源: {data_source})")
 
-            # ⏱️ 性能监控：单位转换
-            convert_start = datetime.now()
-            # 🔥 在 DataFrame 层面做单位转换（向量化操作，比逐行快得多）
-            if data_source == "tushare":
-                # 成交额：千元 -> 元
-                if 'amount' in data.columns:
-                    data['amount'] = data['amount'] * 1000
-                elif 'turnover' in data.columns:
-                    data['turnover'] = data['turnover'] * 1000
-
-                # 成交量：手 -> 股
-                if 'volume' in data.columns:
-                    data['volume'] = data['volume'] * 100
-                elif 'vol' in data.columns:
-                    data['vol'] = data['vol'] * 100
-
-            # 🔥 港股/美股数据：添加 pre_close 字段（从前一天的 close 获取）
-            if market in ["HK", "US"] and 'pre_close' not in data.columns and 'close' in data.columns:
-                # 使用 shift(1) 将 close 列向下移动一行，得到前一天的收盘价
-                data['pre_close'] = data['close'].shift(1)
-                logger.debug(f"✅ {symbol} 添加 pre_close 字段（从前一天的 close 获取）")
-
-            convert_duration = (datetime.now() - convert_start).total_seconds()
-
-            # ⏱️ 性能监控：构建操作列表
+            # ⏱️ 性能监控：构建操作列表（含单位转换）
             prepare_start = datetime.now()
-            # 准备批量操作
-            operations = []
-            saved_count = 0
-            batch_size = 200  # 进一步减小批量大小，避免超时（从500改为200）
-
-            for date_index, row in data.iterrows():
-                try:
-                    # 标准化数据（传递日期索引）
-                    doc = self._standardize_record(symbol, row, data_source, market, period, date_index)
-
-                    # 创建upsert操作
-                    filter_doc = {
-                        "symbol": doc["symbol"],
-                        "trade_date": doc["trade_date"],
-                        "data_source": doc["data_source"],
-                        "period": doc["period"]
-                    }
-
-                    from pymongo import ReplaceOne
-                    operations.append(ReplaceOne(
-                        filter=filter_doc,
-                        replacement=doc,
-                        upsert=True
-                    ))
-
-                    # 批量执行（每200条）
-                    if len(operations) >= batch_size:
-                        batch_write_start = datetime.now()
-                        batch_saved = await self._execute_bulk_write_with_retry(symbol, operations)
-                        batch_write_duration = (datetime.now() - batch_write_start).total_seconds()
-                        logger.debug(f"   批量写入 {len(operations)} 条，耗时 {batch_write_duration:.2f}秒")
-                        saved_count += batch_saved
-                        operations = []
-
-                except Exception as e:
-                    # 获取日期信息用于错误日志
-                    date_str = str(date_index) if hasattr(date_index, '__str__') else 'unknown'
-                    logger.error(f"❌ 处理记录失败 {symbol} {date_str}: {e}")
-                    continue
-
+            operations = self.build_operations(symbol, data, data_source, market, period)
             prepare_duration = (datetime.now() - prepare_start).total_seconds()
 
-            # ⏱️ 性能监控：最后一批写入
-            final_write_start = datetime.now()
-            # 执行剩余操作
-            if operations:
-                saved_count += await self._execute_bulk_write_with_retry(
-                    symbol, operations
-                )
-            final_write_duration = (datetime.now() - final_write_start).total_seconds()
+            # ⏱️ 性能监控：批量写入
+            write_start = datetime.now()
+            saved_count = await self.bulk_write(symbol, operations)
+            write_duration = (datetime.now() - write_start).total_seconds()
 
             total_duration = (datetime.now() - total_start).total_seconds()
             logger.info(
                 f"✅ {symbol} 历史数据保存完成: {saved_count}条记录，"
                 f"总耗时 {total_duration:.2f}秒 "
-                f"(转换: {convert_duration:.3f}秒, 准备: {prepare_duration:.2f}秒, 最后写入: {final_write_duration:.2f}秒)"
+                f"(准备: {prepare_duration:.2f}秒, 写入: {write_duration:.2f}秒)"
             )
             return saved_count
             
@@ -190,11 +132,92 @@ class HistoricalDataService:
             logger.error(f"❌ 保存历史数据失败 {symbol}: {e}")
             return 0
 
+    def build_operations(
+        self,
+        symbol: str,
+        data: pd.DataFrame,
+        data_source: str,
+        market: str = "CN",
+        period: str = "daily"
+    ) -> List:
+        """
+        把历史数据DataFrame转换为 upsert 操作列表（纯CPU计算，可在线程中执行）
+
+        注意：会就地修改 data（单位转换、补充 pre_close）
+        """
+        from pymongo import ReplaceOne
+
+        if data is None or data.empty:
+            return []
+
+        # 🔥 在 DataFrame 层面做单位转换（向量化操作，比逐行快得多）
+        if data_source == "tushare":
+            # 成交额：千元 -> 元
+            if 'amount' in data.columns:
+                data['amount'] = data['amount'] * 1000
+            elif 'turnover' in data.columns:
+                data['turnover'] = data['turnover'] * 1000
+
+            # 成交量：手 -> 股
+            if 'volume' in data.columns:
+                data['volume'] = data['volume'] * 100
+            elif 'vol' in data.columns:
+                data['vol'] = data['vol'] * 100
+
+        # 🔥 港股/美股数据：添加 pre_close 字段（从前一天的 close 获取）
+        if market in ["HK", "US"] and 'pre_close' not in data.columns and 'close' in data.columns:
+            # 使用 shift(1) 将 close 列向下移动一行，得到前一天的收盘价
+            data['pre_close'] = data['close'].shift(1)
+            logger.debug(f"✅ {symbol} 添加 pre_close 字段（从前一天的 close 获取）")
+
+        operations = []
+        for date_index, row in data.iterrows():
+            try:
+                # 标准化数据（传递日期索引）
+                doc = self._standardize_record(symbol, row, data_source, market, period, date_index)
+
+                # 创建upsert操作
+                filter_doc = {
+                    "symbol": doc["symbol"],
+                    "trade_date": doc["trade_date"],
+                    "data_source": doc["data_source"],
+                    "period": doc["period"]
+                }
+                operations.append(ReplaceOne(filter=filter_doc, replacement=doc, upsert=True))
+
+            except Exception as e:
+                # 获取日期信息用于错误日志
+                date_str = str(date_index) if hasattr(date_index, '__str__') else 'unknown'
+                logger.error(f"❌ 处理记录失败 {symbol} {date_str}: {e}")
+                continue
+
+        return operations
+
+    async def bulk_write(self, label: str, operations: List, raise_on_error: bool = False) -> int:
+        """
+        按 BULK_WRITE_BATCH_SIZE 分批执行 upsert 操作（可包含多只股票），返回保存的记录数
+
+        Args:
+            raise_on_error: 重试后仍失败时抛出异常（默认记录日志并跳过该批）
+        """
+        if self.collection is None:
+            await self.initialize()
+
+        saved_count = 0
+        for i in range(0, len(operations), BULK_WRITE_BATCH_SIZE):
+            batch = operations[i:i + BULK_WRITE_BATCH_SIZE]
+            batch_write_start = datetime.now()
+            saved_count += await self._execute_bulk_write_with_retry(label, batch, raise_on_error=raise_on_error)
+            batch_write_duration = (datetime.now() - batch_write_start).total_seconds()
+            logger.debug(f"   批量写入 {len(batch)} 条，耗时 {batch_write_duration:.2f}秒")
+        return saved_count
+
     async def _execute_bulk_write_with_retry(
         self,
         symbol: str,
         operations: List,
-        max_retries: int = 5  # 增加重试次数：从3次改为5次
+        max_retries: int = 5,  # 增加重试次数：从3次改为5次
+        raise_on_error: bool = False
     ) -> int:
         """
         执行批量写入，带重试机制
@@ -203,6 +226,7 @@ class HistoricalDataService:
             symbol: 股票代码
             operations: 批量操作列表
             max_retries: 最大重试次数
+            raise_on_error: 最终失败时抛出异常，而不是返回 0
 
         Returns:
             成功保存的记录数
@@ -225,6 +249,8 @@ class HistoricalDataService:
                     await asyncio.sleep(wait_time)
                 else:
                     logger.error(f"❌ {symbol} 批量写入失败，已重试{max_retries}次: {e}")
+                    if raise_on_error:
+                        raise
                     return 0
 
             except Exception as e:
@@ -238,9 +264,13 @@ class HistoricalDataService:
                         await asyncio.sleep(wait_time)
                     else:
                         logger.error(f"❌ {symbol} 批量写入失败，已重试{max_retries}次: {e}")
+                        if raise_on_error:
+                            raise
                         return 0
                 else:
                     logger.error(f"❌ {symbol} 批量写入失败: {e}")
+                    if raise_on_error:
+                        raise
                     return 0
 
         return saved_count
@@ -448,6 +478,27 @@ class HistoricalDataService:
             logger.error(f"❌ 获取最新日期失败 {symbol}: {e}")
             return None
     
+    async def get_latest_dates(self, symbols: List[str], data_source: str) -> Dict[str, str]:
+        """
+        一次聚合查询多只股票的最新数据日期
+
+        Returns:
+            {股票代码: 最新日期}，没有数据的股票不在结果中；查询失败时抛出异常（由调用方决定回退策略）
+        """
+        if self.collection is None:
+            await self.initialize()
+
+        if not symbols:
+            return {}
+
+        # $sort + $group/$first 与 source_symbol_date_index 一致，每只股票只读一个索引项
+        cursor = self.collection.aggregate([
+            {"$match": {"data_source": data_source, "symbol": {"$in": list(symbols)}}},
+            {"$sort": {"data_source": 1, "symbol": 1, "trade_date": -1}},
+            {"$group": {"_id": "$symbol", "latest_date": {"$first": "$trade_date"}}}
+        ], allowDiskUse=True)
+        return {doc["_id"]: doc["latest_date"] async for doc in cursor}
+
     async def get_data_statistics(self) -> Dict[str, Any]:
         """获取数据统计信息"""
         if self.collection is None:
@@ -11,6 +11,7 @@ from pymongo.errors import BulkWriteError
 from bson import ObjectId
 
 from app.core.database import get_database
+from tradingagents.utils.news_dedup import dedupe_near_duplicates
 
 logger = logging.getLogger(__name__)
 
@@ -175,6 +176,8 @@ class NewsDataService:
             
             if not news_list:
                 return 0
+
+            news_list = self._dedupe_near_duplicates(news_list)
             
             # 准备批量操作
             operations = []
@@ -276,6 +279,8 @@ class NewsDataService:
             if not news_list:
                 return 0
 
+            news_list = self._dedupe_near_duplicates(news_list)
+
             # 准备批量操作
             operations = []
 
@@ -344,6 +349,38 @@ class NewsDataService:
             self.logger.error(traceback.format_exc())
             return 0
 
+    def _dedupe_near_duplicates(self, news_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批次内近似重复去重（同一稿件多家转载时每簇保留最权威/最早的一条）
+
+        按股票分组后分别聚类：同一篇新闻关联到多只股票时，每只股票各保留一条
+        """
+        groups: Dict[Any, List[Dict[str, Any]]] = {}
+        for news in news_list:
+            groups.setdefault(news.get("symbol"), []).append(news)
+
+        try:
+            kept = set()
+            for group in groups.values():
+                unique = dedupe_near_duplicates(
+                    group,
+                    title=lambda n: n.get("title", ""),
+                    content=lambda n: n.get("content") or n.get("summary", ""),
+                    publish_time=lambda n: self._parse_datetime(n.get("publish_time")),
+                    source=lambda n: n.get("source", ""),
+                    keep="authority",
+                )
+                kept.update(id(n) for n in unique)
+        except Exception as e:
+            self.logger.warning(f"⚠️ 新闻近似去重失败，按原数据保存: {e}")
+            return news_list
+
+        # 保持原有顺序
+        unique = [n for n in news_list if id(n) in kept]
+        if len(unique) < len(news_list):
+            self.logger.info(f"🧹 近似重复新闻: {len(news_list)} -> {len(unique)} 条")
+        return unique
+
     def _standardize_news_data(
         self,
         news_data: Dict[str, Any],
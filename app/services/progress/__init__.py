@@ -2,7 +2,14 @@
 Progress 子包（过渡期）：对进度跟踪与日志处理进行结构化组织。
 当前阶段采用“新路径重导出到旧实现”的方式，保持 API 稳定。
 """
-from .tracker import RedisProgressTracker, get_progress_by_id
+from .tracker import (
+    RedisProgressTracker,
+    get_progress_by_id,
+    get_progress_by_ids,
+    aget_progress_by_id,
+    aget_progress_by_ids,
+)
+from .store import ProgressStore, get_progress_store
 from .log_handler import (
     ProgressLogHandler,
     get_progress_log_handler,
@@ -0,0 +1,191 @@
+"""
+进度消息分发中心（进程内多路复用 Redis Pub/Sub）
+
+- 每个事件循环只维护一个 PSUBSCRIBE task_progress:* 连接，按任务ID分发到进程内的订阅队列
+- 订阅队列有界：慢客户端队列满时丢弃最旧的中间进度（每条进度消息都是完整快照，只需保留最新的）
+- 进程内产生的进度（如 WebSocketManager.send_progress_update）通过 dispatch 直接进入同一分发路径
+- 没有订阅者时关闭 Pub/Sub 连接
+"""
+from typing import Any, Callable, Dict, Optional, Set
+import asyncio
+import json
+import logging
+import weakref
+
+logger = logging.getLogger("app.services.progress.hub")
+
+PROGRESS_CHANNEL_PREFIX = "task_progress:"
+PROGRESS_CHANNEL_PATTERN = f"{PROGRESS_CHANNEL_PREFIX}*"
+DEFAULT_QUEUE_SIZE = 32
+# Pub/Sub 读取的单次等待时间（仅影响分发协程，不影响客户端）
+READ_TIMEOUT_SECONDS = 1.0
+RECONNECT_MAX_DELAY_SECONDS = 30.0
+
+
+class ProgressSubscription:
+    """单个客户端对某个任务的订阅"""
+
+    def __init__(self, hub: "ProgressHub", task_id: str, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.hub = hub
+        self.task_id = task_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, message: Dict[str, Any]) -> None:
+        """非阻塞投递；队列满时丢弃最旧的一条"""
+        if self.closed:
+            return
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """等待下一条消息，超时返回 None"""
+        try:
+            if timeout is None:
+                return await self.queue.get()
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.hub._unsubscribe(self)
+
+
+class ProgressHub:
+    """按任务ID将进度消息分发给进程内订阅者"""
+
+    def __init__(self, redis_factory: Optional[Callable[[], Any]] = None, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self._redis_factory = redis_factory
+        self.queue_size = queue_size
+        self._subscriptions: Dict[str, Set[ProgressSubscription]] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._reader_cancelled = False
+        self._ready = asyncio.Event()
+
+    # ---- 订阅管理 ----
+
+    async def subscribe(self, task_id: str, maxsize: Optional[int] = None, ready_timeout: float = 2.0) -> ProgressSubscription:
+        """订阅任务进度；首次订阅时启动 Pub/Sub 读取协程并等待其就绪"""
+        sub = ProgressSubscription(self, task_id, maxsize or self.queue_size)
+        self._subscriptions.setdefault(task_id, set()).add(sub)
+        self._ensure_reader()
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=ready_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ [ProgressHub] Pub/Sub 尚未就绪，继续等待后台重连: task={task_id}")
+            except asyncio.CancelledError:
+                sub.close()
+                raise
+        return sub
+
+    def _unsubscribe(self, sub: ProgressSubscription) -> None:
+        subs = self._subscriptions.get(sub.task_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subscriptions[sub.task_id]
+        if sub.dropped:
+            logger.debug(f"📉 [ProgressHub] 慢客户端合并了 {sub.dropped} 条中间进度: task={sub.task_id}")
+        if not self._subscriptions and self._reader and not self._reader.done():
+            # 空闲时关闭 Pub/Sub 连接（也会打断重连退避等待）
+            self._reader.cancel()
+            self._reader_cancelled = True
+
+    def subscriber_count(self, task_id: Optional[str] = None) -> int:
+        if task_id is not None:
+            return len(self._subscriptions.get(task_id, ()))
+        return sum(len(subs) for subs in self._subscriptions.values())
+
+    # ---- 分发 ----
+
+    def dispatch(self, task_id: str, message: Dict[str, Any]) -> int:
+        """将消息投递给该任务的所有订阅者，返回投递数量"""
+        subs = self._subscriptions.get(task_id)
+        if not subs:
+            return 0
+        for sub in list(subs):
+            sub.put(message)
+        return len(subs)
+
+    def _dispatch_raw(self, channel: str, data: Any) -> None:
+        if not channel.startswith(PROGRESS_CHANNEL_PREFIX):
+            return
+        task_id = channel[len(PROGRESS_CHANNEL_PREFIX):]
+        if task_id not in self._subscriptions:
+            return
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid JSON in progress message: {data}")
+            return
+        self.dispatch(task_id, message)
+
+    # ---- Redis 读取协程 ----
+
+    def _ensure_reader(self) -> None:
+        if self._reader is None or self._reader.done() or self._reader_cancelled:
+            self._ready.clear()
+            self._reader_cancelled = False
+            self._reader = asyncio.create_task(self._read_loop())
+
+    def _get_redis(self):
+        if self._redis_factory is None:
+            from app.core.database import get_redis_client
+            self._redis_factory = get_redis_client
+        return self._redis_factory()
+
+    async def _read_loop(self) -> None:
+        delay = 1.0
+        while self._subscriptions:
+            pubsub = None
+            try:
+                pubsub = self._get_redis().pubsub()
+                await pubsub.psubscribe(PROGRESS_CHANNEL_PATTERN)
+                logger.info(f"📡 [ProgressHub] 已订阅 {PROGRESS_CHANNEL_PATTERN}")
+                self._ready.set()
+                delay = 1.0
+                while self._subscriptions:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=READ_TIMEOUT_SECONDS)
+                    if message and message.get("type") == "pmessage":
+                        self._dispatch_raw(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._ready.clear()
+                logger.error(f"❌ [ProgressHub] Pub/Sub 读取失败，{delay:.0f}秒后重连: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY_SECONDS)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.punsubscribe(PROGRESS_CHANNEL_PATTERN)
+                        await pubsub.close()
+                    except Exception as e:
+                        logger.debug(f"[ProgressHub] 关闭 Pub/Sub 连接失败: {e}")
+        self._ready.clear()
+
+
+_hubs: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ProgressHub]" = weakref.WeakKeyDictionary()
+
+
+def get_progress_hub(redis_factory: Optional[Callable[[], Any]] = None) -> ProgressHub:
+    """获取当前事件循环的进度分发中心（asyncio 队列与连接不能跨事件循环使用）
+
+    Args:
+        redis_factory: 首次创建时使用的 Redis 客户端工厂，默认 app.core.database.get_redis_client
+    """
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = ProgressHub(redis_factory)
+        _hubs[loop] = hub
+    return hub
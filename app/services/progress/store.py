@@ -0,0 +1,185 @@
+"""
+进度存储（进程级共享连接池）
+
+- 同步/异步两套接口使用进程级共享的 Redis 连接（app.core.redis_client.get_shared_redis）
+- 批量读取使用单次 MGET
+- Redis 未启用或连接失败时回退到 ./data/progress 下的 JSON 文件；连接池耗尽时排队等待，不停用 Redis
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from app.core.redis_client import (
+    REDIS_RETRY_INTERVAL_SECONDS,
+    SharedRedisConnections,
+    get_shared_redis,
+    is_connection_failure,
+)
+
+logger = logging.getLogger("app.services.progress.store")
+
+PROGRESS_KEY_PREFIX = "progress:"
+PROGRESS_TTL_SECONDS = 3600
+PROGRESS_DIR = "./data/progress"
+
+
+def _progress_key(task_id: str) -> str:
+    return f"{PROGRESS_KEY_PREFIX}{task_id}"
+
+
+def _progress_file_candidates(task_id: str) -> List[str]:
+    return [f"{PROGRESS_DIR}/{task_id}.json", f"./data/progress_{task_id}.json"]
+
+
+def _read_progress_file(task_id: str) -> Optional[Dict[str, Any]]:
+    for path in _progress_file_candidates(task_id):
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.debug(f"📊 [进度存储] 读取进度文件失败: {path} - {e}")
+    return None
+
+
+def _decode(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProgressStore:
+    """进度数据读写（Redis 优先，文件兜底）"""
+
+    def __init__(self, redis_client=None, async_redis_client=None, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = (
+                redis_client is not None
+                or async_redis_client is not None
+                or os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
+            )
+        self.enabled = enabled
+        if redis_client is not None or async_redis_client is not None:
+            self._redis = SharedRedisConnections(redis_client, async_redis_client)
+        else:
+            self._redis = get_shared_redis()
+        self._down_until = 0.0
+
+    # ---- 连接管理 ----
+
+    def client(self):
+        """同步 Redis 客户端（进程内共享连接池）"""
+        return self._redis.client()
+
+    def async_client(self):
+        """当前事件循环的异步 Redis 客户端"""
+        return self._redis.async_client()
+
+    def _redis_usable(self) -> bool:
+        return self.enabled and time.time() >= self._down_until
+
+    def _mark_down(self, e: Exception) -> None:
+        self._down_until = time.time() + REDIS_RETRY_INTERVAL_SECONDS
+        logger.warning(f"📊 [进度存储] Redis不可用，{REDIS_RETRY_INTERVAL_SECONDS}秒内使用文件存储: {e}")
+
+    def _handle_error(self, e: Exception) -> None:
+        """只有连接失败/超时才暂停使用 Redis；连接池耗尽等其他错误只影响本次调用"""
+        if is_connection_failure(e):
+            self._mark_down(e)
+        else:
+            logger.warning(f"📊 [进度存储] Redis操作失败，本次使用文件存储: {e}")
+
+    def ping(self) -> bool:
+        """检查 Redis 是否可用（失败后一段时间内直接返回 False）"""
+        if not self._redis_usable():
+            return False
+        try:
+            self.client().ping()
+            return True
+        except Exception as e:
+            self._handle_error(e)
+            return False
+
+    # ---- 写入 ----
+
+    def save(self, task_id: str, payload: str, ttl: int = PROGRESS_TTL_SECONDS) -> None:
+        """写入进度 JSON 字符串（Redis 失败时写文件）"""
+        if self._redis_usable():
+            try:
+                self.client().set(_progress_key(task_id), payload, ex=ttl)
+                return
+            except Exception as e:
+                self._handle_error(e)
+        os.makedirs(PROGRESS_DIR, exist_ok=True)
+        with open(f"{PROGRESS_DIR}/{task_id}.json", 'w', encoding='utf-8') as f:
+            f.write(payload)
+
+    # ---- 读取 ----
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([task_id]).get(task_id)
+
+    def get_many(self, task_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """批量读取进度：一次 MGET，未命中的再查文件"""
+        ids = list(dict.fromkeys(task_ids))
+        result: Dict[str, Optional[Dict[str, Any]]] = {task_id: None for task_id in ids}
+        if not ids:
+            return result
+
+        if self._redis_usable():
+            try:
+                values = self.client().mget([_progress_key(task_id) for task_id in ids])
+                for task_id, raw in zip(ids, values):
+                    result[task_id] = _decode(raw)
+            except Exception as e:
+                self._handle_error(e)
+
+        for task_id in ids:
+            if result[task_id] is None:
+                result[task_id] = _read_progress_file(task_id)
+        return result
+
+    async def aget(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return (await self.aget_many([task_id])).get(task_id)
+
+    async def aget_many(self, task_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """get_many 的异步版本"""
+        ids = list(dict.fromkeys(task_ids))
+        result: Dict[str, Optional[Dict[str, Any]]] = {task_id: None for task_id in ids}
+        if not ids:
+            return result
+
+        if self._redis_usable():
+            try:
+                values = await self.async_client().mget([_progress_key(task_id) for task_id in ids])
+                for task_id, raw in zip(ids, values):
+                    result[task_id] = _decode(raw)
+            except Exception as e:
+                self._handle_error(e)
+
+        missing = [task_id for task_id in ids if result[task_id] is None]
+        if missing:
+            files = await asyncio.to_thread(lambda: {task_id: _read_progress_file(task_id) for task_id in missing})
+            result.update(files)
+        return result
+
+
+_store: Optional[ProgressStore] = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store() -> ProgressStore:
+    """进程级单例"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ProgressStore()
+    return _store
@@ -1,7 +1,7 @@
 """
 进度跟踪器（过渡期）
 - 暂时从旧模块导入 RedisProgressTracker 类
-- 在本模块内提供 get_progress_by_id 的实现（与旧实现一致，修正 cls 引用）
+- 在本模块内提供 get_progress_by_id 的实现（读写经由进程级共享的 ProgressStore）
 """
 from typing import Any, Dict, Optional, List
 import json
@@ -13,6 +13,8 @@ import time
 
 logger = logging.getLogger("app.services.progress.tracker")
 
+from app.services.progress.store import get_progress_store
+
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
@@ -89,46 +91,16 @@ class RedisProgressTracker:
         logger.info(f"📊 [Redis进度] 初始化完成: {task_id}, 步骤数: {len(self.analysis_steps)}")
 
     def _init_redis(self) -> bool:
-        """初始化Redis连接"""
-        try:
-            # 检查REDIS_ENABLED环境变量
-            redis_enabled = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
-            if not redis_enabled:
-                logger.info(f"📊 [Redis进度] Redis未启用，使用文件存储")
-                return False
-
-            import redis
-
-            # 从环境变量获取Redis配置
-            redis_host = os.getenv('REDIS_HOST', 'localhost')
-            redis_port = int(os.getenv('REDIS_PORT', 6379))
-            redis_password = os.getenv('REDIS_PASSWORD', None)
-            redis_db = int(os.getenv('REDIS_DB', 0))
-
-            # 创建Redis连接
-            if redis_password:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    password=redis_password,
-                    db=redis_db,
-                    decode_responses=True
-                )
-            else:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    db=redis_db,
-                    decode_responses=True
-                )
-
-            # 测试连接
-            self.redis_client.ping()
-            logger.info(f"📊 [Redis进度] Redis连接成功: {redis_host}:{redis_port}")
-            return True
-        except Exception as e:
-            logger.warning(f"📊 [Redis进度] Redis连接失败，使用文件存储: {e}")
+        """初始化Redis连接（复用进程级进度存储的连接池）"""
+        store = get_progress_store()
+        if not store.enabled:
+            logger.info(f"📊 [Redis进度] Redis未启用，使用文件存储")
+            return False
+        if not store.ping():
+            logger.warning(f"📊 [Redis进度] Redis连接失败，使用文件存储")
             return False
+        self.redis_client = store.client()
+        return True
 
     def _generate_dynamic_steps(self) -> List[AnalysisStep]:
         """根据分析师数量和研究深度动态生成分析步骤"""
@@ -407,10 +379,8 @@ class RedisProgressTracker:
         try:
             progress_copy = self.to_dict()
             serialized = json.dumps(progress_copy)
-            if self.use_redis and self.redis_client:
-                key = f"progress:{self.task_id}"
-                self.redis_client.set(key, serialized)
-                self.redis_client.expire(key, 3600)
+            if self.use_redis:
+                get_progress_store().save(self.task_id, serialized)
             else:
                 os.makedirs("./data/progress", exist_ok=True)
                 with open(f"./data/progress/{self.task_id}.json", 'w', encoding='utf-8') as f:
@@ -474,67 +444,44 @@ class RedisProgressTracker:
 
 
 
+def _with_time_estimates(progress_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if progress_data is None:
+        return None
+    return RedisProgressTracker._calculate_static_time_estimates(progress_data)
+
+
 def get_progress_by_id(task_id: str) -> Optional[Dict[str, Any]]:
-    """根据任务ID获取进度（与旧实现一致，修正 cls 引用）"""
+    """根据任务ID获取进度（Redis 优先，文件兜底）"""
     try:
-        # 检查REDIS_ENABLED环境变量
-        redis_enabled = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
-
-        # 如果Redis启用，先尝试Redis
-        if redis_enabled:
-            try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
-                key = f"progress:{task_id}"
-                data = redis_client.get(key)
-                if data:
-                    progress_data = json.loads(data)
-                    progress_data = RedisProgressTracker._calculate_static_time_estimates(progress_data)
-                    return progress_data
-            except Exception as e:
-                logger.debug(f"📊 [Redis进度] Redis读取失败: {e}")
-
-        # 尝试从文件读取
-        progress_file = f"./data/progress/{task_id}.json"
-        if os.path.exists(progress_file):
-            with open(progress_file, 'r', encoding='utf-8') as f:
-                progress_data = json.load(f)
-                progress_data = RedisProgressTracker._calculate_static_time_estimates(progress_data)
-                return progress_data
-
-        # 尝试备用文件位置
-        backup_file = f"./data/progress_{task_id}.json"
-        if os.path.exists(backup_file):
-            with open(backup_file, 'r', encoding='utf-8') as f:
-                progress_data = json.load(f)
-                progress_data = RedisProgressTracker._calculate_static_time_estimates(progress_data)
-                return progress_data
-
+        return _with_time_estimates(get_progress_store().get(task_id))
+    except Exception as e:
+        logger.error(f"📊 [Redis进度] 获取进度失败: {task_id} - {e}")
         return None
 
+
+def get_progress_by_ids(task_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """批量获取进度（单次 MGET）"""
+    try:
+        return {task_id: _with_time_estimates(data) for task_id, data in get_progress_store().get_many(task_ids).items()}
+    except Exception as e:
+        logger.error(f"📊 [Redis进度] 批量获取进度失败: {e}")
+        return {task_id: None for task_id in task_ids}
+
+
+async def aget_progress_by_id(task_id: str) -> Optional[Dict[str, Any]]:
+    """get_progress_by_id 的异步版本，不阻塞事件循环"""
+    try:
+        return _with_time_estimates(await get_progress_store().aget(task_id))
     except Exception as e:
         logger.error(f"📊 [Redis进度] 获取进度失败: {task_id} - {e}")
         return None
+
+
+async def aget_progress_by_ids(task_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """get_progress_by_ids 的异步版本"""
+    try:
+        data = await get_progress_store().aget_many(task_ids)
+        return {task_id: _with_time_estimates(progress) for task_id, progress in data.items()}
+    except Exception as e:
+        logger.error(f"📊 [Redis进度] 批量获取进度失败: {e}")
+        return {task_id: None for task_id in task_ids}
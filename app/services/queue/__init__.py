@@ -2,6 +2,7 @@
 Queue 子包
 - keys: Redis 键名与常量
 - helpers: 队列相关的 Redis 操作辅助函数
+- scripts: 原子出队/回收使用的 Lua 脚本
 """
 from .keys import (
     READY_LIST,
@@ -14,6 +15,9 @@ from .keys import (
     USER_PROCESSING_PREFIX,
     GLOBAL_CONCURRENT_KEY,
     VISIBILITY_TIMEOUT_PREFIX,
+    WORKER_PROCESSING_PREFIX,
+    WORKER_LISTS_SET,
+    VISIBILITY_ZSET,
     DEFAULT_USER_CONCURRENT_LIMIT,
     GLOBAL_CONCURRENT_LIMIT,
     VISIBILITY_TIMEOUT_SECONDS,
@@ -28,3 +32,8 @@ from .helpers import (
     clear_visibility_timeout,
 )
 
+from .scripts import (
+    CLAIM_TASK_LUA,
+    REQUEUE_EXPIRED_LUA,
+    RECOVER_ORPHAN_LUA,
+)
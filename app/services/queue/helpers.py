@@ -3,7 +3,6 @@
 """
 from __future__ import annotations
 import time
-from typing import Dict
 from redis.asyncio import Redis
 
 from .keys import (
@@ -12,6 +11,7 @@ from .keys import (
     SET_PROCESSING,
     USER_PROCESSING_PREFIX,
     VISIBILITY_TIMEOUT_PREFIX,
+    VISIBILITY_ZSET,
 )
 
 
@@ -43,19 +43,12 @@ async def unmark_task_processing(r: Redis, task_id: str, user_id: str) -> None:
 
 
 async def set_visibility_timeout(r: Redis, task_id: str, worker_id: str, visibility_timeout: int) -> None:
-    """设置可见性超时"""
-    timeout_key = VISIBILITY_TIMEOUT_PREFIX + task_id
-    timeout_data: Dict[str, str] = {
-        "task_id": task_id,
-        "worker_id": worker_id,
-        "timeout_at": str(int(time.time()) + visibility_timeout),
-    }
-    await r.hset(timeout_key, mapping=timeout_data)
-    await r.expire(timeout_key, visibility_timeout)
+    """设置（或续期）可见性超时：截止时间统一记录在 VISIBILITY_ZSET 中"""
+    await r.zadd(VISIBILITY_ZSET, {task_id: int(time.time()) + visibility_timeout})
 
 
 async def clear_visibility_timeout(r: Redis, task_id: str) -> None:
     """清除可见性超时"""
-    timeout_key = VISIBILITY_TIMEOUT_PREFIX + task_id
-    await r.delete(timeout_key)
-
+    await r.zrem(VISIBILITY_ZSET, task_id)
+    # 兼容旧版：删除升级前写入的单任务 hash
+    await r.delete(VISIBILITY_TIMEOUT_PREFIX + task_id)
@@ -15,7 +15,12 @@ BATCH_TASKS_PREFIX = "qa:batch_tasks:"
 # 并发控制相关
 USER_PROCESSING_PREFIX = "qa:user_processing:"
 GLOBAL_CONCURRENT_KEY = "qa:global_concurrent"
-VISIBILITY_TIMEOUT_PREFIX = "qa:visibility:"
+VISIBILITY_TIMEOUT_PREFIX = "qa:visibility:"  # 旧版：每个任务一个 hash，已由 VISIBILITY_ZSET 取代
+
+# 租约式出队相关
+WORKER_PROCESSING_PREFIX = "qa:worker_processing:"  # 每个 Worker 的处理中列表（BLMOVE 目标）
+WORKER_LISTS_SET = "qa:worker_lists"                # 所有 Worker 处理中列表的键名集合
+VISIBILITY_ZSET = "qa:visibility_deadlines"         # 可见性截止时间：member=task_id, score=截止时间戳
 
 # 配置常量 - 开源版限制
 DEFAULT_USER_CONCURRENT_LIMIT = 3
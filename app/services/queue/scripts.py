@@ -0,0 +1,96 @@
+"""
+队列服务使用的 Redis Lua 脚本
+
+出队的“限流检查 + 标记处理中 + 登记可见性截止时间”、过期任务回收都需要原子执行，
+否则在检查与写入之间会出现竞态（如任务被重复放回队列或在放回前丢失）。
+
+用户处理中集合的键名由脚本根据任务 hash 中的 user 字段拼接（ARGV 传入前缀），
+因此这些脚本只适用于单实例/主从 Redis，不适用于 Redis Cluster。
+"""
+
+# 认领已通过 BLMOVE 移入 Worker 处理中列表的任务
+# KEYS: 1=任务hash 2=Worker处理中列表 3=就绪队列 4=全局处理中集合 5=可见性zset
+# ARGV: 1=task_id 2=用户处理中集合前缀 3=用户并发上限 4=全局并发上限 5=当前时间 6=截止时间 7=worker_id
+# 返回: ok / lost / missing / cancelled / limited
+CLAIM_TASK_LUA = """
+local task_id = ARGV[1]
+-- 任务必须仍在本 Worker 的处理中列表中（可能已被孤儿回收流程放回队列）
+if redis.call('LREM', KEYS[2], 1, task_id) == 0 then
+    return 'lost'
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 'missing'
+end
+if redis.call('HGET', KEYS[1], 'status') == 'cancelled' then
+    return 'cancelled'
+end
+
+local user = redis.call('HGET', KEYS[1], 'user') or ''
+local user_key = ARGV[2] .. user
+if redis.call('SCARD', user_key) >= tonumber(ARGV[3])
+    or redis.call('SCARD', KEYS[4]) >= tonumber(ARGV[4]) then
+    -- 超出并发限制：原子地放回队尾
+    redis.call('LPUSH', KEYS[3], task_id)
+    return 'limited'
+end
+
+redis.call('LPUSH', KEYS[2], task_id)
+redis.call('SADD', user_key, task_id)
+redis.call('SADD', KEYS[4], task_id)
+redis.call('ZADD', KEYS[5], ARGV[6], task_id)
+redis.call('HSET', KEYS[1],
+    'status', 'processing',
+    'worker_id', ARGV[7],
+    'started_at', ARGV[5],
+    'processing_list', KEYS[2])
+return 'ok'
+"""
+
+# 回收可见性超时的任务（截止时间在检查后被续期或任务已确认时不做任何事）
+# KEYS: 1=可见性zset 2=就绪队列 3=全局处理中集合 4=任务hash
+# ARGV: 1=task_id 2=当前时间 3=用户处理中集合前缀
+# 返回: 1=已放回队列 0=未处理
+REQUEUE_EXPIRED_LUA = """
+local task_id = ARGV[1]
+local score = redis.call('ZSCORE', KEYS[1], task_id)
+if not score or tonumber(score) > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZREM', KEYS[1], task_id)
+redis.call('SREM', KEYS[3], task_id)
+
+if redis.call('EXISTS', KEYS[4]) == 0 then
+    return 0
+end
+local user = redis.call('HGET', KEYS[4], 'user') or ''
+redis.call('SREM', ARGV[3] .. user, task_id)
+local list = redis.call('HGET', KEYS[4], 'processing_list')
+if list and list ~= '' then
+    redis.call('LREM', list, 0, task_id)
+end
+redis.call('LPUSH', KEYS[2], task_id)
+redis.call('HSET', KEYS[4],
+    'status', 'queued',
+    'worker_id', '',
+    'processing_list', '',
+    'requeued_at', ARGV[2])
+return 1
+"""
+
+# 回收 Worker 在 BLMOVE 之后、认领之前退出而遗留在处理中列表里的任务
+# KEYS: 1=Worker处理中列表 2=就绪队列 3=可见性zset 4=任务hash
+# ARGV: 1=task_id
+# 返回: 1=已放回队列 0=未处理
+RECOVER_ORPHAN_LUA = """
+local task_id = ARGV[1]
+if redis.call('ZSCORE', KEYS[3], task_id) then
+    return 0
+end
+if redis.call('LREM', KEYS[1], 1, task_id) == 0 then
+    return 0
+end
+if redis.call('EXISTS', KEYS[4]) == 1 and redis.call('HGET', KEYS[4], 'status') ~= 'cancelled' then
+    redis.call('LPUSH', KEYS[2], task_id)
+end
+return 1
+"""
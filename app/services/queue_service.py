@@ -12,6 +12,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 
 from redis.asyncio import Redis
+from redis.exceptions import ResponseError
 
 from app.core.database import get_redis_client
 
@@ -26,6 +27,9 @@ from app.services.queue import (
     USER_PROCESSING_PREFIX,
     GLOBAL_CONCURRENT_KEY,
     VISIBILITY_TIMEOUT_PREFIX,
+    WORKER_PROCESSING_PREFIX,
+    WORKER_LISTS_SET,
+    VISIBILITY_ZSET,
     DEFAULT_USER_CONCURRENT_LIMIT,
     GLOBAL_CONCURRENT_LIMIT,
     VISIBILITY_TIMEOUT_SECONDS,
@@ -35,6 +39,9 @@ from app.services.queue import (
     unmark_task_processing,
     set_visibility_timeout,
     clear_visibility_timeout,
+    CLAIM_TASK_LUA,
+    REQUEUE_EXPIRED_LUA,
+    RECOVER_ORPHAN_LUA,
 )
 
 logger = logging.getLogger(__name__)
@@ -50,6 +57,12 @@ class QueueService:
         self.user_concurrent_limit = DEFAULT_USER_CONCURRENT_LIMIT
         self.global_concurrent_limit = GLOBAL_CONCURRENT_LIMIT
         self.visibility_timeout = VISIBILITY_TIMEOUT_SECONDS
+        # 任务因并发限制被放回队列后的退避时间（秒），避免阻塞出队空转
+        self.limit_backoff = 1.0
+        self.cleanup_batch_size = 100
+
+        self._scripts: Dict[str, Any] = {}
+        self._use_blmove = True
 
     async def enqueue_task(
         self,
@@ -97,42 +110,53 @@ class QueueService:
         logger.info(f"任务已入队: {task_id}")
         return task_id
 
-    async def dequeue_task(self, worker_id: str) -> Optional[Dict[str, Any]]:
-        """从FIFO队列中取出任务"""
+    def _script(self, source: str):
+        """按需注册 Lua 脚本（EVALSHA，缓存缺失时自动回退 EVAL）"""
+        if source not in self._scripts:
+            self._scripts[source] = self.r.register_script(source)
+        return self._scripts[source]
+
+    async def dequeue_task(self, worker_id: str, timeout: float = 0) -> Optional[Dict[str, Any]]:
+        """从FIFO队列中取出任务
+
+        任务先通过 BLMOVE 原子地移入该 Worker 的处理中列表，再由 Lua 脚本一次性完成
+        并发限制检查、处理中标记和可见性截止时间登记。
+
+        Args:
+            worker_id: Worker 标识
+            timeout: 队列为空时阻塞等待的秒数，0 表示不阻塞
+        """
+        processing_list = WORKER_PROCESSING_PREFIX + worker_id
         try:
-            # 从FIFO队列获取任务
-            task_id = await self.r.rpop(READY_LIST)
+            await self.r.sadd(WORKER_LISTS_SET, processing_list)
+            task_id = await self._move_to_processing(processing_list, timeout)
             if not task_id:
                 return None
 
-            # 获取任务详情
-            task_data = await self.get_task(task_id)
-            if not task_data:
-                logger.warning(f"任务数据不存在: {task_id}")
+            now = int(time.time())
+            result = await self._script(CLAIM_TASK_LUA)(
+                keys=[TASK_PREFIX + task_id, processing_list, READY_LIST, SET_PROCESSING, VISIBILITY_ZSET],
+                args=[
+                    task_id,
+                    USER_PROCESSING_PREFIX,
+                    self.user_concurrent_limit,
+                    self.global_concurrent_limit,
+                    now,
+                    now + int(self.visibility_timeout),
+                    worker_id,
+                ],
+            )
+
+            if result == "limited":
+                logger.warning(f"并发限制，任务重新入队: {task_id}")
+                if timeout and timeout > 0:
+                    await asyncio.sleep(self.limit_backoff)
                 return None
-
-            user_id = task_data.get("user")
-
-            # 再次检查并发限制（防止竞态条件）
-            if not await self._check_user_concurrent_limit(user_id):
-                # 如果超过限制，将任务放回队列
-                await self.r.lpush(READY_LIST, task_id)
-                logger.warning(f"用户 {user_id} 并发限制，任务重新入队: {task_id}")
+            if result != "ok":
+                logger.warning(f"任务无法认领 ({result}): {task_id}")
                 return None
 
-            # 标记任务为处理中
-            await self._mark_task_processing(task_id, user_id, worker_id)
-
-            # 设置可见性超时
-            await self._set_visibility_timeout(task_id, worker_id)
-
-            # 更新任务状态
-            await self.r.hset(TASK_PREFIX + task_id, mapping={
-                "status": "processing",
-                "worker_id": worker_id,
-                "started_at": str(int(time.time()))
-            })
-
+            task_data = await self.get_task(task_id)
             logger.info(f"任务已出队: {task_id} -> Worker: {worker_id}")
             return task_data
 
@@ -140,6 +164,22 @@ class QueueService:
             logger.error(f"出队失败: {e}")
             return None
 
+    async def _move_to_processing(self, processing_list: str, timeout: float) -> Optional[str]:
+        """将队首任务移入处理中列表；timeout > 0 时阻塞等待"""
+        if not timeout or timeout <= 0:
+            return await self.r.rpoplpush(READY_LIST, processing_list)
+
+        if self._use_blmove:
+            try:
+                return await self.r.blmove(READY_LIST, processing_list, timeout, "RIGHT", "LEFT")
+            except ResponseError as e:
+                if "unknown command" not in str(e).lower():
+                    raise
+                # Redis < 6.2 不支持 BLMOVE
+                logger.info("Redis 不支持 BLMOVE，改用 BRPOPLPUSH")
+                self._use_blmove = False
+        return await self.r.brpoplpush(READY_LIST, processing_list, timeout=max(1, int(timeout)))
+
     async def ack_task(self, task_id: str, success: bool = True) -> bool:
         """确认任务完成"""
         try:
@@ -147,27 +187,25 @@ class QueueService:
             if not task_data:
                 return False
 
-            user_id = task_data.get("user")
-            worker_id = task_data.get("worker_id")
-
-            # 从处理中集合移除
-            await self._unmark_task_processing(task_id, user_id)
-
-            # 清除可见性超时
-            await self._clear_visibility_timeout(task_id)
-
-            # 更新任务状态
+            user_id = task_data.get("user") or ""
+            processing_list = task_data.get("processing_list")
             status = "completed" if success else "failed"
-            await self.r.hset(TASK_PREFIX + task_id, mapping={
+
+            # 移除租约、处理中标记并更新状态（事务内一次提交）
+            pipe = self.r.pipeline(transaction=True)
+            if processing_list:
+                pipe.lrem(processing_list, 0, task_id)
+            pipe.srem(USER_PROCESSING_PREFIX + user_id, task_id)
+            pipe.srem(SET_PROCESSING, task_id)
+            pipe.zrem(VISIBILITY_ZSET, task_id)
+            pipe.delete(VISIBILITY_TIMEOUT_PREFIX + task_id)
+            pipe.hset(TASK_PREFIX + task_id, mapping={
                 "status": status,
+                "processing_list": "",
                 "completed_at": str(int(time.time()))
             })
-
-            # 添加到相应的集合
-            if success:
-                await self.r.sadd(SET_COMPLETED, task_id)
-            else:
-                await self.r.sadd(SET_FAILED, task_id)
+            pipe.sadd(SET_COMPLETED if success else SET_FAILED, task_id)
+            await pipe.execute()
 
             logger.info(f"任务已确认: {task_id} (成功: {success})")
             return True
@@ -176,19 +214,79 @@ class QueueService:
             logger.error(f"确认任务失败: {e}")
             return False
 
+    async def enqueue_tasks_bulk(
+        self,
+        user_id: str,
+        symbols: List[str],
+        params: Dict[str, Any],
+        batch_id: Optional[str] = None,
+        batch_mapping: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """批量入队：并发限制只检查一次，所有写入在一个事务管道中提交
+
+        与逐个调用 enqueue_task 的结果一致（出队顺序与 symbols 顺序相同），
+        但 Redis 往返次数从 O(N) 降为常数。
+
+        Args:
+            batch_mapping: 需要同时写入的批次 hash（仅在提供 batch_id 时生效）
+
+        Returns:
+            按 symbols 顺序排列的任务ID列表
+        """
+        if not await self._check_user_concurrent_limit(user_id):
+            raise ValueError(f"用户 {user_id} 达到并发限制 ({self.user_concurrent_limit})")
+        if not await self._check_global_concurrent_limit():
+            raise ValueError(f"系统达到全局并发限制 ({self.global_concurrent_limit})")
+
+        if not symbols and not (batch_id and batch_mapping):
+            return []
+
+        now = str(int(time.time()))
+        params_json = json.dumps(params or {})
+        task_ids = [str(uuid.uuid4()) for _ in symbols]
+
+        pipe = self.r.pipeline(transaction=True)
+        if batch_id and batch_mapping:
+            pipe.hset(BATCH_PREFIX + batch_id, mapping=batch_mapping)
+        for task_id, symbol in zip(task_ids, symbols):
+            mapping = {
+                "id": task_id,
+                "user": user_id,
+                "symbol": symbol,
+                "status": "queued",
+                "created_at": now,
+                "params": params_json,
+                "enqueued_at": now
+            }
+            if batch_id:
+                mapping["batch_id"] = batch_id
+            pipe.hset(TASK_PREFIX + task_id, mapping=mapping)
+        if task_ids:
+            # LPUSH 多个值等价于依次 LPUSH，配合队尾出队保持 FIFO
+            pipe.lpush(READY_LIST, *task_ids)
+            if batch_id:
+                pipe.sadd(BATCH_TASKS_PREFIX + batch_id, *task_ids)
+        await pipe.execute()
+
+        logger.info(f"批量入队 {len(task_ids)} 个任务" + (f" (批次: {batch_id})" if batch_id else ""))
+        return task_ids
+
     async def create_batch(self, user_id: str, symbols: List[str], params: Dict[str, Any]) -> tuple[str, int]:
         batch_id = str(uuid.uuid4())
         now = int(time.time())
-        batch_key = BATCH_PREFIX + batch_id
-        await self.r.hset(batch_key, mapping={
-            "id": batch_id,
-            "user": user_id,
-            "status": "queued",
-            "submitted": str(len(symbols)),
-            "created_at": str(now),
-        })
-        for s in symbols:
-            await self.enqueue_task(user_id=user_id, symbol=s, params=params, batch_id=batch_id)
+        await self.enqueue_tasks_bulk(
+            user_id=user_id,
+            symbols=symbols,
+            params=params,
+            batch_id=batch_id,
+            batch_mapping={
+                "id": batch_id,
+                "user": user_id,
+                "status": "queued",
+                "submitted": str(len(symbols)),
+                "created_at": str(now),
+            },
+        )
         return batch_id, len(symbols)
 
     async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
@@ -271,62 +369,53 @@ class QueueService:
         }
 
     async def cleanup_expired_tasks(self):
-        """清理过期任务（可见性超时）"""
-        try:
-            # 获取所有可见性超时键
-            timeout_keys = await self.r.keys(VISIBILITY_TIMEOUT_PREFIX + "*")
+        """清理过期任务（可见性超时）
 
+        截止时间统一保存在 VISIBILITY_ZSET 中，按分数范围查询即可找到过期任务；
+        回收由 Lua 脚本原子完成，任务在检查后被确认或续期时不会被重复放回队列。
+        """
+        try:
             current_time = int(time.time())
-            expired_tasks = []
-
-            for timeout_key in timeout_keys:
-                timeout_data = await self.r.hgetall(timeout_key)
-                if timeout_data:
-                    timeout_at = int(timeout_data.get("timeout_at", 0))
-                    if current_time > timeout_at:
-                        task_id = timeout_data.get("task_id")
-                        if task_id:
-                            expired_tasks.append(task_id)
-
-            # 处理过期任务
-            for task_id in expired_tasks:
-                await self._handle_expired_task(task_id)
-
-            if expired_tasks:
-                logger.warning(f"处理了 {len(expired_tasks)} 个过期任务")
+            requeued = 0
+
+            while True:
+                expired_tasks = await self.r.zrangebyscore(
+                    VISIBILITY_ZSET, "-inf", current_time, start=0, num=self.cleanup_batch_size
+                )
+                for task_id in expired_tasks:
+                    done = await self._script(REQUEUE_EXPIRED_LUA)(
+                        keys=[VISIBILITY_ZSET, READY_LIST, SET_PROCESSING, TASK_PREFIX + task_id],
+                        args=[task_id, current_time, USER_PROCESSING_PREFIX],
+                    )
+                    if int(done or 0):
+                        requeued += 1
+                        logger.warning(f"过期任务重新入队: {task_id}")
+                if len(expired_tasks) < self.cleanup_batch_size:
+                    break
+
+            recovered = await self._recover_orphaned_tasks()
+
+            if requeued or recovered:
+                logger.warning(f"处理了 {requeued} 个过期任务，回收了 {recovered} 个未认领任务")
 
         except Exception as e:
             logger.error(f"清理过期任务失败: {e}")
 
-    async def _handle_expired_task(self, task_id: str):
-        """处理过期任务"""
-        try:
-            task_data = await self.get_task(task_id)
-            if not task_data:
-                return
-
-            user_id = task_data.get("user")
-
-            # 从处理中集合移除
-            await self._unmark_task_processing(task_id, user_id)
-
-            # 清除可见性超时
-            await self._clear_visibility_timeout(task_id)
-
-            # 重新加入队列
-            await self.r.lpush(READY_LIST, task_id)
-
-            # 更新任务状态
-            await self.r.hset(TASK_PREFIX + task_id, mapping={
-                "status": "queued",
-                "worker_id": "",
-                "requeued_at": str(int(time.time()))
-            })
-
-            logger.warning(f"过期任务重新入队: {task_id}")
-
-        except Exception as e:
-            logger.error(f"处理过期任务失败: {task_id} - {e}")
+    async def _recover_orphaned_tasks(self) -> int:
+        """回收 Worker 在移入处理中列表后、认领前退出而遗留的任务"""
+        recovered = 0
+        for processing_list in await self.r.smembers(WORKER_LISTS_SET):
+            task_ids = await self.r.lrange(processing_list, 0, -1)
+            if not task_ids:
+                await self.r.srem(WORKER_LISTS_SET, processing_list)
+                continue
+            for task_id in task_ids:
+                done = await self._script(RECOVER_ORPHAN_LUA)(
+                    keys=[processing_list, READY_LIST, VISIBILITY_ZSET, TASK_PREFIX + task_id],
+                    args=[task_id],
+                )
+                recovered += int(done or 0)
+        return recovered
 
     async def cancel_task(self, task_id: str) -> bool:
         """取消任务"""
@@ -339,9 +428,11 @@ class QueueService:
             user_id = task_data.get("user")
 
             if status == "processing":
-                # 如果正在处理中，从处理集合移除
+                # 如果正在处理中，从处理集合移除并撤销租约（不再被超时回收）
                 await self._unmark_task_processing(task_id, user_id)
                 await self._clear_visibility_timeout(task_id)
+                if task_data.get("processing_list"):
+                    await self.r.lrem(task_data["processing_list"], 0, task_id)
             elif status == "queued":
                 # 如果在队列中，从队列移除
                 await self.r.lrem(READY_LIST, 0, task_id)
@@ -13,24 +13,6 @@ from typing import Dict, List, Optional
 logger = logging.getLogger(__name__)
 
 
-def _safe_float(v) -> Optional[float]:
-    try:
-        if v is None:
-            return None
-        # 处理字符串中的逗号/百分号/空白
-        if isinstance(v, str):
-            s = v.strip().replace(",", "")
-            if s.endswith("%"):
-                s = s[:-1]
-            if s == "-" or s == "":
-                return None
-            return float(s)
-        # 处理 pandas/numpy 数值
-        return float(v)
-    except Exception:
-        return None
-
-
 class QuotesService:
     def __init__(self, ttl_seconds: int = 30) -> None:
         self._ttl = ttl_seconds
@@ -47,12 +29,12 @@ class QuotesService:
         now = time.time()
         async with self._lock:
             if self._cache and (now - self._cache_ts) < self._ttl:
-                return {c: q for c, q in self._cache.items() if c in codes and q}
+                return {c: self._cache[c] for c in codes if self._cache.get(c)}
             # 刷新缓存（阻塞IO放到线程）
             data = await asyncio.to_thread(self._fetch_spot_akshare)
             self._cache = data
             self._cache_ts = time.time()
-            return {c: q for c, q in self._cache.items() if c in codes and q}
+            return {c: self._cache[c] for c in codes if self._cache.get(c)}
 
     def _fetch_spot_akshare(self) -> Dict[str, Dict[str, Optional[float]]]:
         """通过 AKShare 东方财富全市场快照接口拉取行情，并标准化为字典。
@@ -60,39 +42,19 @@ class QuotesService:
         不同版本可能有差异，做多列名兼容。
         """
         try:
-            import akshare as ak  # 已在项目中使用，不额外安装
-            df = ak.stock_zh_a_spot_em()
-            if df is None or getattr(df, "empty", True):
+            from tradingagents.dataflows.providers.china.market_snapshot import get_market_snapshot
+
+            # 与行情同步、单股分析共用同一份全市场快照
+            snapshot = get_market_snapshot("eastmoney")
+            if len(snapshot) == 0:
                 logger.warning("AKShare spot 返回空数据")
                 return {}
-            # 兼容常见列名
-            code_col = next((c for c in ["代码", "代码code", "symbol", "股票代码"] if c in df.columns), None)
-            price_col = next((c for c in ["最新价", "现价", "最新价(元)", "price", "最新"] if c in df.columns), None)
-            pct_col = next((c for c in ["涨跌幅", "涨跌幅(%)", "涨幅", "pct_chg"] if c in df.columns), None)
-            amount_col = next((c for c in ["成交额", "成交额(元)", "amount", "成交额(万元)"] if c in df.columns), None)
-
-            if not code_col or not price_col:
-                logger.error(f"AKShare spot 缺少必要列: code={code_col}, price={price_col}")
+            if not snapshot.has_field("price"):
+                logger.error("AKShare spot 缺少必要列: price")
                 return {}
 
-            result: Dict[str, Dict[str, Optional[float]]] = {}
-            for _, row in df.iterrows():  # type: ignore
-                code_raw = row.get(code_col)
-                if not code_raw:
-                    continue
-                # 标准化股票代码：移除前导0，然后补齐到6位
-                code_str = str(code_raw).strip()
-                # 如果是纯数字，移除前导0后补齐到6位
-                if code_str.isdigit():
-                    code_clean = code_str.lstrip('0') or '0'  # 移除前导0，如果全是0则保留一个0
-                    code = code_clean.zfill(6)  # 补齐到6位
-                else:
-                    code = code_str.zfill(6)
-                close = _safe_float(row.get(price_col))
-                pct = _safe_float(row.get(pct_col)) if pct_col else None
-                amt = _safe_float(row.get(amount_col)) if amount_col else None
-                # 若成交额单位为万元，统一转换为元（部分接口是万元，这里不强转，保持原样由前端展示单位）
-                result[code] = {"close": close, "pct_chg": pct, "amount": amt}
+            # 若成交额单位为万元，统一转换为元（部分接口是万元，这里不强转，保持原样由前端展示单位）
+            result = snapshot.records({"close": "price", "pct_chg": "change_percent", "amount": "amount"})
             logger.info(f"AKShare spot 拉取完成: {len(result)} 条")
             return result
         except Exception as e:
@@ -3,11 +3,22 @@ Thin re-export: RedisProgressTracker moved to app.services.progress.tracker
 This module keeps exports for backward compatibility. Prefer importing from the new path.
 """
 
-from app.services.progress.tracker import AnalysisStep, safe_serialize, RedisProgressTracker, get_progress_by_id
+from app.services.progress.tracker import (
+    AnalysisStep,
+    safe_serialize,
+    RedisProgressTracker,
+    get_progress_by_id,
+    get_progress_by_ids,
+    aget_progress_by_id,
+    aget_progress_by_ids,
+)
 
 __all__ = [
     "AnalysisStep",
     "safe_serialize",
     "RedisProgressTracker",
     "get_progress_by_id",
+    "get_progress_by_ids",
+    "aget_progress_by_id",
+    "aget_progress_by_ids",
 ]
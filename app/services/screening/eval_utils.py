@@ -165,3 +165,103 @@ def safe_float(v: Any) -> Optional[float]:
     except Exception:
         return None
 
+
+
+def _compare_mask(left: pd.Series, right: Any, op: str) -> pd.Series:
+    """Vectorized counterpart of the scalar comparisons in evaluate_conditions."""
+    false_mask = pd.Series(False, index=left.index)
+    try:
+        if op == "between":
+            lo_hi = right if isinstance(right, (list, tuple)) else (None, None)
+            lo, hi = lo_hi if isinstance(lo_hi, (list, tuple)) and len(lo_hi) == 2 else (None, None)
+            if lo is None or hi is None:
+                return false_mask
+            return (left >= float(lo)) & (left <= float(hi))
+        if not isinstance(right, pd.Series):
+            right = float(right)
+    except Exception:
+        return false_mask
+
+    if op == ">":
+        return left > right
+    if op == "<":
+        return left < right
+    if op == ">=":
+        return left >= right
+    if op == "<=":
+        return left <= right
+    if op == "==":
+        return left == right
+    if op == "!=":
+        return left != right
+    return false_mask
+
+
+def evaluate_conditions_panel(
+    panel: Dict[str, pd.DataFrame],
+    node: Dict[str, Any],
+    allowed_fields: Iterable[str],
+    allowed_ops: Iterable[str],
+    symbols: pd.Index,
+) -> pd.Series:
+    """
+    Evaluate the condition DSL for every symbol at once.
+
+    ``panel`` maps field name -> DataFrame (rows = bars aligned to each symbol's
+    latest bar, columns = symbols). Returns a boolean Series indexed by symbol
+    with the same semantics as ``evaluate_conditions`` applied per symbol.
+    """
+    true_mask = pd.Series(True, index=symbols)
+    false_mask = pd.Series(False, index=symbols)
+    if not node:
+        return true_mask
+
+    # group 节点
+    if node.get("op") == "group" or "children" in node:
+        logic = (node.get("logic") or "AND").upper()
+        children = node.get("children", [])
+        if logic not in {"AND", "OR"}:
+            logic = "AND"
+        result = true_mask if logic == "AND" else false_mask
+        for c in children:
+            flags = evaluate_conditions_panel(panel, c, allowed_fields, allowed_ops, symbols)
+            result = (result & flags) if logic == "AND" else (result | flags)
+        return result
+
+    # 叶子：字段比较
+    field = node.get("field")
+    op = node.get("op")
+    if field not in allowed_fields or op not in set(allowed_ops):
+        return false_mask
+    if field not in panel:
+        return false_mask
+
+    def _row(name: str, offset: int) -> pd.Series:
+        frame = panel[name]
+        if len(frame) < offset:
+            return pd.Series(np.nan, index=symbols)
+        return frame.iloc[-offset].reindex(symbols)
+
+    # 需要最近两行（交叉）
+    if op in {"cross_up", "cross_down"}:
+        right_field = node.get("right_field")
+        if right_field not in allowed_fields or right_field not in panel:
+            return false_mask
+        a0, a1 = _row(field, 1), _row(field, 2)
+        b0, b1 = _row(right_field, 1), _row(right_field, 2)
+        valid = a0.notna() & a1.notna() & b0.notna() & b1.notna()
+        if op == "cross_up":
+            return valid & (a1 <= b1) & (a0 > b0)
+        return valid & (a1 >= b1) & (a0 < b0)
+
+    # 普通比较：最近一行
+    left = _row(field, 1)
+    if node.get("right_field"):
+        rf = node.get("right_field")
+        if rf not in allowed_fields or rf not in panel:
+            return false_mask
+        right = _row(rf, 1)
+    else:
+        right = node.get("value")
+
+    return left.notna() & _compare_mask(left.astype(float), right, op).fillna(False).astype(bool)
@@ -0,0 +1,167 @@
+"""
+Panel-based screening engine.
+
+Loads the daily bars of the whole universe from ``stock_daily_quotes`` in one
+bulk read, pivots them into (bar x symbol) matrices and computes indicators for
+all symbols at once. Each symbol's bars are right-aligned to its own latest bar
+(row -1 = latest bar of every symbol), so indicator values are identical to the
+per-symbol ``compute_many`` path, including for suspended or newly listed stocks.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from tradingagents.tools.analysis.indicators import ema, ma, rsi
+
+logger = logging.getLogger("agents")
+
+# 同一股票同一交易日存在多个数据源时的默认优先级
+DEFAULT_SOURCE_PRIORITY = ["tushare", "akshare", "baostock"]
+
+# stock_daily_quotes 字段 -> 筛选字段
+QUOTE_FIELDS = {
+    "open": "open",
+    "high": "high",
+    "low": "low",
+    "close": "close",
+    "volume": "vol",
+    "amount": "amount",
+}
+
+
+def load_daily_panel(
+    db,
+    start_date: str,
+    end_date: str,
+    symbols: Optional[Iterable[str]] = None,
+    source_priority: Optional[List[str]] = None,
+    period: str = "daily",
+) -> Dict[str, pd.DataFrame]:
+    """
+    Bulk-read daily quotes and pivot them into right-aligned panels.
+
+    Returns:
+        {field: DataFrame(rows = bar offset, columns = symbol)}，外加
+        ``"trade_date"`` 面板；无数据时返回空字典
+    """
+    t0 = time.time()
+    projection = {"_id": 0, "symbol": 1, "trade_date": 1, "data_source": 1}
+    projection.update({f: 1 for f in QUOTE_FIELDS})
+
+    cursor = db.stock_daily_quotes.find(
+        {"period": period, "trade_date": {"$gte": start_date, "$lte": end_date}},
+        projection,
+        batch_size=10000,
+    )
+    df = pd.DataFrame(list(cursor))
+    if df.empty or "symbol" not in df.columns:
+        return {}
+
+    if symbols is not None:
+        df = df[df["symbol"].isin(set(symbols))]
+        if df.empty:
+            return {}
+
+    # 每只股票只使用一个数据源（不同数据源的复权口径可能不同，不能逐日混用）
+    priority = source_priority or DEFAULT_SOURCE_PRIORITY
+    rank_map = {src: i for i, src in enumerate(priority)}
+    df["_rank"] = df["data_source"].map(rank_map).fillna(len(priority))
+    best_rank = df.groupby("symbol")["_rank"].transform("min")
+    df = df[df["_rank"] == best_rank]
+    df = df.drop_duplicates(subset=["symbol", "trade_date"], keep="first")
+
+    # 右对齐：行号 = 距该股票最新一根K线的偏移
+    df = df.sort_values(["symbol", "trade_date"])
+    offset = df.groupby("symbol").cumcount(ascending=False)
+    n_rows = int(offset.max()) + 1
+    df["_row"] = (n_rows - 1) - offset
+
+    panel: Dict[str, pd.DataFrame] = {}
+    for src_field, field in QUOTE_FIELDS.items():
+        if src_field in df.columns:
+            panel[field] = (
+                df.pivot(index="_row", columns="symbol", values=src_field)
+                .reindex(range(n_rows))
+                .astype(float)
+            )
+    panel["trade_date"] = df.pivot(index="_row", columns="symbol", values="trade_date").reindex(range(n_rows))
+
+    logger.info(
+        f"📊 [面板筛选] 批量加载 {panel['trade_date'].shape[1]} 只股票 x {n_rows} 根K线，"
+        f"耗时 {time.time() - t0:.2f}s"
+    )
+    return panel
+
+
+def _atr_panel(high: pd.DataFrame, low: pd.DataFrame, close: pd.DataFrame, n: int = 14) -> pd.DataFrame:
+    prev_close = close.shift(1)
+    # fmax 忽略 NaN，与 indicators.atr 中 concat(...).max(axis=1) 的行为一致
+    tr = np.fmax(np.fmax((high - low).abs(), (high - prev_close).abs()), (low - prev_close).abs())
+    return tr.rolling(window=int(n), min_periods=int(n)).mean()
+
+
+def _kdj_panel(high: pd.DataFrame, low: pd.DataFrame, close: pd.DataFrame,
+               n: int = 9, m1: int = 3, m2: int = 3) -> Dict[str, pd.DataFrame]:
+    lowest_low = low.rolling(window=int(n), min_periods=int(n)).min()
+    highest_high = high.rolling(window=int(n), min_periods=int(n)).max()
+    rsv = ((close - lowest_low) / (highest_high - lowest_low) * 100).replace([np.inf, -np.inf], np.nan)
+
+    # 按行递推，每一步同时处理所有股票
+    rsv_arr = rsv.to_numpy(dtype=float)
+    k_arr = np.full_like(rsv_arr, np.nan)
+    d_arr = np.full_like(rsv_arr, np.nan)
+    alpha_k = 1 / float(m1)
+    alpha_d = 1 / float(m2)
+    last_k = np.full(rsv_arr.shape[1], 50.0)
+    last_d = np.full(rsv_arr.shape[1], 50.0)
+    for i in range(rsv_arr.shape[0]):
+        rv = rsv_arr[i]
+        valid = ~np.isnan(rv)
+        curr_k = (1 - alpha_k) * last_k + alpha_k * rv
+        curr_d = (1 - alpha_d) * last_d + alpha_d * curr_k
+        k_arr[i] = np.where(valid, curr_k, np.nan)
+        d_arr[i] = np.where(valid, curr_d, np.nan)
+        last_k = np.where(valid, curr_k, last_k)
+        last_d = np.where(valid, curr_d, last_d)
+
+    k = pd.DataFrame(k_arr, index=close.index, columns=close.columns)
+    d = pd.DataFrame(d_arr, index=close.index, columns=close.columns)
+    return {"kdj_k": k, "kdj_d": d, "kdj_j": 3 * k - 2 * d}
+
+
+def compute_panel_indicators(panel: Dict[str, pd.DataFrame], need_tech: bool = True) -> Dict[str, pd.DataFrame]:
+    """Add derived fields and the screening indicator set to ``panel`` (in place)."""
+    close = panel["close"]
+    panel["pct_chg"] = close.pct_change() * 100.0
+    if not need_tech:
+        return panel
+
+    for n in (5, 10, 20, 60):
+        panel[f"ma{n}"] = ma(close, n)
+    for n in (12, 26):
+        panel[f"ema{n}"] = ema(close, n)
+
+    dif = ema(close, 12) - ema(close, 26)
+    dea = dif.ewm(span=9, adjust=False).mean()
+    panel["dif"], panel["dea"], panel["macd_hist"] = dif, dea, dif - dea
+
+    panel["rsi14"] = rsi(close, 14)
+
+    mid = ma(close, 20)
+    std = close.rolling(window=20, min_periods=1).std()
+    panel["boll_mid"], panel["boll_upper"], panel["boll_lower"] = mid, mid + 2.0 * std, mid - 2.0 * std
+
+    if "high" in panel and "low" in panel:
+        panel["atr14"] = _atr_panel(panel["high"], panel["low"], close, 14)
+        panel.update(_kdj_panel(panel["high"], panel["low"], close, 9, 3, 3))
+    return panel
+
+
+def last_row_frame(panel: Dict[str, pd.DataFrame], fields: Iterable[str]) -> pd.DataFrame:
+    """Latest value of each field for every symbol (index = symbol)."""
+    return pd.DataFrame({f: panel[f].iloc[-1] for f in fields if f in panel})
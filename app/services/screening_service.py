@@ -3,12 +3,14 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+import time
 
 import pandas as pd
 import numpy as np
 
 # 统一指标库
-from tradingagents.tools.analysis.indicators import IndicatorSpec, compute_many
+from tradingagents.tools.analysis.indicators import compute_many
+from tradingagents.tools.analysis.streaming import DEFAULT_SPECS
 # 统一多数据源DF接口（按优先级降级）
 from tradingagents.dataflows.data_source_manager import get_data_source_manager
 from tradingagents.dataflows.providers.china.fundamentals_snapshot import get_cn_fund_snapshot
@@ -17,9 +19,15 @@ from tradingagents.dataflows.providers.china.fundamentals_snapshot import get_cn
 from app.services.screening.eval_utils import (
     collect_fields_from_conditions as _collect_fields_from_conditions_util,
     evaluate_conditions as _evaluate_conditions_util,
+    evaluate_conditions_panel as _evaluate_conditions_panel_util,
     evaluate_fund_conditions as _evaluate_fund_conditions_util,
     safe_float as _safe_float_util,
 )
+from app.services.screening.panel_engine import (
+    compute_panel_indicators,
+    last_row_frame,
+    load_daily_panel,
+)
 
 # --- DSL 约束 ---
 ALLOWED_FIELDS = {
@@ -52,6 +60,9 @@ TECH_FIELDS = {
 }
 FUND_FIELDS = {"pe", "pb", "roe", "market_cap"}
 
+# 结果项中返回的技术指标（最新值）
+RESULT_TECH_FIELDS = ("ma20", "rsi14", "kdj_k", "kdj_d", "kdj_j", "dif", "dea", "macd_hist")
+
 ALLOWED_OPS = {">", "<", ">=", "<=", "==", "!=", "between", "cross_up", "cross_down"}
 
 
@@ -76,16 +87,12 @@ class ScreeningService:
     # --- 公共入口 ---
     def run(self, conditions: Dict[str, Any], params: ScreeningParams) -> Dict[str, Any]:
         symbols = self._get_universe()
-        # 为控制时长，先限制样本规模（后续用批量/缓存优化）
-        symbols = symbols[:120]
 
         end_date = datetime.now()
         start_date = end_date - timedelta(days=220)
         end_s = end_date.strftime("%Y-%m-%d")
         start_s = start_date.strftime("%Y-%m-%d")
 
-        results: List[Dict[str, Any]] = []
-
         # 解析条件中涉及的字段，决定是否需要技术指标/行情
         needed_fields = self._collect_fields_from_conditions(conditions)
         order_fields = {o.get("field") for o in (params.order_by or []) if o.get("field")}
@@ -94,6 +101,90 @@ class ScreeningService:
         need_base = any(f in BASE_FIELDS for f in all_needed) or need_tech
         need_fund = any(f in FUND_FIELDS for f in all_needed)
 
+        results: Optional[List[Dict[str, Any]]] = None
+        if need_base:
+            # 全市场面板：一次批量读取 + 二维指标计算，不限制股票数量
+            results = self._run_panel(conditions, symbols, start_s, end_s, need_tech)
+        if results is None:
+            # 逐只回退路径：为控制时长，限制样本规模
+            results = self._run_per_symbol(
+                conditions, symbols[:120], start_s, end_s, need_base, need_tech, need_fund
+            )
+
+        total = len(results)
+        # 排序
+        if params.order_by:
+            for order in reversed(params.order_by):  # 后者优先级低
+                f = order.get("field")
+                d = order.get("direction", "desc").lower()
+                if f in ALLOWED_FIELDS:
+                    results.sort(key=lambda x: (x.get(f) is None, x.get(f)), reverse=(d == "desc"))
+
+        # 分页
+        start = params.offset or 0
+        end = start + (params.limit or 50)
+        page_items = results[start:end]
+
+        return {
+            "total": total,
+            "items": page_items,
+        }
+
+    def _run_panel(
+        self,
+        conditions: Dict[str, Any],
+        symbols: List[str],
+        start_s: str,
+        end_s: str,
+        need_tech: bool,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """基于 stock_daily_quotes 的全市场面板筛选；数据不可用时返回 None 以回退逐只路径"""
+        try:
+            from app.core.database import get_mongo_db_sync
+
+            t0 = time.time()
+            panel = load_daily_panel(get_mongo_db_sync(), start_s, end_s, symbols=symbols)
+            if not panel:
+                logger.warning("⚠️ [面板筛选] stock_daily_quotes 无可用数据，回退到逐只筛选")
+                return None
+
+            compute_panel_indicators(panel, need_tech=need_tech)
+            universe = panel["close"].columns
+            mask = _evaluate_conditions_panel_util(panel, conditions, ALLOWED_FIELDS, ALLOWED_OPS, universe)
+            passed = mask[mask].index
+
+            item_fields = ["close", "pct_chg", "amount"]
+            if need_tech:
+                item_fields += list(RESULT_TECH_FIELDS)
+            last = last_row_frame(panel, item_fields).reindex(passed)
+
+            results: List[Dict[str, Any]] = []
+            for code, row in zip(passed, last.to_dict("records")):
+                item = {"code": code}
+                for f in ["close", "pct_chg", "amount"] + list(RESULT_TECH_FIELDS):
+                    item[f] = self._safe_float(row.get(f)) if f in row else None
+                results.append(item)
+
+            logger.info(
+                f"✅ [面板筛选] {len(universe)} 只股票中 {len(results)} 只满足条件，"
+                f"耗时 {time.time() - t0:.2f}s"
+            )
+            return results
+        except Exception as e:
+            logger.warning(f"⚠️ [面板筛选] 失败，回退到逐只筛选: {e}")
+            return None
+
+    def _run_per_symbol(
+        self,
+        conditions: Dict[str, Any],
+        symbols: List[str],
+        start_s: str,
+        end_s: str,
+        need_base: bool,
+        need_tech: bool,
+        need_fund: bool,
+    ) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
         for code in symbols:
             try:
                 dfc = None
@@ -116,19 +207,7 @@ class ScreeningService:
 
                     # 仅在需要技术指标时计算
                     if need_tech:
-                        specs = [
-                            IndicatorSpec("ma", {"n": 5}),
-                            IndicatorSpec("ma", {"n": 10}),
-                            IndicatorSpec("ma", {"n": 20}),
-                            IndicatorSpec("ema", {"n": 12}),
-                            IndicatorSpec("ema", {"n": 26}),
-                            IndicatorSpec("macd"),
-                            IndicatorSpec("rsi", {"n": 14}),
-                            IndicatorSpec("boll", {"n": 20, "k": 2}),
-                            IndicatorSpec("atr", {"n": 14}),
-                            IndicatorSpec("kdj", {"n": 9, "m1": 3, "m2": 3}),
-                        ]
-                        dfc = compute_many(dfu, specs)
+                        dfc = compute_many(dfu, DEFAULT_SPECS)
                     else:
                         dfc = dfu
 
@@ -165,25 +244,8 @@ class ScreeningService:
                     results.append(item)
             except Exception:
                 continue
+        return results
 
-        total = len(results)
-        # 排序
-        if params.order_by:
-            for order in reversed(params.order_by):  # 后者优先级低
-                f = order.get("field")
-                d = order.get("direction", "desc").lower()
-                if f in ALLOWED_FIELDS:
-                    results.sort(key=lambda x: (x.get(f) is None, x.get(f)), reverse=(d == "desc"))
-
-        # 分页
-        start = params.offset or 0
-        end = start + (params.limit or 50)
-        page_items = results[start:end]
-
-        return {
-            "total": total,
-            "items": page_items,
-        }
     def _evaluate_fund_conditions(self, snap: Dict[str, Any], node: Dict[str, Any]) -> bool:
         """Delegate fundamental condition evaluation to utils to keep service slim."""
         return _evaluate_fund_conditions_util(snap, node, FUND_FIELDS)
@@ -206,9 +268,10 @@ class ScreeningService:
     def _get_universe(self) -> List[str]:
         """获取A股代码集合：从 MongoDB stock_basic_info 集合获取所有A股股票代码"""
         try:
-            from app.core.database import get_mongo_db
+            from app.core.database import get_mongo_db_sync
 
-            db = get_mongo_db()
+            # 同步遍历游标，需使用同步客户端（Motor 游标不支持同步迭代）
+            db = get_mongo_db_sync()
             collection = db.stock_basic_info
 
             # 查询所有A股股票代码（兼容不同的数据结构）
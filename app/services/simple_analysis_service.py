@@ -20,6 +20,7 @@ from tradingagents.utils.logging_init import init_logging
 init_logging()
 
 from tradingagents.graph.trading_graph import TradingAgentsGraph
+from tradingagents.graph.graph_pool import get_graph_pool
 from tradingagents.default_config import DEFAULT_CONFIG
 from app.models.analysis import (
     AnalysisTask, AnalysisStatus, SingleAnalysisRequest, AnalysisParameters
@@ -30,7 +31,7 @@ from bson import ObjectId
 from app.core.database import get_mongo_db
 from app.services.config_service import ConfigService
 from app.services.memory_state_manager import get_memory_state_manager, TaskStatus
-from app.services.redis_progress_tracker import RedisProgressTracker, get_progress_by_id
+from app.services.redis_progress_tracker import RedisProgressTracker, aget_progress_by_id
 from app.services.progress_log_handler import register_analysis_tracker, unregister_analysis_tracker
 
 # 股票基础信息获取（用于补充显示名称）
@@ -592,7 +593,6 @@ class SimpleAnalysisService:
     """简化的股票分析服务类"""
 
     def __init__(self):
-        self._trading_graph_cache = {}
         self.memory_manager = get_memory_state_manager()
 
         # 进度跟踪器缓存
@@ -705,25 +705,14 @@ class SimpleAnalysisService:
             return PyObjectId(new_object_id)
 
     def _get_trading_graph(self, config: Dict[str, Any]) -> TradingAgentsGraph:
-        """获取或创建TradingAgents实例
+        """获取TradingAgents实例（从编译图复用池中按配置取出）
 
-        ⚠️ 注意：为了避免并发执行时的数据混淆，每次都创建新实例
-        虽然这会增加一些初始化开销，但可以确保线程安全
-
-        TradingAgentsGraph 实例包含可变状态（self.ticker, self.curr_state等），
-        如果多个线程共享同一个实例，会导致数据混淆。
+        TradingAgentsGraph 不再保存单次运行的状态（ticker、最终状态等只存在于 propagate 的调用栈
+        和当前线程中），同一配置的图实例可以被并发任务共享，避免每次重建 LLM 客户端、记忆库和 LangGraph。
         """
-        # 🔧 [并发安全] 每次都创建新实例，避免多线程共享状态
-        # 不再使用缓存，因为 TradingAgentsGraph 有可变的实例变量
-        logger.info(f"🔧 创建新的TradingAgents实例（并发安全模式）...")
-
-        trading_graph = TradingAgentsGraph(
-            selected_analysts=config.get("selected_analysts", ["market", "fundamentals"]),
-            debug=config.get("debug", False),
-            config=config
-        )
+        trading_graph = get_graph_pool().get(config)
 
-        logger.info(f"✅ TradingAgents实例创建成功（实例ID: {id(trading_graph)}）")
+        logger.info(f"✅ TradingAgents实例就绪（实例ID: {id(trading_graph)}，复用池: {get_graph_pool().stats()}）")
 
         return trading_graph
 
@@ -1876,7 +1865,7 @@ class SimpleAnalysisService:
                 logger.debug(f"🔍 [GET_STATUS] result_data为空或不存在（任务运行中，这是正常的）")
 
             # 优先从Redis获取详细进度信息
-            redis_progress = get_progress_by_id(task_id)
+            redis_progress = await aget_progress_by_id(task_id)
             if redis_progress:
                 logger.info(f"📊 [Redis进度] 获取到详细进度: {task_id}")
 
@@ -10,6 +10,14 @@ from collections import defaultdict
 
 from app.core.database import get_mongo_db
 from app.models.config import UsageRecord, UsageStatistics
+from tradingagents.config.usage_rollups import (
+    ROLLUP_COLLECTION,
+    ROLLUP_META_ID,
+    expired_filter,
+    merge_rollups,
+    rollup_operations,
+    window_filter,
+)
 
 logger = logging.getLogger("app.services.usage_statistics_service")
 
@@ -20,6 +28,8 @@ class UsageStatisticsService:
     def __init__(self):
         # 使用 tradingagents 的集合名称
         self.collection_name = "token_usage"
+        self.rollup_collection_name = ROLLUP_COLLECTION
+        self._rollups_ready = False
     
     async def add_usage_record(self, record: UsageRecord) -> bool:
         """添加使用记录"""
@@ -29,6 +39,7 @@ class UsageStatisticsService:
 
             record_dict = record.model_dump(exclude={"id"})
             result = await collection.insert_one(record_dict)
+            await self._update_rollups(db, [record_dict])
 
             logger.info(f"✅ 添加使用记录成功: {record.provider}/{record.model_name}")
             return True
@@ -90,6 +101,25 @@ class UsageStatisticsService:
             # 计算时间范围
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days)
+
+            # 优先读取预聚合的小时/天汇总
+            if await self._rollups_available(db):
+                cursor = db[self.rollup_collection_name].find(
+                    window_filter(start_date, end_date, provider=provider, model_name=model_name)
+                )
+                merged = merge_rollups([doc async for doc in cursor])
+                stats = UsageStatistics(
+                    total_requests=merged["requests"],
+                    total_input_tokens=merged["input_tokens"],
+                    total_output_tokens=merged["output_tokens"],
+                    total_cost=merged["cost"],
+                    cost_by_currency=merged["cost_by_currency"],
+                    by_provider=merged["by_provider"],
+                    by_model=merged["by_model"],
+                    by_date=merged["by_date"],
+                )
+                logger.info(f"✅ 获取使用统计成功（汇总）: {stats.total_requests} 条记录")
+                return stats
             
             # 构建查询条件
             query = {
@@ -186,6 +216,36 @@ class UsageStatisticsService:
             logger.error(f"❌ 获取使用统计失败: {e}")
             return UsageStatistics()
     
+    async def _update_rollups(self, db, records: List[Dict[str, Any]]) -> None:
+        """写入原始记录后更新小时/天汇总"""
+        try:
+            operations = rollup_operations(records)
+            if operations:
+                await db[self.rollup_collection_name].bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"❌ 更新使用汇总失败: {e}")
+
+    async def _rollups_available(self, db) -> bool:
+        """汇总集合是否已覆盖全部原始记录（已回填，或原始集合为空）"""
+        if self._rollups_ready:
+            return True
+        try:
+            rollups = db[self.rollup_collection_name]
+            if await rollups.find_one({"_id": ROLLUP_META_ID}) is None:
+                if await db[self.collection_name].estimated_document_count() > 0:
+                    logger.warning("⚠️ 使用汇总尚未回填，统计将扫描原始记录；"
+                                   "请运行 scripts/maintenance/backfill_usage_rollups.py")
+                    return False
+                await rollups.update_one(
+                    {"_id": ROLLUP_META_ID},
+                    {"$setOnInsert": {"backfilled_at": datetime.now()}},
+                    upsert=True,
+                )
+            self._rollups_ready = True
+        except Exception as e:
+            logger.error(f"❌ 检查使用汇总状态失败: {e}")
+        return self._rollups_ready
+
     async def get_cost_by_provider(self, days: int = 7) -> Dict[str, float]:
         """获取按供应商的成本统计"""
         stats = await self.get_usage_statistics(days=days)
@@ -225,7 +285,10 @@ class UsageStatisticsService:
             })
             
             deleted_count = result.deleted_count
-            logger.info(f"✅ 删除旧记录成功: {deleted_count} 条")
+
+            # 汇总文档按同一截止时间清理，保持与原始记录一致
+            rollup_result = await db[self.rollup_collection_name].delete_many(expired_filter(cutoff_date))
+            logger.info(f"✅ 删除旧记录成功: {deleted_count} 条，汇总 {rollup_result.deleted_count} 个")
             return deleted_count
         except Exception as e:
             logger.error(f"❌ 删除旧记录失败: {e}")
@@ -1,6 +1,9 @@
 """
 WebSocket 连接管理器
 用于实时推送分析进度更新
+
+进度消息经由 ProgressHub 分发：每个有连接的任务对应一个订阅和一个推送协程，
+Worker 通过 Redis 发布的进度与进程内 send_progress_update 的进度走同一条路径。
 """
 
 import asyncio
@@ -9,6 +12,8 @@ import logging
 from typing import Dict, Set, Any
 from fastapi import WebSocket, WebSocketDisconnect
 
+from app.services.progress.hub import get_progress_hub
+
 logger = logging.getLogger(__name__)
 
 class WebSocketManager:
@@ -17,6 +22,10 @@ class WebSocketManager:
     def __init__(self):
         # 存储活跃连接：{task_id: {websocket1, websocket2, ...}}
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # 每个任务一个推送协程：{task_id: asyncio.Task}
+        self._pumps: Dict[str, asyncio.Task] = {}
+        # 推送协程完成订阅的信号：{task_id: asyncio.Future}
+        self._subscribed: Dict[str, asyncio.Future] = {}
         self._lock = asyncio.Lock()
     
     async def connect(self, websocket: WebSocket, task_id: str):
@@ -27,36 +36,88 @@ class WebSocketManager:
             if task_id not in self.active_connections:
                 self.active_connections[task_id] = set()
             self.active_connections[task_id].add(websocket)
+            subscribed = self._subscribed.get(task_id)
+            if subscribed is None:
+                subscribed = self._subscribed[task_id] = asyncio.get_running_loop().create_future()
+                self._pumps[task_id] = asyncio.create_task(self._pump(task_id, subscribed))
+
+        # 在锁外等待订阅就绪（最长等待 Pub/Sub 确认），不阻塞其他连接的建立和断开
+        try:
+            await asyncio.shield(subscribed)
+        except asyncio.CancelledError:
+            if not subscribed.cancelled():
+                raise
+            # 等待期间该任务的连接已全部移除
+            return
+        except Exception as e:
+            logger.error(f"❌ 订阅任务进度失败: {task_id} - {e}")
+            await self.disconnect(websocket, task_id)
+            raise
         
         logger.info(f"🔌 WebSocket 连接建立: {task_id}")
     
     async def disconnect(self, websocket: WebSocket, task_id: str):
         """断开 WebSocket 连接"""
         async with self._lock:
-            if task_id in self.active_connections:
-                self.active_connections[task_id].discard(websocket)
-                if not self.active_connections[task_id]:
-                    del self.active_connections[task_id]
+            pump = self._remove_connection(websocket, task_id)
+        if pump:
+            pump.cancel()
         
         logger.info(f"🔌 WebSocket 连接断开: {task_id}")
+
+    def _remove_connection(self, websocket: WebSocket, task_id: str):
+        """移除连接（需持有锁）；任务的最后一个连接被移除时摘下并返回其推送协程"""
+        connections = self.active_connections.get(task_id)
+        if connections is None:
+            return None
+        connections.discard(websocket)
+        if connections:
+            return None
+        del self.active_connections[task_id]
+        subscribed = self._subscribed.pop(task_id, None)
+        if subscribed is not None and not subscribed.done():
+            subscribed.cancel()
+        return self._pumps.pop(task_id, None)
     
     async def send_progress_update(self, task_id: str, message: Dict[str, Any]):
-        """发送进度更新到指定任务的所有连接"""
+        """发送进度更新到指定任务的所有连接（经由 ProgressHub，慢连接会合并中间进度）"""
         if task_id not in self.active_connections:
             return
-        
-        # 复制连接集合以避免在迭代时修改
-        connections = self.active_connections[task_id].copy()
-        
-        for connection in connections:
+        get_progress_hub().dispatch(task_id, message)
+
+    async def _pump(self, task_id: str, subscribed: asyncio.Future):
+        """订阅任务进度，并将进度推送给该任务的所有连接"""
+        subscription = None
+        try:
             try:
-                await connection.send_text(json.dumps(message))
+                subscription = await get_progress_hub().subscribe(task_id)
             except Exception as e:
-                logger.warning(f"⚠️ 发送 WebSocket 消息失败: {e}")
-                # 移除失效的连接
-                async with self._lock:
-                    if task_id in self.active_connections:
-                        self.active_connections[task_id].discard(connection)
+                if not subscribed.done():
+                    subscribed.set_exception(e)
+                return
+            if not subscribed.done():
+                subscribed.set_result(None)
+
+            while True:
+                message = await subscription.get()
+                # 复制连接集合以避免在迭代时修改
+                connections = self.active_connections.get(task_id, set()).copy()
+                payload = json.dumps(message)
+                for connection in connections:
+                    try:
+                        await connection.send_text(payload)
+                    except Exception as e:
+                        logger.warning(f"⚠️ 发送 WebSocket 消息失败: {e}")
+                        # 移除失效的连接；最后一个连接失效时推送协程随之退出
+                        async with self._lock:
+                            pump = self._remove_connection(connection, task_id)
+                        if pump is not None:
+                            return
+        finally:
+            if self._subscribed.get(task_id) is subscribed:
+                del self._subscribed[task_id]
+            if subscription is not None:
+                subscription.close()
     
     async def broadcast_to_user(self, user_id: str, message: Dict[str, Any]):
         """向用户的所有连接广播消息"""
@@ -8,8 +8,10 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 
 from app.core.database import get_mongo_db
+from app.core.rate_limiter import get_akshare_rate_limiter
 from app.services.historical_data_service import get_historical_data_service
 from app.services.news_data_service import get_news_data_service
+from app.worker.historical_sync_pipeline import HistoricalSyncPipeline
 from tradingagents.dataflows.providers.china.akshare import get_akshare_provider
 
 logger = logging.getLogger(__name__)
@@ -590,27 +592,23 @@ class AKShareSyncService:
 
             logger.info(f"📊 历史数据同步: 结束日期={end_date}, 股票数量={len(symbols)}, 模式={'增量' if incremental else '全量'}")
 
-            # 4. 批量处理
-            for i in range(0, len(symbols), self.batch_size):
-                batch = symbols[i:i + self.batch_size]
-                batch_stats = await self._process_historical_batch(
-                    batch, start_date, end_date, period, incremental
-                )
-
-                # 更新统计
-                stats["success_count"] += batch_stats["success_count"]
-                stats["error_count"] += batch_stats["error_count"]
-                stats["total_records"] += batch_stats["total_records"]
-                stats["errors"].extend(batch_stats["errors"])
-
-                # 进度日志
-                progress = min(i + self.batch_size, len(symbols))
-                logger.info(f"📈 历史数据同步进度: {progress}/{len(symbols)} "
-                           f"(成功: {stats['success_count']}, 记录: {stats['total_records']})")
-
-                # API限流
-                if i + self.batch_size < len(symbols):
-                    await asyncio.sleep(self.rate_limit_delay)
+            # 4. 流水线处理：批量确定起始日期 -> 并发拉取 -> 跨股票批量写入
+            async def on_progress(done: int, total: int, symbol: str, pipeline_stats: Dict[str, Any]):
+                if done % self.batch_size == 0 or done == total:
+                    logger.info(f"📈 历史数据同步进度: {done}/{total} "
+                               f"(成功: {pipeline_stats['success_count']}, 记录: {pipeline_stats['total_records']})")
+
+            pipeline = self.create_historical_pipeline(period, on_progress=on_progress)
+            result = await pipeline.run(symbols, end_date=end_date, start_date=start_date, incremental=incremental)
+
+            stats["success_count"] += result["success_count"]
+            stats["error_count"] += result["error_count"] + len(result["empty_symbols"])
+            stats["total_records"] += result["total_records"]
+            stats["errors"].extend(result["errors"])
+            stats["errors"].extend(
+                {"code": symbol, "error": "历史数据为空", "context": "sync_historical_data"}
+                for symbol in result["empty_symbols"]
+            )
 
             # 4. 完成统计
             stats["end_time"] = datetime.utcnow()
@@ -629,71 +627,17 @@ class AKShareSyncService:
             stats["errors"].append({"error": str(e), "context": "sync_historical_data"})
             return stats
 
-    async def _process_historical_batch(
-        self,
-        batch: List[str],
-        start_date: str,
-        end_date: str,
-        period: str = "daily",
-        incremental: bool = False
-    ) -> Dict[str, Any]:
-        """处理历史数据批次"""
-        batch_stats = {
-            "success_count": 0,
-            "error_count": 0,
-            "total_records": 0,
-            "errors": []
-        }
-
-        for symbol in batch:
-            try:
-                # 确定该股票的起始日期
-                symbol_start_date = start_date
-                if not symbol_start_date:
-                    if incremental:
-                        # 增量同步：获取该股票的最后日期
-                        symbol_start_date = await self._get_last_sync_date(symbol)
-                        logger.debug(f"📅 {symbol}: 从 {symbol_start_date} 开始同步")
-                    else:
-                        # 全量同步：最近1年
-                        symbol_start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-
-                # 获取历史数据
-                hist_data = await self.provider.get_historical_data(symbol, symbol_start_date, end_date, period)
-
-                if hist_data is not None and not hist_data.empty:
-                    # 保存到统一历史数据集合
-                    if self.historical_service is None:
-                        self.historical_service = await get_historical_data_service()
-
-                    saved_count = await self.historical_service.save_historical_data(
-                        symbol=symbol,
-                        data=hist_data,
-                        data_source="akshare",
-                        market="CN",
-                        period=period
-                    )
-
-                    batch_stats["success_count"] += 1
-                    batch_stats["total_records"] += saved_count
-                    logger.debug(f"✅ {symbol}历史数据同步成功: {saved_count}条记录")
-                else:
-                    batch_stats["error_count"] += 1
-                    batch_stats["errors"].append({
-                        "code": symbol,
-                        "error": "历史数据为空",
-                        "context": "_process_historical_batch"
-                    })
-
-            except Exception as e:
-                batch_stats["error_count"] += 1
-                batch_stats["errors"].append({
-                    "code": symbol,
-                    "error": str(e),
-                    "context": "_process_historical_batch"
-                })
-
-        return batch_stats
+    def create_historical_pipeline(self, period: str = "daily", **kwargs) -> HistoricalSyncPipeline:
+        """创建 AKShare 历史数据同步流水线（共享 AKShare 速率限制器）"""
+        return HistoricalSyncPipeline(
+            data_source="akshare",
+            fetch=self.provider.get_historical_data,
+            period=period,
+            rate_limiter=get_akshare_rate_limiter(),
+            db=self.db,
+            historical_service=self.historical_service,
+            **kwargs
+        )
 
     async def _get_last_sync_date(self, symbol: str = None) -> str:
         """
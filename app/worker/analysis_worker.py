@@ -11,7 +11,7 @@ import uuid
 import traceback
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent.parent
@@ -36,13 +36,17 @@ class AnalysisWorker:
         self.worker_id = worker_id or f"worker-{uuid.uuid4().hex[:8]}"
         self.queue_service = None
         self.running = False
-        self.current_task = None
+        # 槽位 -> 正在执行的任务信息（task_id/symbol/started_at），空闲槽位为 None
+        self.slots: Dict[int, Optional[Dict[str, Any]]] = {}
 
         # 配置参数（可由系统设置覆盖）
         self.heartbeat_interval = int(getattr(settings, 'WORKER_HEARTBEAT_INTERVAL', 30))
         self.max_retries = int(getattr(settings, 'QUEUE_MAX_RETRIES', 3))
-        self.poll_interval = float(getattr(settings, 'QUEUE_POLL_INTERVAL_SECONDS', 1))  # 队列轮询间隔（秒）
+        self.poll_interval = float(getattr(settings, 'QUEUE_POLL_INTERVAL_SECONDS', 1))  # 并发受限时的退避间隔（秒）
+        self.block_timeout = float(getattr(settings, 'QUEUE_BLOCK_TIMEOUT_SECONDS', 5))  # 阻塞出队等待时间（秒）
         self.cleanup_interval = float(getattr(settings, 'QUEUE_CLEANUP_INTERVAL_SECONDS', 60))
+        self.concurrency = max(1, int(getattr(settings, 'WORKER_CONCURRENCY', 3)))  # 并发任务槽位数
+        self.drain_timeout = float(getattr(settings, 'WORKER_DRAIN_TIMEOUT_SECONDS', 300))  # 关闭时等待进行中任务的时间（秒）
 
         # 注册信号处理器
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -50,9 +54,18 @@ class AnalysisWorker:
 
     def _signal_handler(self, signum, frame):
         """信号处理器，优雅关闭"""
-        logger.info(f"收到信号 {signum}，准备关闭Worker...")
+        logger.info(f"收到信号 {signum}，停止领取新任务，等待进行中的任务完成...")
         self.running = False
 
+    @property
+    def current_task(self) -> Optional[str]:
+        """第一个进行中的任务ID（兼容单任务时代的心跳字段）"""
+        active = self._active_task_ids()
+        return active[0] if active else None
+
+    def _active_task_ids(self) -> List[str]:
+        return [info["task_id"] for info in self.slots.values() if info]
+
     async def start(self):
         """启动Worker"""
         try:
@@ -82,6 +95,8 @@ class AnalysisWorker:
                 self.heartbeat_interval = int(effective_settings.get("worker_heartbeat_interval_seconds", self.heartbeat_interval))
                 self.poll_interval = float(effective_settings.get("queue_poll_interval_seconds", self.poll_interval))
                 self.cleanup_interval = float(effective_settings.get("queue_cleanup_interval_seconds", self.cleanup_interval))
+                self.concurrency = max(1, int(effective_settings.get("worker_concurrency", self.concurrency)))
+                self.queue_service.limit_backoff = self.poll_interval
             except Exception:
                 pass
             # 启动心跳任务
@@ -110,36 +125,59 @@ class AnalysisWorker:
             await self._cleanup()
 
     async def _work_loop(self):
-        """主工作循环"""
-        logger.info(f"✅ Worker {self.worker_id} 开始工作")
+        """主工作循环：启动 concurrency 个任务槽位，收到停止信号后排空进行中的任务"""
+        logger.info(f"✅ Worker {self.worker_id} 开始工作，并发槽位: {self.concurrency}")
+
+        self.slots = {slot: None for slot in range(self.concurrency)}
+        pending = {asyncio.create_task(self._slot_loop(slot)) for slot in range(self.concurrency)}
+
+        while self.running and pending:
+            _, pending = await asyncio.wait(pending, timeout=1.0)
+
+        if pending:
+            # 各槽位完成当前任务后自行退出；超过 drain_timeout 仍未完成的任务不确认，
+            # 由可见性超时回收后重新入队
+            logger.info(f"⏳ 排空中: {len(self._active_task_ids())} 个任务进行中，最长等待 {self.drain_timeout:.0f} 秒")
+            _, pending = await asyncio.wait(pending, timeout=self.drain_timeout)
+            if pending:
+                logger.warning(f"⚠️ 排空超时，放弃 {len(self._active_task_ids())} 个进行中的任务: {self._active_task_ids()}")
+                for slot_task in pending:
+                    slot_task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        logger.info(f"🔄 Worker {self.worker_id} 工作循环结束")
 
+    async def _slot_loop(self, slot: int):
+        """单个任务槽位：一次只执行一个任务"""
         while self.running:
             try:
-                # 从队列获取任务
-                task_data = await self.queue_service.dequeue_task(self.worker_id)
+                # 阻塞出队：队列为空时在 Redis 端等待，最长 block_timeout 秒后返回以便检查 running
+                task_data = await self.queue_service.dequeue_task(self.worker_id, timeout=self.block_timeout)
 
                 if task_data:
-                    await self._process_task(task_data)
-                else:
-                    # 没有任务，短暂休眠
-                    await asyncio.sleep(self.poll_interval)
+                    await self._process_task(task_data, slot)
 
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"工作循环异常: {e}")
+                logger.error(f"槽位 {slot} 工作循环异常: {e}")
                 await asyncio.sleep(5)  # 异常后等待5秒再继续
 
-        logger.info(f"🔄 Worker {self.worker_id} 工作循环结束")
-
-    async def _process_task(self, task_data: Dict[str, Any]):
+    async def _process_task(self, task_data: Dict[str, Any], slot: int = 0):
         """处理单个任务"""
         task_id = task_data.get("id")
         stock_code = task_data.get("symbol")
         user_id = task_data.get("user")
 
-        logger.info(f"📊 开始处理任务: {task_id} - {stock_code}")
+        logger.info(f"📊 [槽位{slot}] 开始处理任务: {task_id} - {stock_code}")
 
-        self.current_task = task_id
+        self.slots[slot] = {
+            "task_id": task_id,
+            "symbol": stock_code,
+            "started_at": datetime.utcnow().isoformat(),
+        }
         success = False
+        cancelled = False
 
         try:
             # 构建分析任务对象
@@ -150,43 +188,51 @@ class AnalysisWorker:
 
             parameters = AnalysisParameters(**parameters_dict)
 
+            analysis_service = get_analysis_service()
             task = AnalysisTask(
                 task_id=task_id,
-                user_id=user_id,
-                stock_code=stock_code,
+                user_id=analysis_service._convert_user_id(user_id),
+                symbol=stock_code,
+                stock_code=stock_code,  # 兼容字段
                 batch_id=task_data.get("batch_id"),
                 parameters=parameters
             )
 
             # 执行分析
-            result = await get_analysis_service().execute_analysis_task(
+            result = await analysis_service.execute_analysis_task(
                 task,
-                progress_callback=self._progress_callback
+                progress_callback=lambda progress, message: self._progress_callback(task_id, progress, message)
             )
 
             success = True
             logger.info(f"✅ 任务完成: {task_id} - 耗时: {result.execution_time:.2f}秒")
 
+        except asyncio.CancelledError:
+            # 排空超时被取消：不确认任务，等待可见性超时后重新入队
+            cancelled = True
+            raise
+
         except Exception as e:
             logger.error(f"❌ 任务执行失败: {task_id} - {e}")
             logger.error(traceback.format_exc())
 
         finally:
             # 确认任务完成
-            try:
-                await self.queue_service.ack_task(task_id, success)
-            except Exception as e:
-                logger.error(f"确认任务失败: {task_id} - {e}")
+            if not cancelled:
+                try:
+                    await self.queue_service.ack_task(task_id, success)
+                except Exception as e:
+                    logger.error(f"确认任务失败: {task_id} - {e}")
 
-            self.current_task = None
+            self.slots[slot] = None
 
-    def _progress_callback(self, progress: int, message: str):
+    def _progress_callback(self, task_id: str, progress: int, message: str):
         """进度回调函数"""
-        logger.debug(f"任务进度 {self.current_task}: {progress}% - {message}")
+        logger.debug(f"任务进度 {task_id}: {progress}% - {message}")
 
     async def _heartbeat_loop(self):
-        """心跳循环"""
-        while self.running:
+        """心跳循环（排空期间继续上报）"""
+        while self.running or self._active_task_ids():
             try:
                 await self._send_heartbeat()
                 await asyncio.sleep(self.heartbeat_interval)
@@ -202,11 +248,23 @@ class AnalysisWorker:
             from app.core.redis_client import get_redis_service
             redis_service = get_redis_service()
 
+            active_tasks = self._active_task_ids()
+            if self.running:
+                status = "active"
+            else:
+                status = "draining" if active_tasks else "stopping"
+
             heartbeat_data = {
                 "worker_id": self.worker_id,
                 "timestamp": datetime.utcnow().isoformat(),
                 "current_task": self.current_task,
-                "status": "active" if self.running else "stopping"
+                "status": status,
+                "concurrency": self.concurrency,
+                "active_tasks": len(active_tasks),
+                "slots": [
+                    {"slot": slot, **info} if info else {"slot": slot, "task_id": None}
+                    for slot, info in sorted(self.slots.items())
+                ],
             }
 
             heartbeat_key = f"worker:{self.worker_id}:heartbeat"
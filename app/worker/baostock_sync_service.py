@@ -12,6 +12,7 @@ from dataclasses import dataclass
 from app.core.config import get_settings
 from app.core.database import get_database
 from app.services.historical_data_service import get_historical_data_service
+from app.worker.historical_sync_pipeline import HistoricalSyncPipeline
 from tradingagents.dataflows.providers.china.baostock import BaoStockProvider
 
 logger = logging.getLogger(__name__)
@@ -387,20 +388,31 @@ class BaoStockSyncService:
 
             logger.info(f"📊 开始同步{len(stock_codes)}只股票的历史数据...")
 
-            # 批量处理
-            for i in range(0, len(stock_codes), batch_size):
-                batch = stock_codes[i:i + batch_size]
-                batch_stats = await self._sync_historical_batch(batch, days, end_date, period, use_incremental)
-                
-                stats.historical_records += batch_stats.historical_records
-                stats.errors.extend(batch_stats.errors)
-                
-                logger.info(f"📊 批次进度: {i + len(batch)}/{len(stock_codes)}, "
-                          f"记录: {batch_stats.historical_records}, "
-                          f"错误: {len(batch_stats.errors)}")
-                
-                # 避免API限制
-                await asyncio.sleep(0.5)
+            # 流水线处理：批量确定起始日期 -> 拉取 -> 跨股票批量写入
+            async def on_progress(done: int, total: int, code: str, pipeline_stats: Dict[str, Any]):
+                if done % batch_size == 0 or done == total:
+                    logger.info(f"📊 批次进度: {done}/{total}, "
+                              f"记录: {pipeline_stats['total_records']}, "
+                              f"错误: {pipeline_stats['error_count'] + len(pipeline_stats['empty_symbols'])}")
+
+            pipeline = self.create_historical_pipeline(period, on_progress=on_progress)
+            if use_incremental:
+                # 没有历史数据的股票从30天前开始
+                result = await pipeline.run(
+                    stock_codes, end_date=end_date, incremental=True,
+                    new_symbol_start=(datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+                )
+            elif days >= 3650:
+                result = await pipeline.run(stock_codes, end_date=end_date, incremental=False, all_history=True)
+            else:
+                result = await pipeline.run(
+                    stock_codes, end_date=end_date, incremental=False,
+                    start_date=(datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+                )
+
+            stats.historical_records += result["total_records"]
+            stats.errors.extend(f"获取{code}历史数据失败" for code in result["empty_symbols"])
+            stats.errors.extend(f"处理{error['code']}历史数据失败: {error['error']}" for error in result["errors"])
             
             logger.info(f"✅ BaoStock历史数据同步完成: {stats.historical_records}条记录")
             return stats
@@ -410,86 +422,37 @@ class BaoStockSyncService:
             stats.errors.append(str(e))
             return stats
     
-    async def _sync_historical_batch(
-        self,
-        code_batch: List[str],
-        days: int,
-        end_date: str,
-        period: str = "daily",
-        incremental: bool = False
-    ) -> BaoStockSyncStats:
-        """同步历史数据批次"""
-        stats = BaoStockSyncStats()
-
-        for code in code_batch:
-            try:
-                # 确定该股票的起始日期
-                if incremental:
-                    # 增量同步：获取该股票的最后日期
-                    start_date = await self._get_last_sync_date(code)
-                    logger.debug(f"📅 {code}: 从 {start_date} 开始同步")
-                elif days >= 3650:
-                    # 全历史同步
-                    start_date = "1990-01-01"
-                else:
-                    # 固定天数同步
-                    start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-
-                hist_data = await self.provider.get_historical_data(code, start_date, end_date, period)
-
-                if hist_data is not None and not hist_data.empty:
-                    # 更新数据库
-                    records_count = await self._update_historical_data(code, hist_data, period)
-                    stats.historical_records += records_count
-                else:
-                    stats.errors.append(f"获取{code}历史数据失败")
-
-            except Exception as e:
-                stats.errors.append(f"处理{code}历史数据失败: {e}")
-
-        return stats
-
-    async def _update_historical_data(self, code: str, hist_data, period: str = "daily") -> int:
-        """更新历史数据到数据库"""
+    def create_historical_pipeline(self, period: str = "daily", **kwargs) -> HistoricalSyncPipeline:
+        """创建 BaoStock 历史数据同步流水线（BaoStock 登录会话不支持并发，拉取并发固定为1）"""
+        kwargs.setdefault("concurrency", 1)
+        kwargs.setdefault("on_fetched", self._update_historical_meta)
+        return HistoricalSyncPipeline(
+            data_source="baostock",
+            fetch=self.provider.get_historical_data,
+            period=period,
+            db=self.db,
+            historical_service=self.historical_service,
+            **kwargs
+        )
+
+    async def _update_historical_meta(self, code: str, hist_data) -> None:
+        """更新market_quotes集合的历史数据元信息（保持兼容性）"""
+        if self.db is None:
+            return
         try:
-            if hist_data is None or hist_data.empty:
-                logger.warning(f"⚠️ {code} 历史数据为空，跳过保存")
-                return 0
-
-            # 初始化历史数据服务
-            if self.historical_service is None:
-                self.historical_service = await get_historical_data_service()
-
-            # 保存到统一历史数据集合
-            saved_count = await self.historical_service.save_historical_data(
-                symbol=code,
-                data=hist_data,
-                data_source="baostock",
-                market="CN",
-                period=period
+            latest_record = hist_data.iloc[-1] if not hist_data.empty else None
+            await self.db.market_quotes.update_one(
+                {"code": code},
+                {"$set": {
+                    "historical_data_updated": datetime.now(),
+                    "latest_historical_date": latest_record.get('date') if latest_record is not None else None,
+                    "historical_records_count": len(hist_data)
+                }},
+                upsert=True
             )
-
-            # 同时更新market_quotes集合的元信息（保持兼容性）
-            if self.db is not None:
-                collection = self.db.market_quotes
-                latest_record = hist_data.iloc[-1] if not hist_data.empty else None
-
-                await collection.update_one(
-                    {"code": code},
-                    {"$set": {
-                        "historical_data_updated": datetime.now(),
-                        "latest_historical_date": latest_record.get('date') if latest_record is not None else None,
-                        "historical_records_count": saved_count
-                    }},
-                    upsert=True
-                )
-
-            return saved_count
-
         except Exception as e:
-            logger.error(f"❌ 更新历史数据到数据库失败: {e}")
-            return 0
-    
+            logger.error(f"❌ 更新{code}历史数据元信息失败: {e}")
+
     async def _get_last_sync_date(self, symbol: str = None) -> str:
         """
         获取最后同步日期
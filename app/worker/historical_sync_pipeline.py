@@ -0,0 +1,418 @@
+"""
+历史行情同步流水线（Tushare / AKShare / BaoStock / 多周期同步共用）
+
+原来的同步逐只股票串行执行：查最后同步日期 -> 调数据源接口 -> 写库，网络请求和 Mongo 读写从不重叠。
+流水线分为三段：
+1. 起始日期：一次聚合查出全部股票的最后同步日期，从未同步过的股票一次查询取上市日期
+2. 拉取：N 个协程并发调用数据源（共享速率限制器）；交易日历确认区间内没有交易日时不调用接口
+3. 写入：单个写入协程把多只股票的 upsert 操作合并为大批次 bulk_write
+
+停止检查在每只股票开始前执行，进度回调在每只股票完成后执行，与逐只处理时的行为一致。
+一批写入成功后，用这批新K线推进各股票的增量指标状态（IndicatorStateStore），选股等读取
+最新指标时不必在全部历史上重新计算。
+
+环境变量：
+- HISTORICAL_SYNC_CONCURRENCY: 并发拉取数，默认 4（BaoStock 会话不支持并发，固定为 1）
+- HISTORICAL_SYNC_INDICATOR_STATE: 是否维护增量指标状态，默认 true
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from app.core.rate_limiter import PRIORITY_BULK, RateLimiter
+from app.services.historical_data_service import BULK_WRITE_BATCH_SIZE, get_historical_data_service
+from tradingagents.dataflows.trading_calendar import get_trading_calendar
+from tradingagents.tools.analysis.streaming import DEFAULT_SPECS, IncrementalIndicatorEngine, IndicatorStateStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+# 写入队列中最多积压的股票数（拉取快于写入时形成背压）
+WRITE_QUEUE_SIZE = 64
+# 写入协程攒批的最长等待时间（秒）
+WRITE_FLUSH_INTERVAL = 1.0
+FULL_HISTORY_START = "1990-01-01"
+
+FetchFunc = Callable[[str, str, str, str], Awaitable[Optional[pd.DataFrame]]]
+
+
+def get_sync_concurrency(default: int = DEFAULT_CONCURRENCY) -> int:
+    try:
+        return max(1, int(os.getenv("HISTORICAL_SYNC_CONCURRENCY", default)))
+    except ValueError:
+        return default
+
+
+def indicator_state_enabled() -> bool:
+    return os.getenv("HISTORICAL_SYNC_INDICATOR_STATE", "true").lower() == "true"
+
+
+def _indicator_bars(df: pd.DataFrame) -> pd.DataFrame:
+    """拉取结果 -> 按日期排序的 date/open/high/low/close（日期取值顺序与 _standardize_record 一致）"""
+    date_column = next((c for c in ("date", "trade_date") if c in df.columns), None)
+    dates = df[date_column] if date_column else df.index.to_series()
+    bars = df[[c for c in ("open", "high", "low", "close") if c in df.columns]].reset_index(drop=True)
+    bars["date"] = pd.to_datetime(dates.astype(str).to_numpy())
+    return bars.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def _normalize_list_date(list_date: Any) -> Optional[str]:
+    """20100101 / 2010-01-01 / datetime -> YYYY-MM-DD"""
+    if not list_date:
+        return None
+    if isinstance(list_date, str):
+        if len(list_date) == 8 and list_date.isdigit():
+            return f"{list_date[:4]}-{list_date[4:6]}-{list_date[6:]}"
+        return list_date
+    return list_date.strftime('%Y-%m-%d')
+
+
+def next_sync_date(latest_date: str, calendar=None) -> str:
+    """最后同步日期之后的下一个交易日（日历未覆盖时为下一天）"""
+    try:
+        last_date_obj = datetime.strptime(latest_date, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        # 如果日期格式不对，直接返回
+        return latest_date
+    if calendar is not None and calendar.covers(last_date_obj):
+        return calendar.next_trading_day(last_date_obj).strftime('%Y-%m-%d')
+    return (last_date_obj + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+class HistoricalSyncPipeline:
+    """单个数据源、单个周期的历史数据同步流水线"""
+
+    def __init__(
+        self,
+        data_source: str,
+        fetch: FetchFunc,
+        period: str = "daily",
+        market: str = "CN",
+        concurrency: Optional[int] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        db=None,
+        historical_service=None,
+        should_stop: Optional[Callable[[], Awaitable[bool]]] = None,
+        on_progress: Optional[Callable[[int, int, str, Dict[str, Any]], Awaitable[None]]] = None,
+        on_fetched: Optional[Callable[[str, pd.DataFrame], Awaitable[None]]] = None,
+        write_batch_size: int = BULK_WRITE_BATCH_SIZE,
+        indicator_state: Optional[IndicatorStateStore] = None,
+    ):
+        """
+        Args:
+            data_source: 数据源 (tushare/akshare/baostock)，写入 data_source 字段
+            fetch: async (symbol, start_date, end_date, period) -> DataFrame
+            period: 数据周期 (daily/weekly/monthly)
+            concurrency: 并发拉取数，默认读取 HISTORICAL_SYNC_CONCURRENCY
+            rate_limiter: 每次调用接口前以批量优先级获取令牌
+            db: 用于查询上市日期的数据库（stock_basic_info），默认使用历史数据服务的数据库
+            should_stop: 每只股票开始前调用，返回 True 时停止派发新的股票
+            on_progress: 每只股票完成后调用 (已完成数, 总数, 股票代码, 统计)
+            on_fetched: 拉取到非空数据后、写入前调用（如更新其他集合的元信息）
+            write_batch_size: 写入协程攒够多少条操作后立即写入
+            indicator_state: 增量指标状态存储，默认在 HISTORICAL_SYNC_INDICATOR_STATE 开启时使用默认目录
+        """
+        self.data_source = data_source
+        self.fetch = fetch
+        self.period = period
+        self.market = market
+        self.concurrency = concurrency or get_sync_concurrency()
+        self.rate_limiter = rate_limiter
+        self.db = db
+        self.historical_service = historical_service
+        self.should_stop = should_stop
+        self.on_progress = on_progress
+        self.on_fetched = on_fetched
+        self.write_batch_size = max(1, write_batch_size)
+        self.indicator_state = indicator_state
+        # 本次同步从头拉取全部历史的股票（全历史模式或库中还没有数据），可以直接新建指标状态
+        self.full_history_symbols: set = set()
+
+    async def _service(self):
+        if self.historical_service is None:
+            self.historical_service = await get_historical_data_service()
+        return self.historical_service
+
+    async def _get_list_dates(self, symbols: List[str]) -> Dict[str, str]:
+        if not symbols:
+            return {}
+        db = self.db if self.db is not None else (await self._service()).db
+        cursor = db.stock_basic_info.find({"code": {"$in": symbols}}, {"code": 1, "list_date": 1})
+        result = {}
+        async for doc in cursor:
+            list_date = _normalize_list_date(doc.get("list_date"))
+            if list_date:
+                result[doc["code"]] = list_date
+        return result
+
+    async def resolve_start_dates(
+        self,
+        symbols: List[str],
+        start_date: Optional[str] = None,
+        incremental: bool = True,
+        all_history: bool = False,
+        new_symbol_start: Optional[str] = None,
+    ) -> Dict[str, str]:
+        """
+        确定每只股票的起始日期
+
+        Args:
+            start_date: 指定时所有股票统一使用
+            incremental: 增量模式，从各股票最后同步日期的下一个交易日开始
+            all_history: 全历史模式，从1990-01-01开始
+            new_symbol_start: 增量模式下没有历史数据的股票的起始日期，默认从上市日期开始
+        """
+        self.full_history_symbols = set()
+        if start_date:
+            return {symbol: start_date for symbol in symbols}
+        if all_history:
+            self.full_history_symbols = set(symbols)
+            return {symbol: FULL_HISTORY_START for symbol in symbols}
+        if not incremental:
+            default_start = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+            return {symbol: default_start for symbol in symbols}
+
+        try:
+            latest_dates = await (await self._service()).get_latest_dates(symbols, self.data_source)
+        except Exception as e:
+            # 出错时从30天前开始，确保不漏数据
+            logger.error(f"❌ 批量获取最后同步日期失败 ({self.data_source}): {e}")
+            fallback = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+            return {symbol: fallback for symbol in symbols}
+
+        calendar = await asyncio.to_thread(get_trading_calendar, self.market)
+        start_dates = {s: next_sync_date(latest_dates[s], calendar) for s in symbols if latest_dates.get(s)}
+
+        new_symbols = [s for s in symbols if s not in start_dates]
+        self.full_history_symbols = set(new_symbols)
+        if new_symbols:
+            if new_symbol_start:
+                start_dates.update({s: new_symbol_start for s in new_symbols})
+            else:
+                # 🔥 没有历史数据时，从上市日期开始全量同步
+                try:
+                    list_dates = await self._get_list_dates(new_symbols)
+                except Exception as e:
+                    logger.error(f"❌ 批量获取上市日期失败: {e}")
+                    list_dates = {}
+                missing = [s for s in new_symbols if s not in list_dates]
+                if missing:
+                    logger.warning(f"⚠️ {len(missing)}只股票未找到上市日期，从{FULL_HISTORY_START}开始同步: {missing[:10]}")
+                start_dates.update({s: list_dates.get(s, FULL_HISTORY_START) for s in new_symbols})
+
+        logger.info(f"📅 {self.data_source} 起始日期已确定: {len(symbols)}只股票，其中{len(new_symbols)}只无历史数据")
+        return start_dates
+
+    def _update_indicator_state(self, symbol: str, df: pd.DataFrame, start_date: str, calendar):
+        """
+        用已写入的新K线推进增量指标状态（在线程中执行）
+
+        状态最后日期之前的K线已经计入，跳过；与最后日期相同的K线按盘中改写处理。
+        拉取区间晚于状态最后日期的下一个交易日时中间缺了K线，状态作废，
+        等下次全历史同步或调用方 get_or_build 时重建。
+        """
+        store, key = self.indicator_state, f"{self.data_source}_{self.period}"
+        bars = _indicator_bars(df)
+        if symbol in self.full_history_symbols:
+            engine = IncrementalIndicatorEngine(DEFAULT_SPECS)
+        else:
+            engine = store.load(symbol, key, DEFAULT_SPECS)
+            if engine is None or engine.last_date is None or \
+                    start_date > next_sync_date(engine.last_date, calendar):
+                store.delete(symbol, key)
+                return
+            bars = bars[bars["date"] >= pd.Timestamp(engine.last_date)]
+        if not bars.empty:
+            engine.warm_up(bars)
+            store.save(symbol, key, engine)
+
+    async def run(
+        self,
+        symbols: List[str],
+        end_date: Optional[str] = None,
+        start_date: Optional[str] = None,
+        incremental: bool = True,
+        all_history: bool = False,
+        new_symbol_start: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        执行同步
+
+        Returns:
+            统计信息：success_count / error_count / empty_symbols / total_records /
+            skipped_no_trading_days / errors / stopped
+        """
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        stats: Dict[str, Any] = {
+            "total_processed": len(symbols),
+            "success_count": 0,
+            "error_count": 0,
+            "empty_symbols": [],
+            "total_records": 0,
+            "skipped_no_trading_days": 0,
+            "errors": [],
+            "stopped": False,
+        }
+        if not symbols:
+            return stats
+
+        start_dates = await self.resolve_start_dates(symbols, start_date, incremental, all_history, new_symbol_start)
+        calendar = await asyncio.to_thread(get_trading_calendar, self.market)
+        service = await self._service()
+        if self.indicator_state is None and indicator_state_enabled():
+            self.indicator_state = await asyncio.to_thread(IndicatorStateStore)
+
+        pending = iter(symbols)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+        done = 0
+        period_name = {"daily": "日线", "weekly": "周线", "monthly": "月线"}.get(self.period, self.period)
+
+        async def fetch_worker():
+            nonlocal done
+            for symbol in pending:
+                if stats["stopped"]:
+                    return
+                symbol_start_date = start_dates.get(symbol, start_date)
+                try:
+                    if self.should_stop is not None and await self.should_stop():
+                        stats["stopped"] = True
+                        return
+
+                    # 区间内没有交易日（已同步到最新、周末或节假日）时不调用接口
+                    if calendar.covers(symbol_start_date, end_date) and \
+                            calendar.count_trading_days(symbol_start_date, end_date) == 0:
+                        stats["skipped_no_trading_days"] += 1
+                        logger.debug(f"⏭️ {symbol}: {symbol_start_date} ~ {end_date} 无交易日，跳过")
+                    else:
+                        if self.rate_limiter is not None:
+                            await self.rate_limiter.acquire(priority=PRIORITY_BULK)
+
+                        logger.debug(
+                            f"🔍 {symbol}: 请求{period_name}数据 "
+                            f"start={symbol_start_date}, end={end_date}, period={self.period}"
+                        )
+                        df = await self.fetch(symbol, symbol_start_date, end_date, self.period)
+
+                        if df is not None and not df.empty:
+                            if self.on_fetched is not None:
+                                await self.on_fetched(symbol, df)
+                            operations = await asyncio.to_thread(
+                                service.build_operations, symbol, df, self.data_source, self.market, self.period
+                            )
+                            # 写入失败时由写入协程改记为失败
+                            stats["success_count"] += 1
+                            await write_queue.put((symbol, operations, df))
+                        else:
+                            stats["empty_symbols"].append(symbol)
+                            logger.warning(
+                                f"⚠️ {symbol}: 无{period_name}数据 (start={symbol_start_date}, end={end_date})"
+                            )
+                except Exception as e:
+                    stats["error_count"] += 1
+                    stats["errors"].append({
+                        "code": symbol,
+                        "error": str(e),
+                        "error_type": type(e).__name__,
+                        "context": f"sync_historical_data_{self.period}",
+                    })
+                    logger.error(f"❌ {symbol} {period_name}数据同步失败 (start={symbol_start_date}, end={end_date}): {e}")
+
+                done += 1
+                if self.on_progress is not None:
+                    try:
+                        await self.on_progress(done, len(symbols), symbol, stats)
+                    except Exception as e:
+                        # 进度回调抛出异常（如任务已被取消）时停止派发新的股票
+                        logger.warning(f"⚠️ 进度回调失败，停止同步: {e}")
+                        stats["stopped"] = True
+                        return
+
+        failed_writes = set()
+
+        async def flush(buffer: List):
+            """写入一批操作；失败时把这批涉及的股票从成功改记为失败，成功时推进指标状态"""
+            operations = [op for _, ops, _ in buffer for op in ops]
+            try:
+                stats["total_records"] += await service.bulk_write(
+                    f"{self.data_source}-{self.period}", operations, raise_on_error=True
+                )
+            except Exception as e:
+                batch_symbols = list(dict.fromkeys(symbol for symbol, _, _ in buffer))
+                logger.error(
+                    f"❌ {self.data_source} {period_name}数据批量写入失败 "
+                    f"({len(operations)}条, {len(batch_symbols)}只股票): {e}"
+                )
+                for symbol in batch_symbols:
+                    if symbol in failed_writes:
+                        continue
+                    failed_writes.add(symbol)
+                    stats["success_count"] -= 1
+                    stats["error_count"] += 1
+                    stats["errors"].append({
+                        "code": symbol,
+                        "error": str(e),
+                        "error_type": type(e).__name__,
+                        "context": f"save_historical_data_{self.period}",
+                    })
+                return
+
+            if self.indicator_state is None:
+                return
+            for symbol, _, df in buffer:
+                try:
+                    await asyncio.to_thread(
+                        self._update_indicator_state, symbol, df, start_dates.get(symbol, start_date), calendar
+                    )
+                except Exception as e:
+                    # 指标状态只是加速用的缓存，失败不影响同步结果
+                    logger.warning(f"⚠️ {symbol} 增量指标状态更新失败: {e}")
+
+        async def writer():
+            buffer: List = []
+            buffered = 0
+            finished = False
+            while not finished:
+                try:
+                    if buffer:
+                        item = await asyncio.wait_for(write_queue.get(), timeout=WRITE_FLUSH_INTERVAL)
+                    else:
+                        item = await write_queue.get()
+                except asyncio.TimeoutError:
+                    item = ()
+
+                if item is None:
+                    finished = True
+                elif item:
+                    buffer.append(item)
+                    buffered += len(item[1])
+
+                # 攒够一批、拉取暂时没有新数据或全部结束时写入
+                if buffer and (finished or not item or buffered >= self.write_batch_size):
+                    await flush(buffer)
+                    buffer, buffered = [], 0
+
+        logger.info(
+            f"🚀 {self.data_source} {period_name}同步流水线启动: {len(symbols)}只股票, 并发{self.concurrency}"
+        )
+        writer_task = asyncio.create_task(writer())
+        workers = [asyncio.create_task(fetch_worker()) for _ in range(min(self.concurrency, len(symbols)))]
+        fetching = asyncio.gather(*workers)
+        try:
+            # 拉取全部结束、任一拉取协程异常或写入协程意外退出时返回；
+            # 异常时由 finally 取消其余协程，避免拉取协程阻塞在已满的写入队列上
+            completed, _ = await asyncio.wait([fetching, writer_task], return_when=asyncio.FIRST_COMPLETED)
+            for task in completed:
+                task.result()
+            await write_queue.put(None)
+            await writer_task
+        finally:
+            running = [task for task in workers + [writer_task] if not task.done()]
+            for task in running:
+                task.cancel()
+            await asyncio.gather(fetching, *running, return_exceptions=True)
+
+        return stats
@@ -3,7 +3,6 @@
 多周期历史数据同步服务
 支持日线、周线、月线数据的统一同步
 """
-import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
@@ -165,24 +164,18 @@ class MultiPeriodSyncService:
                 logger.error(f"❌ 不支持的数据源: {data_source}")
                 return stats
             
-            # 批量处理
-            batch_size = 50
-            for i in range(0, len(symbols), batch_size):
-                batch = symbols[i:i + batch_size]
-                batch_stats = await self._sync_batch_period_data(
-                    service, data_source, period, batch, start_date, end_date
-                )
-                
-                stats["records"] += batch_stats["records"]
-                stats["success"] += batch_stats["success"]
-                stats["errors"] += batch_stats["errors"]
-                
-                # 进度日志
-                progress = min(i + batch_size, len(symbols))
-                logger.info(f"📊 {data_source}-{period}进度: {progress}/{len(symbols)}")
-                
-                # API限流
-                await asyncio.sleep(0.5)
+            # 复用数据源服务的同步流水线（共享该数据源的速率限制器）
+            async def on_progress(done: int, total: int, symbol: str, pipeline_stats: Dict[str, Any]):
+                if done % 50 == 0 or done == total:
+                    logger.info(f"📊 {data_source}-{period}进度: {done}/{total}")
+
+            pipeline = service.create_historical_pipeline(period, on_fetched=None, on_progress=on_progress)
+            # 未指定开始日期时同步最近一年
+            result = await pipeline.run(symbols, end_date=end_date, start_date=start_date, incremental=False)
+
+            stats["records"] += result["total_records"]
+            stats["success"] += result["success_count"]
+            stats["errors"] += result["error_count"] + len(result["empty_symbols"])
             
             return stats
             
@@ -191,57 +184,6 @@ class MultiPeriodSyncService:
             stats["errors"] += 1
             return stats
     
-    async def _sync_batch_period_data(
-        self,
-        service,
-        data_source: str,
-        period: str,
-        symbols: List[str],
-        start_date: str = None,
-        end_date: str = None
-    ) -> Dict[str, Any]:
-        """同步批次周期数据"""
-        stats = {"records": 0, "success": 0, "errors": 0}
-        
-        for symbol in symbols:
-            try:
-                # 获取历史数据
-                if data_source == "tushare":
-                    hist_data = await service.provider.get_historical_data(
-                        symbol, start_date, end_date, period
-                    )
-                elif data_source == "akshare":
-                    hist_data = await service.provider.get_historical_data(
-                        symbol, start_date, end_date, period
-                    )
-                elif data_source == "baostock":
-                    hist_data = await service.provider.get_historical_data(
-                        symbol, start_date, end_date, period
-                    )
-                else:
-                    continue
-                
-                if hist_data is not None and not hist_data.empty:
-                    # 保存到数据库
-                    saved_count = await self.historical_service.save_historical_data(
-                        symbol=symbol,
-                        data=hist_data,
-                        data_source=data_source,
-                        market="CN",
-                        period=period
-                    )
-                    
-                    stats["records"] += saved_count
-                    stats["success"] += 1
-                else:
-                    stats["errors"] += 1
-                    
-            except Exception as e:
-                logger.error(f"❌ {symbol}-{period}同步失败: {e}")
-                stats["errors"] += 1
-        
-        return stats
-    
     async def _get_all_symbols(self) -> List[str]:
         """获取所有股票代码"""
         try:
@@ -8,12 +8,14 @@ from typing import List, Dict, Any, Optional
 import logging
 
 from tradingagents.dataflows.providers.china.tushare import TushareProvider
+from tradingagents.dataflows.trading_calendar import get_trading_calendar
 from app.services.stock_data_service import get_stock_data_service
 from app.services.historical_data_service import get_historical_data_service
 from app.services.news_data_service import get_news_data_service
 from app.core.database import get_mongo_db
 from app.core.config import settings
-from app.core.rate_limiter import get_tushare_rate_limiter
+from app.core.rate_limiter import PRIORITY_BULK, get_tushare_rate_limiter
+from app.worker.historical_sync_pipeline import HistoricalSyncPipeline, next_sync_date
 from app.utils.timezone import now_tz
 
 logger = logging.getLogger(__name__)
@@ -573,6 +575,7 @@ class TushareSyncService:
             "success_count": 0,
             "error_count": 0,
             "total_records": 0,
+            "skipped_no_trading_days": 0,
             "start_time": datetime.utcnow(),
             "errors": []
         }
@@ -624,108 +627,40 @@ class TushareSyncService:
 
             logger.info(f"📊 历史数据同步: 结束日期={end_date}, 股票数量={len(symbols)}, 模式={'增量' if incremental else '全量'}")
 
-            # 4. 批量处理
-            for i, symbol in enumerate(symbols):
-                # 记录单个股票开始时间
-                stock_start_time = datetime.now()
-
-                try:
-                    # 检查是否需要退出
-                    if job_id and await self._should_stop(job_id):
-                        logger.warning(f"⚠️ 任务 {job_id} 收到停止信号，正在退出...")
-                        stats["stopped"] = True
-                        break
-
-                    # 速率限制
-                    await self.rate_limiter.acquire()
-
-                    # 确定该股票的起始日期
-                    symbol_start_date = start_date
-                    if not symbol_start_date:
-                        if all_history:
-                            symbol_start_date = "1990-01-01"
-                        elif incremental:
-                            # 增量同步：获取该股票的最后日期
-                            symbol_start_date = await self._get_last_sync_date(symbol)
-                            logger.debug(f"📅 {symbol}: 从 {symbol_start_date} 开始同步")
-                        else:
-                            symbol_start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-
-                    # 记录请求参数
-                    logger.debug(
-                        f"🔍 {symbol}: 请求{period_name}数据 "
-                        f"start={symbol_start_date}, end={end_date}, period={period}"
-                    )
-
-                    # ⏱️ 性能监控：API 调用
-                    api_start = datetime.now()
-                    df = await self.provider.get_historical_data(symbol, symbol_start_date, end_date, period=period)
-                    api_duration = (datetime.now() - api_start).total_seconds()
-
-                    if df is not None and not df.empty:
-                        # ⏱️ 性能监控：数据保存
-                        save_start = datetime.now()
-                        records_saved = await self._save_historical_data(symbol, df, period=period)
-                        save_duration = (datetime.now() - save_start).total_seconds()
-
-                        stats["success_count"] += 1
-                        stats["total_records"] += records_saved
-
-                        # 计算单个股票耗时
-                        stock_duration = (datetime.now() - stock_start_time).total_seconds()
-                        logger.info(
-                            f"✅ {symbol}: 保存 {records_saved} 条{period_name}记录，"
-                            f"总耗时 {stock_duration:.2f}秒 "
-                            f"(API: {api_duration:.2f}秒, 保存: {save_duration:.2f}秒)"
-                        )
-                    else:
-                        stock_duration = (datetime.now() - stock_start_time).total_seconds()
-                        logger.warning(
-                            f"⚠️ {symbol}: 无{period_name}数据 "
-                            f"(start={symbol_start_date}, end={end_date})，耗时 {stock_duration:.2f}秒"
-                        )
-
-                    # 每个股票都更新进度
-                    progress_percent = int(((i + 1) / len(symbols)) * 100)
-
-                    # 更新任务进度
-                    if job_id:
-                        await self._update_progress(
-                            job_id,
-                            progress_percent,
-                            f"正在同步 {symbol} ({i + 1}/{len(symbols)})"
-                        )
-
-                    # 每50个股票输出一次详细日志
-                    if (i + 1) % 50 == 0 or (i + 1) == len(symbols):
-                        logger.info(f"📈 {period_name}数据同步进度: {i + 1}/{len(symbols)} ({progress_percent}%) "
-                                   f"(成功: {stats['success_count']}, 记录: {stats['total_records']})")
-
-                        # 输出速率限制器统计
-                        limiter_stats = self.rate_limiter.get_stats()
-                        logger.info(f"   速率限制: {limiter_stats['current_calls']}/{limiter_stats['max_calls']}次, "
-                                   f"等待次数: {limiter_stats['total_waits']}, "
-                                   f"总等待时间: {limiter_stats['total_wait_time']:.1f}秒")
+            # 4. 流水线处理：批量确定起始日期 -> 并发拉取 -> 跨股票批量写入
+            async def should_stop() -> bool:
+                if job_id and await self._should_stop(job_id):
+                    logger.warning(f"⚠️ 任务 {job_id} 收到停止信号，正在退出...")
+                    return True
+                return False
 
-                except Exception as e:
-                    import traceback
-                    error_details = traceback.format_exc()
-                    stats["error_count"] += 1
-                    stats["errors"].append({
-                        "code": symbol,
-                        "error": str(e),
-                        "error_type": type(e).__name__,
-                        "context": f"sync_historical_data_{period}",
-                        "traceback": error_details
-                    })
-                    logger.error(
-                        f"❌ {symbol} {period_name}数据同步失败\n"
-                        f"   参数: start={symbol_start_date if 'symbol_start_date' in locals() else 'N/A'}, "
-                        f"end={end_date}, period={period}\n"
-                        f"   错误类型: {type(e).__name__}\n"
-                        f"   错误信息: {str(e)}\n"
-                        f"   堆栈跟踪:\n{error_details}"
-                    )
+            async def on_progress(done: int, total: int, symbol: str, pipeline_stats: Dict[str, Any]):
+                # 每个股票都更新进度
+                progress_percent = int((done / total) * 100)
+                if job_id:
+                    await self._update_progress(job_id, progress_percent, f"正在同步 {symbol} ({done}/{total})")
+
+                # 每50个股票输出一次详细日志
+                if done % 50 == 0 or done == total:
+                    logger.info(f"📈 {period_name}数据同步进度: {done}/{total} ({progress_percent}%) "
+                               f"(成功: {pipeline_stats['success_count']}, 记录: {pipeline_stats['total_records']})")
+
+                    # 输出速率限制器统计
+                    limiter_stats = self.rate_limiter.get_stats()
+                    logger.info(f"   速率限制: {limiter_stats['current_calls']}/{limiter_stats['max_calls']}次, "
+                               f"等待次数: {limiter_stats['total_waits']}, "
+                               f"总等待时间: {limiter_stats['total_wait_time']:.1f}秒")
+
+            pipeline = self.create_historical_pipeline(period, should_stop=should_stop, on_progress=on_progress)
+            result = await pipeline.run(
+                symbols, end_date=end_date, start_date=start_date,
+                incremental=incremental, all_history=all_history
+            )
+            for key in ("success_count", "error_count", "total_records", "skipped_no_trading_days"):
+                stats[key] += result[key]
+            stats["errors"].extend(result["errors"])
+            if result["stopped"]:
+                stats["stopped"] = True
 
             # 4. 完成统计
             stats["end_time"] = datetime.utcnow()
@@ -735,6 +670,7 @@ class TushareSyncService:
                        f"股票 {stats['success_count']}/{stats['total_processed']}, "
                        f"记录 {stats['total_records']} 条, "
                        f"错误 {stats['error_count']} 个, "
+                       f"无交易日跳过 {stats['skipped_no_trading_days']} 个, "
                        f"耗时 {stats['duration']:.2f} 秒")
 
             return stats
@@ -756,6 +692,18 @@ class TushareSyncService:
             })
             return stats
 
+    def create_historical_pipeline(self, period: str = "daily", **kwargs) -> HistoricalSyncPipeline:
+        """创建 Tushare 历史数据同步流水线（共享 Tushare 速率限制器）"""
+        return HistoricalSyncPipeline(
+            data_source="tushare",
+            fetch=self.provider.get_historical_data,
+            period=period,
+            rate_limiter=self.rate_limiter,
+            db=self.db,
+            historical_service=self.historical_service,
+            **kwargs
+        )
+
     async def _save_historical_data(self, symbol: str, df, period: str = "daily") -> int:
         """保存历史数据到数据库"""
         try:
@@ -795,14 +743,8 @@ class TushareSyncService:
                 # 获取特定股票的最新日期
                 latest_date = await self.historical_service.get_latest_date(symbol, "tushare")
                 if latest_date:
-                    # 返回最后日期的下一天（避免重复同步）
-                    try:
-                        last_date_obj = datetime.strptime(latest_date, '%Y-%m-%d')
-                        next_date = last_date_obj + timedelta(days=1)
-                        return next_date.strftime('%Y-%m-%d')
-                    except:
-                        # 如果日期格式不对，直接返回
-                        return latest_date
+                    # 返回最后日期之后的下一个交易日（避免重复同步，并跳过已知的休市日）
+                    return next_sync_date(latest_date, get_trading_calendar("CN"))
                 else:
                     # 🔥 没有历史数据时，从上市日期开始全量同步
                     stock_info = await self.db.stock_basic_info.find_one(
@@ -876,8 +818,8 @@ class TushareSyncService:
             # 批量处理
             for i, symbol in enumerate(symbols):
                 try:
-                    # 速率限制
-                    await self.rate_limiter.acquire()
+                    # 速率限制（批量同步不占用为交互式分析预留的配额）
+                    await self.rate_limiter.acquire(priority=PRIORITY_BULK)
 
                     # 获取财务数据（指定获取期数）
                     financial_data = await self.provider.get_financial_data(symbol, limit=limit)
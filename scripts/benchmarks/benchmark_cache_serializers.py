@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+DataFrame 缓存序列化格式基准测试
+
+对比旧的 CSV（文件缓存）/ JSON records（数据库缓存）与 Arrow IPC / Parquet 的
+写入、读取耗时和体积。
+
+用法:
+    python scripts/benchmarks/benchmark_cache_serializers.py --rows 4000 --repeat 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from tradingagents.dataflows.cache.serializers import (
+    ArrowIPCSerializer,
+    CSVSerializer,
+    JSONRecordsSerializer,
+    ParquetSerializer,
+    PYARROW_AVAILABLE,
+)
+
+
+def make_ohlcv(rows: int) -> pd.DataFrame:
+    """生成与行情缓存结构一致的日线数据"""
+    rng = np.random.default_rng(42)
+    close = 10 + rng.standard_normal(rows).cumsum() * 0.1
+    index = pd.bdate_range("2010-01-04", periods=rows, name="date")
+    return pd.DataFrame({
+        "open": close + rng.standard_normal(rows) * 0.05,
+        "high": close + 0.2,
+        "low": close - 0.2,
+        "close": close,
+        "volume": rng.integers(1_000_000, 50_000_000, rows),
+        "amount": rng.random(rows) * 1e9,
+        "code": "000001",
+    }, index=index)
+
+
+def bench(label, write, read, size, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        write()
+    write_ms = (time.perf_counter() - start) / repeat * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        df = read()
+    read_ms = (time.perf_counter() - start) / repeat * 1000
+
+    print(f"{label:<28}{write_ms:>10.2f}{read_ms:>10.2f}{size() / 1024:>12.1f}")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DataFrame缓存序列化基准测试")
+    parser.add_argument("--rows", type=int, default=4000, help="每个DataFrame的行数（默认约15年日线）")
+    parser.add_argument("--repeat", type=int, default=20, help="每种格式重复次数")
+    args = parser.parse_args()
+
+    df = make_ohlcv(args.rows)
+    print(f"数据: {len(df)} 行 x {len(df.columns)} 列, 重复 {args.repeat} 次")
+    print(f"{'格式':<28}{'写入ms':>10}{'读取ms':>10}{'大小KB':>12}")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        # 文件后端
+        file_cases = [("file csv (旧)", CSVSerializer(), False)]
+        if PYARROW_AVAILABLE:
+            file_cases += [
+                ("file arrow (mmap)", ArrowIPCSerializer(), True),
+                ("file parquet", ParquetSerializer(), False),
+            ]
+        for label, serializer, memory_map in file_cases:
+            path = tmp / f"bench.{serializer.file_extension}"
+            result = bench(
+                label,
+                lambda: serializer.write_file(df, path),
+                lambda: serializer.read_file(path, memory_map=memory_map),
+                lambda: os.path.getsize(path),
+                args.repeat,
+            )
+            print(f"{'':<28}index={type(result.index).__name__}, volume={result['volume'].dtype}")
+
+        # Redis/MongoDB 后端（内存中的字节）
+        blob_cases = [("blob json records (旧)", JSONRecordsSerializer())]
+        if PYARROW_AVAILABLE:
+            blob_cases += [("blob arrow zstd", ArrowIPCSerializer(compression="zstd"))]
+        for label, serializer in blob_cases:
+            holder = {}
+
+            def write(serializer=serializer, holder=holder):
+                holder["payload"] = serializer.dumps(df)
+
+            bench(
+                label,
+                write,
+                lambda serializer=serializer, holder=holder: serializer.loads(holder["payload"]),
+                lambda holder=holder: len(holder["payload"]),
+                args.repeat,
+            )
+
+    if not PYARROW_AVAILABLE:
+        print("\n⚠️ 未安装 pyarrow，仅测试了旧格式")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+分析任务启动延迟基准测试
+
+对比两种获取 TradingAgentsGraph 的方式（只测到拿到可执行的图为止，不调用模型）：
+- 每次新建：旧版 SimpleAnalysisService._get_trading_graph 的行为（LLM 客户端、记忆库、ToolNode、编译 LangGraph）
+- 复用池：get_graph_pool().get(config)，首次构建后按配置复用
+
+默认关闭记忆库（开启需要可用的 Embedding 配置）；未设置 OPENAI_API_KEY 时使用占位值，构建客户端不会发起请求。
+
+用法:
+    python scripts/benchmarks/benchmark_graph_pool.py --iterations 20 --analysts market news fundamentals
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from tradingagents.default_config import DEFAULT_CONFIG
+from tradingagents.graph.graph_pool import TradingGraphPool, _build_trading_graph
+
+
+def build_config(args) -> dict:
+    config = DEFAULT_CONFIG.copy()
+    config.update({
+        "llm_provider": "openai",
+        "quick_think_llm": args.quick_model,
+        "deep_think_llm": args.deep_model,
+        "selected_analysts": args.analysts,
+        "research_depth": "标准",
+        "memory_enabled": args.memory,
+        "online_tools": True,
+    })
+    return config
+
+
+def summarize(label: str, samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {label:<10} 平均 {statistics.mean(samples) * 1000:9.1f} ms   "
+          f"P50 {statistics.median(samples) * 1000:9.1f} ms   P95 {p95 * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分析任务启动延迟基准测试")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--analysts", nargs="+", default=["market", "fundamentals"])
+    parser.add_argument("--quick-model", default="gpt-4o-mini")
+    parser.add_argument("--deep-model", default="o4-mini")
+    parser.add_argument("--memory", action="store_true", help="启用 FinancialSituationMemory")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark-placeholder")
+    config = build_config(args)
+
+    print(f"📊 分析师: {args.analysts}, 记忆库: {'开启' if args.memory else '关闭'}, 次数: {args.iterations}")
+
+    fresh = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        _build_trading_graph(dict(config))
+        fresh.append(time.perf_counter() - start)
+
+    pool = TradingGraphPool()
+    start = time.perf_counter()
+    pool.get(dict(config))
+    first = time.perf_counter() - start
+    pooled = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        pool.get(dict(config))
+        pooled.append(time.perf_counter() - start)
+
+    print("\n⏱️ 获取图实例耗时")
+    summarize("每次新建", fresh)
+    summarize("复用池", pooled)
+    print(f"  复用池首次构建 {first * 1000:.1f} ms，命中率 {pool.stats()['hit_rate']:.0%}")
+    print(f"  加速比 {statistics.mean(fresh) / statistics.mean(pooled):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+技术指标计算基准测试
+
+对比旧实现（逐指标 compute_indicator + 逐行循环 KDJ）与单次计算的 compute_many。
+
+用法:
+    python scripts/benchmarks/benchmark_indicators.py --rows 5000 --repeat 10
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from tradingagents.tools.analysis import indicators
+from tradingagents.tools.analysis.indicators import IndicatorSpec, compute_indicator, compute_many
+
+
+SPECS = [
+    IndicatorSpec("ma", {"n": 5}),
+    IndicatorSpec("ma", {"n": 10}),
+    IndicatorSpec("ma", {"n": 20}),
+    IndicatorSpec("ema", {"n": 12}),
+    IndicatorSpec("ema", {"n": 26}),
+    IndicatorSpec("macd"),
+    IndicatorSpec("rsi", {"n": 14}),
+    IndicatorSpec("boll", {"n": 20, "k": 2}),
+    IndicatorSpec("atr", {"n": 14}),
+    IndicatorSpec("kdj", {"n": 9, "m1": 3, "m2": 3}),
+]
+
+
+def make_ohlcv(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    close = 10 + rng.standard_normal(rows).cumsum() * 0.1
+    return pd.DataFrame({
+        "open": close,
+        "high": close + rng.uniform(0, 0.3, rows),
+        "low": close - rng.uniform(0, 0.3, rows),
+        "close": close,
+        "vol": rng.integers(1_000_000, 50_000_000, rows).astype(float),
+    }, index=pd.bdate_range("2000-01-03", periods=rows, name="date"))
+
+
+def legacy_kdj(high, low, close, n=9, m1=3, m2=3):
+    """旧版逐行循环实现"""
+    lowest_low = low.rolling(window=int(n), min_periods=int(n)).min()
+    highest_high = high.rolling(window=int(n), min_periods=int(n)).max()
+    rsv = ((close - lowest_low) / (highest_high - lowest_low) * 100).replace([np.inf, -np.inf], np.nan)
+    k = pd.Series(np.nan, index=close.index)
+    d = pd.Series(np.nan, index=close.index)
+    last_k = last_d = 50.0
+    for i in range(len(close)):
+        rv = rsv.iloc[i]
+        if np.isnan(rv):
+            continue
+        last_k = (1 - 1 / m1) * last_k + 1 / m1 * rv
+        last_d = (1 - 1 / m2) * last_d + 1 / m2 * last_k
+        k.iloc[i] = last_k
+        d.iloc[i] = last_d
+    return pd.DataFrame({"kdj_k": k, "kdj_d": d, "kdj_j": 3 * k - 2 * d})
+
+
+def legacy_compute_many(df: pd.DataFrame) -> pd.DataFrame:
+    """旧版：每个指标复制一次 DataFrame，KDJ 逐行循环"""
+    out = df.copy()
+    for spec in SPECS:
+        if spec.name == "kdj":
+            out = out.copy()
+            kdj_df = legacy_kdj(out["high"], out["low"], out["close"])
+            for c in kdj_df.columns:
+                out[c] = kdj_df[c]
+        else:
+            out = compute_indicator(out, spec)
+    return out
+
+
+def bench(label, fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+    print(f"{label:<36}{elapsed_ms:>12.2f}")
+    return result, elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="技术指标计算基准测试")
+    parser.add_argument("--rows", type=int, default=5000, help="K线数量（默认约20年日线）")
+    parser.add_argument("--repeat", type=int, default=10, help="重复次数")
+    args = parser.parse_args()
+
+    df = make_ohlcv(args.rows)
+    print(f"数据: {len(df)} 行, 指标 {len(SPECS)} 个, 重复 {args.repeat} 次, "
+          f"scipy={'是' if indicators.SCIPY_AVAILABLE else '否'}")
+    print(f"{'实现':<36}{'耗时ms':>12}")
+    print("-" * 48)
+
+    _, kdj_old = bench("kdj 逐行循环（旧）", lambda: legacy_kdj(df["high"], df["low"], df["close"]), args.repeat)
+    _, kdj_new = bench("kdj 递推滤波", lambda: indicators.kdj(df["high"], df["low"], df["close"]), args.repeat)
+    old, many_old = bench("compute_many 逐指标（旧）", lambda: legacy_compute_many(df), args.repeat)
+    new, many_new = bench("compute_many 单次计算", lambda: compute_many(df, SPECS), args.repeat)
+
+    max_diff = (new[old.columns].astype(float) - old.astype(float)).abs().max().max()
+    print("-" * 48)
+    print(f"kdj 加速: {kdj_old / kdj_new:.1f}x, compute_many 加速: {many_old / many_new:.1f}x, "
+          f"最大误差: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
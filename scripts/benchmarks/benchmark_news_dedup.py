@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+新闻去重基准测试
+
+生成带转载变体的合成新闻（加来源前缀、改标点、删一个字），对比：
+- 标题精确去重（旧实现）
+- MinHash + LSH 近似去重：dedupe_near_duplicates
+- 两两比较估计 Jaccard（仅在小规模下运行，作为平方级参照）
+
+用法:
+    python scripts/benchmarks/benchmark_news_dedup.py --sizes 10000 100000
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from tradingagents.utils.news_dedup import (
+    DEFAULT_THRESHOLD,
+    dedupe_near_duplicates,
+    estimate_jaccard,
+    minhash_signature,
+    shingles,
+)
+
+COMPANIES = ["贵州茅台", "宁德时代", "比亚迪", "招商银行", "中国平安", "隆基绿能", "五粮液", "美的集团", "恒瑞医药", "中信证券"]
+EVENTS = ["三季度净利润同比增长", "发布回购计划金额不超过", "获北向资金净买入", "签署战略合作协议涉及金额",
+          "股东减持比例达到", "上半年营收同比下降", "拟定增募资", "新产品销量环比增长"]
+SOURCES = ["证券时报", "财联社", "东方财富", "新浪财经", "同花顺", "某自媒体"]
+PUNCT = ["：", "，", " ", "！"]
+
+
+def make_news(n: int, syndication: int, seed: int = 7):
+    """每篇原稿平均被转载 syndication 次"""
+    rng = random.Random(seed)
+    t0 = datetime(2026, 10, 15, 9, 0)
+    news = []
+    while len(news) < n:
+        company = rng.choice(COMPANIES)
+        event = rng.choice(EVENTS)
+        number = rng.randint(1, 9999)
+        title = f"{company}{event}{number}万元"
+        body = f"{company}公告显示，公司{event}{number}万元，编号{rng.randint(0, 10**9)}，详情见公告全文。"
+        for _ in range(rng.randint(1, 2 * syndication - 1)):
+            variant = title
+            roll = rng.random()
+            if roll < 0.3:
+                variant = f"【{rng.choice(SOURCES)}】{variant}"
+            elif roll < 0.6:
+                variant = variant.replace(event, rng.choice(PUNCT) + event, 1)
+            elif roll < 0.8:
+                pos = rng.randrange(len(company), len(variant))
+                variant = variant[:pos] + variant[pos + 1:]
+            news.append({
+                "title": variant,
+                "content": body,
+                "source": rng.choice(SOURCES),
+                "publish_time": t0 + timedelta(minutes=rng.randint(0, 600)),
+            })
+    return news[:n]
+
+
+def exact_title_dedupe(news):
+    seen = set()
+    kept = []
+    for item in news:
+        if item["title"] not in seen:
+            seen.add(item["title"])
+            kept.append(item)
+    return kept
+
+
+def pairwise_dedupe(news):
+    signatures = [minhash_signature(shingles(n["title"], n["content"])) for n in news]
+    kept = []
+    for i, sig in enumerate(signatures):
+        if all(estimate_jaccard(sig, signatures[j]) < DEFAULT_THRESHOLD for j in kept):
+            kept.append(i)
+    return [news[i] for i in kept]
+
+
+def timed(label, func, news):
+    start = time.perf_counter()
+    kept = func(news)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed:8.3f}s  保留 {len(kept):>7} 条")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="新闻去重基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--syndication", type=int, default=4, help="每篇原稿的平均转载数")
+    parser.add_argument("--pairwise-limit", type=int, default=10000, help="两两比较参照的最大规模")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        news = make_news(size, args.syndication)
+        print(f"\n📰 {size} 条新闻（平均每篇转载 {args.syndication} 次）")
+        timed("标题精确去重", exact_title_dedupe, news)
+        timed("MinHash + LSH", lambda items: dedupe_near_duplicates(
+            items,
+            title=lambda n: n["title"],
+            content=lambda n: n["content"],
+            publish_time=lambda n: n["publish_time"],
+            source=lambda n: n["source"],
+            keep="authority",
+        ), news)
+        if size <= args.pairwise_limit:
+            timed("两两比较", pairwise_dedupe, news)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+进度查询基准测试
+
+模拟多个前端轮询者并发查询任务进度，对比：
+- 旧实现：每次查询新建 redis.Redis 客户端
+- 共享连接池：ProgressStore.get
+- 批量 MGET：ProgressStore.get_many（每次查询一组任务）
+- 异步接口：ProgressStore.aget_many
+
+需要可用的 Redis，默认使用 db 15；测试结束后删除写入的键。
+连接池使用默认大小（REDIS_MAX_CONNECTIONS，默认20），轮询者多于连接数时排队等待空闲连接。
+
+用法:
+    python scripts/benchmarks/benchmark_progress_store.py --pollers 50 --tasks 20 --seconds 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import redis
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from app.services.progress.store import ProgressStore
+
+
+def legacy_get(task_id: str, host: str, port: int, db: int):
+    """旧版 get_progress_by_id：每次调用新建客户端"""
+    client = redis.Redis(host=host, port=port, db=db, decode_responses=True)
+    data = client.get(f"progress:{task_id}")
+    return json.loads(data) if data else None
+
+
+def run_threads(pollers: int, seconds: float, fn) -> float:
+    """pollers 个线程循环调用 fn，返回每秒完成的任务查询数"""
+    stop = time.perf_counter() + seconds
+    counts = [0] * pollers
+
+    def worker(i):
+        while time.perf_counter() < stop:
+            counts[i] += fn(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(pollers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / seconds
+
+
+async def run_coroutines(pollers: int, seconds: float, store: ProgressStore, task_ids) -> float:
+    stop = time.perf_counter() + seconds
+    counts = [0] * pollers
+
+    async def worker(i):
+        while time.perf_counter() < stop:
+            await store.aget_many(task_ids)
+            counts[i] += len(task_ids)
+
+    await asyncio.gather(*(worker(i) for i in range(pollers)))
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="进度查询基准测试")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--pollers", type=int, default=50, help="并发轮询者数量")
+    parser.add_argument("--tasks", type=int, default=20, help="每个轮询者关注的任务数")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    url = urlparse(args.redis_url)
+    host, port, db = url.hostname or "localhost", url.port or 6379, int((url.path or "/0").lstrip("/") or 0)
+    os.environ.update({"REDIS_ENABLED": "true", "REDIS_HOST": host, "REDIS_PORT": str(port), "REDIS_DB": str(db)})
+
+    store = ProgressStore()
+    task_ids = [f"bench-progress-{i}" for i in range(args.tasks)]
+    payload = json.dumps({"status": "running", "progress_percentage": 42, "steps": [{"name": "step"}] * 10})
+    for task_id in task_ids:
+        store.save(task_id, payload)
+
+    try:
+        print(f"Redis: {args.redis_url}, 轮询者 {args.pollers}, 每组任务 {args.tasks}, 时长 {args.seconds}s")
+        print(f"{'实现':<28}{'任务查询/秒':>14}")
+        print("-" * 42)
+
+        def legacy_poll(i):
+            legacy_get(task_ids[i % len(task_ids)], host, port, db)
+            return 1
+
+        def pooled_poll(i):
+            store.get(task_ids[i % len(task_ids)])
+            return 1
+
+        def batch_poll(i):
+            return len(store.get_many(task_ids))
+
+        rates = {
+            "每次新建客户端（旧）": run_threads(args.pollers, args.seconds, legacy_poll),
+            "共享连接池 get": run_threads(args.pollers, args.seconds, pooled_poll),
+            "共享连接池 get_many (MGET)": run_threads(args.pollers, args.seconds, batch_poll),
+            "异步 aget_many (MGET)": asyncio.run(
+                run_coroutines(args.pollers, args.seconds, store, task_ids)),
+        }
+        baseline = rates["每次新建客户端（旧）"]
+        for label, rate in rates.items():
+            print(f"{label:<28}{rate:>14.0f}  ({rate / baseline:.1f}x)")
+        if not store._redis_usable():
+            print("⚠️ 测试期间 Redis 被停用，部分查询走了文件存储，结果无效")
+    finally:
+        store.client().delete(*[f"progress:{task_id}" for task_id in task_ids])
+
+
+if __name__ == "__main__":
+    main()
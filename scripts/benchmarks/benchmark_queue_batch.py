@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+批量入队基准测试
+
+对比逐个 enqueue_task（旧版 create_batch）与管道化的 enqueue_tasks_bulk。
+需要可用的 Redis，默认使用 db 15；测试结束后删除本次写入的键。
+
+用法:
+    python scripts/benchmarks/benchmark_queue_batch.py --redis-url redis://localhost:6379/15
+    python scripts/benchmarks/benchmark_queue_batch.py --sizes 100 1000 5000 --repeat 3
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from redis.asyncio import Redis
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from app.services.queue import BATCH_PREFIX, BATCH_TASKS_PREFIX, READY_LIST, TASK_PREFIX
+from app.services.queue_service import QueueService
+
+
+async def legacy_create_batch(qs: QueueService, user_id: str, symbols, params, batch_id: str):
+    """旧版：逐个调用 enqueue_task"""
+    return [
+        await qs.enqueue_task(user_id=user_id, symbol=s, params=params, batch_id=batch_id)
+        for s in symbols
+    ]
+
+
+async def cleanup(r: Redis, batch_id: str, task_ids):
+    pipe = r.pipeline(transaction=False)
+    for task_id in task_ids:
+        pipe.delete(TASK_PREFIX + task_id)
+        pipe.lrem(READY_LIST, 0, task_id)
+    pipe.delete(BATCH_PREFIX + batch_id, BATCH_TASKS_PREFIX + batch_id)
+    await pipe.execute()
+
+
+async def bench(qs: QueueService, label: str, size: int, repeat: int, bulk: bool) -> float:
+    symbols = [f"{i:06d}" for i in range(size)]
+    params = {"research_depth": "标准"}
+    total = 0.0
+    for n in range(repeat):
+        batch_id = f"bench-{label}-{size}-{n}"
+        start = time.perf_counter()
+        if bulk:
+            task_ids = await qs.enqueue_tasks_bulk("bench-user", symbols, params, batch_id=batch_id)
+        else:
+            task_ids = await legacy_create_batch(qs, "bench-user", symbols, params, batch_id)
+        total += time.perf_counter() - start
+        await cleanup(qs.r, batch_id, task_ids)
+    return total / repeat * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="批量入队基准测试")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    r = Redis.from_url(args.redis_url, decode_responses=True)
+    await r.ping()
+    qs = QueueService(r)
+
+    print(f"Redis: {args.redis_url}, 重复 {args.repeat} 次")
+    print(f"{'批量大小':>10}{'逐个入队ms':>16}{'管道入队ms':>16}{'加速':>10}")
+    print("-" * 52)
+    for size in args.sizes:
+        legacy_ms = await bench(qs, "legacy", size, args.repeat, bulk=False)
+        bulk_ms = await bench(qs, "bulk", size, args.repeat, bulk=True)
+        print(f"{size:>10}{legacy_ms:>16.1f}{bulk_ms:>16.1f}{legacy_ms / bulk_ms:>9.1f}x")
+
+    await r.aclose() if hasattr(r, "aclose") else await r.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
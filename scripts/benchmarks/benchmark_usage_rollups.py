@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+使用统计基准测试
+
+向临时数据库写入合成的 Token 使用记录（默认 100 万条，分布在最近 90 天），对比：
+- 原始记录扫描：UsageStatisticsService 旧实现（find 全部记录后在 Python 中累加）
+- 原始记录聚合：MongoDBStorage 旧实现（$match + $group）
+- 预聚合汇总：window_filter 读取小时/天汇总文档后 merge_rollups
+
+需要可用的 MongoDB；测试结束后删除临时数据库（--keep 保留）。
+
+用法:
+    python scripts/benchmarks/benchmark_usage_rollups.py --rows 1000000 --days 1 7 30 90
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pymongo import MongoClient
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from tradingagents.config.usage_rollups import (
+    ROLLUP_COLLECTION,
+    aggregate_records,
+    merge_rollups,
+    rollup_replacements,
+    window_filter,
+)
+
+MODELS = [("dashscope", "qwen-turbo"), ("dashscope", "qwen-plus"), ("deepseek", "deepseek-chat"),
+          ("openai", "gpt-4o-mini"), ("google", "gemini-2.5-flash")]
+
+
+def generate(rows: int, span_days: int, users: int, seed: int = 42):
+    rng = random.Random(seed)
+    now = datetime.now()
+    for i in range(rows):
+        provider, model = rng.choice(MODELS)
+        ts = now - timedelta(seconds=rng.randint(0, span_days * 86400))
+        input_tokens = rng.randint(500, 8000)
+        output_tokens = rng.randint(100, 2000)
+        yield {
+            "timestamp": ts.isoformat(),
+            "provider": provider,
+            "model_name": model,
+            "user_id": f"user{rng.randrange(users)}",
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost": round((input_tokens * 0.002 + output_tokens * 0.006) / 1000, 6),
+            "currency": "CNY",
+            "session_id": f"bench_{i}",
+            "analysis_type": "stock_analysis",
+        }
+
+
+def load(db, rows: int, span_days: int, users: int, batch_size: int = 20000):
+    raw = db["token_usage"]
+    raw.create_index("timestamp")
+    totals = None
+    batch = []
+    start = time.perf_counter()
+    for doc in generate(rows, span_days, users):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            totals = aggregate_records(batch, into=totals)
+            raw.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        totals = aggregate_records(batch, into=totals)
+        raw.insert_many(batch, ordered=False)
+    rollups = db[ROLLUP_COLLECTION]
+    rollups.create_index([("granularity", 1), ("bucket", 1)])
+    rollups.bulk_write(rollup_replacements(totals), ordered=False)
+    print(f"📥 写入 {rows} 条原始记录、{len(totals)} 个汇总文档，耗时 {time.perf_counter() - start:.1f}s")
+
+
+def raw_scan(db, start, end):
+    """旧版服务：读取窗口内全部原始记录后累加"""
+    requests = 0
+    cost = 0.0
+    for doc in db["token_usage"].find({"timestamp": {"$gte": start.isoformat(), "$lte": end.isoformat()}}):
+        requests += 1
+        cost += doc.get("cost", 0.0)
+    return requests, cost
+
+
+def raw_aggregate(db, start, end):
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": start.isoformat(), "$lte": end.isoformat()}}},
+        {"$group": {"_id": None, "requests": {"$sum": 1}, "cost": {"$sum": "$cost"}}},
+    ]
+    result = list(db["token_usage"].aggregate(pipeline))
+    return (result[0]["requests"], result[0]["cost"]) if result else (0, 0.0)
+
+
+def rollup_query(db, start, end):
+    docs = list(db[ROLLUP_COLLECTION].find(window_filter(start, end)))
+    merged = merge_rollups(docs)
+    return merged["requests"], merged["cost"], len(docs)
+
+
+def timed(func, *args, repeat: int = 3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="使用统计基准测试")
+    parser.add_argument("--connection-string", default=os.getenv("MONGODB_CONNECTION_STRING", "mongodb://localhost:27017/"))
+    parser.add_argument("--database", default="tradingagents_bench_usage")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--span-days", type=int, default=90)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 7, 30, 90])
+    parser.add_argument("--skip-scan", action="store_true", help="跳过最慢的原始记录扫描")
+    parser.add_argument("--keep", action="store_true", help="保留临时数据库")
+    args = parser.parse_args()
+
+    client = MongoClient(args.connection_string)
+    client.drop_database(args.database)
+    db = client[args.database]
+    try:
+        load(db, args.rows, args.span_days, args.users)
+        end = datetime.now()
+        for days in args.days:
+            start = end - timedelta(days=days)
+            print(f"\n📊 最近 {days} 天")
+            if not args.skip_scan:
+                elapsed, (requests, _) = timed(raw_scan, db, start, end, repeat=1)
+                print(f"  原始记录扫描   {elapsed * 1000:10.1f} ms  ({requests} 条)")
+            elapsed, (requests, _) = timed(raw_aggregate, db, start, end)
+            print(f"  原始记录聚合   {elapsed * 1000:10.1f} ms  ({requests} 条)")
+            elapsed, (requests, _, docs) = timed(rollup_query, db, start, end)
+            print(f"  预聚合汇总     {elapsed * 1000:10.1f} ms  ({requests} 条，读取 {docs} 个汇总文档)")
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Token 使用汇总回填脚本
+
+根据 token_usage 集合中已有的原始记录重建 token_usage_rollups 的小时/天汇总文档。
+新写入的记录会自动维护汇总；升级后对历史数据执行一次即可，可重复执行（结果相同）。
+回填期间新写入的增量可能被覆盖，建议在没有分析任务运行时执行。
+
+使用方法：
+    python scripts/maintenance/backfill_usage_rollups.py
+    python scripts/maintenance/backfill_usage_rollups.py --connection-string mongodb://localhost:27017/ --database tradingagents
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from tradingagents.config.mongodb_storage import MongoDBStorage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回填 Token 使用汇总")
+    parser.add_argument("--connection-string", default=os.getenv("MONGODB_CONNECTION_STRING"),
+                        help="MongoDB 连接字符串（默认读取 MONGODB_CONNECTION_STRING）")
+    parser.add_argument("--database", default=os.getenv("MONGODB_DATABASE_NAME", "tradingagents"))
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    storage = MongoDBStorage(connection_string=args.connection_string, database_name=args.database)
+    if not storage.is_connected():
+        print("❌ 无法连接 MongoDB")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    processed = storage.backfill_rollups(batch_size=args.batch_size)
+    print(f"✅ 回填完成: {processed} 条原始记录，耗时 {time.perf_counter() - start:.1f}s")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+使用记录缓冲写入测试
+"""
+import threading
+
+from tradingagents.config.usage_models import UsageRecord
+from tradingagents.config.usage_recorder import UsageLogFile, UsageRecorder
+
+
+def _record(i: int, provider: str = "dashscope") -> UsageRecord:
+    return UsageRecord(
+        timestamp=f"2026-10-15T09:00:{i % 60:02d}+08:00",
+        provider=provider,
+        model_name="qwen-turbo",
+        input_tokens=100,
+        output_tokens=50,
+        cost=0.01,
+        session_id=f"s{i}",
+    )
+
+
+def test_recorder_batches_writes_off_caller_thread():
+    batches = []
+    writer_threads = set()
+
+    def sink(batch):
+        writer_threads.add(threading.current_thread().name)
+        batches.append(list(batch))
+
+    recorder = UsageRecorder(sink, capacity=100, batch_size=10, flush_interval=60)
+    for i in range(25):
+        recorder.record(_record(i))
+
+    assert recorder.flush(timeout=5)
+    assert sum(len(b) for b in batches) == 25
+    assert max(len(b) for b in batches) <= 10
+    assert writer_threads == {"usage-recorder"}
+    recorder.close()
+
+
+def test_recorder_is_bounded_and_drains_on_close():
+    release = threading.Event()
+    written = []
+
+    def slow_sink(batch):
+        release.wait(5)
+        written.extend(batch)
+
+    recorder = UsageRecorder(slow_sink, capacity=5, batch_size=1, flush_interval=60)
+    recorder.record(_record(0))
+    for i in range(1, 20):
+        recorder.record(_record(i))
+
+    assert recorder.dropped > 0
+    release.set()
+    recorder.close()
+    assert recorder.pending() == 0
+    # 最新的记录一定被保留
+    assert written[-1].session_id == "s19"
+
+
+def test_log_file_appends_and_compacts(tmp_path):
+    log = UsageLogFile(tmp_path / "usage.jsonl")
+    for start in range(0, 30, 10):
+        log.append([_record(i) for i in range(start, start + 10)], max_records=10)
+
+    records = list(log.iter_records())
+    # 第三批追加后超过 2 × max_records，压缩为最新的 10 条
+    assert [r.session_id for r in records] == [f"s{i}" for i in range(20, 30)]
+
+
+def test_log_file_migrates_legacy_json(tmp_path):
+    legacy = tmp_path / "usage.json"
+    legacy.write_text(
+        '[{"timestamp": "2026-10-15T09:00:00", "provider": "openai", "model_name": "gpt-4o",'
+        ' "input_tokens": 1, "output_tokens": 2, "cost": 0.5}]',
+        encoding="utf-8",
+    )
+    log = UsageLogFile(tmp_path / "usage.jsonl", legacy_json_path=legacy)
+    records = list(log.iter_records())
+    assert len(records) == 1 and records[0].provider == "openai"
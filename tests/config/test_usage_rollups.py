@@ -0,0 +1,146 @@
+"""
+Token 使用汇总（小时/天）测试
+"""
+from datetime import datetime
+
+import pytest
+
+from tradingagents.config.usage_rollups import (
+    aggregate_records,
+    expired_filter,
+    merge_rollups,
+    rollup_keys,
+    window_filter,
+)
+
+RECORDS = [
+    {"timestamp": "2026-10-14T23:30:00+08:00", "provider": "dashscope", "model_name": "qwen-plus",
+     "user_id": "u1", "input_tokens": 100, "output_tokens": 10, "cost": 1.0},
+    {"timestamp": "2026-10-15T09:05:00", "provider": "dashscope", "model_name": "qwen-plus",
+     "user_id": "u1", "input_tokens": 200, "output_tokens": 20, "cost": 2.0},
+    {"timestamp": "2026-10-15T09:55:00", "provider": "openai", "model_name": "gpt-4o",
+     "input_tokens": 300, "output_tokens": 30, "cost": 0.5, "currency": "USD"},
+    {"timestamp": "", "provider": "openai", "model_name": "gpt-4o", "input_tokens": 1, "output_tokens": 1, "cost": 9.0},
+]
+
+
+def test_records_roll_up_into_hour_and_day_buckets():
+    totals = aggregate_records(RECORDS)
+    assert rollup_keys(RECORDS[3]) == []
+
+    hour = totals[("hour", "2026-10-15T09", "dashscope", "qwen-plus", "u1", "CNY")]
+    day = totals[("day", "2026-10-15", "dashscope", "qwen-plus", "u1", "CNY")]
+    assert hour == day == {"requests": 1, "input_tokens": 200, "output_tokens": 20, "cost": 2.0}
+    assert ("day", "2026-10-15", "openai", "gpt-4o", "", "USD") in totals
+    # 6 个汇总文档：3 条有效记录 × (小时 + 天)
+    assert len(totals) == 6
+
+
+def test_window_filter_uses_hours_at_edges_and_days_in_between():
+    query = window_filter(datetime(2026, 10, 10, 14, 20), datetime(2026, 10, 15, 9, 30), provider="openai")
+    assert query["provider"] == "openai"
+    first_hours, middle_days, last_hours = query["$or"]
+    assert first_hours == {"granularity": "hour", "bucket": {"$gte": "2026-10-10T14", "$lt": "2026-10-11"}}
+    assert middle_days == {"granularity": "day", "bucket": {"$gt": "2026-10-10", "$lt": "2026-10-15"}}
+    assert last_hours == {"granularity": "hour", "bucket": {"$gte": "2026-10-15", "$lte": "2026-10-15T09"}}
+
+    same_day = window_filter(datetime(2026, 10, 15, 1), datetime(2026, 10, 15, 9))
+    assert same_day["$or"] == [{"granularity": "hour", "bucket": {"$gte": "2026-10-15T01", "$lte": "2026-10-15T09"}}]
+
+
+def test_merge_rollups_groups_by_provider_model_and_date():
+    docs = [
+        {"granularity": "hour", "bucket": key[1], "provider": key[2], "model_name": key[3],
+         "user_id": key[4], "currency": key[5], **values}
+        for key, values in aggregate_records(RECORDS).items() if key[0] == "hour"
+    ]
+    merged = merge_rollups(docs)
+    assert merged["requests"] == 3
+    assert merged["cost_by_currency"] == {"CNY": 3.0, "USD": 0.5}
+    assert merged["by_provider"]["dashscope"]["input_tokens"] == 300
+    assert merged["by_model"]["openai/gpt-4o"]["cost_by_currency"] == {"USD": 0.5}
+    assert set(merged["by_date"]) == {"2026-10-14", "2026-10-15"}
+
+
+def _apply(collection, operations):
+    # mongomock 的 bulk_write 不兼容 pymongo 4.11+ 的 UpdateOne，逐条执行
+    for op in operations:
+        collection.update_one(op._filter, op._doc, upsert=op._upsert)
+
+
+def test_rollup_window_matches_raw_records():
+    mongomock = pytest.importorskip("mongomock")
+    from tradingagents.config.usage_rollups import rollup_operations
+
+    rollups = mongomock.MongoClient().db.rollups
+    _apply(rollups, rollup_operations(RECORDS[:2]))
+    _apply(rollups, rollup_operations(RECORDS[2:]))
+
+    docs = list(rollups.find(window_filter(datetime(2026, 10, 14, 23), datetime(2026, 10, 15, 9, 59))))
+    assert merge_rollups(docs)["requests"] == 3
+    docs = list(rollups.find(window_filter(datetime(2026, 10, 15, 0), datetime(2026, 10, 15, 9, 59))))
+    assert merge_rollups(docs)["cost"] == 2.5
+
+
+def test_partial_bulk_insert_returns_only_failed_records():
+    pytest.importorskip("pymongo")
+    from pymongo.errors import BulkWriteError
+    from tradingagents.config.mongodb_storage import MongoDBStorage
+    from tradingagents.config.usage_models import UsageRecord
+    from tradingagents.config.usage_rollups import rollup_operations
+
+    records = [
+        UsageRecord(timestamp=f"2026-10-15T09:0{i}:00", provider="dashscope", model_name="qwen-plus",
+                    input_tokens=100, output_tokens=10, cost=1.0, session_id=f"s{i}")
+        for i in range(3)
+    ]
+
+    class _PartialCollection:
+        def insert_many(self, docs, ordered=True):
+            raise BulkWriteError({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}],
+                                  "nInserted": 2})
+
+    class _RollupCollection:
+        operations = []
+
+        def bulk_write(self, operations, ordered=True):
+            self.operations.extend(operations)
+
+    storage = MongoDBStorage.__new__(MongoDBStorage)
+    storage._connected = True
+    storage.collection = _PartialCollection()
+    storage.rollup_collection = _RollupCollection()
+
+    failed = storage.save_usage_records(records)
+
+    # 只有失败的一条需要回退保存，已写入的两条计入汇总
+    assert failed == [records[1]]
+    assert storage.rollup_collection.operations == rollup_operations([records[0], records[2]])
+
+
+def test_cleanup_prunes_rollups_with_raw_records():
+    mongomock = pytest.importorskip("mongomock")
+    from tradingagents.config.mongodb_storage import MongoDBStorage
+    from tradingagents.config.usage_rollups import rollup_operations
+
+    records = [
+        {"timestamp": "2026-07-01T10:00:00", "provider": "dashscope", "model_name": "qwen-plus", "cost": 1.0},
+        {"timestamp": "2026-07-20T11:30:00", "provider": "dashscope", "model_name": "qwen-plus", "cost": 2.0},
+        {"timestamp": "2026-10-15T09:05:00", "provider": "dashscope", "model_name": "qwen-plus", "cost": 3.0},
+    ]
+    db = mongomock.MongoClient().db
+    storage = MongoDBStorage.__new__(MongoDBStorage)
+    storage._connected = True
+    storage.collection = db.token_usage
+    storage.rollup_collection = db.rollups
+    storage.collection.insert_many([dict(r) for r in records])
+    _apply(storage.rollup_collection, rollup_operations(records))
+    storage.rollup_collection.insert_one({"_id": "__meta__", "records": 3})
+
+    cutoff = datetime(2026, 7, 20, 12)
+    assert expired_filter(cutoff)["$or"][0]["bucket"] == {"$lt": "2026-07-20T12"}
+    storage.cleanup_old_records(days=(datetime.now() - cutoff).days)
+
+    remaining = {(d.get("granularity"), d.get("bucket")) for d in storage.rollup_collection.find()}
+    assert ("hour", "2026-07-01T10") not in remaining and ("day", "2026-07-01") not in remaining
+    assert ("hour", "2026-10-15T09") in remaining and (None, None) in remaining
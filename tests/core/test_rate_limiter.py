@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+滑动窗口速率限制器测试：进程内回退、任意窗口不超限、批量/交互式预留、Redis Lua 共享配额
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.rate_limiter import (
+    PRIORITY_BULK,
+    LocalSlidingWindow,
+    RateLimitBackend,
+    RateLimiter,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_local_window_reports_wait_until_oldest_call_expires():
+    clock = _Clock()
+    window = LocalSlidingWindow(clock=clock)
+    assert window.take("k", 2, 1.0, 1, 0) == (0.0, 1)
+    clock.now += 0.4
+    assert window.take("k", 2, 1.0, 1, 0)[0] == 0.0
+    wait, _ = window.take("k", 2, 1.0, 1, 0)
+    assert wait == pytest.approx(0.6)
+    clock.now += wait
+    assert window.take("k", 2, 1.0, 1, 0)[0] == 0.0
+    # 不同键互不影响
+    assert window.take("other", 2, 1.0, 2, 0)[0] == 0.0
+
+
+def test_never_exceeds_max_calls_in_any_window():
+    # Tushare standard 等级：400次/分钟 * 0.8 安全边际
+    clock = _Clock()
+    window = LocalSlidingWindow(clock=clock)
+    limit, span = 320, 60.0
+    granted = []
+    end = clock.now + 3 * span
+    while clock.now < end:
+        wait, _ = window.take("tushare", limit, span, 1, 0)
+        if wait <= 0:
+            granted.append(clock.now)
+            clock.now += 0.01
+        else:
+            clock.now += wait
+
+    for i, start in enumerate(granted):
+        in_window = sum(1 for t in granted[i:] if t < start + span)
+        assert in_window <= limit
+    # 持续吞吐不打折扣
+    assert len(granted) >= 3 * limit
+
+
+def test_bulk_callers_leave_reserve_for_interactive():
+    limiter = RateLimiter(10, 60, name="test", interactive_reserve=0.3,
+                          backend=RateLimitBackend(enabled=False))
+    backend = limiter.backend
+    key = limiter._bucket_key()
+    floor = limiter._floor(1, PRIORITY_BULK)
+    assert floor == 3
+
+    granted = sum(backend.take(key, 10, limiter.time_window, 1, floor)[0] == 0 for _ in range(10))
+    assert granted == 7
+    # 批量任务用完可用配额后，交互式请求仍能立即获得预留的配额
+    asyncio.run(limiter.acquire())
+    stats = limiter.get_stats()
+    assert stats["total_waits"] == 0 and stats["calls_by_priority"] == {"interactive": 1}
+    assert stats["current_calls"] == 8 and stats["backend"] == "local"
+
+    tiny = RateLimiter(1, 0.1, name="tiny", backend=RateLimitBackend(enabled=False))
+    assert tiny._floor(1, PRIORITY_BULK) == 0
+
+
+def test_acquire_waits_for_window():
+    limiter = RateLimiter(2, 0.2, name="fast", backend=RateLimitBackend(enabled=False))
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire_sync(priority=PRIORITY_BULK)
+    assert time.monotonic() - start >= 0.18
+    assert limiter.get_stats()["total_calls"] == 4
+    assert limiter.get_stats()["total_waits"] >= 1
+
+
+def test_get_stats_does_not_touch_backend():
+    limiter = RateLimiter(5, 60, name="stats", backend=RateLimitBackend(enabled=False))
+    limiter.acquire_sync()
+    limiter.acquire_sync()
+
+    class _NoCalls(RateLimitBackend):
+        def take(self, *args):
+            raise AssertionError("get_stats 不应访问存储")
+
+    limiter._backend = _NoCalls(enabled=False)
+    assert limiter.get_stats()["current_calls"] == 2
+
+
+class _FailingRedis:
+    def __init__(self, error):
+        self.error = error
+
+    def register_script(self, script):
+        def run(keys, args):
+            raise self.error
+        return run
+
+
+def test_falls_back_to_local_window_when_redis_fails():
+    backend = RateLimitBackend(redis_client=_FailingRedis(ConnectionError("redis down")))
+    assert backend.take("k", 1, 1.0, 1, 0)[0] == 0.0
+    assert not backend.redis_active
+    assert backend.take("k", 1, 1.0, 1, 0)[0] > 0
+
+
+def test_pool_exhaustion_does_not_fall_back_to_local_quota():
+    backend = RateLimitBackend(redis_client=_FailingRedis(ConnectionError("No connection available.")))
+    for _ in range(3):
+        wait, _ = backend.take("k", 1, 1.0, 1, 0)
+        assert wait > 0
+    assert backend.redis_active
+
+
+def test_processes_share_quota_through_redis_script():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+
+    # 两个后端模拟两个进程，共享同一个 Redis
+    first = RateLimiter(3, 60, name="p1", key="tushare",
+                        backend=RateLimitBackend(redis_client=fakeredis.FakeRedis(server=server, decode_responses=True)))
+    second = RateLimiter(3, 60, name="p2", key="tushare", backend=RateLimitBackend(
+        redis_client=fakeredis.FakeRedis(server=server, decode_responses=True),
+        async_redis_client=fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+    ))
+
+    first.acquire_sync()
+    second.acquire_sync()
+    first.acquire_sync()
+    wait, _ = second.backend.take(second._bucket_key(), 3, second.time_window, 1, 0)
+    assert 59 < wait <= 60
+    stats = asyncio.run(second.get_stats_async())
+    assert stats["current_calls"] == 3 and stats["backend"] == "redis"
+    # 按接口拆分的配额互不影响
+    assert second.backend.take(second._bucket_key("daily"), 3, second.time_window, 1, 0)[0] == 0
+
+
+def test_default_backend_shares_process_redis_connections():
+    from app.core.redis_client import get_shared_redis
+    from app.services.progress.store import ProgressStore
+
+    # 速率限制与进度存储共用同一组进程级连接，不各自创建连接池
+    assert RateLimitBackend(enabled=False)._redis is get_shared_redis()
+    assert ProgressStore(enabled=False)._redis is get_shared_redis()
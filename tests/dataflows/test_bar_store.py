@@ -0,0 +1,154 @@
+"""
+区间感知K线缓存测试
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import tradingagents.dataflows.trading_calendar as trading_calendar
+from tradingagents.dataflows.cache.bar_store import OHLCVBarStore, subtract_intervals
+from tradingagents.dataflows.trading_calendar import TradingCalendar
+
+
+def _make_fetcher(calls):
+    def fetcher(symbol, start_date, end_date):
+        calls.append((start_date, end_date))
+        dates = pd.bdate_range(start_date, end_date)
+        return pd.DataFrame({'date': dates, 'close': range(len(dates))})
+    return fetcher
+
+
+def test_subtract_intervals():
+    covered = [(date(2024, 2, 1), date(2024, 2, 10)), (date(2024, 2, 20), date(2024, 2, 25))]
+    gaps = subtract_intervals(date(2024, 1, 25), date(2024, 3, 1), covered)
+    assert gaps == [
+        (date(2024, 1, 25), date(2024, 1, 31)),
+        (date(2024, 2, 11), date(2024, 2, 19)),
+        (date(2024, 2, 26), date(2024, 3, 1)),
+    ]
+    assert subtract_intervals(date(2024, 2, 2), date(2024, 2, 5), covered) == []
+
+
+def test_sub_range_served_from_store(tmp_path):
+    store = OHLCVBarStore(cache_dir=tmp_path)
+    calls = []
+    fetcher = _make_fetcher(calls)
+
+    full = store.get_range("000001", "2023-01-01", "2023-12-31", fetcher=fetcher)
+    assert calls == [("2023-01-01", "2023-12-31")]
+
+    sub = store.get_range("000001", "2023-03-01", "2023-03-31", fetcher=fetcher)
+    assert len(calls) == 1
+    assert sub['date'].min() >= pd.Timestamp("2023-03-01")
+    assert sub['date'].max() <= pd.Timestamp("2023-03-31")
+    assert len(sub) == len(full[(full['date'] >= "2023-03-01") & (full['date'] <= "2023-03-31")])
+
+
+def test_only_missing_gaps_are_fetched(tmp_path):
+    store = OHLCVBarStore(cache_dir=tmp_path)
+    calls = []
+    fetcher = _make_fetcher(calls)
+
+    store.get_range("000001", "2023-03-01", "2023-06-30", fetcher=fetcher)
+    calls.clear()
+
+    df = store.get_range("000001", "2023-01-01", "2023-09-30", fetcher=fetcher)
+    assert calls == [("2023-01-01", "2023-02-28"), ("2023-07-01", "2023-09-30")]
+    assert df['date'].is_monotonic_increasing
+    assert not df['date'].duplicated().any()
+    assert len(df) == len(pd.bdate_range("2023-01-01", "2023-09-30"))
+
+
+def test_failed_gap_is_not_marked_covered(tmp_path):
+    store = OHLCVBarStore(cache_dir=tmp_path)
+    assert store.get_range("000001", "2023-01-01", "2023-01-31", fetcher=lambda *a: None) is None
+    assert store.missing_ranges("000001", "2023-01-01", "2023-01-31") == [
+        (date(2023, 1, 1), date(2023, 1, 31))
+    ]
+
+
+def test_expired_coverage_is_refetched(tmp_path):
+    store = OHLCVBarStore(cache_dir=tmp_path, ttl_hours=0)
+    calls = []
+    fetcher = _make_fetcher(calls)
+
+    store.get_range("000001", "2023-01-01", "2023-01-31", fetcher=fetcher)
+    store.get_range("000001", "2023-01-01", "2023-01-31", fetcher=fetcher)
+    assert len(calls) == 2
+
+
+def test_fresh_put_does_not_inherit_stale_fetch_time(tmp_path):
+    store = OHLCVBarStore(cache_dir=tmp_path, ttl_hours=24)
+    fetcher = _make_fetcher([])
+    store.put("000001", fetcher("000001", "2023-01-01", "2023-01-31"), "2023-01-01", "2023-01-31")
+
+    # 一月的覆盖记录已过期
+    bars, coverage = store._load("000001", "daily", "default")
+    coverage['intervals'][0]['fetched_at'] = (datetime.now() - timedelta(hours=30)).isoformat()
+    store._save("000001", "daily", "default", bars, coverage)
+
+    # 紧邻的二月刚刚获取：只有一月需要重新获取
+    store.put("000001", fetcher("000001", "2023-02-01", "2023-02-28"), "2023-02-01", "2023-02-28")
+    assert store.missing_ranges("000001", "2023-01-01", "2023-02-28") == [
+        (date(2023, 1, 1), date(2023, 1, 31))
+    ]
+    _, coverage = store._load("000001", "daily", "default")
+    assert [(i['start'], i['end']) for i in coverage['intervals']] == [("2023-02-01", "2023-02-28")]
+
+
+def test_empty_successful_fetch_is_marked_covered(tmp_path):
+    store = OHLCVBarStore(cache_dir=tmp_path)
+    calls = []
+
+    def fetcher(symbol, start_date, end_date):
+        calls.append((start_date, end_date))
+        return pd.DataFrame()
+
+    # 停牌期间数据源正常返回空结果
+    assert store.get_range("000001", "2023-01-01", "2023-01-31", fetcher=fetcher) is None
+    assert store.get_range("000001", "2023-01-01", "2023-01-31", fetcher=fetcher) is None
+    assert calls == [("2023-01-01", "2023-01-31")]
+
+
+def test_gaps_trimmed_to_trading_days(tmp_path, monkeypatch):
+    # 2023-01-02 元旦休市
+    start, end = date(2022, 12, 1), date(2023, 1, 31)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    calendar = TradingCalendar("CN", [d for d in days if d.weekday() < 5 and d != date(2023, 1, 2)],
+                               "test", start=start, end=end)
+    monkeypatch.setattr(trading_calendar, "get_trading_calendar", lambda market="CN": calendar)
+
+    store = OHLCVBarStore(cache_dir=tmp_path)
+    calls = []
+    fetcher = _make_fetcher(calls)
+
+    # 周末 + 节假日：不请求数据源，直接记为已覆盖
+    assert store.get_range("000001", "2022-12-31", "2023-01-02", fetcher=fetcher, market="CN") is None
+    assert calls == []
+    assert store.missing_ranges("000001", "2022-12-31", "2023-01-02") == []
+
+    df = store.get_range("000001", "2022-12-31", "2023-01-08", fetcher=fetcher, market="CN")
+    assert calls == [("2023-01-03", "2023-01-06")]
+    assert len(df) == 4
+    assert store.missing_ranges("000001", "2022-12-31", "2023-01-08") == []
+
+
+def test_today_is_covered_only_briefly(tmp_path):
+    today = date.today()
+    calls = []
+
+    def fetcher(symbol, start_date, end_date):
+        calls.append((start_date, end_date))
+        return pd.DataFrame()
+
+    store = OHLCVBarStore(cache_dir=tmp_path)
+    store.get_range("000001", today, today + timedelta(days=5), fetcher=fetcher)
+    store.get_range("000001", today, today + timedelta(days=5), fetcher=fetcher)
+    # 今天之后的日期不请求
+    assert calls == [(today.isoformat(), today.isoformat())]
+
+    expired = OHLCVBarStore(cache_dir=tmp_path, intraday_ttl_minutes=0)
+    expired.get_range("000001", today, today, fetcher=fetcher)
+    assert len(calls) == 2
@@ -0,0 +1,73 @@
+"""
+DataFrame 缓存序列化器测试
+"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from tradingagents.dataflows.cache.file_cache import StockDataCache
+from tradingagents.dataflows.cache.serializers import (
+    ArrowIPCSerializer,
+    get_default_serializer,
+    get_serializer,
+)
+
+
+def _ohlcv():
+    # 与数据源返回的行情一致：日期索引不带 freq（Arrow/Parquet 不保存 freq）
+    index = pd.DatetimeIndex(pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05", "2024-01-08"]), name="date")
+    return pd.DataFrame({
+        "close": [1.0, 2.0, 3.0, 4.0, 5.0],
+        "volume": pd.Series([10, 20, 30, 40, 50], dtype="int64").values,
+        "code": ["000001"] * 5,
+    }, index=index)
+
+
+@pytest.mark.parametrize("name", ["arrow", "parquet"])
+def test_binary_formats_preserve_dtypes_and_index(name, tmp_path):
+    df = _ohlcv()
+    serializer = get_serializer(name)
+
+    pd.testing.assert_frame_equal(serializer.loads(serializer.dumps(df)), df)
+
+    path = tmp_path / f"data.{serializer.file_extension}"
+    serializer.write_file(df, path)
+    pd.testing.assert_frame_equal(serializer.read_file(path, memory_map=True), df)
+
+
+def test_compressed_arrow_is_readable_by_default_serializer():
+    df = _ohlcv()
+    payload = ArrowIPCSerializer(compression="zstd").dumps(df)
+    serializer = get_serializer("arrow")
+
+    text = serializer.encode_text(payload)
+    assert isinstance(text, str)
+    pd.testing.assert_frame_equal(serializer.loads(serializer.decode_text(text)), df)
+
+
+def test_default_serializer_falls_back_on_unknown_format(monkeypatch):
+    monkeypatch.setenv("TA_CACHE_DATAFRAME_FORMAT", "unknown")
+    assert get_default_serializer(legacy_format="csv").name == "csv"
+
+    monkeypatch.setenv("TA_CACHE_DATAFRAME_FORMAT", "arrow")
+    assert get_default_serializer(legacy_format="csv").name == "arrow"
+
+
+def test_file_cache_reads_new_and_legacy_formats(tmp_path, monkeypatch):
+    df = _ohlcv()
+
+    monkeypatch.setenv("TA_CACHE_DATAFRAME_FORMAT", "csv")
+    legacy_cache = StockDataCache(cache_dir=str(tmp_path))
+    legacy_key = legacy_cache.save_stock_data("000001", df, "2024-01-02", "2024-01-08", "tushare")
+
+    monkeypatch.setenv("TA_CACHE_DATAFRAME_FORMAT", "arrow")
+    cache = StockDataCache(cache_dir=str(tmp_path))
+    key = cache.save_stock_data("000002", df, "2024-01-02", "2024-01-08", "tushare")
+
+    assert cache._load_metadata(key)["file_format"] == "arrow"
+    pd.testing.assert_frame_equal(cache.load_stock_data(key), df)
+
+    # 旧的 CSV 缓存仍可读取（不保留 dtype 和索引类型）
+    legacy = cache.load_stock_data(legacy_key)
+    assert list(legacy["close"]) == list(df["close"])
@@ -0,0 +1,85 @@
+"""
+文件缓存元数据索引测试
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from tradingagents.dataflows.cache.file_cache import StockDataCache
+from tradingagents.dataflows.cache.metadata_index import CacheMetadataIndex
+
+
+def test_partial_match_uses_index(tmp_path):
+    cache = StockDataCache(cache_dir=str(tmp_path))
+    cache.save_stock_data("000001", "data-a", "2024-01-01", "2024-06-30", "tushare")
+    cache.save_stock_data("000002", "data-b", "2024-01-01", "2024-06-30", "tushare")
+
+    # 不同日期范围 -> 精确匹配失败，走索引部分匹配
+    key = cache.find_cached_stock_data("000001", "2023-01-01", "2023-12-31", "tushare")
+    assert key is not None
+    assert cache.load_stock_data(key) == "data-a"
+
+    assert cache.find_cached_stock_data("000003") is None
+
+
+def test_fundamentals_lookup_and_stats(tmp_path):
+    cache = StockDataCache(cache_dir=str(tmp_path))
+    cache.save_fundamentals_data("AAPL", "fundamentals", data_source="finnhub")
+    cache.save_news_data("AAPL", "news", data_source="finnhub")
+
+    key = cache.find_cached_fundamentals_data("AAPL", data_source="finnhub")
+    assert cache.load_fundamentals_data(key) == "fundamentals"
+    assert cache.find_cached_fundamentals_data("AAPL", data_source="openai") is None
+
+    stats = cache.get_cache_stats()
+    assert stats['total_files'] == 2
+    assert stats['fundamentals_count'] == 1
+    assert stats['news_count'] == 1
+    assert stats['total_size'] > 0
+
+
+def test_migrates_existing_sidecars(tmp_path):
+    metadata_dir = tmp_path / "metadata"
+    metadata_dir.mkdir()
+    data_file = tmp_path / "legacy.txt"
+    data_file.write_text("legacy", encoding="utf-8")
+    with open(metadata_dir / "600519_stock_data_abc_meta.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "symbol": "600519",
+            "data_type": "stock_data",
+            "market_type": "china",
+            "data_source": "akshare",
+            "file_path": str(data_file),
+            "file_format": "txt",
+            "cached_at": datetime.now().isoformat(),
+        }, f)
+
+    cache = StockDataCache(cache_dir=str(tmp_path))
+    assert cache.metadata_index.count() == 1
+    assert cache.find_cached_stock_data("600519") == "600519_stock_data_abc"
+
+    # 迁移只执行一次
+    assert CacheMetadataIndex(metadata_dir / "metadata_index.db").is_migrated()
+
+
+def test_clear_old_cache_removes_expired_entries(tmp_path):
+    cache = StockDataCache(cache_dir=str(tmp_path))
+    old_key = cache.save_news_data("000001", "old news", data_source="akshare")
+    new_key = cache.save_news_data("000001", "new news", "2024-01-01", "2024-01-02", data_source="akshare")
+
+    # 将旧条目的缓存时间改到10天前
+    metadata = cache._load_metadata(old_key)
+    metadata_path = cache._get_metadata_path(old_key)
+    metadata['cached_at'] = (datetime.now() - timedelta(days=10)).isoformat()
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f)
+    cache.metadata_index.upsert(old_key, metadata)
+
+    cache.clear_old_cache(max_age_days=7)
+
+    assert not metadata_path.exists()
+    assert cache._load_metadata(new_key) is not None
+    assert cache.metadata_index.count() == 1
@@ -0,0 +1,94 @@
+"""
+全市场行情快照测试（桩数据，不访问 AKShare）
+"""
+import threading
+import time
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from tradingagents.dataflows.providers.china.market_snapshot import (
+    MarketSnapshot,
+    MarketSnapshotCache,
+    normalize_code,
+)
+
+SPOT = pd.DataFrame({
+    "代码": ["600000", "000001", "sh688981", None],
+    "名称": ["浦发银行", "平安银行", "中芯国际", "未知"],
+    "最新价": ["10.5", "1,234.5", "-", "3"],
+    "涨跌幅": [1.2, -0.5, 0.0, 0.1],
+    "总市值": [3.1e11, 2.2e11, None, 1.0],
+})
+
+
+def test_snapshot_indexes_codes_and_coerces_columns():
+    snapshot = MarketSnapshot(SPOT, "eastmoney")
+    assert len(snapshot) == 3
+    assert normalize_code("sz1") == "000001"
+
+    quote = snapshot.get("000001")
+    assert quote["name"] == "平安银行"
+    assert quote["price"] == 1234.5
+    assert quote["total_mv"] == 2.2e11
+    assert quote["volume"] is None  # 接口未提供的列
+
+    assert snapshot.get("688981")["price"] is None
+    assert snapshot.get_many(["600000", "300750"]).keys() == {"600000"}
+
+    records = snapshot.records({"close": "price", "pct_chg": "change_percent", "volume": "volume"})
+    assert records["600000"] == {"close": 10.5, "pct_chg": 1.2, "volume": None}
+
+
+def test_concurrent_callers_share_one_fetch():
+    calls = []
+
+    def fetcher(source):
+        calls.append(source)
+        time.sleep(0.2)
+        return SPOT
+
+    cache = MarketSnapshotCache(ttl_seconds=60, fetcher=fetcher)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("eastmoney"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["eastmoney"]
+    assert all(snapshot is results[0] for snapshot in results)
+    assert cache.get("eastmoney") is results[0]
+    assert cache.get("eastmoney", max_age=0) is not results[0]
+    assert cache.get("sina") is not results[0]
+    assert calls == ["eastmoney", "eastmoney", "sina"]
+
+
+def test_fetch_errors_reach_every_waiter_and_are_not_cached():
+    attempts = []
+
+    def fetcher(source):
+        attempts.append(source)
+        time.sleep(0.1)
+        if len(attempts) == 1:
+            raise ConnectionError("限流")
+        return SPOT
+
+    cache = MarketSnapshotCache(fetcher=fetcher)
+    errors = []
+
+    def call():
+        try:
+            cache.get()
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(errors) == 4 and len(attempts) == 1
+    assert len(cache.get()) == 3
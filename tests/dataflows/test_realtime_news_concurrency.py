@@ -0,0 +1,133 @@
+"""
+测试实时新闻聚合器的并发获取与截止时间（使用本地桩 HTTP 服务）
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+from tradingagents.dataflows.news import realtime_news
+from tradingagents.dataflows.news.realtime_news import (
+    RealtimeNewsAggregator,
+    get_news_source_stats,
+    reset_news_source_stats,
+)
+
+
+def _make_handler(delays):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = urlparse(self.path).path
+            time.sleep(delays.get(path, 0))
+            now = int(time.time())
+            if path == "/finnhub":
+                body = [{"headline": "AAPL finnhub headline", "summary": "s", "source": "FinnHub",
+                         "datetime": now, "url": "http://x/1"}]
+            else:
+                body = {"feed": [{"title": "AAPL alpha headline", "summary": "s", "source": "AV",
+                                  "time_published": datetime.now(realtime_news.ZoneInfo(
+                                      realtime_news.get_timezone_name())).strftime("%Y%m%dT%H%M%S"),
+                                  "url": "http://x/2"}]}
+            payload = json.dumps(body).encode()
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def stub_server():
+    delays = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(delays))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", delays
+    server.shutdown()
+    server.server_close()
+
+
+def _make_aggregator(base_url, **kwargs):
+    aggregator = RealtimeNewsAggregator(**kwargs)
+    aggregator.finnhub_key = "test"
+    aggregator.alpha_vantage_key = "test"
+    aggregator.newsapi_key = None
+    aggregator.FINNHUB_URL = f"{base_url}/finnhub"
+    aggregator.ALPHA_VANTAGE_URL = f"{base_url}/alpha"
+    aggregator._get_chinese_finance_news = lambda ticker, hours_back: []
+    return aggregator
+
+
+def test_sources_are_fetched_concurrently(stub_server):
+    base_url, delays = stub_server
+    delays.update({"/finnhub": 0.6, "/alpha": 0.6})
+    reset_news_source_stats()
+
+    aggregator = _make_aggregator(base_url, source_timeout=5, deadline=5)
+    start = time.perf_counter()
+    news = aggregator.get_realtime_stock_news("AAPL", hours_back=6)
+    elapsed = time.perf_counter() - start
+
+    assert {item.title for item in news} == {"AAPL finnhub headline", "AAPL alpha headline"}
+    assert elapsed < 1.1  # 串行需要 1.2 秒以上
+
+    stats = get_news_source_stats()
+    assert stats["FinnHub"]["calls"] == 1 and stats["FinnHub"]["hit_rate"] == 1.0
+    assert stats["Alpha Vantage"]["avg_latency"] >= 0.6
+    assert stats["中文财经"]["hits"] == 0
+
+
+def test_slow_source_is_dropped_at_deadline(stub_server):
+    base_url, delays = stub_server
+    delays.update({"/finnhub": 2.0, "/alpha": 0.0})
+    reset_news_source_stats()
+
+    aggregator = _make_aggregator(base_url, source_timeout=5, deadline=0.5)
+    start = time.perf_counter()
+    news = aggregator.get_realtime_stock_news("AAPL", hours_back=6)
+    elapsed = time.perf_counter() - start
+
+    assert [item.title for item in news] == ["AAPL alpha headline"]
+    assert elapsed < 1.5
+    assert get_news_source_stats()["FinnHub"]["timeouts"] == 1
+
+
+def test_hung_sources_do_not_starve_later_calls(stub_server):
+    base_url, delays = stub_server
+    delays.update({"/finnhub": 3.0, "/alpha": 0.0})
+    reset_news_source_stats()
+
+    aggregator = _make_aggregator(base_url, source_timeout=5, deadline=0.3)
+    # 超时的 FinnHub 请求仍在后台执行，调用次数超过旧的共享线程池大小（8）
+    for _ in range(10):
+        news = aggregator.get_realtime_stock_news("AAPL", hours_back=6)
+        assert [item.title for item in news] == ["AAPL alpha headline"]
+    assert get_news_source_stats()["FinnHub"]["timeouts"] == 10
+
+    # 等后台请求结束，避免测试结束后线程仍在写日志
+    deadline = time.perf_counter() + 5
+    while get_news_source_stats()["FinnHub"]["calls"] < 10 and time.perf_counter() < deadline:
+        time.sleep(0.1)
+
+
+def test_rss_feed_request_times_out(stub_server):
+    pytest.importorskip("feedparser")
+    base_url, delays = stub_server
+    delays.update({"/rss": 3.0})
+
+    aggregator = RealtimeNewsAggregator(source_timeout=0.3)
+    start = time.perf_counter()
+    assert aggregator._parse_rss_feed(f"{base_url}/rss", "AAPL", 6) == []
+    assert time.perf_counter() - start < 2
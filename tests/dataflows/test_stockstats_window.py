@@ -0,0 +1,108 @@
+"""
+技术指标整列计算与缓存测试（离线 CSV，不访问网络）
+"""
+import os
+import threading
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("stockstats")
+pytest.importorskip("yfinance")
+
+from stockstats import wrap
+
+import tradingagents.dataflows.technical.stockstats as stockstats_module
+from tradingagents.dataflows.technical.stockstats import NOT_TRADING_DAY, StockstatsUtils
+
+SYMBOL = "TEST"
+
+
+def _write_prices(data_dir, days=80, symbol=SYMBOL):
+    dates = pd.bdate_range("2025-01-02", periods=days)
+    close = [100 + (i % 7) * 1.5 - (i % 3) for i in range(days)]
+    frame = pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Open": close, "High": [c + 1 for c in close], "Low": [c - 1 for c in close],
+        "Close": close, "Volume": [1_000_000 + i * 10 for i in range(days)],
+    })
+    path = os.path.join(data_dir, f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv")
+    frame.to_csv(path, index=False)
+    return path, list(frame["Date"])
+
+
+def _legacy_value(path, indicator, date):
+    df = wrap(pd.read_csv(path))
+    df[indicator]
+    rows = df[df["Date"].str.startswith(date)]
+    return rows[indicator].values[0] if not rows.empty else NOT_TRADING_DAY
+
+
+@pytest.fixture(autouse=True)
+def _clear_memo():
+    stockstats_module._wrapped_frames.clear()
+    stockstats_module._indicator_values.clear()
+
+
+def test_values_match_per_day_computation(tmp_path):
+    path, dates = _write_prices(str(tmp_path))
+    for indicator in ("close_10_ema", "rsi", "macd"):
+        for date in dates[-15:] + ["2025-01-04"]:
+            expected = _legacy_value(path, indicator, date)
+            actual = StockstatsUtils.get_stock_stats(SYMBOL, indicator, date, str(tmp_path))
+            assert str(actual) == str(expected)
+
+
+def test_csv_parsed_once_per_data_version(tmp_path, monkeypatch):
+    path, dates = _write_prices(str(tmp_path))
+    reads = []
+    real_read_csv = pd.read_csv
+    monkeypatch.setattr(stockstats_module.pd, "read_csv", lambda *a, **k: reads.append(a) or real_read_csv(*a, **k))
+
+    for date in dates[-60:]:
+        StockstatsUtils.get_stock_stats(SYMBOL, "rsi", date, str(tmp_path))
+    StockstatsUtils.get_stock_stats(SYMBOL, "boll", dates[-1], str(tmp_path))
+    assert len(reads) == 1
+
+    _write_prices(str(tmp_path), days=81)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    values = StockstatsUtils.get_indicator_values(SYMBOL, "rsi", str(tmp_path))
+    assert len(reads) == 2
+    assert len(values) == 81
+
+
+def test_slow_indicator_does_not_block_other_symbols(tmp_path, monkeypatch):
+    # 两只股票的行数不同，只有 SLOW（80 行）的数据帧会卡住
+    _write_prices(str(tmp_path), symbol="SLOW")
+    _write_prices(str(tmp_path), days=81, symbol="FAST")
+    computing, release = threading.Event(), threading.Event()
+
+    class _BlockingFrame:
+        """SLOW 的指标计算卡住，直到 release"""
+
+        def __init__(self, df, slow):
+            self.df, self.slow = df, slow
+
+        def __getitem__(self, key):
+            if self.slow and key == "rsi":
+                computing.set()
+                release.wait(5)
+            return self.df[key]
+
+    real_wrap = stockstats_module.wrap
+    monkeypatch.setattr(stockstats_module, "wrap", lambda data: _BlockingFrame(real_wrap(data), slow=len(data) == 80))
+
+    slow = threading.Thread(target=StockstatsUtils.get_indicator_values, args=("SLOW", "rsi", str(tmp_path)))
+    slow.start()
+    assert computing.wait(5)
+    try:
+        done = []
+        fast = threading.Thread(target=lambda: done.append(
+            StockstatsUtils.get_indicator_values("FAST", "rsi", str(tmp_path))))
+        fast.start()
+        fast.join(2)
+        assert done and len(done[0]) == 81
+    finally:
+        release.set()
+        slow.join(5)
@@ -0,0 +1,68 @@
+"""
+交易日历测试（桩数据源，不访问网络）
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from tradingagents.dataflows.trading_calendar import TradingCalendar, TradingCalendarStore
+
+# 2025 年 1-2 月 A 股：元旦 1/1 休市，春节 1/28 - 2/4 休市
+START, END = date(2025, 1, 1), date(2025, 2, 28)
+HOLIDAYS = {date(2025, 1, 1)} | {date(2025, 1, 28) + timedelta(days=i) for i in range(8)}
+TRADE_DAYS = [
+    START + timedelta(days=i) for i in range((END - START).days + 1)
+    if (START + timedelta(days=i)).weekday() < 5 and START + timedelta(days=i) not in HOLIDAYS
+]
+
+
+@pytest.fixture
+def calendar():
+    return TradingCalendar("CN", TRADE_DAYS, "test", start=START, end=END)
+
+
+def test_queries_inside_coverage(calendar):
+    assert calendar.exact and calendar.covers("2025-01-02", "20250228")
+    assert not calendar.is_trading_day("2025-01-01")
+    assert calendar.is_trading_day(date(2025, 1, 27))
+    assert calendar.next_trading_day("2025-01-27") == date(2025, 2, 5)
+    assert calendar.prev_trading_day("2025-02-05") == date(2025, 1, 27)
+    assert calendar.latest_trading_day("2025-02-01") == date(2025, 1, 27)
+    assert calendar.count_trading_days("2025-01-28", "2025-02-04") == 0
+    assert calendar.count_trading_days(START, END) == len(TRADE_DAYS)
+    assert calendar.trading_days("2025-01-24", "2025-02-06") == [
+        date(2025, 1, 24), date(2025, 1, 27), date(2025, 2, 5), date(2025, 2, 6)
+    ]
+
+
+def test_weekday_fallback_outside_coverage(calendar):
+    assert not calendar.covers("2024-12-30", "2025-01-03")
+    assert calendar.is_trading_day("2024-12-31")
+    assert calendar.prev_trading_day("2025-01-02") == date(2024, 12, 31)
+    assert calendar.next_trading_day("2025-02-28") == date(2025, 3, 3)
+    # 12/30、12/31 按周末规则 + 1/2、1/3 来自日历
+    assert calendar.count_trading_days("2024-12-28", "2025-01-03") == 4
+
+    weekday = TradingCalendar.weekday_calendar("US")
+    assert not weekday.exact
+    assert weekday.count_trading_days("2025-01-01", "2025-01-31") == 23
+
+
+def test_store_syncs_once_and_reloads_from_file(tmp_path):
+    calls = []
+
+    def failing():
+        raise ConnectionError("限流")
+
+    def fetcher():
+        calls.append(1)
+        return TradingCalendar("CN", TRADE_DAYS + [date.today()], "test", start=START, end=date.today())
+
+    store = TradingCalendarStore(str(tmp_path), fetchers={"CN": [failing, fetcher]})
+    assert store.get("cn").count_trading_days(START, END) == len(TRADE_DAYS)
+    assert store.get("CN") is store.get("CN") and calls == [1]
+
+    reloaded = TradingCalendarStore(str(tmp_path), fetchers={"CN": []}).get("CN")
+    assert reloaded.source == "test" and len(reloaded) == len(TRADE_DAYS) + 1
+
+    assert not TradingCalendarStore(None, fetchers={}).get("HK").exact
@@ -0,0 +1,103 @@
+"""
+编译图复用池测试（使用桩工厂，不创建真实LLM）
+"""
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from tradingagents.graph.graph_pool import TradingGraphPool, graph_pool_key
+from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+CONFIG = {
+    "selected_analysts": ["market", "fundamentals"],
+    "llm_provider": "dashscope",
+    "quick_think_llm": "qwen-turbo",
+    "deep_think_llm": "qwen-plus",
+    "research_depth": "标准",
+    "max_debate_rounds": 1,
+}
+
+
+class _StubGraph:
+    def __init__(self, config):
+        self.config = config
+
+
+def _counting_factory(builds, delay=0.0):
+    def factory(config):
+        builds.append(config)
+        time.sleep(delay)
+        return _StubGraph(config)
+    return factory
+
+
+def test_pool_key_tracks_analyst_order_and_config_changes():
+    key = graph_pool_key(CONFIG)
+    assert key[:6] == (("market", "fundamentals"), "dashscope", "qwen-turbo", "dashscope", "qwen-plus", "标准")
+    assert key == graph_pool_key(dict(CONFIG))
+    assert key != graph_pool_key({**CONFIG, "selected_analysts": ["fundamentals", "market"]})
+    assert key != graph_pool_key({**CONFIG, "max_debate_rounds": 2})
+
+
+def test_pool_reuses_graph_and_isolates_caller_config():
+    builds = []
+    pool = TradingGraphPool(factory=_counting_factory(builds))
+    config = dict(CONFIG)
+    first = pool.get(config)
+    config["research_depth"] = "深度"
+    assert first.config["research_depth"] == "标准"
+
+    assert pool.get(dict(CONFIG)) is first
+    assert pool.get(config) is not first
+    assert len(builds) == 2
+    assert pool.stats()["hits"] == 1
+
+
+def test_concurrent_first_requests_build_once():
+    builds = []
+    pool = TradingGraphPool(factory=_counting_factory(builds, delay=0.2))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get(CONFIG))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(builds) == 1
+    assert all(graph is results[0] for graph in results)
+
+
+def test_pool_evicts_least_recently_used():
+    builds = []
+    pool = TradingGraphPool(max_size=2, factory=_counting_factory(builds))
+    a = pool.get({**CONFIG, "quick_think_llm": "a"})
+    pool.get({**CONFIG, "quick_think_llm": "b"})
+    assert pool.get({**CONFIG, "quick_think_llm": "a"}) is a
+    pool.get({**CONFIG, "quick_think_llm": "c"})
+
+    assert pool.stats()["evictions"] == 1
+    pool.get({**CONFIG, "quick_think_llm": "a"})
+    assert len(builds) == 3
+
+
+def test_state_log_merges_runs_of_shared_graph(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    debate = {"bull_history": "", "bear_history": "", "history": "", "current_response": "", "judge_decision": ""}
+    risk = {"risky_history": "", "safe_history": "", "neutral_history": "", "history": "", "judge_decision": ""}
+    state = {
+        "company_of_interest": "600519", "trade_date": "", "market_report": "", "sentiment_report": "",
+        "news_report": "", "fundamentals_report": "", "investment_debate_state": debate,
+        "trader_investment_plan": "", "risk_debate_state": risk, "investment_plan": "", "final_trade_decision": "买入",
+    }
+    graph = object.__new__(TradingAgentsGraph)
+    graph._log_state("600519", "2026-10-15", {**state, "trade_date": "2026-10-15"})
+    graph._log_state("000001", "2026-10-15", {**state, "company_of_interest": "000001"})
+    graph._log_state("600519", "2026-10-16", {**state, "trade_date": "2026-10-16"})
+
+    log = json.loads((tmp_path / "eval_results/600519/TradingAgentsStrategy_logs/full_states_log.json").read_text())
+    assert sorted(log) == ["2026-10-15", "2026-10-16"]
+    assert all(entry["company_of_interest"] == "600519" for entry in log.values())
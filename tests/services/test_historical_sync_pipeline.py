@@ -0,0 +1,245 @@
+"""
+历史数据同步流水线测试：有界并发拉取、跨股票批量写入、停止与无交易日跳过（桩数据源与数据库）
+"""
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("motor")
+
+import numpy as np
+import pandas as pd
+
+import app.worker.historical_sync_pipeline as pipeline_module
+from app.worker.historical_sync_pipeline import HistoricalSyncPipeline, next_sync_date
+from tradingagents.dataflows.trading_calendar import TradingCalendar
+from tradingagents.tools.analysis.indicators import compute_many
+from tradingagents.tools.analysis.streaming import DEFAULT_SPECS, IndicatorStateStore
+
+START, END = date(2025, 1, 1), date(2025, 3, 31)
+CALENDAR = TradingCalendar(
+    "CN",
+    [START + timedelta(days=i) for i in range((END - START).days + 1) if (START + timedelta(days=i)).weekday() < 5],
+    "test", start=START, end=END,
+)
+
+
+class _Frame:
+    def __init__(self, rows):
+        self.rows = rows
+        self.empty = rows == 0
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        async def gen():
+            for doc in self.docs:
+                yield doc
+        return gen()
+
+
+class _BasicInfo:
+    def find(self, query, projection):
+        return _Cursor([{"code": c, "list_date": "20200101"} for c in query["code"]["$in"] if c != "NOLIST"])
+
+
+class _FakeDB:
+    stock_basic_info = _BasicInfo()
+
+
+class _FakeService:
+    db = _FakeDB()
+
+    def __init__(self, fail_symbols=()):
+        self.writes = []
+        self.fail_symbols = set(fail_symbols)
+
+    async def get_latest_dates(self, symbols, data_source):
+        return {s: "2025-03-28" for s in symbols if s.startswith("OLD")}
+
+    def build_operations(self, symbol, df, data_source, market, period):
+        return [(symbol, i) for i in range(df.rows)]
+
+    async def bulk_write(self, label, operations, raise_on_error=False):
+        if self.fail_symbols & {symbol for symbol, _ in operations}:
+            raise RuntimeError("写入超时")
+        self.writes.append(len(operations))
+        return len(operations)
+
+
+@pytest.fixture(autouse=True)
+def _fixed_calendar(monkeypatch):
+    monkeypatch.setattr(pipeline_module, "get_trading_calendar", lambda market="CN": CALENDAR)
+    monkeypatch.setenv("HISTORICAL_SYNC_INDICATOR_STATE", "false")
+
+
+def _make_fetch(calls, peak):
+    inflight = [0]
+
+    async def fetch(symbol, start_date, end_date, period):
+        calls[symbol] = start_date
+        inflight[0] += 1
+        peak[0] = max(peak[0], inflight[0])
+        await asyncio.sleep(0.02)
+        inflight[0] -= 1
+        if symbol == "BAD":
+            raise ValueError("接口异常")
+        return _Frame(0 if symbol == "EMPTY" else 3)
+
+    return fetch
+
+
+def test_next_sync_date_skips_non_trading_days():
+    assert next_sync_date("2025-03-28", CALENDAR) == "2025-03-31"
+    assert next_sync_date("2025-03-03", CALENDAR) == "2025-03-04"
+
+
+def test_pipeline_fetches_concurrently_and_batches_writes():
+    calls, peak, progress = {}, [0], []
+    service = _FakeService()
+
+    async def on_progress(done, total, symbol, stats):
+        progress.append((done, total))
+
+    pipeline = HistoricalSyncPipeline(
+        "tushare", _make_fetch(calls, peak), concurrency=4,
+        historical_service=service, on_progress=on_progress,
+    )
+    symbols = ["OLD1", "NEW1", "NOLIST", "EMPTY", "BAD"] + [f"S{i}" for i in range(15)]
+    stats = asyncio.run(pipeline.run(symbols, end_date="2025-03-28"))
+
+    assert peak[0] == 4
+    # 已同步到最新的股票区间内没有交易日，不调用接口
+    assert "OLD1" not in calls and stats["skipped_no_trading_days"] == 1
+    assert calls["NEW1"] == "2020-01-01" and calls["NOLIST"] == "1990-01-01"
+    assert stats["success_count"] == 17 and stats["error_count"] == 1
+    assert stats["empty_symbols"] == ["EMPTY"] and stats["errors"][0]["code"] == "BAD"
+    # 多只股票的写操作合并为少量批次
+    assert stats["total_records"] == sum(service.writes) == 51
+    assert len(service.writes) < stats["success_count"]
+    assert progress[-1] == (len(symbols), len(symbols))
+
+
+def test_pipeline_stops_dispatching_when_requested():
+    calls, peak = {}, [0]
+    checks = []
+
+    async def should_stop():
+        checks.append(1)
+        return len(checks) > 3
+
+    pipeline = HistoricalSyncPipeline(
+        "akshare", _make_fetch(calls, peak), concurrency=2,
+        historical_service=_FakeService(), should_stop=should_stop,
+    )
+    stats = asyncio.run(pipeline.run([f"S{i}" for i in range(10)], start_date="2025-03-03", end_date="2025-03-28"))
+
+    assert stats["stopped"] and len(calls) == 3
+    assert stats["total_records"] == 9
+
+
+def test_failed_write_reports_symbols_as_errors():
+    calls, peak = {}, [0]
+    service = _FakeService(fail_symbols={"S3"})
+    pipeline = HistoricalSyncPipeline(
+        "tushare", _make_fetch(calls, peak), concurrency=2,
+        historical_service=service, write_batch_size=6,
+    )
+    stats = asyncio.run(pipeline.run([f"S{i}" for i in range(6)], start_date="2025-03-03", end_date="2025-03-28"))
+
+    # S3 所在批次（两只股票）写入失败，不能算作同步成功
+    failed = {e["code"] for e in stats["errors"]}
+    assert "S3" in failed and len(failed) == 2
+    assert stats["success_count"] == 4 and stats["error_count"] == 2
+    assert stats["total_records"] == sum(service.writes) == 12
+
+
+def test_should_stop_failure_is_reported_per_symbol():
+    calls, peak = {}, [0]
+    checks = []
+
+    async def should_stop():
+        checks.append(1)
+        if len(checks) == 3:
+            raise ConnectionError("数据库不可用")
+        return False
+
+    pipeline = HistoricalSyncPipeline(
+        "tushare", _make_fetch(calls, peak), concurrency=2,
+        historical_service=_FakeService(), should_stop=should_stop,
+    )
+    stats = asyncio.run(pipeline.run([f"S{i}" for i in range(10)], start_date="2025-03-03", end_date="2025-03-28"))
+
+    assert stats["error_count"] == 1 and stats["errors"][0]["error_type"] == "ConnectionError"
+    assert stats["success_count"] == 9 and len(calls) == 9
+
+
+def test_cancelled_run_tears_down_workers_and_writer():
+    calls, peak = {}, [0]
+
+    class _StuckService(_FakeService):
+        async def bulk_write(self, label, operations, raise_on_error=False):
+            await asyncio.Event().wait()
+
+    pipeline = HistoricalSyncPipeline(
+        "tushare", _make_fetch(calls, peak), concurrency=4,
+        historical_service=_StuckService(), write_batch_size=1,
+    )
+
+    async def run():
+        # 写入卡住后写入队列很快被占满，拉取协程阻塞在 put 上
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                pipeline.run([f"S{i}" for i in range(200)], start_date="2025-03-03", end_date="2025-03-28"), 1
+            )
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(run())
+
+
+def test_written_bars_advance_indicator_state(tmp_path):
+    days = [START + timedelta(days=i) for i in range((END - START).days + 1) if (START + timedelta(days=i)).weekday() < 5]
+    rng = np.random.default_rng(7)
+    close = np.cumsum(rng.normal(0, 1, len(days))) + 50
+    history = pd.DataFrame({
+        "trade_date": [d.strftime("%Y%m%d") for d in days],
+        "open": close, "high": close + rng.uniform(0, 1, len(days)),
+        "low": close - rng.uniform(0, 1, len(days)), "close": close,
+    })
+
+    async def fetch(symbol, start_date, end_date, period):
+        dates = pd.to_datetime(history["trade_date"])
+        return history[(dates >= start_date) & (dates <= end_date)].copy()
+
+    class _Service(_FakeService):
+        latest = {}
+
+        async def get_latest_dates(self, symbols, data_source):
+            return {s: self.latest[s] for s in symbols if s in self.latest}
+
+        def build_operations(self, symbol, df, data_source, market, period):
+            return [(symbol, i) for i in range(len(df))]
+
+    store, service = IndicatorStateStore(str(tmp_path)), _Service()
+    pipeline = HistoricalSyncPipeline("tushare", fetch, historical_service=service, indicator_state=store)
+
+    # 首次同步：库中没有数据，从上市日期拉取全部历史并新建状态
+    asyncio.run(pipeline.run(["S1", "S2"], end_date="2025-03-14"))
+    assert store.load("S1", "tushare_daily", DEFAULT_SPECS).last_date == "2025-03-14"
+
+    # 增量同步只推进新写入的K线；S2 库中数据比状态新（中间的K线没有计入状态），状态作废
+    service.latest = {"S1": "2025-03-14", "S2": "2025-03-21"}
+    asyncio.run(pipeline.run(["S1", "S2"], end_date="2025-03-28"))
+
+    engine = store.load("S1", "tushare_daily", DEFAULT_SPECS)
+    synced = history.assign(date=pd.to_datetime(history["trade_date"]))
+    expected = compute_many(synced[synced["date"] <= "2025-03-28"], DEFAULT_SPECS).iloc[-1]
+    assert engine.last_date == "2025-03-28"
+    for column, value in engine.last_row.items():
+        assert value == pytest.approx(expected[column], rel=1e-9, nan_ok=True)
+    assert store.load("S2", "tushare_daily", DEFAULT_SPECS) is None
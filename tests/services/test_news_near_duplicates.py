@@ -0,0 +1,29 @@
+"""
+新闻入库前的近似重复去重：按股票分组聚类
+"""
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pymongo")
+
+from app.services.news_data_service import NewsDataService
+
+BODY = "贵州茅台发布三季度报告，前三季度实现营业收入1231亿元，同比增长16%，归母净利润609亿元，同比增长15%。"
+
+
+def _news(symbol, title, source, publish_time):
+    return {"symbol": symbol, "title": title, "content": BODY, "source": source, "publish_time": publish_time}
+
+
+def test_near_duplicates_are_clustered_per_symbol():
+    news_list = [
+        _news("600519", "【财联社】贵州茅台：三季度净利润同比增长15%", "财联社", "2025-10-20 09:00:00"),
+        _news("600519", "贵州茅台三季度净利润同比增长15%", "新浪财经", "2025-10-20 09:05:00"),
+        # 同一篇报道关联到另一只股票，不能被 600519 的那一条合并掉
+        _news("000858", "贵州茅台三季度净利润同比增长15%", "新浪财经", "2025-10-20 09:05:00"),
+    ]
+
+    unique = NewsDataService()._dedupe_near_duplicates(news_list)
+
+    assert [n["symbol"] for n in unique] == ["600519", "000858"]
+    assert unique[0]["source"] == "财联社"
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+ProgressHub 测试：单个 Pub/Sub 连接按任务分发、慢客户端合并中间进度、无订阅者时关闭连接
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.progress.hub import ProgressHub, ProgressSubscription
+
+
+def test_slow_subscriber_keeps_latest_updates():
+    async def run():
+        hub = ProgressHub(redis_factory=lambda: None)
+        # 直接登记订阅，不启动 Redis 读取协程
+        slow = ProgressSubscription(hub, "t1", maxsize=2)
+        hub._subscriptions["t1"] = {slow}
+
+        for pct in (10, 20, 30, 100):
+            hub.dispatch("t1", {"progress": pct})
+
+        assert slow.dropped == 2
+        assert [(await slow.get(timeout=0.1))["progress"] for _ in range(2)] == [30, 100]
+        assert await slow.get(timeout=0.01) is None
+        assert hub.dispatch("other", {"progress": 1}) == 0
+
+    asyncio.run(run())
+
+
+def test_redis_messages_are_routed_by_task_id():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        hub = ProgressHub(redis_factory=lambda: redis)
+
+        sub_a = await hub.subscribe("a")
+        sub_b = await hub.subscribe("b")
+        await redis.publish("task_progress:a", json.dumps({"task_id": "a", "progress": 50}))
+        await redis.publish("task_progress:b", "not-json")
+
+        assert await sub_a.get(timeout=2) == {"task_id": "a", "progress": 50}
+        assert await sub_b.get(timeout=0.2) is None
+
+        sub_a.close()
+        sub_b.close()
+        assert hub.subscriber_count() == 0
+        await asyncio.sleep(0.05)
+        assert hub._reader.done()
+
+    asyncio.run(run())
+
+
+def test_pump_exits_when_last_connection_fails(monkeypatch):
+    pytest.importorskip("fastapi")
+    import app.services.websocket_manager as ws_module
+
+    class _DeadSocket:
+        async def accept(self):
+            pass
+
+        async def send_text(self, payload):
+            raise RuntimeError("连接已关闭")
+
+    async def run():
+        hub = ProgressHub(redis_factory=lambda: None)
+        hub._ready.set()
+        hub._ensure_reader = lambda: None
+        monkeypatch.setattr(ws_module, "get_progress_hub", lambda: hub)
+        manager = ws_module.WebSocketManager()
+
+        await manager.connect(_DeadSocket(), "t1")
+        pump = manager._pumps["t1"]
+        await manager.send_progress_update("t1", {"progress": 10})
+        await asyncio.wait_for(pump, timeout=1)
+
+        # 最后一个连接发送失败后：连接、推送协程与订阅一并清理
+        assert manager.active_connections == {} and manager._pumps == {}
+        assert hub.subscriber_count() == 0
+
+    asyncio.run(run())
+
+
+class _Socket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        pass
+
+
+def test_connect_subscribes_outside_the_lock_and_rolls_back_on_failure(monkeypatch):
+    pytest.importorskip("fastapi")
+    import app.services.websocket_manager as ws_module
+
+    release = None
+
+    class _SlowHub:
+        def __init__(self):
+            self.subscriptions = []
+
+        async def subscribe(self, task_id):
+            if task_id == "broken":
+                raise ConnectionError("Redis 不可用")
+            if task_id == "slow":
+                await release.wait()
+            sub = ProgressSubscription(self, task_id)
+            self.subscriptions.append(sub)
+            return sub
+
+        def _unsubscribe(self, sub):
+            self.subscriptions.remove(sub)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        hub = _SlowHub()
+        monkeypatch.setattr(ws_module, "get_progress_hub", lambda: hub)
+        manager = ws_module.WebSocketManager()
+
+        # 一个任务等待订阅确认时，其他任务的连接和断开不被阻塞
+        slow = asyncio.create_task(manager.connect(_Socket(), "slow"))
+        await asyncio.sleep(0.01)
+        fast_socket = _Socket()
+        await asyncio.wait_for(manager.connect(fast_socket, "fast"), 0.5)
+        await asyncio.wait_for(manager.disconnect(fast_socket, "fast"), 0.5)
+        assert not slow.done()
+        release.set()
+        await asyncio.wait_for(slow, 0.5)
+        assert await manager.get_connection_count("slow") == 1
+
+        # 订阅失败时撤销连接登记
+        with pytest.raises(ConnectionError):
+            await manager.connect(_Socket(), "broken")
+        assert "broken" not in manager.active_connections and "broken" not in manager._pumps
+
+        for pump in list(manager._pumps.values()):
+            pump.cancel()
+        await asyncio.gather(*manager._pumps.values(), return_exceptions=True)
+        assert hub.subscriptions == []
+
+    asyncio.run(run())
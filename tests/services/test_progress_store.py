@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+ProgressStore 测试：同步/异步接口共享数据、MGET 批量读取、文件兜底
+"""
+
+import asyncio
+import json
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.services.progress import store as store_mod
+from app.services.progress.store import ProgressStore
+
+
+def _make_store() -> ProgressStore:
+    server = fakeredis.FakeServer()
+    return ProgressStore(
+        redis_client=fakeredis.FakeRedis(server=server, decode_responses=True),
+        async_redis_client=fakeredis.aioredis.FakeRedis(server=server, decode_responses=True),
+    )
+
+
+def test_save_and_batch_read_sync_and_async():
+    store = _make_store()
+    store.save("t1", json.dumps({"task_id": "t1", "progress_percentage": 10}))
+    store.save("t2", json.dumps({"task_id": "t2", "progress_percentage": 55}))
+
+    assert store.client().ttl("progress:t1") > 0
+
+    result = store.get_many(["t1", "t2", "t1", "missing"])
+    assert list(result) == ["t1", "t2", "missing"]
+    assert result["t2"]["progress_percentage"] == 55
+    assert result["missing"] is None
+
+    async_result = asyncio.run(store.aget_many(["t1", "t2"]))
+    assert async_result == {"t1": result["t1"], "t2": result["t2"]}
+
+
+def test_falls_back_to_progress_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_mod, "PROGRESS_DIR", str(tmp_path))
+    (tmp_path / "file-task.json").write_text(json.dumps({"task_id": "file-task"}), encoding="utf-8")
+
+    store = ProgressStore(enabled=False)
+    assert store.get("file-task") == {"task_id": "file-task"}
+    assert asyncio.run(store.aget("file-task")) == {"task_id": "file-task"}
+
+    store.save("new-task", json.dumps({"task_id": "new-task"}))
+    assert (tmp_path / "new-task.json").exists()
+
+
+class _FailingRedis:
+    def __init__(self, error):
+        self.error = error
+
+    def mget(self, keys):
+        raise self.error
+
+
+def test_pool_exhaustion_does_not_disable_redis(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_mod, "PROGRESS_DIR", str(tmp_path))
+    (tmp_path / "t1.json").write_text(json.dumps({"task_id": "t1"}), encoding="utf-8")
+
+    busy = ProgressStore(redis_client=_FailingRedis(ConnectionError("No connection available.")))
+    assert busy.get("t1") == {"task_id": "t1"}
+    assert busy._redis_usable()
+
+    down = ProgressStore(redis_client=_FailingRedis(ConnectionError("Connection refused")))
+    assert down.get("t1") == {"task_id": "t1"}
+    assert not down._redis_usable()
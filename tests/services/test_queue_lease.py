@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+QueueService 租约式出队测试：
+1) 出队后任务进入 Worker 处理中列表与可见性 zset，确认后全部清除
+2) 可见性超时的任务被放回就绪队列
+3) Worker 在认领前退出时遗留的任务会被孤儿回收
+4) 批量入队保持 FIFO 顺序并写入批次信息
+"""
+
+import asyncio
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from app.services.queue import (
+    READY_LIST,
+    SET_PROCESSING,
+    TASK_PREFIX,
+    VISIBILITY_ZSET,
+    WORKER_PROCESSING_PREFIX,
+)
+from app.services.queue_service import QueueService
+
+
+def _make_service() -> QueueService:
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return QueueService(redis)
+
+
+def test_dequeue_and_ack_lease():
+    async def run():
+        qs = _make_service()
+        task_id = await qs.enqueue_task("u1", "000001", {})
+
+        task = await qs.dequeue_task("w1")
+        assert task["id"] == task_id
+        assert task["status"] == "processing"
+        assert await qs.r.lrange(WORKER_PROCESSING_PREFIX + "w1", 0, -1) == [task_id]
+        assert await qs.r.zscore(VISIBILITY_ZSET, task_id) is not None
+
+        assert await qs.ack_task(task_id, True)
+        assert await qs.r.llen(WORKER_PROCESSING_PREFIX + "w1") == 0
+        assert await qs.r.zscore(VISIBILITY_ZSET, task_id) is None
+        assert not await qs.r.sismember(SET_PROCESSING, task_id)
+        assert (await qs.get_task(task_id))["status"] == "completed"
+
+    asyncio.run(run())
+
+
+def test_dequeue_respects_user_limit():
+    async def run():
+        qs = _make_service()
+        qs.user_concurrent_limit = 1
+        first = await qs.enqueue_task("u1", "000001", {})
+        second = await qs.enqueue_task("u1", "000002", {})
+
+        assert (await qs.dequeue_task("w1"))["id"] == first
+        assert await qs.dequeue_task("w2") is None
+        # 超出并发限制的任务原子地放回就绪队列
+        assert await qs.r.lrange(READY_LIST, 0, -1) == [second]
+        assert await qs.r.llen(WORKER_PROCESSING_PREFIX + "w2") == 0
+
+    asyncio.run(run())
+
+
+def test_cleanup_requeues_expired_and_orphaned_tasks():
+    async def run():
+        qs = _make_service()
+        expired = await qs.enqueue_task("u1", "000001", {})
+        orphan = await qs.enqueue_task("u2", "000002", {})
+
+        assert (await qs.dequeue_task("w1"))["id"] == expired
+        await qs.r.zadd(VISIBILITY_ZSET, {expired: int(time.time()) - 1})
+
+        # 模拟 Worker 在 BLMOVE 之后、认领之前退出
+        await qs.r.sadd("qa:worker_lists", WORKER_PROCESSING_PREFIX + "w2")
+        await qs.r.rpoplpush(READY_LIST, WORKER_PROCESSING_PREFIX + "w2")
+
+        await qs.cleanup_expired_tasks()
+
+        assert sorted(await qs.r.lrange(READY_LIST, 0, -1)) == sorted([expired, orphan])
+        assert await qs.r.llen(WORKER_PROCESSING_PREFIX + "w1") == 0
+        assert await qs.r.llen(WORKER_PROCESSING_PREFIX + "w2") == 0
+        assert await qs.r.hget(TASK_PREFIX + expired, "status") == "queued"
+
+    asyncio.run(run())
+
+
+def test_create_batch_bulk_enqueue_preserves_order():
+    async def run():
+        qs = _make_service()
+        symbols = ["000001", "000002", "600000"]
+        batch_id, submitted = await qs.create_batch("u1", symbols, {"research_depth": "快速"})
+        assert submitted == 3
+
+        batch = await qs.get_batch(batch_id)
+        assert batch["submitted"] == 3
+        assert len(batch["tasks"]) == 3
+
+        dequeued = []
+        for worker in ("w1", "w2", "w3"):
+            task = await qs.dequeue_task(worker)
+            assert task["batch_id"] == batch_id
+            assert task["parameters"] == {"research_depth": "快速"}
+            dequeued.append(task["symbol"])
+        assert dequeued == symbols
+
+    asyncio.run(run())
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+
+class _FakeCollection:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def find(self, query, projection=None, **_kwargs):
+        lo = query["trade_date"]["$gte"]
+        hi = query["trade_date"]["$lte"]
+        return [d for d in self._docs if lo <= d["trade_date"] <= hi and d["period"] == query["period"]]
+
+
+class _FakeDB:
+    def __init__(self, docs):
+        self.stock_daily_quotes = _FakeCollection(docs)
+
+
+def _make_docs():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=120).strftime("%Y-%m-%d").tolist()
+    docs = []
+    # 000003 上市较晚，000002 最近停牌，检验右对齐
+    for code, days in [("000001", dates), ("000002", dates[:-5]), ("000003", dates[-40:])]:
+        close = 10 + np.cumsum(rng.normal(0, 0.2, len(days)))
+        for i, d in enumerate(days):
+            c = float(close[i])
+            docs.append({
+                "symbol": code, "trade_date": d, "period": "daily", "data_source": "tushare",
+                "open": c, "high": c + 0.3, "low": c - 0.3, "close": c,
+                "volume": 1000.0 + i, "amount": 1e6 + i,
+            })
+        # 低优先级数据源的重复记录不应混入
+        docs.append({
+            "symbol": code, "trade_date": days[-1], "period": "daily", "data_source": "akshare",
+            "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1.0, "amount": 1.0,
+        })
+    return docs
+
+
+def test_panel_matches_per_symbol_evaluation():
+    from app.services.screening.eval_utils import evaluate_conditions, evaluate_conditions_panel
+    from app.services.screening.panel_engine import compute_panel_indicators, load_daily_panel
+    from app.services.screening_service import ALLOWED_FIELDS, ALLOWED_OPS
+    from tradingagents.tools.analysis.indicators import IndicatorSpec, compute_many
+
+    docs = _make_docs()
+    panel = load_daily_panel(_FakeDB(docs), "2000-01-01", "2099-12-31")
+    compute_panel_indicators(panel)
+    symbols = panel["close"].columns
+
+    conditions = {
+        "logic": "OR",
+        "children": [
+            {"field": "close", "op": ">", "right_field": "ma20"},
+            {"field": "kdj_k", "op": "cross_up", "right_field": "kdj_d"},
+            {"field": "rsi14", "op": "between", "value": [40, 60]},
+        ],
+    }
+    mask = evaluate_conditions_panel(panel, conditions, ALLOWED_FIELDS, ALLOWED_OPS, symbols)
+
+    specs = [
+        IndicatorSpec("ma", {"n": 20}),
+        IndicatorSpec("rsi", {"n": 14}),
+        IndicatorSpec("kdj", {"n": 9, "m1": 3, "m2": 3}),
+    ]
+    for code in symbols:
+        rows = [d for d in docs if d["symbol"] == code and d["data_source"] == "tushare"]
+        df = pd.DataFrame(rows).rename(columns={"volume": "vol"})
+        dfc = compute_many(df, specs)
+
+        last = dfc.iloc[-1]
+        assert panel["close"][code].iloc[-1] == pytest.approx(last["close"])
+        for field in ("ma20", "rsi14", "kdj_k", "kdj_d"):
+            assert panel[field][code].iloc[-1] == pytest.approx(last[field], nan_ok=True)
+        assert bool(mask[code]) == evaluate_conditions(dfc, conditions, ALLOWED_FIELDS, ALLOWED_OPS)
+
+
+def test_run_uses_panel_without_symbol_cap(monkeypatch):
+    import app.services.screening_service as mod
+
+    docs = _make_docs()
+    monkeypatch.setattr("app.core.database.get_mongo_db_sync", lambda: _FakeDB(docs))
+    monkeypatch.setattr(mod.ScreeningService, "_get_universe", lambda self: ["000001", "000002", "000003"])
+
+    def _no_per_symbol(*_args, **_kwargs):
+        raise AssertionError("panel path should not fall back")
+
+    monkeypatch.setattr(mod.ScreeningService, "_run_per_symbol", _no_per_symbol)
+
+    svc = mod.ScreeningService()
+    out = svc.run({"field": "close", "op": ">", "value": 0}, mod.ScreeningParams())
+    assert out["total"] == 3
+    assert {item["code"] for item in out["items"]} == {"000001", "000002", "000003"}
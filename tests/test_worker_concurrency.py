@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+AnalysisWorker 并发槽位测试：
+1) 多个槽位同时执行任务，且并发数不超过 concurrency
+2) 停止后排空进行中的任务并全部确认
+3) 排空超时被取消的任务不确认（留给可见性超时回收）
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import app.worker.analysis_worker as analysis_worker
+from app.services.analysis_service import AnalysisService
+
+USER_ID = "507f1f77bcf86cd799439011"
+# 排空/停止的最长等待时间，避免失败时测试挂起
+RUN_TIMEOUT = 10
+
+
+class _FakeQueue:
+    def __init__(self, task_ids):
+        self.pending = list(task_ids)
+        self.acked = {}
+
+    async def dequeue_task(self, worker_id, timeout=0):
+        if not self.pending:
+            await asyncio.sleep(0.01)
+            return None
+        task_id = self.pending.pop(0)
+        return {"id": task_id, "symbol": "000001", "user": USER_ID, "parameters": {}}
+
+    async def ack_task(self, task_id, success=True):
+        self.acked[task_id] = success
+        return True
+
+
+class _FakeAnalysisService:
+    _convert_user_id = AnalysisService._convert_user_id
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self.tasks = []
+
+    async def execute_analysis_task(self, task, progress_callback=None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.tasks.append(task)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return SimpleNamespace(execution_time=self.delay)
+
+
+def _make_worker(monkeypatch, queue, service, concurrency):
+    monkeypatch.setattr(analysis_worker, "get_analysis_service", lambda: service)
+    worker = analysis_worker.AnalysisWorker(worker_id="wtest")
+    worker.queue_service = queue
+    worker.concurrency = concurrency
+    worker.running = True
+    return worker
+
+
+def test_slots_run_concurrently_and_drain(monkeypatch):
+    queue = _FakeQueue([f"t{i}" for i in range(6)])
+    service = _FakeAnalysisService(delay=0.2)
+    worker = _make_worker(monkeypatch, queue, service, concurrency=3)
+
+    async def run():
+        async def stop_when_queue_empty():
+            while queue.pending:
+                await asyncio.sleep(0.01)
+            worker.running = False
+        await asyncio.wait_for(asyncio.gather(worker._work_loop(), stop_when_queue_empty()), RUN_TIMEOUT)
+
+    asyncio.run(run())
+
+    assert service.max_running == 3
+    assert {(t.symbol, str(t.user_id)) for t in service.tasks} == {("000001", USER_ID)}
+    assert queue.acked == {f"t{i}": True for i in range(6)}
+    assert worker._active_task_ids() == []
+
+
+def test_drain_timeout_leaves_task_unacked(monkeypatch):
+    queue = _FakeQueue(["slow"])
+    service = _FakeAnalysisService(delay=5)
+    worker = _make_worker(monkeypatch, queue, service, concurrency=2)
+    worker.drain_timeout = 0.1
+
+    async def run():
+        async def stop_after_start():
+            while not worker._active_task_ids():
+                await asyncio.sleep(0.01)
+            worker.running = False
+        await asyncio.wait_for(asyncio.gather(worker._work_loop(), stop_after_start()), RUN_TIMEOUT)
+
+    asyncio.run(run())
+
+    assert queue.acked == {}
+    assert worker.current_task is None
@@ -0,0 +1,89 @@
+"""
+记忆库向量缓存与批量向量化测试（桩客户端，不调用真实接口）
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from tradingagents.agents.utils.embedding_cache import EmbeddingCache
+
+
+def test_cache_tiers_and_namespaces(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    cache = EmbeddingCache(path, memory_size=2)
+    cache.put_many("dashscope:text-embedding-v3", {"a": [0.5, 1.0], "b": [0.25, 2.0], "c": [1.0, 0.0]})
+
+    assert len(cache._memory) == 2
+    assert cache.get_many("dashscope:text-embedding-v3", ["a", "c", "x"]) == {"a": [0.5, 1.0], "c": [1.0, 0.0]}
+    assert cache.get_many("openai:text-embedding-3-small", ["a"]) == {}
+    assert cache.stats()["disk_hits"] == 1 and cache.stats()["memory_hits"] == 1
+
+    reopened = EmbeddingCache(path)
+    assert reopened.get_many("dashscope:text-embedding-v3", ["b"]) == {"b": [0.25, 2.0]}
+    assert EmbeddingCache(None).get_many("dashscope:text-embedding-v3", ["b"]) == {}
+
+
+class _FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, model, input):
+        self.calls.append(list(input))
+        data = [SimpleNamespace(index=i, embedding=[float(len(text)), 1.0]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.queries = []
+
+    def count(self):
+        return 3
+
+    def query(self, query_embeddings, n_results):
+        self.queries.append(len(query_embeddings))
+        return {
+            "documents": [[f"doc{i}"] * n_results for i in range(len(query_embeddings))],
+            "metadatas": [[{"recommendation": f"rec{i}"}] * n_results for i in range(len(query_embeddings))],
+            "distances": [[0.25] * n_results for _ in query_embeddings],
+        }
+
+
+@pytest.fixture
+def memory(tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    pytest.importorskip("dashscope")
+    from tradingagents.agents.utils import memory as memory_module
+
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"))
+    monkeypatch.setattr(memory_module, "get_embedding_cache", lambda: cache)
+    instance = object.__new__(memory_module.FinancialSituationMemory)
+    instance.llm_provider = "openai"
+    instance.embedding = "text-embedding-3-small"
+    instance.client = SimpleNamespace(embeddings=_FakeEmbeddings(), base_url="https://api.openai.com/v1")
+    instance.enable_embedding_length_check = True
+    instance.max_embedding_length = 100
+    instance.situation_collection = _FakeCollection()
+    return instance
+
+
+def test_get_embeddings_batches_dedupes_and_caches(memory):
+    vectors = memory.get_embeddings(["牛市", "熊市行情", "牛市", "", "x" * 200])
+    assert memory.client.embeddings.calls == [["牛市", "熊市行情"]]
+    assert vectors[0] == vectors[2] == [2.0, 1.0]
+    assert vectors[1] == [4.0, 1.0]
+    assert vectors[3] == vectors[4] == [0.0] * 1024
+
+    assert memory.get_embedding("熊市行情") == [4.0, 1.0]
+    assert len(memory.client.embeddings.calls) == 1
+
+
+def test_get_memories_accepts_many_queries_in_one_call(memory):
+    results = memory.get_memories(["利率上行", "", "科技股波动"], n_matches=2)
+    assert memory.situation_collection.queries == [2]
+    assert [len(r) for r in results] == [2, 0, 2]
+    assert results[2][0]["recommendation"] == "rec1"
+    assert results[0][0]["similarity"] == 0.75
+
+    single = memory.get_memories("利率上行", n_matches=1)
+    assert single[0]["situation"] == "doc0"
@@ -0,0 +1,85 @@
+"""
+LLM 响应缓存测试
+"""
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tradingagents.llm_adapters import response_cache
+from tradingagents.llm_adapters.response_cache import (
+    LLMCacheMissError,
+    LLMResponseCache,
+    cached_generate,
+    make_cache_key,
+)
+
+MESSAGES = [SystemMessage(content="你是风险经理"), HumanMessage(content="分析 600519 2026-10-15")]
+
+
+def _result(text: str) -> ChatResult:
+    message = AIMessage(content=text, tool_calls=[{"name": "get_news", "args": {"ticker": "600519"}, "id": "call_1"}])
+    return ChatResult(generations=[ChatGeneration(message=message)],
+                      llm_output={"token_usage": {"prompt_tokens": 10, "completion_tokens": 5}})
+
+
+class _FakeLLM:
+    temperature = 0.1
+    max_tokens = 2000
+
+
+def test_cache_key_ignores_message_ids_and_bookkeeping_kwargs():
+    a = MESSAGES + [AIMessage(content="", id="run-1", tool_calls=[{"name": "get_news", "args": {}, "id": "call_a"}]),
+                    ToolMessage(content="新闻", tool_call_id="call_a")]
+    b = MESSAGES + [AIMessage(content="", id="run-2", tool_calls=[{"name": "get_news", "args": {}, "id": "call_b"}]),
+                    ToolMessage(content="新闻", tool_call_id="call_b")]
+    key = make_cache_key("dashscope", "qwen-plus", 0.1, a, params={"session_id": "s1"})
+    assert key == make_cache_key("dashscope", "qwen-plus", 0.1, b, params={"session_id": "s2"})
+    assert key != make_cache_key("dashscope", "qwen-plus", 0.7, a)
+    assert key != make_cache_key("dashscope", "qwen-plus", 0.1, a, params={"tools": [{"name": "get_news"}]})
+
+
+def test_round_trip_ttl_and_eviction(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), ttl_seconds=3600, max_entries=3)
+    cache.put("k1", _result("买入"))
+    restored = cache.get("k1")
+    assert restored.generations[0].message.content == "买入"
+    assert restored.generations[0].message.tool_calls[0]["args"] == {"ticker": "600519"}
+    assert restored.llm_output["token_usage"]["prompt_tokens"] == 10
+    assert cache.get("missing") is None
+
+    for i in range(60):
+        cache.put(f"k{i}", _result(str(i)))
+    assert cache.stats()["entries"] <= 3
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    expired = LLMResponseCache(str(tmp_path / "llm.sqlite"), ttl_seconds=-1)
+    assert expired.get("k59") is None
+
+
+def test_cached_generate_modes(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_RESPONSE_CACHE", "on")
+    monkeypatch.setenv("LLM_RESPONSE_CACHE_PATH", str(tmp_path / "llm.sqlite"))
+    monkeypatch.setattr(response_cache, "_cache", None)
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return _result("持有")
+
+    first, hit = cached_generate(_FakeLLM(), "deepseek", "deepseek-chat", MESSAGES, None, {}, generate)
+    assert not hit
+    second, hit = cached_generate(_FakeLLM(), "deepseek", "deepseek-chat", MESSAGES, None, {}, generate)
+    assert hit and second.generations[0].message.content == "持有"
+    assert len(calls) == 1
+
+    response_cache._cache.replay_only = True
+    with pytest.raises(LLMCacheMissError):
+        cached_generate(_FakeLLM(), "deepseek", "deepseek-reasoner", MESSAGES, None, {}, generate)
+    assert len(calls) == 1
+
+    monkeypatch.setenv("LLM_RESPONSE_CACHE", "off")
+    cached_generate(_FakeLLM(), "deepseek", "deepseek-chat", MESSAGES, None, {}, generate)
+    assert len(calls) == 2
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from tradingagents.tools.analysis.indicators import (
+    IndicatorSpec,
+    compute_indicator,
+    compute_many,
+    kdj,
+    rsi,
+)
+
+
+def make_df(n=300, seed=7):
+    rng = np.random.default_rng(seed)
+    close = pd.Series(np.cumsum(rng.normal(0, 1, n)) + 100)
+    high = close + rng.uniform(0, 2, n)
+    low = close - rng.uniform(0, 2, n)
+    # 一段一字板（high == low == close），RSV 为 NaN，检验递推跳过 NaN
+    high.iloc[100:112] = low.iloc[100:112] = close.iloc[100:112] = 120.0
+    return pd.DataFrame({'open': close, 'high': high, 'low': low, 'close': close})
+
+
+def reference_kdj(high, low, close, n=9, m1=3, m2=3):
+    """原逐行循环实现（golden reference）"""
+    lowest_low = low.rolling(window=int(n), min_periods=int(n)).min()
+    highest_high = high.rolling(window=int(n), min_periods=int(n)).max()
+    rsv = (close - lowest_low) / (highest_high - lowest_low) * 100
+    rsv = rsv.replace([np.inf, -np.inf], np.nan)
+
+    k = pd.Series(np.nan, index=close.index)
+    d = pd.Series(np.nan, index=close.index)
+    alpha_k = 1 / float(m1)
+    alpha_d = 1 / float(m2)
+    last_k = 50.0
+    last_d = 50.0
+    for i in range(len(close)):
+        rv = rsv.iloc[i]
+        if np.isnan(rv):
+            continue
+        curr_k = (1 - alpha_k) * last_k + alpha_k * rv
+        curr_d = (1 - alpha_d) * last_d + alpha_d * curr_k
+        k.iloc[i] = curr_k
+        d.iloc[i] = curr_d
+        last_k, last_d = curr_k, curr_d
+    j = 3 * k - 2 * d
+    return pd.DataFrame({"kdj_k": k, "kdj_d": d, "kdj_j": j})
+
+
+SPECS = [
+    IndicatorSpec('ma', {'n': 5}),
+    IndicatorSpec('ma', {'n': 20}),
+    IndicatorSpec('ema', {'n': 12}),
+    IndicatorSpec('ema', {'n': 26}),
+    IndicatorSpec('macd'),
+    IndicatorSpec('rsi', {'n': 14}),
+    IndicatorSpec('boll', {'n': 20, 'k': 2}),
+    IndicatorSpec('atr', {'n': 14}),
+]
+
+
+def test_kdj_matches_reference_loop():
+    df = make_df()
+    got = kdj(df['high'], df['low'], df['close'])
+    ref = reference_kdj(df['high'], df['low'], df['close'])
+    pd.testing.assert_frame_equal(got, ref, rtol=1e-10, atol=1e-10)
+
+
+def test_compute_many_matches_per_spec_implementation():
+    df = make_df()
+    got = compute_many(df, SPECS + [IndicatorSpec('kdj', {'n': 9, 'm1': 3, 'm2': 3})])
+
+    ref = df.copy()
+    for spec in SPECS:
+        ref = compute_indicator(ref, spec)
+    ref = pd.concat([ref, reference_kdj(df['high'], df['low'], df['close'])], axis=1)
+
+    assert list(got.columns) == list(ref.columns)
+    pd.testing.assert_frame_equal(got, ref, rtol=1e-10, atol=1e-10)
+
+
+def test_china_rsi_matches_ewm_adjust_true():
+    close = make_df()['close']
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.ewm(com=5, adjust=True).mean()
+    avg_loss = loss.ewm(com=5, adjust=True).mean()
+    expected = 100 - (100 / (1 + avg_gain / avg_loss.replace(0, np.nan)))
+
+    pd.testing.assert_series_equal(rsi(close, 6, method='china'), expected, rtol=1e-10, atol=1e-10)
+
+
+def test_compute_many_overwrites_existing_column():
+    df = make_df(40)
+    df['ma5'] = 0.0
+    out = compute_many(df, [IndicatorSpec('ma', {'n': 5})])
+    assert list(out.columns) == list(df.columns)
+    assert (df['ma5'] == 0.0).all()
+    assert out['ma5'].iloc[-1] != 0.0
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from tradingagents.tools.analysis.indicators import IndicatorSpec, compute_many
+from tradingagents.tools.analysis.streaming import IncrementalIndicatorEngine, IndicatorStateStore
+
+
+SPECS = [
+    IndicatorSpec('ma', {'n': 5}),
+    IndicatorSpec('ma', {'n': 20}),
+    IndicatorSpec('ema', {'n': 12}),
+    IndicatorSpec('macd'),
+    IndicatorSpec('rsi', {'n': 14}),
+    IndicatorSpec('boll', {'n': 20, 'k': 2}),
+    IndicatorSpec('atr', {'n': 14}),
+    IndicatorSpec('kdj', {'n': 9, 'm1': 3, 'm2': 3}),
+]
+
+
+def make_df(n=200, seed=3):
+    rng = np.random.default_rng(seed)
+    close = np.cumsum(rng.normal(0, 1, n)) + 100
+    high = close + rng.uniform(0, 2, n)
+    low = close - rng.uniform(0, 2, n)
+    # 一字板：RSV 无定义
+    high[50:60] = low[50:60] = close[50:60] = 110.0
+    return pd.DataFrame({
+        'date': pd.bdate_range('2024-01-01', periods=n),
+        'open': close, 'high': high, 'low': low, 'close': close,
+    })
+
+
+def test_streaming_matches_batch():
+    df = make_df()
+    batch = compute_many(df, SPECS)
+
+    engine = IncrementalIndicatorEngine(SPECS)
+    engine.warm_up(df.iloc[:150])
+    rows = [engine.update(bar) for bar in df.iloc[150:].to_dict('records')]
+    streamed = pd.DataFrame(rows, index=df.index[150:])
+
+    expected = batch.loc[df.index[150:], engine.columns]
+    pd.testing.assert_frame_equal(streamed[engine.columns], expected, rtol=1e-9, atol=1e-9)
+
+
+def test_intraday_rewrite_of_last_bar():
+    df = make_df()
+    engine = IncrementalIndicatorEngine(SPECS)
+    engine.warm_up(df.iloc[:-1])
+
+    last = df.iloc[-1].to_dict()
+    provisional = dict(last, close=last['close'] + 5, high=last['high'] + 5)
+    engine.update(provisional)
+    row = engine.update(last)
+
+    expected = compute_many(df, SPECS).iloc[-1]
+    for col in engine.columns:
+        assert np.isclose(row[col], expected[col], rtol=1e-9, atol=1e-9, equal_nan=True), col
+
+
+def test_state_round_trip(tmp_path):
+    df = make_df()
+    store = IndicatorStateStore(state_dir=str(tmp_path))
+
+    engine = store.get_or_build('000001', 'daily', SPECS, lambda: df.iloc[:-1])
+    reloaded = store.load('000001', 'daily', SPECS)
+    assert reloaded is not None and reloaded.last_date == engine.last_date
+
+    row = reloaded.update(df.iloc[-1].to_dict())
+    expected = compute_many(df, SPECS).iloc[-1]
+    assert np.isclose(row['kdj_k'], expected['kdj_k'])
+    assert np.isclose(row['rsi14'], expected['rsi14'])
+
+    # 指标集合变化时需要重新建立状态
+    assert store.load('000001', 'daily', SPECS[:2]) is None
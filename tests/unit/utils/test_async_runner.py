@@ -0,0 +1,52 @@
+"""
+后台事件循环桥接测试
+"""
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from tradingagents.utils.async_runner import get_background_loop, run_coro
+
+
+async def _current_loop_thread():
+    await asyncio.sleep(0)
+    return threading.current_thread().name
+
+
+def test_run_coro_reuses_one_background_loop():
+    first = run_coro(_current_loop_thread())
+    second = run_coro(_current_loop_thread())
+    assert first == second == get_background_loop().name
+
+
+def test_run_coro_works_inside_running_loop():
+    async def caller():
+        # 异步上下文中的同步代码（如 LangChain 工具）不能 run_until_complete
+        return run_coro(_current_loop_thread())
+
+    assert asyncio.run(caller()) == get_background_loop().name
+
+
+def test_run_coro_timeout_cancels_coroutine():
+    cancelled = threading.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        run_coro(slow(), timeout=0.05)
+    assert cancelled.wait(1)
+
+
+def test_run_coro_rejects_nested_call_from_loop_thread():
+    async def nested():
+        return run_coro(_current_loop_thread())
+
+    with pytest.raises(RuntimeError):
+        run_coro(nested())
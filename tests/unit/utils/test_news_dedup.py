@@ -0,0 +1,73 @@
+"""
+新闻近似重复检测测试
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from tradingagents.utils.news_dedup import (
+    cluster_signatures,
+    dedupe_near_duplicates,
+    estimate_jaccard,
+    minhash_signature,
+    normalize_text,
+    shingles,
+)
+
+BODY = "贵州茅台发布三季度报告，前三季度实现营业收入1231亿元，同比增长16%，归母净利润609亿元，同比增长15%，其中第三季度单季净利润增速放缓。"
+
+
+def test_normalize_strips_source_tags_and_punctuation():
+    assert normalize_text("【财联社】贵州茅台：三季度净利润增长15%！") == "贵州茅台三季度净利润增长15"
+
+
+def _signature(title, content=""):
+    return minhash_signature(shingles(title, content))
+
+
+def test_syndicated_title_edits_stay_similar():
+    a = _signature("贵州茅台三季度净利润同比增长15%", BODY)
+    b = _signature("【财联社】贵州茅台：三季度净利润同比增长15%", BODY)
+    c = _signature("贵州茅台三季度净利同比增长15%", BODY)
+    other = _signature("宁德时代与福特汽车签署电池技术授权协议", "宁德时代公告称将向福特授权磷酸铁锂电池技术，合作期限十年。")
+
+    assert estimate_jaccard(a, b) == 1.0
+    assert estimate_jaccard(a, c) >= 0.8
+    assert estimate_jaccard(a, other) < 0.2
+
+
+def test_cluster_signatures_links_transitively():
+    a = _signature("央行宣布下调存款准备金率0.5个百分点", BODY)
+    b = _signature("央行宣布下调存款准备金率0.5个百分点释放长期资金", BODY)
+    c = _signature("沪深两市成交额连续第五个交易日突破万亿元", "")
+    clusters = cluster_signatures([a, c, b, a])
+    assert clusters == [[0, 2, 3], [1]]
+    with pytest.raises(ValueError):
+        cluster_signatures([a, b], bands=7)
+
+
+def test_dedupe_keeps_authoritative_then_earliest():
+    t0 = datetime(2026, 10, 15, 9, 0)
+    news = [
+        {"title": "【东方财富】贵州茅台三季度净利润同比增长15%", "content": BODY, "source": "东方财富", "publish_time": t0},
+        {"title": "贵州茅台：三季度净利润同比增长15%", "content": BODY, "source": "证券时报", "publish_time": t0 + timedelta(minutes=5)},
+        {"title": "贵州茅台三季度净利润同比增长15%", "content": BODY, "source": "某自媒体", "publish_time": t0 - timedelta(minutes=1)},
+        {"title": "宁德时代与福特汽车签署电池技术授权协议", "content": "", "source": "新浪财经", "publish_time": t0},
+        {"title": "", "content": "", "source": "新浪财经", "publish_time": t0},
+        {"title": "", "content": "", "source": "新浪财经", "publish_time": t0},
+    ]
+    accessors = dict(
+        title=lambda n: n["title"],
+        content=lambda n: n["content"],
+        publish_time=lambda n: n["publish_time"],
+        source=lambda n: n["source"],
+    )
+
+    authority = dedupe_near_duplicates(news, keep="authority", **accessors)
+    # 无文本的条目不参与聚类，原样保留
+    assert [n["source"] for n in authority] == ["证券时报", "新浪财经", "新浪财经", "新浪财经"]
+
+    earliest = dedupe_near_duplicates(news, keep="earliest", **accessors)
+    assert [n["source"] for n in earliest] == ["某自媒体", "新浪财经", "新浪财经", "新浪财经"]
@@ -1,4 +1,4 @@
-from typing import Annotated, Sequence
+from typing import Annotated, Dict, Sequence
 from datetime import date, timedelta, datetime
 from typing_extensions import TypedDict, Optional
 from langchain_openai import ChatOpenAI
@@ -11,6 +11,13 @@ from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
+def merge_analyst_timings(left: Dict, right: Dict) -> Dict:
+    """合并并行分析师分支各自上报的计时信息"""
+    merged = dict(left or {})
+    merged.update(right or {})
+    return merged
+
+
 # Researcher team state
 class InvestDebateState(TypedDict):
     bull_history: Annotated[
@@ -71,6 +78,9 @@ class AgentState(MessagesState):
     sentiment_tool_call_count: Annotated[int, "Social media analyst tool call counter"]
     fundamentals_tool_call_count: Annotated[int, "Fundamentals analyst tool call counter"]
 
+    # 并行分析师模式: 各分支的起止时间（用于统计墙钟耗时）
+    analyst_timings: Annotated[Dict[str, Dict[str, float]], merge_analyst_timings]
+
     # researcher team discussion step
     investment_debate_state: Annotated[
         InvestDebateState, "Current state of the debate on if to invest or not"
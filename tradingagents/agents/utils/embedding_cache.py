@@ -0,0 +1,176 @@
+"""
+文本向量缓存（按内容哈希寻址）
+
+一次分析中五个 FinancialSituationMemory 会对同一段情况描述反复向量化，重复分析同一股票时也是如此。
+向量结果只取决于 (后端, 模型, 文本)，因此用 SHA-256 作为键缓存：
+- 进程内 LRU：以 float32 数组保存，命中时不访问磁盘
+- 持久层（SQLite）：进程重启后仍可复用，超过上限时按写入时间淘汰最早的条目
+
+环境变量：
+- EMBEDDING_CACHE_ENABLED: 是否启用，默认 true
+- EMBEDDING_CACHE_MEMORY_SIZE: 进程内缓存条目数，默认 2048
+- EMBEDDING_CACHE_PATH: SQLite 文件路径，默认 ./data/cache/embeddings.sqlite；设为空字符串只使用进程内缓存
+- EMBEDDING_CACHE_MAX_ENTRIES: 持久层最大条目数，默认 100000
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("agents.utils.memory")
+
+DEFAULT_CACHE_PATH = "./data/cache/embeddings.sqlite"
+DEFAULT_MEMORY_SIZE = 2048
+DEFAULT_MAX_ENTRIES = 100000
+
+
+def embedding_cache_key(namespace: str, text: str) -> str:
+    """(后端/模型命名空间, 文本) 的 SHA-256 摘要"""
+    return hashlib.sha256(f"{namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """两级向量缓存：进程内 LRU + 可选的 SQLite 持久层"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, memory_size: int = DEFAULT_MEMORY_SIZE,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path or None
+        self.memory_size = max(1, memory_size)
+        self.max_entries = max(1, max_entries)
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if self.path:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_created ON embeddings (created_at)")
+
+    def get_many(self, namespace: str, texts: Iterable[str]) -> Dict[str, List[float]]:
+        """返回命中的 {文本: 向量}，未命中的文本不在结果中"""
+        found: Dict[str, List[float]] = {}
+        keys = {}
+        with self._lock:
+            for text in texts:
+                key = embedding_cache_key(namespace, text)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    found[text] = vector.tolist()
+                else:
+                    keys[key] = text
+
+            if keys and self._conn is not None:
+                rows = []
+                pending = list(keys)
+                # SQLite 单条语句的参数个数有限，分批查询
+                for start in range(0, len(pending), 500):
+                    chunk = pending[start:start + 500]
+                    rows.extend(self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall())
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    self._remember_locked(key, vector)
+                    self.disk_hits += 1
+                    found[keys.pop(key)] = vector.tolist()
+
+            self.misses += len(keys)
+        return found
+
+    def put_many(self, namespace: str, vectors: Dict[str, List[float]]) -> None:
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, embedding in vectors.items():
+                key = embedding_cache_key(namespace, text)
+                vector = array("f", embedding)
+                self._remember_locked(key, vector)
+                rows.append((key, vector.tobytes(), now))
+
+            if rows and self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)", rows
+                )
+                self._writes += len(rows)
+                # 每写入约 1% 上限的条目检查一次，淘汰到上限的 90%
+                if self._writes >= max(1, self.max_entries // 100):
+                    self._writes = 0
+                    self._evict_locked()
+
+    def _remember_locked(self, key: str, vector: array) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict_locked(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count > self.max_entries:
+            overflow = count - int(self.max_entries * 0.9)
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY created_at LIMIT ?)",
+                (overflow,),
+            )
+            logger.info(f"🗑️ [向量缓存] 淘汰 {overflow} 条持久化向量")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] if self._conn else 0
+            return {
+                "memory_entries": len(self._memory),
+                "persistent_entries": entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """按环境变量创建的进程级向量缓存；禁用时返回 None"""
+    global _cache
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                path = os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH)
+                try:
+                    _cache = EmbeddingCache(
+                        path=path,
+                        memory_size=int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", DEFAULT_MEMORY_SIZE)),
+                        max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                    )
+                except (sqlite3.Error, OSError) as e:
+                    logger.warning(f"⚠️ [向量缓存] 持久层不可用，仅使用进程内缓存: {e}")
+                    _cache = EmbeddingCache(path=None)
+                logger.info(f"🗄️ [向量缓存] 已启用: path={_cache.path or '仅进程内'}")
+    return _cache
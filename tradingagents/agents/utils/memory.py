@@ -8,10 +8,16 @@ import threading
 import hashlib
 from typing import Dict, Optional
 
+from tradingagents.agents.utils.embedding_cache import get_embedding_cache
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("agents.utils.memory")
 
+# 多输入接口单次请求的最大条数（DashScope text-embedding-v3 为 10）
+DASHSCOPE_EMBEDDING_BATCH_SIZE = 10
+OPENAI_EMBEDDING_BATCH_SIZE = 100
+
 
 class ChromaDBManager:
     """单例ChromaDB管理器，避免并发创建集合的冲突"""
@@ -348,24 +354,33 @@ class FinancialSituationMemory:
         logger.warning(f"⚠️ 强制截断：保留首尾关键信息，{len(text)}字符截断为{len(truncated)}字符")
         return truncated, True
 
-    def get_embedding(self, text):
-        """Get embedding for a text using the configured provider"""
+    def _uses_dashscope_embedding(self):
+        """是否使用阿里百炼的嵌入模型"""
+        return (self.llm_provider == "dashscope" or
+                self.llm_provider == "alibaba" or
+                self.llm_provider == "qianfan" or
+                (self.llm_provider == "google" and self.client is None) or
+                (self.llm_provider == "deepseek" and self.client is None) or
+                (self.llm_provider == "openrouter" and self.client is None))
 
-        # 检查记忆功能是否被禁用
-        if self.client == "DISABLED":
-            # 内存功能已禁用，返回空向量
-            logger.debug(f"⚠️ 记忆功能已禁用，返回空向量")
-            return [0.0] * 1024  # 返回1024维的零向量
+    def _embedding_namespace(self):
+        """向量缓存的命名空间：同一后端、同一模型的向量才能互相复用"""
+        if self._uses_dashscope_embedding():
+            return f"dashscope:{self.embedding}"
+        return f"{getattr(self.client, 'base_url', self.llm_provider)}:{self.embedding}"
+
+    def _check_embedding_input(self, text):
+        """检查文本是否需要向量化，不需要时（空文本、超长）调用方使用空向量"""
 
         # 验证输入文本
         if not text or not isinstance(text, str):
             logger.warning(f"⚠️ 输入文本为空或无效，返回空向量")
-            return [0.0] * 1024
+            return False
 
         text_length = len(text)
         if text_length == 0:
             logger.warning(f"⚠️ 输入文本长度为0，返回空向量")
-            return [0.0] * 1024
+            return False
         
         # 检查是否启用长度限制
         if self.enable_embedding_length_check and text_length > self.max_embedding_length:
@@ -380,7 +395,7 @@ class FinancialSituationMemory:
                 'strategy': 'length_limit_skip',
                 'max_length': self.max_embedding_length
             }
-            return [0.0] * 1024
+            return False
         
         # 记录文本信息（不进行任何截断）
         if text_length > 8192:
@@ -395,13 +410,90 @@ class FinancialSituationMemory:
             'provider': self.llm_provider,
             'strategy': 'no_truncation_with_fallback'  # 标记策略
         }
+        return True
+
+    def get_embedding(self, text):
+        """Get embedding for a text using the configured provider"""
+        return self.get_embeddings([text])[0]
 
-        if (self.llm_provider == "dashscope" or
-            self.llm_provider == "alibaba" or
-            self.llm_provider == "qianfan" or
-            (self.llm_provider == "google" and self.client is None) or
-            (self.llm_provider == "deepseek" and self.client is None) or
-            (self.llm_provider == "openrouter" and self.client is None)):
+    def get_embeddings(self, texts):
+        """批量获取向量：先查向量缓存，未命中的文本去重后按批调用供应商的多输入接口
+
+        返回与输入顺序一致的向量列表；记忆功能禁用、文本无效或调用失败时对应位置为1024维零向量。
+        """
+        texts = list(texts)
+
+        # 检查记忆功能是否被禁用
+        if self.client == "DISABLED":
+            # 内存功能已禁用，返回空向量
+            logger.debug(f"⚠️ 记忆功能已禁用，返回空向量")
+            return [[0.0] * 1024 for _ in texts]  # 返回1024维的零向量
+
+        results = [None] * len(texts)
+        pending = {}  # 文本 -> 在输入中的位置
+        for i, text in enumerate(texts):
+            if self._check_embedding_input(text):
+                pending.setdefault(text, []).append(i)
+            else:
+                results[i] = [0.0] * 1024
+
+        if pending:
+            namespace = self._embedding_namespace()
+            cache = get_embedding_cache()
+            vectors = cache.get_many(namespace, pending) if cache else {}
+            missing = [text for text in pending if text not in vectors]
+            if missing:
+                computed = self._embed_batch(missing)
+                vectors.update(computed)
+                # 零向量表示降级，不写入缓存
+                if cache:
+                    cache.put_many(namespace, {t: v for t, v in computed.items() if any(v)})
+            if len(missing) < len(pending):
+                logger.debug(f"🗄️ 向量缓存命中 {len(pending) - len(missing)}/{len(pending)}")
+
+            for text, indices in pending.items():
+                for i in indices:
+                    results[i] = vectors[text]
+
+        return results
+
+    def _embed_batch(self, texts):
+        """按批调用多输入接口；整批失败（如某条超长）时逐条重试，逐条路径带有原有的降级处理"""
+        batch_size = DASHSCOPE_EMBEDDING_BATCH_SIZE if self._uses_dashscope_embedding() else OPENAI_EMBEDDING_BATCH_SIZE
+        vectors = {}
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            if len(chunk) > 1:
+                try:
+                    vectors.update(zip(chunk, self._call_embedding_api(chunk)))
+                    logger.debug(f"✅ {self.llm_provider} 批量embedding成功: {len(chunk)}条")
+                    continue
+                except Exception as e:
+                    logger.warning(f"⚠️ {self.llm_provider} 批量embedding失败，逐条重试: {str(e)}")
+            for text in chunk:
+                vectors[text] = self._embed_one(text)
+        return vectors
+
+    def _call_embedding_api(self, texts):
+        """一次请求向量化多条文本，返回与输入顺序一致的向量"""
+        if self._uses_dashscope_embedding():
+            if not hasattr(dashscope, 'api_key') or not dashscope.api_key:
+                raise RuntimeError("DashScope API密钥未设置")
+            response = TextEmbedding.call(model=self.embedding, input=texts)
+            if response.status_code != 200:
+                raise RuntimeError(f"{response.code} - {response.message}")
+            items = sorted(response.output['embeddings'], key=lambda item: item['text_index'])
+            return [item['embedding'] for item in items]
+
+        if self.client is None:
+            raise RuntimeError("嵌入客户端未初始化")
+        response = self.client.embeddings.create(model=self.embedding, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def _embed_one(self, text):
+        """向量化单条文本（带长度限制降级处理）"""
+
+        if self._uses_dashscope_embedding():
             # 使用阿里百炼的嵌入模型
             try:
                 # 导入DashScope模块
@@ -562,7 +654,6 @@ class FinancialSituationMemory:
         situations = []
         advice = []
         ids = []
-        embeddings = []
 
         offset = self.situation_collection.count()
 
@@ -570,7 +661,9 @@ class FinancialSituationMemory:
             situations.append(situation)
             advice.append(recommendation)
             ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
+
+        # 批量向量化，重复的情况描述只请求一次
+        embeddings = self.get_embeddings(situations)
 
         self.situation_collection.add(
             documents=situations,
@@ -580,64 +673,81 @@ class FinancialSituationMemory:
         )
 
     def get_memories(self, current_situation, n_matches=1):
-        """Find matching recommendations using embeddings with smart truncation handling"""
-        
-        # 获取当前情况的embedding
-        query_embedding = self.get_embedding(current_situation)
-        
-        # 检查是否为空向量（记忆功能被禁用或出错）
-        if all(x == 0.0 for x in query_embedding):
+        """Find matching recommendations using embeddings with smart truncation handling
+
+        current_situation 也可以是情况描述的列表：一次批量向量化、一次 ChromaDB query，
+        返回与输入顺序对应的结果列表（每项为该情况的记忆列表）。
+        """
+        if isinstance(current_situation, (list, tuple)):
+            return self._query_memories(list(current_situation), n_matches)
+        return self._query_memories([current_situation], n_matches)[0]
+
+    def _query_memories(self, situations, n_matches):
+        memories_per_query = [[] for _ in situations]
+        if not situations:
+            return memories_per_query
+
+        # 获取所有情况的embedding
+        query_embeddings = self.get_embeddings(situations)
+
+        # 空向量（记忆功能被禁用或出错）不参与查询
+        valid = [i for i, embedding in enumerate(query_embeddings) if any(x != 0.0 for x in embedding)]
+        if not valid:
             logger.debug(f"⚠️ 查询embedding为空向量，返回空结果")
-            return []
+            return memories_per_query
         
         # 检查是否有足够的数据进行查询
         collection_count = self.situation_collection.count()
         if collection_count == 0:
             logger.debug(f"📭 记忆库为空，返回空结果")
-            return []
+            return memories_per_query
         
         # 调整查询数量，不能超过集合中的文档数量
         actual_n_matches = min(n_matches, collection_count)
         
         try:
-            # 执行相似度查询
+            # 执行相似度查询（多个情况合并为一次查询）
             results = self.situation_collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=[query_embeddings[i] for i in valid],
                 n_results=actual_n_matches
             )
             
             # 处理查询结果
-            memories = []
             if results and 'documents' in results and results['documents']:
-                documents = results['documents'][0]
-                metadatas = results.get('metadatas', [[]])[0]
-                distances = results.get('distances', [[]])[0]
-                
-                for i, doc in enumerate(documents):
-                    metadata = metadatas[i] if i < len(metadatas) else {}
-                    distance = distances[i] if i < len(distances) else 1.0
-                    
-                    memory_item = {
-                        'situation': doc,
-                        'recommendation': metadata.get('recommendation', ''),
-                        'similarity': 1.0 - distance,  # 转换为相似度分数
-                        'distance': distance
-                    }
-                    memories.append(memory_item)
+                metadatas_per_query = results.get('metadatas') or [[] for _ in valid]
+                distances_per_query = results.get('distances') or [[] for _ in valid]
+
+                for row, index in enumerate(valid):
+                    documents = results['documents'][row]
+                    metadatas = metadatas_per_query[row] or []
+                    distances = distances_per_query[row] or []
+
+                    for i, doc in enumerate(documents):
+                        metadata = metadatas[i] if i < len(metadatas) else {}
+                        distance = distances[i] if i < len(distances) else 1.0
+                        
+                        memory_item = {
+                            'situation': doc,
+                            'recommendation': metadata.get('recommendation', ''),
+                            'similarity': 1.0 - distance,  # 转换为相似度分数
+                            'distance': distance
+                        }
+                        memories_per_query[index].append(memory_item)
                 
                 # 记录查询信息
+                found = sum(len(memories) for memories in memories_per_query)
                 if hasattr(self, '_last_text_info') and self._last_text_info.get('was_truncated'):
-                    logger.info(f"🔍 截断文本查询完成，找到{len(memories)}个相关记忆")
+                    logger.info(f"🔍 截断文本查询完成，找到{found}个相关记忆")
                     logger.debug(f"📊 原文长度: {self._last_text_info['original_length']}, "
                                f"处理后长度: {self._last_text_info['processed_length']}")
                 else:
-                    logger.debug(f"🔍 记忆查询完成，找到{len(memories)}个相关记忆")
+                    logger.debug(f"🔍 记忆查询完成（{len(valid)}个查询），找到{found}个相关记忆")
             
-            return memories
+            return memories_per_query
             
         except Exception as e:
             logger.error(f"❌ 记忆查询失败: {str(e)}")
-            return []
+            return memories_per_query
 
     def get_cache_info(self):
         """获取缓存相关信息，用于调试和监控"""
@@ -651,6 +761,10 @@ class FinancialSituationMemory:
         # 添加最后一次文本处理信息
         if hasattr(self, '_last_text_info'):
             info['last_text_processing'] = self._last_text_info
+
+        cache = get_embedding_cache()
+        if cache:
+            info['embedding_cache'] = cache.stats()
             
         return info
 
@@ -12,7 +12,10 @@
 import json
 import os
 import re
+import threading
+import time
 import warnings
+from collections import deque
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from typing import Dict, List, Optional, Any
@@ -40,6 +43,7 @@ logger = get_logger('agents')
 
 # 导入数据模型（避免循环导入）
 from .usage_models import UsageRecord, ModelConfig, PricingConfig
+from .usage_recorder import UsageLogFile, UsageRecorder
 
 try:
     from .mongodb_storage import MongoDBStorage
@@ -68,6 +72,7 @@ class ConfigManager:
         self.models_file = self.config_dir / "models.json"
         self.pricing_file = self.config_dir / "pricing.json"
         self.usage_file = self.config_dir / "usage.json"
+        self.usage_log_file = self.config_dir / "usage.jsonl"
         self.settings_file = self.config_dir / "settings.json"
 
         # 加载.env文件（保持向后兼容）
@@ -77,6 +82,10 @@ class ConfigManager:
         self.mongodb_storage = None
         self._init_mongodb_storage()
 
+        # 使用记录：JSONL 追加文件 + 后台批量写入
+        self.usage_log = UsageLogFile(self.usage_log_file, legacy_json_path=self.usage_file)
+        self.usage_recorder = UsageRecorder(self._write_usage_batch)
+
         self._init_default_configs()
 
     def _load_env_file(self):
@@ -364,29 +373,26 @@ class ConfigManager:
             logger.error(f"保存定价配置失败: {e}")
     
     def load_usage_records(self) -> List[UsageRecord]:
-        """加载使用记录"""
+        """加载使用记录（本地 JSONL 文件，最多 max_usage_records 条）"""
+        self.usage_recorder.flush()
         try:
-            if not self.usage_file.exists():
-                return []
-            with open(self.usage_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [UsageRecord(**item) for item in data]
+            max_records = self.load_settings().get("max_usage_records", 10000)
+            return list(deque(self.usage_log.iter_records(), maxlen=max_records))
         except Exception as e:
             logger.error(f"加载使用记录失败: {e}")
             return []
-    
+
     def save_usage_records(self, records: List[UsageRecord]):
-        """保存使用记录"""
+        """保存使用记录（整体覆盖本地 JSONL 文件）"""
+        self.usage_recorder.flush()
         try:
-            data = [asdict(record) for record in records]
-            with open(self.usage_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.usage_log.rewrite(records)
         except Exception as e:
             logger.error(f"保存使用记录失败: {e}")
-    
+
     def add_usage_record(self, provider: str, model_name: str, input_tokens: int,
                         output_tokens: int, session_id: str, analysis_type: str = "stock_analysis"):
-        """添加使用记录"""
+        """添加使用记录（放入写入缓冲区后立即返回，由后台线程批量保存）"""
         # 计算成本和货币单位
         cost, currency = self.calculate_cost(provider, model_name, input_tokens, output_tokens)
 
@@ -402,42 +408,29 @@ class ConfigManager:
             analysis_type=analysis_type
         )
 
-        # 🔍 详细日志：记录保存位置
-        logger.info(f"💾 [Token记录] 准备保存: {provider}/{model_name}, 输入={input_tokens}, 输出={output_tokens}, 成本=¥{cost:.4f}, session={session_id}")
+        logger.info(f"💾 [Token记录] 加入写入缓冲: {provider}/{model_name}, 输入={input_tokens}, 输出={output_tokens}, 成本=¥{cost:.4f}, session={session_id}")
+        self.usage_recorder.record(record)
+        return record
+
+    def flush_usage_records(self, timeout: float = 5.0) -> bool:
+        """等待缓冲中的使用记录写入存储"""
+        return self.usage_recorder.flush(timeout)
 
-        # 优先使用MongoDB存储
+    def _write_usage_batch(self, records: List[UsageRecord]):
+        """后台线程回调：优先批量写入MongoDB，失败时追加到JSONL文件"""
         if self.mongodb_storage and self.mongodb_storage.is_connected():
-            logger.info(f"📊 [Token记录] 使用 MongoDB 存储 (数据库: {self.mongodb_storage.database_name}, 集合: {self.mongodb_storage.collection_name})")
-            success = self.mongodb_storage.save_usage_record(record)
-            if success:
-                logger.info(f"✅ [Token记录] MongoDB 保存成功: {provider}/{model_name}")
-                return record
-            else:
-                logger.error(f"⚠️ [Token记录] MongoDB保存失败，回退到JSON文件存储")
-        else:
-            # 🔍 详细日志：为什么没有使用MongoDB
-            if self.mongodb_storage is None:
-                logger.warning(f"⚠️ [Token记录] MongoDB存储未初始化 (mongodb_storage=None)")
-                logger.warning(f"   💡 请检查环境变量: USE_MONGODB_STORAGE={os.getenv('USE_MONGODB_STORAGE', '未设置')}")
-            elif not self.mongodb_storage.is_connected():
-                logger.warning(f"⚠️ [Token记录] MongoDB未连接 (is_connected=False)")
-
-            logger.info(f"📄 [Token记录] 使用 JSON 文件存储: {self.usage_file}")
-
-        # 回退到JSON文件存储
-        records = self.load_usage_records()
-        records.append(record)
-
-        # 限制记录数量
+            failed = self.mongodb_storage.save_usage_records(records)
+            if not failed:
+                logger.debug(f"✅ [Token记录] MongoDB 批量保存成功: {len(records)} 条")
+                return
+            # 只有未写入 MongoDB 的记录回退到文件，已写入的不重复保存
+            logger.error(f"⚠️ [Token记录] MongoDB批量保存失败 {len(failed)}/{len(records)} 条，回退到JSONL文件存储")
+            records = failed
+
         settings = self.load_settings()
-        max_records = settings.get("max_usage_records", 10000)
-        if len(records) > max_records:
-            records = records[-max_records:]
+        self.usage_log.append(records, max_records=settings.get("max_usage_records", 10000))
+        logger.debug(f"✅ [Token记录] JSONL 文件追加成功: {len(records)} 条 -> {self.usage_log_file}")
 
-        self.save_usage_records(records)
-        logger.info(f"✅ [Token记录] JSON 文件保存成功: {self.usage_file}")
-        return record
-    
     def calculate_cost(self, provider: str, model_name: str, input_tokens: int, output_tokens: int) -> tuple[float, str]:
         """
         计算使用成本
@@ -558,6 +551,8 @@ class ConfigManager:
     
     def get_usage_statistics(self, days: int = 30) -> Dict[str, Any]:
         """获取使用统计"""
+        self.usage_recorder.flush()
+
         # 优先使用MongoDB获取统计
         if self.mongodb_storage and self.mongodb_storage.is_connected():
             try:
@@ -573,31 +568,33 @@ class ConfigManager:
             except Exception as e:
                 logger.error(f"⚠️ MongoDB统计获取失败，回退到JSON文件: {e}")
         
-        # 回退到JSON文件统计
-        records = self.load_usage_records()
-        
-        # 过滤最近N天的记录
+        # 回退到本地文件统计：逐行累加，不把全部记录载入内存
         from datetime import datetime, timedelta
 
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        recent_records = []
-        for record in records:
+        tz = ZoneInfo(get_timezone_name())
+        cutoff_date = datetime.now(tz) - timedelta(days=days)
+
+        total_cost = 0.0
+        total_input_tokens = 0
+        total_output_tokens = 0
+        total_requests = 0
+        provider_stats = {}
+        for record in self.usage_log.iter_records():
             try:
                 record_date = datetime.fromisoformat(record.timestamp)
-                if record_date >= cutoff_date:
-                    recent_records.append(record)
-            except:
+            except (TypeError, ValueError):
                 continue
-        
-        # 统计数据
-        total_cost = sum(record.cost for record in recent_records)
-        total_input_tokens = sum(record.input_tokens for record in recent_records)
-        total_output_tokens = sum(record.output_tokens for record in recent_records)
-        
-        # 按供应商统计
-        provider_stats = {}
-        for record in recent_records:
+            if record_date.tzinfo is None:
+                record_date = record_date.replace(tzinfo=tz)
+            if record_date < cutoff_date:
+                continue
+
+            total_cost += record.cost
+            total_input_tokens += record.input_tokens
+            total_output_tokens += record.output_tokens
+            total_requests += 1
+
+            # 按供应商统计
             if record.provider not in provider_stats:
                 provider_stats[record.provider] = {
                     "cost": 0,
@@ -609,17 +606,17 @@ class ConfigManager:
             provider_stats[record.provider]["input_tokens"] += record.input_tokens
             provider_stats[record.provider]["output_tokens"] += record.output_tokens
             provider_stats[record.provider]["requests"] += 1
-        
+
         return {
             "period_days": days,
             "total_cost": round(total_cost, 4),
             "total_input_tokens": total_input_tokens,
             "total_output_tokens": total_output_tokens,
-            "total_requests": len(recent_records),
+            "total_requests": total_requests,
             "provider_stats": provider_stats,
-            "records_count": len(recent_records)
+            "records_count": total_requests
         }
-    
+
     def get_data_dir(self) -> str:
         """获取数据目录路径"""
         settings = self.load_settings()
@@ -692,8 +689,14 @@ class ConfigManager:
 class TokenTracker:
     """Token使用跟踪器"""
 
+    # 成本警告使用内存中的累计值，每隔一段时间才重新查询存储校准
+    COST_BASELINE_REFRESH_SECONDS = 300
+
     def __init__(self, config_manager: ConfigManager):
         self.config_manager = config_manager
+        self._recent_cost: Optional[float] = None
+        self._recent_cost_refreshed_at = 0.0
+        self._cost_lock = threading.Lock()
 
     def track_usage(self, provider: str, model_name: str, input_tokens: int,
                    output_tokens: int, session_id: str = None, analysis_type: str = "stock_analysis"):
@@ -730,13 +733,24 @@ class TokenTracker:
         threshold = settings.get("cost_alert_threshold", 100.0)
 
         # 获取今日总成本
-        today_stats = self.config_manager.get_usage_statistics(1)
-        total_today = today_stats["total_cost"]
+        total_today = self._accumulate_recent_cost(current_cost)
 
         if total_today >= threshold:
             logger.warning(f"⚠️ 成本警告: 今日成本已达到 ¥{total_today:.4f}，超过阈值 ¥{threshold}",
                           extra={'cost': total_today, 'threshold': threshold, 'event_type': 'cost_alert'})
 
+    def _accumulate_recent_cost(self, current_cost: float) -> float:
+        """最近一天的累计成本：定期从存储校准，其余时间在内存中累加，避免每次调用都查询全部记录"""
+        now = time.monotonic()
+        with self._cost_lock:
+            if self._recent_cost is None or now - self._recent_cost_refreshed_at >= self.COST_BASELINE_REFRESH_SECONDS:
+                # get_usage_statistics 会先写入缓冲区，统计结果已包含本次记录
+                self._recent_cost = self.config_manager.get_usage_statistics(1)["total_cost"]
+                self._recent_cost_refreshed_at = now
+            else:
+                self._recent_cost += current_cost
+            return self._recent_cost
+
     def get_session_cost(self, session_id: str) -> float:
         """获取会话成本"""
         records = self.config_manager.load_usage_records()
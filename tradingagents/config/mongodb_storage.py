@@ -10,6 +10,16 @@ from zoneinfo import ZoneInfo
 from typing import Dict, List, Optional, Any
 from dataclasses import asdict
 from .usage_models import UsageRecord
+from .usage_rollups import (
+    ROLLUP_COLLECTION,
+    ROLLUP_META_ID,
+    aggregate_records,
+    expired_filter,
+    merge_rollups,
+    rollup_operations,
+    rollup_replacements,
+    window_filter,
+)
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -18,7 +28,7 @@ logger = get_logger('agents')
 
 try:
     from pymongo import MongoClient
-    from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+    from pymongo.errors import BulkWriteError, ConnectionFailure, ServerSelectionTimeoutError
     MONGODB_AVAILABLE = True
 except ImportError:
     MONGODB_AVAILABLE = False
@@ -48,7 +58,9 @@ class MongoDBStorage:
         self.client = None
         self.db = None
         self.collection = None
+        self.rollup_collection = None
         self._connected = False
+        self._rollups_ready = False
         
         # 尝试连接
         self._connect()
@@ -73,6 +85,7 @@ class MongoDBStorage:
             
             self.db = self.client[self.database_name]
             self.collection = self.db[self.collection_name]
+            self.rollup_collection = self.db[ROLLUP_COLLECTION]
             
             # 创建索引以提高查询性能
             self._create_indexes()
@@ -103,6 +116,9 @@ class MongoDBStorage:
             
             # 创建分析类型索引
             self.collection.create_index("analysis_type")
+
+            # 汇总集合按粒度和时间桶查询
+            self.rollup_collection.create_index([("granularity", 1), ("bucket", 1)])
             
         except Exception as e:
             logger.error(f"创建MongoDB索引失败: {e}")
@@ -133,6 +149,7 @@ class MongoDBStorage:
 
             if result.inserted_id:
                 logger.info(f"✅ [MongoDB存储] 记录已保存: ID={result.inserted_id}, {record.provider}/{record.model_name}, ¥{record.cost:.4f}")
+                self._update_rollups([record])
                 return True
             else:
                 logger.error(f"❌ [MongoDB存储] 插入失败：未返回插入ID")
@@ -144,6 +161,109 @@ class MongoDBStorage:
             logger.error(f"   堆栈: {traceback.format_exc()}")
             return False
     
+    def save_usage_records(self, records: List[UsageRecord]) -> List[UsageRecord]:
+        """批量保存使用记录到MongoDB（insert_many），返回未能写入的记录（全部成功时为空列表）
+
+        ordered=False 时个别文档失败不影响其他文档：只返回 writeErrors 对应的记录，
+        已写入的记录照常更新汇总，调用方只需为返回的记录兜底，不会重复保存。
+        """
+        if not self._connected:
+            logger.warning(f"⚠️ [MongoDB存储] 未连接，无法保存记录")
+            return list(records)
+        if not records:
+            return []
+
+        created_at = datetime.now(ZoneInfo(get_timezone_name()))
+        docs = []
+        for record in records:
+            record_dict = asdict(record)
+            record_dict['_created_at'] = created_at
+            docs.append(record_dict)
+
+        try:
+            self.collection.insert_many(docs, ordered=False)
+            failed_indexes = set()
+        except BulkWriteError as e:
+            failed_indexes = {err['index'] for err in (e.details or {}).get('writeErrors', [])}
+            logger.error(f"❌ [MongoDB存储] 批量保存部分失败: {len(failed_indexes)}/{len(docs)} 条 - {e}")
+        except Exception as e:
+            logger.error(f"❌ [MongoDB存储] 批量保存记录失败: {e}")
+            return list(records)
+
+        inserted = [record for i, record in enumerate(records) if i not in failed_indexes]
+        logger.debug(f"📊 [MongoDB存储] 批量保存 {len(inserted)} 条记录")
+        self._update_rollups(inserted)
+        return [records[i] for i in sorted(failed_indexes)]
+
+    # ---- 预聚合汇总 ----
+
+    def _update_rollups(self, records: List[UsageRecord]) -> None:
+        """原始记录写入后更新小时/天汇总（失败只记录日志，可通过回填修复）"""
+        try:
+            operations = rollup_operations(records)
+            if operations:
+                self.rollup_collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"❌ [MongoDB存储] 更新使用汇总失败: {e}")
+
+    def rollups_ready(self) -> bool:
+        """汇总集合是否覆盖全部原始记录（已回填，或原始集合为空时直接启用）"""
+        if self._rollups_ready or not self._connected:
+            return self._rollups_ready
+        try:
+            if self.rollup_collection.find_one({"_id": ROLLUP_META_ID}) is None:
+                if self.collection.estimated_document_count() > 0:
+                    return False
+                self.rollup_collection.update_one(
+                    {"_id": ROLLUP_META_ID},
+                    {"$setOnInsert": {"backfilled_at": datetime.now(ZoneInfo(get_timezone_name()))}},
+                    upsert=True,
+                )
+            self._rollups_ready = True
+        except Exception as e:
+            logger.error(f"检查使用汇总状态失败: {e}")
+        return self._rollups_ready
+
+    def backfill_rollups(self, batch_size: int = 10000) -> int:
+        """根据现有原始记录重建汇总文档，返回处理的记录数
+
+        回填期间新写入的增量可能被覆盖，建议在没有分析任务运行时执行。
+        """
+        if not self._connected:
+            return 0
+
+        projection = {"_id": 0, "timestamp": 1, "provider": 1, "model_name": 1, "user_id": 1,
+                      "currency": 1, "input_tokens": 1, "output_tokens": 1, "cost": 1}
+        totals = None
+        processed = 0
+        batch = []
+        for doc in self.collection.find({}, projection, batch_size=batch_size):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                totals = aggregate_records(batch, into=totals)
+                processed += len(batch)
+                batch = []
+        if batch or totals is None:
+            totals = aggregate_records(batch, into=totals)
+            processed += len(batch)
+
+        operations = rollup_replacements(totals)
+        for i in range(0, len(operations), batch_size):
+            self.rollup_collection.bulk_write(operations[i:i + batch_size], ordered=False)
+        self.rollup_collection.update_one(
+            {"_id": ROLLUP_META_ID},
+            {"$set": {"backfilled_at": datetime.now(ZoneInfo(get_timezone_name())), "records": processed}},
+            upsert=True,
+        )
+        self._rollups_ready = True
+        logger.info(f"✅ [MongoDB存储] 使用汇总回填完成: {processed} 条记录 -> {len(operations)} 个时间桶")
+        return processed
+
+    def _rollup_statistics(self, days: int) -> Dict[str, Any]:
+        end_date = datetime.now()
+        docs = self.rollup_collection.find(window_filter(end_date - timedelta(days=days), end_date))
+        return merge_rollups(docs)
+
     def load_usage_records(self, limit: int = 10000, days: int = None) -> List[UsageRecord]:
         """从MongoDB加载使用记录"""
         if not self._connected:
@@ -186,7 +306,16 @@ class MongoDBStorage:
             return {}
         
         try:
-            from datetime import timedelta
+            if self.rollups_ready():
+                stats = self._rollup_statistics(days)
+                return {
+                    'period_days': days,
+                    'total_cost': round(stats['cost'], 4),
+                    'total_input_tokens': stats['input_tokens'],
+                    'total_output_tokens': stats['output_tokens'],
+                    'total_requests': stats['requests']
+                }
+
             cutoff_date = datetime.now() - timedelta(days=days)
             
             # 聚合查询
@@ -237,7 +366,17 @@ class MongoDBStorage:
             return {}
         
         try:
-            from datetime import timedelta
+            if self.rollups_ready():
+                return {
+                    provider: {
+                        'cost': round(data['cost'], 4),
+                        'input_tokens': data['input_tokens'],
+                        'output_tokens': data['output_tokens'],
+                        'requests': data['requests']
+                    }
+                    for provider, data in self._rollup_statistics(days)['by_provider'].items()
+                }
+
             cutoff_date = datetime.now() - timedelta(days=days)
             
             # 按供应商聚合
@@ -293,6 +432,11 @@ class MongoDBStorage:
             deleted_count = result.deleted_count
             if deleted_count > 0:
                 logger.info(f"清理了 {deleted_count} 条超过 {days} 天的记录")
+
+            # 汇总文档按同一截止时间清理，保持与原始记录一致
+            rollup_result = self.rollup_collection.delete_many(expired_filter(cutoff_date))
+            if rollup_result.deleted_count > 0:
+                logger.info(f"清理了 {rollup_result.deleted_count} 个超过 {days} 天的使用汇总")
             
             return deleted_count
             
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Token 使用记录的缓冲写入
+
+LLM 调用路径上只把记录放入内存环形缓冲区，由后台线程按批写入存储：
+- MongoDB 可用时使用 insert_many 批量写入
+- 否则追加到 JSONL 文件（每行一条记录），超过保留条数的两倍时才整体压缩一次
+
+缓冲区有容量上限，写入跟不上时丢弃最旧的记录并计数；进程退出时会尽量写完缓冲区。
+"""
+
+import atexit
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from .usage_models import UsageRecord
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+DEFAULT_BUFFER_CAPACITY = int(os.getenv("USAGE_BUFFER_CAPACITY", "10000"))
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL_SECONDS = float(os.getenv("USAGE_FLUSH_INTERVAL_SECONDS", "2.0"))
+
+
+class UsageLogFile:
+    """追加写入的 JSONL 使用记录文件"""
+
+    def __init__(self, path: Path, legacy_json_path: Optional[Path] = None):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._line_count: Optional[int] = None
+        if legacy_json_path is not None:
+            self._migrate_legacy(Path(legacy_json_path))
+
+    def _migrate_legacy(self, legacy_path: Path) -> None:
+        """首次使用时把旧版 usage.json（整体 JSON 数组）转换为 JSONL"""
+        if self.path.exists() or not legacy_path.exists():
+            return
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.rewrite(UsageRecord(**item) for item in data)
+            logger.info(f"📄 [Token记录] 已将 {legacy_path.name} 的 {len(data)} 条记录转换为 {self.path.name}")
+        except Exception as e:
+            logger.error(f"转换旧版使用记录失败: {e}")
+
+    def _count_lines(self) -> int:
+        if self._line_count is None:
+            self._line_count = 0
+            if self.path.exists():
+                with open(self.path, 'rb') as f:
+                    self._line_count = sum(1 for _ in f)
+        return self._line_count
+
+    def append(self, records: List[UsageRecord], max_records: Optional[int] = None) -> None:
+        lines = ''.join(json.dumps(asdict(r), ensure_ascii=False) + '\n' for r in records)
+        with self._lock:
+            count = self._count_lines()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+            self._line_count = count + len(records)
+            # 超过保留条数两倍时压缩，摊销后每条记录只被重写常数次
+            if max_records and self._line_count > 2 * max_records:
+                self._rewrite_locked(list(self._iter_locked())[-max_records:])
+
+    def rewrite(self, records) -> None:
+        with self._lock:
+            self._rewrite_locked(records)
+
+    def _rewrite_locked(self, records) -> None:
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        count = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(asdict(record), ensure_ascii=False) + '\n')
+                count += 1
+        os.replace(tmp_path, self.path)
+        self._line_count = count
+
+    def _iter_locked(self) -> Iterator[UsageRecord]:
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield UsageRecord(**json.loads(line))
+                except (TypeError, ValueError):
+                    continue
+
+    def iter_records(self) -> Iterator[UsageRecord]:
+        """逐行读取记录（不会把整个文件载入内存）"""
+        with self._lock:
+            yield from self._iter_locked()
+
+
+class UsageRecorder:
+    """使用记录的非阻塞写入器（内存环形缓冲 + 后台批量写入）"""
+
+    def __init__(self, write_batch: Callable[[List[UsageRecord]], None],
+                 capacity: int = DEFAULT_BUFFER_CAPACITY,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS):
+        self._write_batch = write_batch
+        self._buffer: deque = deque(maxlen=max(1, capacity))
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        self._cond = threading.Condition()
+        self._pending_writes = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._flush_requested = False
+        self._atexit_registered = False
+
+    def record(self, record: UsageRecord) -> None:
+        """加入缓冲区，立即返回"""
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    logger.warning(f"⚠️ [Token记录] 写入缓冲区已满，已丢弃 {self.dropped} 条最旧记录")
+            self._buffer.append(record)
+            self._ensure_thread()
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._buffer) + self._pending_writes
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """等待当前缓冲区写完；返回是否在超时前完成"""
+        with self._cond:
+            if not self._buffer and not self._pending_writes:
+                return True
+            if self._thread is not None and self._thread.is_alive():
+                self._flush_requested = True
+                self._cond.notify_all()
+                return self._cond.wait_for(lambda: not self._buffer and not self._pending_writes, timeout)
+        # 后台线程未运行（如已关闭）时在调用线程写入
+        self._drain()
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """停止后台线程并写完缓冲区（进程退出时自动调用）"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self._drain()
+
+    # ---- 后台线程 ----
+
+    def _ensure_thread(self) -> None:
+        if self._stopping or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._run, name="usage-recorder", daemon=True)
+        self._thread.start()
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+    def _take_batch(self) -> List[UsageRecord]:
+        batch = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        self._pending_writes += len(batch)
+        return batch
+
+    def _write(self, batch: List[UsageRecord]) -> None:
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            logger.error(f"❌ [Token记录] 批量写入 {len(batch)} 条记录失败: {e}")
+        finally:
+            with self._cond:
+                self._pending_writes -= len(batch)
+                self._cond.notify_all()
+
+    def _drain(self) -> None:
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or self._flush_requested or len(self._buffer) >= self.batch_size,
+                    self.flush_interval,
+                )
+                stopping = self._stopping
+                batch = self._take_batch()
+                if not self._buffer:
+                    self._flush_requested = False
+            if batch:
+                self._write(batch)
+            if stopping and not batch:
+                return
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Token 使用统计的预聚合（小时/天汇总文档）
+
+每次写入原始使用记录时，按 (粒度, 时间桶, 供应商, 模型, 用户, 货币) 对汇总文档做 $inc，
+统计查询只需读取窗口内的汇总文档：两端不完整的日期用小时桶，中间的整天用天桶，
+读取量与时间桶数量成正比，与原始记录数无关。
+
+时间桶取自记录 timestamp 字符串本身的本地时间（与按日期统计使用 timestamp[:10] 一致），
+因此统计窗口的精度为小时。
+
+同步（pymongo）与异步（motor）写入方共用这里的纯函数，各自负责执行数据库操作。
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ROLLUP_COLLECTION = "token_usage_rollups"
+# 标记原始记录已回填到汇总集合；缺失时统计回退到原始记录
+ROLLUP_META_ID = "__meta__"
+
+GRANULARITY_HOUR = "hour"
+GRANULARITY_DAY = "day"
+
+_HOUR_LEN = 13  # YYYY-MM-DDTHH
+_DAY_LEN = 10   # YYYY-MM-DD
+
+RollupKey = Tuple[str, str, str, str, str, str]
+
+
+def _field(record: Any, name: str, default: Any = None) -> Any:
+    if isinstance(record, dict):
+        return record.get(name, default)
+    return getattr(record, name, default)
+
+
+def rollup_keys(record: Any) -> List[RollupKey]:
+    """记录所属的小时桶和天桶；timestamp 无效时返回空列表"""
+    timestamp = str(_field(record, "timestamp", "") or "")
+    if len(timestamp) < _HOUR_LEN:
+        return []
+    hour_bucket = timestamp[:_HOUR_LEN].replace(" ", "T")
+    dims = (
+        _field(record, "provider", None) or "unknown",
+        _field(record, "model_name", None) or "unknown",
+        str(_field(record, "user_id", None) or ""),
+        _field(record, "currency", None) or "CNY",
+    )
+    return [
+        (GRANULARITY_HOUR, hour_bucket) + dims,
+        (GRANULARITY_DAY, hour_bucket[:_DAY_LEN]) + dims,
+    ]
+
+
+def aggregate_records(records: Iterable[Any], into: Optional[Dict[RollupKey, Dict[str, float]]] = None
+                      ) -> Dict[RollupKey, Dict[str, float]]:
+    """把原始记录累加到各时间桶"""
+    totals = into if into is not None else defaultdict(lambda: {
+        "requests": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0
+    })
+    for record in records:
+        for key in rollup_keys(record):
+            bucket = totals[key]
+            bucket["requests"] += 1
+            bucket["input_tokens"] += int(_field(record, "input_tokens", 0) or 0)
+            bucket["output_tokens"] += int(_field(record, "output_tokens", 0) or 0)
+            bucket["cost"] += float(_field(record, "cost", 0.0) or 0.0)
+    return totals
+
+
+def rollup_id(key: RollupKey) -> str:
+    return "|".join(key)
+
+
+def _key_fields(key: RollupKey) -> Dict[str, str]:
+    granularity, bucket, provider, model_name, user_id, currency = key
+    return {
+        "granularity": granularity,
+        "bucket": bucket,
+        "provider": provider,
+        "model_name": model_name,
+        "user_id": user_id,
+        "currency": currency,
+    }
+
+
+def rollup_operations(records: Iterable[Any]) -> list:
+    """写入时使用的增量操作（bulk_write，upsert + $inc）"""
+    from pymongo import UpdateOne
+
+    return [
+        UpdateOne(
+            {"_id": rollup_id(key)},
+            {"$inc": totals, "$setOnInsert": _key_fields(key)},
+            upsert=True,
+        )
+        for key, totals in aggregate_records(records).items()
+    ]
+
+
+def rollup_replacements(totals: Dict[RollupKey, Dict[str, float]]) -> list:
+    """回填时使用的整体替换操作"""
+    from pymongo import ReplaceOne
+
+    return [
+        ReplaceOne({"_id": rollup_id(key)}, {**_key_fields(key), **values}, upsert=True)
+        for key, values in totals.items()
+    ]
+
+
+def expired_filter(cutoff: datetime) -> Dict[str, Any]:
+    """早于 cutoff 的汇总文档查询条件（清理原始记录时同步删除）
+
+    只删除整个时间桶都早于 cutoff 的文档；cutoff 所在的小时桶和天桶保留。
+    """
+    cutoff_hour = cutoff.strftime("%Y-%m-%dT%H")
+    return {"$or": [
+        {"granularity": GRANULARITY_HOUR, "bucket": {"$lt": cutoff_hour}},
+        {"granularity": GRANULARITY_DAY, "bucket": {"$lt": cutoff_hour[:_DAY_LEN]}},
+    ]}
+
+
+def window_filter(start: datetime, end: datetime, provider: Optional[str] = None,
+                  model_name: Optional[str] = None) -> Dict[str, Any]:
+    """[start, end] 窗口对应的汇总文档查询条件（两端用小时桶，中间整天用天桶）"""
+    start_hour = start.strftime("%Y-%m-%dT%H")
+    end_hour = end.strftime("%Y-%m-%dT%H")
+    start_day = start_hour[:_DAY_LEN]
+    end_day = end_hour[:_DAY_LEN]
+
+    if start_day == end_day:
+        clauses = [{"granularity": GRANULARITY_HOUR, "bucket": {"$gte": start_hour, "$lte": end_hour}}]
+    else:
+        clauses = [
+            {"granularity": GRANULARITY_HOUR, "bucket": {"$gte": start_hour, "$lt": (start.date() + timedelta(days=1)).isoformat()}},
+            {"granularity": GRANULARITY_DAY, "bucket": {"$gt": start_day, "$lt": end_day}},
+            {"granularity": GRANULARITY_HOUR, "bucket": {"$gte": end_day, "$lte": end_hour}},
+        ]
+
+    query: Dict[str, Any] = {"$or": clauses}
+    if provider:
+        query["provider"] = provider
+    if model_name:
+        query["model_name"] = model_name
+    return query
+
+
+def _empty_group() -> Dict[str, Any]:
+    return {"requests": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0, "cost_by_currency": defaultdict(float)}
+
+
+def merge_rollups(docs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并汇总文档，返回总计以及按供应商/模型/日期的分组统计"""
+    totals = {"requests": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0}
+    cost_by_currency: Dict[str, float] = defaultdict(float)
+    groups = {"by_provider": defaultdict(_empty_group), "by_model": defaultdict(_empty_group),
+              "by_date": defaultdict(_empty_group)}
+
+    for doc in docs:
+        requests = doc.get("requests", 0)
+        input_tokens = doc.get("input_tokens", 0)
+        output_tokens = doc.get("output_tokens", 0)
+        cost = doc.get("cost", 0.0)
+        currency = doc.get("currency", "CNY")
+
+        totals["requests"] += requests
+        totals["input_tokens"] += input_tokens
+        totals["output_tokens"] += output_tokens
+        totals["cost"] += cost
+        cost_by_currency[currency] += cost
+
+        group_keys = {
+            "by_provider": doc.get("provider", "unknown"),
+            "by_model": f"{doc.get('provider', 'unknown')}/{doc.get('model_name', 'unknown')}",
+            "by_date": doc.get("bucket", "")[:_DAY_LEN],
+        }
+        for name, key in group_keys.items():
+            group = groups[name][key]
+            group["requests"] += requests
+            group["input_tokens"] += input_tokens
+            group["output_tokens"] += output_tokens
+            group["cost"] += cost
+            group["cost_by_currency"][currency] += cost
+
+    result: Dict[str, Any] = dict(totals)
+    result["cost_by_currency"] = dict(cost_by_currency)
+    for name, group in groups.items():
+        result[name] = {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in group.items()}
+    return result
@@ -15,6 +15,7 @@ from typing import Any, Dict, Optional, Union
 import pandas as pd
 
 from tradingagents.config.database_manager import get_database_manager
+from .serializers import get_default_serializer, get_serializer
 
 class AdaptiveCacheSystem:
     """自适应缓存系统"""
@@ -39,6 +40,9 @@ class AdaptiveCacheSystem:
         # 初始化缓存后端
         self.primary_backend = self.cache_config["primary_backend"]
         self.fallback_enabled = self.cache_config["fallback_enabled"]
+
+        # MongoDB 后端的 DataFrame 序列化格式
+        self.dataframe_serializer = get_default_serializer(legacy_format='json', compression='zstd')
         
         self.logger.info(f"自适应缓存系统初始化 - 主要后端: {self.primary_backend}")
     
@@ -167,8 +171,9 @@ class AdaptiveCacheSystem:
             
             # 序列化数据
             if isinstance(data, pd.DataFrame):
-                serialized_data = data.to_json()
-                data_type = 'dataframe'
+                serializer = self.dataframe_serializer
+                serialized_data = serializer.dumps(data)
+                data_type = f'dataframe_{serializer.name}'
             else:
                 serialized_data = pickle.dumps(data).hex()
                 data_type = 'pickle'
@@ -213,7 +218,10 @@ class AdaptiveCacheSystem:
             
             # 反序列化数据
             if doc['data_type'] == 'dataframe':
+                # 旧格式（to_json 默认 orient）
                 data = pd.read_json(doc['data'])
+            elif doc['data_type'].startswith('dataframe_'):
+                data = get_serializer(doc['data_type'][len('dataframe_'):]).loads(doc['data'])
             else:
                 data = pickle.loads(bytes.fromhex(doc['data']))
             
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+区间感知的K线缓存
+按 (股票代码, 周期, 数据源) 维护一份合并后的K线数据和已覆盖的日期区间：
+- 请求的区间被已覆盖区间包含时，直接从本地切片返回
+- 只有未覆盖的缺口才会调用数据源获取，获取结果合并回本地
+- 缺口按交易日历裁剪：没有交易日的缺口（周末、节假日）和今天之后的日期不请求数据源，
+  获取成功但没有K线的缺口同样记为已覆盖
+- 当天的K线尚未定型，只在短时间内视为已覆盖
+
+与按 (start_date, end_date) 精确哈希的缓存键不同，2023-01-01..2024-12-31 的缓存
+可以直接服务 2024-01-01..2024-06-30 的请求。
+
+配置：
+    export TA_BAR_STORE_ENABLED=false     # 关闭区间缓存（默认开启）
+    export TA_BAR_STORE_TTL_HOURS=24      # 覆盖区间的有效期（前复权价格会随除权变化）
+    export TA_BAR_STORE_INTRADAY_TTL_MINUTES=10  # 当天数据的有效期
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+from .serializers import get_default_serializer, get_serializer
+
+
+DateLike = Union[str, date, datetime]
+# 缺口获取函数: (symbol, start_date, end_date) -> DataFrame；返回 None 表示获取失败，
+# 返回空 DataFrame 表示获取成功但区间内没有K线
+GapFetcher = Callable[[str, str, str], Optional[pd.DataFrame]]
+
+
+def _to_date(value: DateLike) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(str(value)).date()
+
+
+def _replace_interval(intervals: List[Dict], new: Dict, cutoff: str) -> List[Dict]:
+    """
+    写入一次新获取的覆盖区间
+
+    已过期的区间直接丢弃；旧区间与新区间重叠的部分由新区间取代（旧区间被裁剪），
+    不同时间获取的区间不合并，各自保留自己的 fetched_at，避免新数据继承旧的获取时间而提前过期。
+    """
+    new_start, new_end = _to_date(new['start']), _to_date(new['end'])
+    result: List[Dict] = [new]
+    for interval in intervals:
+        if interval['fetched_at'] < cutoff:
+            continue
+        for piece_start, piece_end in subtract_intervals(
+                _to_date(interval['start']), _to_date(interval['end']), [(new_start, new_end)]):
+            result.append({
+                'start': piece_start.isoformat(),
+                'end': piece_end.isoformat(),
+                'fetched_at': interval['fetched_at'],
+            })
+    return sorted(result, key=lambda i: i['start'])
+
+
+def subtract_intervals(start: date, end: date, covered: List[Tuple[date, date]]) -> List[Tuple[date, date]]:
+    """计算 [start, end] 中未被 covered 覆盖的日期缺口（闭区间，按天）"""
+    gaps = []
+    cursor = start
+    for cov_start, cov_end in sorted(covered):
+        if cov_end < cursor:
+            continue
+        if cov_start > end:
+            break
+        if cov_start > cursor:
+            gaps.append((cursor, min(end, cov_start - timedelta(days=1))))
+        cursor = max(cursor, cov_end + timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class OHLCVBarStore:
+    """按股票和周期合并存储的K线缓存"""
+
+    def __init__(self, cache_dir: Union[str, Path] = None, ttl_hours: float = None,
+                 date_column: str = 'date', intraday_ttl_minutes: float = None):
+        if cache_dir is None:
+            cache_dir = Path(__file__).parent / "data_cache" / "bars"
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        if ttl_hours is None:
+            ttl_hours = float(os.getenv("TA_BAR_STORE_TTL_HOURS", "24"))
+        self.ttl_hours = ttl_hours
+        if intraday_ttl_minutes is None:
+            intraday_ttl_minutes = float(os.getenv("TA_BAR_STORE_INTRADAY_TTL_MINUTES", "10"))
+        self.intraday_ttl_minutes = intraday_ttl_minutes
+        self.date_column = date_column
+        self.serializer = get_default_serializer(legacy_format='csv')
+
+        self._lock = threading.RLock()
+        self.stats = {'hits': 0, 'partial_hits': 0, 'misses': 0, 'gap_fetches': 0}
+
+    # ==================== 存储 ====================
+
+    def _entry_paths(self, symbol: str, period: str, source: str) -> Tuple[Path, Path]:
+        safe_symbol = re.sub(r'[^0-9A-Za-z._-]', '_', str(symbol))
+        base_dir = self.cache_dir / source / period
+        base_dir.mkdir(parents=True, exist_ok=True)
+        return base_dir / f"{safe_symbol}_coverage.json", base_dir / safe_symbol
+
+    def _load(self, symbol: str, period: str, source: str) -> Tuple[Optional[pd.DataFrame], Dict]:
+        coverage_path, data_stem = self._entry_paths(symbol, period, source)
+        if not coverage_path.exists():
+            return None, {'intervals': []}
+
+        try:
+            with open(coverage_path, 'r', encoding='utf-8') as f:
+                coverage = json.load(f)
+            data_path = data_stem.with_suffix(f".{coverage['file_format_ext']}")
+            bars = None
+            if data_path.exists():
+                bars = get_serializer(coverage['file_format']).read_file(data_path, memory_map=True)
+                # CSV 不保留类型：日期列按写入时的类型还原，避免与新获取的K线混合后无法解析
+                if coverage.get('date_is_datetime') and self.date_column in bars.columns:
+                    bars[self.date_column] = pd.to_datetime(bars[self.date_column])
+            return bars, coverage
+        except Exception as e:
+            logger.warning(f"⚠️ 读取K线区间缓存失败 {symbol}/{period}: {e}")
+            return None, {'intervals': []}
+
+    def _save(self, symbol: str, period: str, source: str, bars: Optional[pd.DataFrame], coverage: Dict):
+        coverage_path, data_stem = self._entry_paths(symbol, period, source)
+        coverage['file_format'] = self.serializer.name
+        coverage['file_format_ext'] = self.serializer.file_extension
+        if bars is not None:
+            coverage['date_is_datetime'] = (
+                self.date_column in bars.columns
+                and pd.api.types.is_datetime64_any_dtype(bars[self.date_column])
+            )
+            self.serializer.write_file(bars, data_stem.with_suffix(f".{self.serializer.file_extension}"))
+        with open(coverage_path, 'w', encoding='utf-8') as f:
+            json.dump(coverage, f, ensure_ascii=False, indent=2)
+
+    # ==================== 区间计算 ====================
+
+    def _bar_dates(self, df: pd.DataFrame) -> pd.DatetimeIndex:
+        """取K线日期：优先使用 date 列，否则使用索引"""
+        if self.date_column in df.columns:
+            values = df[self.date_column]
+        else:
+            values = df.index
+        return pd.DatetimeIndex(pd.to_datetime(values)).normalize()
+
+    def _valid_intervals(self, coverage: Dict) -> List[Tuple[date, date]]:
+        now = datetime.now()
+        cutoff = (now - timedelta(hours=self.ttl_hours)).isoformat()
+        intervals = [
+            (_to_date(i['start']), _to_date(i['end']))
+            for i in coverage.get('intervals', [])
+            if i['fetched_at'] >= cutoff
+        ]
+        intraday = coverage.get('intraday')
+        if intraday and intraday['date'] == date.today().isoformat() and \
+                intraday['fetched_at'] >= (now - timedelta(minutes=self.intraday_ttl_minutes)).isoformat():
+            intervals.append((date.today(), date.today()))
+        return intervals
+
+    def _trading_gaps(self, gaps: List[Tuple[date, date]],
+                      market: Optional[str]) -> List[Tuple[date, date, Optional[Tuple[date, date]]]]:
+        """
+        把缺口裁剪到需要请求的交易日区间
+
+        Returns:
+            [(缺口开始, 缺口结束, 请求区间)]，请求区间为 None 表示缺口内没有交易日，不需要请求
+        """
+        today = date.today()
+        calendar = None
+        if market:
+            try:
+                from ..trading_calendar import get_trading_calendar
+                calendar = get_trading_calendar(market)
+            except Exception as e:
+                logger.debug(f"📦 [区间缓存] 交易日历不可用，缺口不裁剪: {e}")
+
+        result = []
+        for gap_start, gap_end in gaps:
+            # 今天之后还没有K线
+            fetch_start, fetch_end = gap_start, min(gap_end, today)
+            if calendar is not None and fetch_start <= fetch_end:
+                if not calendar.is_trading_day(fetch_start):
+                    fetch_start = calendar.next_trading_day(fetch_start)
+                if not calendar.is_trading_day(fetch_end):
+                    fetch_end = calendar.prev_trading_day(fetch_end)
+            result.append((gap_start, gap_end, (fetch_start, fetch_end) if fetch_start <= fetch_end else None))
+        return result
+
+    def missing_ranges(self, symbol: str, start_date: DateLike, end_date: DateLike,
+                       period: str = 'daily', source: str = 'default') -> List[Tuple[date, date]]:
+        """返回请求区间中尚未被有效覆盖的缺口"""
+        with self._lock:
+            _, coverage = self._load(symbol, period, source)
+        return subtract_intervals(_to_date(start_date), _to_date(end_date), self._valid_intervals(coverage))
+
+    def _merge_bars(self, existing: Optional[pd.DataFrame], new: pd.DataFrame) -> pd.DataFrame:
+        if existing is None or existing.empty:
+            combined = new
+        elif new is None or new.empty:
+            combined = existing
+        else:
+            combined = pd.concat([existing, new])
+
+        dates = self._bar_dates(combined)
+        keep = ~dates.duplicated(keep='last')
+        combined = combined[keep]
+        order = dates[keep].argsort(kind='stable')
+        return combined.iloc[order]
+
+    def _slice(self, bars: Optional[pd.DataFrame], start: date, end: date) -> pd.DataFrame:
+        if bars is None or bars.empty:
+            return pd.DataFrame()
+        dates = self._bar_dates(bars)
+        mask = (dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))
+        return bars[mask].copy()
+
+    # ==================== 对外接口 ====================
+
+    def put(self, symbol: str, bars: pd.DataFrame, start_date: DateLike, end_date: DateLike,
+            period: str = 'daily', source: str = 'default'):
+        """写入一段已获取的K线，并将 [start_date, end_date] 记为已覆盖
+
+        当天只在 intraday_ttl_minutes 内视为已覆盖（盘中K线尚未定型），以后的日期不会记为已覆盖，
+        但K线本身仍会合并保存。
+        """
+        start, end = _to_date(start_date), _to_date(end_date)
+        with self._lock:
+            existing, coverage = self._load(symbol, period, source)
+            merged = self._merge_bars(existing, bars if bars is not None else pd.DataFrame())
+
+            covered_end = min(end, date.today() - timedelta(days=1))
+            if covered_end >= start:
+                now = datetime.now()
+                coverage['intervals'] = _replace_interval(
+                    coverage.get('intervals', []),
+                    {'start': start.isoformat(), 'end': covered_end.isoformat(), 'fetched_at': now.isoformat()},
+                    cutoff=(now - timedelta(hours=self.ttl_hours)).isoformat(),
+                )
+            today = date.today()
+            if start <= today <= end:
+                coverage['intraday'] = {'date': today.isoformat(), 'fetched_at': datetime.now().isoformat()}
+
+            self._save(symbol, period, source, merged if not merged.empty else None, coverage)
+
+    def get_range(self, symbol: str, start_date: DateLike, end_date: DateLike,
+                  fetcher: Optional[GapFetcher] = None, period: str = 'daily',
+                  source: str = 'default', market: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """获取 [start_date, end_date] 的K线，只为未覆盖的缺口调用 fetcher
+
+        Args:
+            market: 提供时按该市场的交易日历裁剪缺口，没有交易日的缺口不请求数据源
+
+        Returns:
+            切片后的 DataFrame；没有任何可用数据时返回 None
+        """
+        start, end = _to_date(start_date), _to_date(end_date)
+
+        with self._lock:
+            bars, coverage = self._load(symbol, period, source)
+            gaps = subtract_intervals(start, end, self._valid_intervals(coverage))
+
+        if not gaps:
+            self.stats['hits'] += 1
+            logger.debug(f"📦 [区间缓存] 命中: {symbol} {start}~{end}")
+            result = self._slice(bars, start, end)
+            return result if not result.empty else None
+
+        if fetcher is None:
+            self.stats['misses'] += 1
+            return None
+
+        if len(gaps) == 1 and gaps[0] == (start, end):
+            self.stats['misses'] += 1
+        else:
+            self.stats['partial_hits'] += 1
+        logger.info(f"📦 [区间缓存] {symbol} {start}~{end} 需补齐 {len(gaps)} 个缺口: "
+                    f"{[(s.isoformat(), e.isoformat()) for s, e in gaps]}")
+
+        # 缺口获取在锁外执行，避免网络请求阻塞其他股票
+        for gap_start, gap_end, fetch_range in self._trading_gaps(gaps, market):
+            if fetch_range is None:
+                # 缺口内没有交易日：不请求数据源，直接记为已覆盖
+                self.put(symbol, None, gap_start, gap_end, period=period, source=source)
+                continue
+
+            fetch_start, fetch_end = fetch_range
+            self.stats['gap_fetches'] += 1
+            try:
+                gap_bars = fetcher(symbol, fetch_start.isoformat(), fetch_end.isoformat())
+            except Exception as e:
+                logger.warning(f"⚠️ [区间缓存] 缺口获取失败 {symbol} {fetch_start}~{fetch_end}: {e}")
+                gap_bars = None
+
+            if gap_bars is None:
+                # 获取失败：不记录覆盖，下次请求会重试
+                continue
+            # 获取成功（包括没有K线的空结果）：整个缺口记为已覆盖
+            self.put(symbol, gap_bars, gap_start, gap_end, period=period, source=source)
+
+        with self._lock:
+            bars, _ = self._load(symbol, period, source)
+        result = self._slice(bars, start, end)
+        return result if not result.empty else None
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+
+# 全局实例
+_bar_store_instance: Optional[OHLCVBarStore] = None
+_bar_store_lock = threading.Lock()
+
+
+def bar_store_enabled() -> bool:
+    return os.getenv("TA_BAR_STORE_ENABLED", "true").lower() == "true"
+
+
+def get_bar_store() -> OHLCVBarStore:
+    """获取全局K线区间缓存实例"""
+    global _bar_store_instance
+    if _bar_store_instance is None:
+        with _bar_store_lock:
+            if _bar_store_instance is None:
+                _bar_store_instance = OHLCVBarStore()
+    return _bar_store_instance
@@ -19,6 +19,8 @@ import pandas as pd
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .serializers import get_default_serializer, get_serializer
+
 # MongoDB
 try:
     from pymongo import MongoClient
@@ -71,6 +73,9 @@ class DatabaseCacheManager:
         self.mongodb_db = None
         self.redis_client = None
 
+        # DataFrame 序列化格式（压缩的 Arrow IPC；旧数据按 data_format 读取）
+        self.dataframe_serializer = get_default_serializer(legacy_format='json', compression='zstd')
+
         self._init_mongodb()
         self._init_redis()
 
@@ -181,6 +186,17 @@ class DatabaseCacheManager:
         cache_key = hashlib.md5(params_str.encode()).hexdigest()[:16]
         return f"{data_type}:{symbol}:{cache_key}"
 
+    @staticmethod
+    def _get_format_serializer(data_format: str):
+        """根据 data_format（如 dataframe_arrow、dataframe_json）获取序列化器"""
+        return get_serializer(data_format[len("dataframe_"):])
+
+    def _encode_redis_payload(self, payload, data_format: str) -> str:
+        """Redis 使用 decode_responses=True，二进制格式需转为 base64 文本"""
+        if data_format.startswith("dataframe_"):
+            return self._get_format_serializer(data_format).encode_text(payload)
+        return payload
+
     def save_stock_data(self, symbol: str, data: Union[pd.DataFrame, str],
                        start_date: str = None, end_date: str = None,
                        data_source: str = "unknown", market_type: str = None) -> str:
@@ -228,8 +244,9 @@ class DatabaseCacheManager:
 
         # 处理数据格式
         if isinstance(data, pd.DataFrame):
-            doc["data"] = data.to_json(orient='records', date_format='iso')
-            doc["data_format"] = "dataframe_json"
+            serializer = self.dataframe_serializer
+            doc["data"] = serializer.dumps(data)
+            doc["data_format"] = f"dataframe_{serializer.name}"
         else:
             doc["data"] = str(data)
             doc["data_format"] = "text"
@@ -247,7 +264,7 @@ class DatabaseCacheManager:
         if self.redis_client:
             try:
                 redis_data = {
-                    "data": doc["data"],
+                    "data": self._encode_redis_payload(doc["data"], doc["data_format"]),
                     "data_format": doc["data_format"],
                     "symbol": symbol,
                     "data_source": data_source,
@@ -275,8 +292,9 @@ class DatabaseCacheManager:
                     data_dict = json.loads(redis_data)
                     logger.info(f"⚡ 从Redis加载数据: {cache_key}")
 
-                    if data_dict["data_format"] == "dataframe_json":
-                        return pd.read_json(data_dict["data"], orient='records')
+                    if data_dict["data_format"].startswith("dataframe_"):
+                        serializer = self._get_format_serializer(data_dict["data_format"])
+                        return serializer.loads(serializer.decode_text(data_dict["data"]))
                     else:
                         return data_dict["data"]
             except Exception as e:
@@ -295,7 +313,7 @@ class DatabaseCacheManager:
                     if self.redis_client:
                         try:
                             redis_data = {
-                                "data": doc["data"],
+                                "data": self._encode_redis_payload(doc["data"], doc["data_format"]),
                                 "data_format": doc["data_format"],
                                 "symbol": doc["symbol"],
                                 "data_source": doc["data_source"],
@@ -310,8 +328,8 @@ class DatabaseCacheManager:
                         except Exception as e:
                             logger.error(f"⚠️ Redis同步失败: {e}")
 
-                    if doc["data_format"] == "dataframe_json":
-                        return pd.read_json(doc["data"], orient='records')
+                    if doc["data_format"].startswith("dataframe_"):
+                        return self._get_format_serializer(doc["data_format"]).loads(doc["data"])
                     else:
                         return doc["data"]
 
@@ -17,6 +17,9 @@ import hashlib
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .metadata_index import CacheMetadataIndex
+from .serializers import get_default_serializer, get_serializer
+
 
 class StockDataCache:
     """股票数据缓存管理器 - 支持美股和A股数据缓存优化"""
@@ -92,11 +95,73 @@ class StockDataCache:
             'enable_length_check': os.getenv('ENABLE_CACHE_LENGTH_CHECK', 'false').lower() == 'true'  # 文件缓存默认不限制
         }
 
+        # DataFrame 序列化格式（默认 Arrow IPC，读取时按元数据中记录的格式选择）
+        self.dataframe_serializer = get_default_serializer(legacy_format='csv')
+
+        # 元数据索引（SQLite），首次启动时从已有的 *_meta.json 迁移
+        self.metadata_index = self._init_metadata_index()
+
         logger.info(f"📁 缓存管理器初始化完成，缓存目录: {self.cache_dir}")
         logger.info(f"🗄️ 数据库缓存管理器初始化完成")
         logger.info(f"   美股数据: ✅ 已配置")
         logger.info(f"   A股数据: ✅ 已配置")
 
+    def _init_metadata_index(self) -> Optional[CacheMetadataIndex]:
+        """初始化元数据索引，失败时返回 None 并回退到遍历元数据文件"""
+        try:
+            index = CacheMetadataIndex(self.metadata_dir / "metadata_index.db")
+            if not index.is_migrated():
+                index.migrate_from_sidecars(self.metadata_dir)
+            return index
+        except Exception as e:
+            logger.warning(f"⚠️ 缓存元数据索引不可用，回退到逐文件扫描: {e}")
+            return None
+
+    def _find_cache_entries(self, symbol: str, data_type: str, market_type: str = None,
+                            data_source: str = None, max_age_hours: float = None) -> List[Dict[str, Any]]:
+        """按股票/数据类型/市场/数据源查找缓存条目（最新的在前）
+
+        优先查询元数据索引；索引不可用时遍历 *_meta.json。
+        返回的每个条目都包含 cache_key 字段。
+        """
+        min_cached_at = None
+        if max_age_hours is not None:
+            min_cached_at = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+
+        if self.metadata_index is not None:
+            try:
+                return self.metadata_index.find(symbol, data_type, market_type=market_type,
+                                                data_source=data_source, min_cached_at=min_cached_at)
+            except Exception as e:
+                logger.warning(f"⚠️ 查询缓存元数据索引失败，回退到逐文件扫描: {e}")
+
+        entries = []
+        for metadata_file in self.metadata_dir.glob("*_meta.json"):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except Exception:
+                continue
+
+            if (metadata.get('symbol') == symbol and
+                metadata.get('data_type') == data_type and
+                (market_type is None or metadata.get('market_type') == market_type) and
+                (data_source is None or metadata.get('data_source') == data_source) and
+                (min_cached_at is None or metadata.get('cached_at', '') >= min_cached_at)):
+                metadata['cache_key'] = metadata_file.stem.replace('_meta', '')
+                entries.append(metadata)
+
+        entries.sort(key=lambda m: m.get('cached_at', ''), reverse=True)
+        return entries
+
+    def _remove_stale_index_entry(self, cache_key: str):
+        """元数据文件已不存在时，同步删除索引条目"""
+        if self.metadata_index is not None and not self._get_metadata_path(cache_key).exists():
+            try:
+                self.metadata_index.delete([cache_key])
+            except Exception as e:
+                logger.warning(f"⚠️ 删除缓存索引条目失败: {e}")
+
     def _determine_market_type(self, symbol: str) -> str:
         """根据股票代码确定市场类型"""
         import re
@@ -216,6 +281,12 @@ class StockDataCache:
         
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        if self.metadata_index is not None:
+            try:
+                self.metadata_index.upsert(cache_key, metadata)
+            except Exception as e:
+                logger.warning(f"⚠️ 更新缓存元数据索引失败: {e}")
     
     def _load_metadata(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """加载元数据"""
@@ -302,9 +373,10 @@ class StockDataCache:
 
         # 保存数据
         if isinstance(data, pd.DataFrame):
-            cache_path = self._get_cache_path("stock_data", cache_key, "csv", symbol)
+            serializer = self.dataframe_serializer
+            cache_path = self._get_cache_path("stock_data", cache_key, serializer.file_extension, symbol)
             cache_path.parent.mkdir(parents=True, exist_ok=True)  # 确保目录存在
-            data.to_csv(cache_path, index=True)
+            serializer.write_file(data, cache_path)
         else:
             cache_path = self._get_cache_path("stock_data", cache_key, "txt", symbol)
             cache_path.parent.mkdir(parents=True, exist_ok=True)  # 确保目录存在
@@ -320,7 +392,7 @@ class StockDataCache:
             'end_date': end_date,
             'data_source': data_source,
             'file_path': str(cache_path),
-            'file_format': 'csv' if isinstance(data, pd.DataFrame) else 'txt',
+            'file_format': self.dataframe_serializer.name if isinstance(data, pd.DataFrame) else 'txt',
             'content_length': len(content_to_check)
         }
         self._save_metadata(cache_key, metadata)
@@ -342,8 +414,10 @@ class StockDataCache:
             return None
         
         try:
-            if metadata['file_format'] == 'csv':
-                return pd.read_csv(cache_path, index_col=0)
+            if metadata['file_format'] != 'txt':
+                # DataFrame（csv 为旧格式，arrow/parquet 支持内存映射读取）
+                serializer = get_serializer(metadata['file_format'])
+                return serializer.read_file(cache_path, memory_map=True)
             else:
                 with open(cache_path, 'r', encoding='utf-8') as f:
                     return f.read()
@@ -388,23 +462,14 @@ class StockDataCache:
             return search_key
 
         # 如果没有精确匹配，查找部分匹配（相同股票代码的其他缓存）
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'stock_data' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'stock_data'):
-                        desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
-                        logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        for entry in self._find_cache_entries(symbol, 'stock_data', market_type,
+                                              data_source, max_age_hours):
+            cache_key = entry['cache_key']
+            if self.is_cache_valid(cache_key, max_age_hours, symbol, 'stock_data'):
+                desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
+                logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
+                return cache_key
+            self._remove_stale_index_entry(cache_key)
 
         desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol}")
@@ -529,23 +594,14 @@ class StockDataCache:
             max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
         
         # 查找匹配的缓存
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'fundamentals' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-                    
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'fundamentals'):
-                        desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
-                        logger.info(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        for entry in self._find_cache_entries(symbol, 'fundamentals', market_type,
+                                              data_source, max_age_hours):
+            cache_key = entry['cache_key']
+            if self.is_cache_valid(cache_key, max_age_hours, symbol, 'fundamentals'):
+                desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
+                logger.info(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
+                return cache_key
+            self._remove_stale_index_entry(cache_key)
         
         desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol} ({data_source})")
@@ -555,7 +611,33 @@ class StockDataCache:
         """清理过期缓存"""
         cutoff_time = datetime.now() - timedelta(days=max_age_days)
         cleared_count = 0
-        
+
+        if self.metadata_index is not None:
+            try:
+                expired = self.metadata_index.find_expired(cutoff_time.isoformat())
+                cleared_keys = []
+                for entry in expired:
+                    try:
+                        # 删除数据文件
+                        if entry.get('file_path'):
+                            data_file = Path(entry['file_path'])
+                            if data_file.exists():
+                                data_file.unlink()
+
+                        # 删除元数据文件
+                        metadata_path = self._get_metadata_path(entry['cache_key'])
+                        if metadata_path.exists():
+                            metadata_path.unlink()
+                        cleared_keys.append(entry['cache_key'])
+                    except Exception as e:
+                        logger.warning(f"⚠️ 清理缓存时出错: {e}")
+
+                self.metadata_index.delete(cleared_keys)
+                logger.info(f"🧹 已清理 {len(cleared_keys)} 个过期缓存文件")
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ 查询缓存元数据索引失败，回退到逐文件扫描: {e}")
+
         for metadata_file in self.metadata_dir.glob("*_meta.json"):
             try:
                 with open(metadata_file, 'r', encoding='utf-8') as f:
@@ -591,35 +673,52 @@ class StockDataCache:
 
         total_size_bytes = 0
 
-        # 统计有元数据的缓存文件
+        # 统计有元数据的缓存文件（优先使用元数据索引聚合，不再逐个解析元数据文件）
         metadata_files_count = 0
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
+        index_stats = None
+        if self.metadata_index is not None:
             try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                data_type = metadata.get('data_type', 'unknown')
-                if data_type == 'stock_data':
-                    stats['stock_data_count'] += 1
-                elif data_type == 'news':
-                    stats['news_count'] += 1
-                elif data_type == 'fundamentals':
-                    stats['fundamentals_count'] += 1
-
-                # 检查是否为跳过的缓存（没有实际文件）
-                data_file = Path(metadata.get('file_path', ''))
-                if not data_file.exists():
-                    stats['skipped_count'] += 1
-                else:
-                    # 计算文件大小（字节）
-                    file_size = data_file.stat().st_size
-                    total_size_bytes += file_size
-
-                stats['total_files'] += 1
-                metadata_files_count += 1
-
-            except Exception:
-                continue
+                index_stats = self.metadata_index.get_stats()
+            except Exception as e:
+                logger.warning(f"⚠️ 查询缓存元数据索引失败，回退到逐文件扫描: {e}")
+
+        if index_stats is not None:
+            for data_type, type_stats in index_stats.items():
+                count_field = f"{data_type}_count"
+                if count_field in stats:
+                    stats[count_field] += type_stats['count']
+                stats['skipped_count'] += type_stats['skipped']
+                stats['total_files'] += type_stats['count']
+                total_size_bytes += type_stats['total_size']
+                metadata_files_count += type_stats['count']
+        else:
+            for metadata_file in self.metadata_dir.glob("*_meta.json"):
+                try:
+                    with open(metadata_file, 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
+
+                    data_type = metadata.get('data_type', 'unknown')
+                    if data_type == 'stock_data':
+                        stats['stock_data_count'] += 1
+                    elif data_type == 'news':
+                        stats['news_count'] += 1
+                    elif data_type == 'fundamentals':
+                        stats['fundamentals_count'] += 1
+
+                    # 检查是否为跳过的缓存（没有实际文件）
+                    data_file = Path(metadata.get('file_path', ''))
+                    if not data_file.exists():
+                        stats['skipped_count'] += 1
+                    else:
+                        # 计算文件大小（字节）
+                        file_size = data_file.stat().st_size
+                        total_size_bytes += file_size
+
+                    stats['total_files'] += 1
+                    metadata_files_count += 1
+
+                except Exception:
+                    continue
 
         # 如果没有元数据文件，则直接统计缓存目录中的文件（兼容旧缓存）
         if metadata_files_count == 0:
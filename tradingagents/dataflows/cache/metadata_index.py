@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+文件缓存元数据索引
+使用内嵌 SQLite 维护 *_meta.json 的索引，避免每次查找都遍历并解析全部元数据文件
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    cache_key      TEXT PRIMARY KEY,
+    symbol         TEXT,
+    data_type      TEXT,
+    market_type    TEXT,
+    data_source    TEXT,
+    start_date     TEXT,
+    end_date       TEXT,
+    cached_at      TEXT NOT NULL,
+    file_path      TEXT,
+    file_format    TEXT,
+    file_size      INTEGER,
+    content_length INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_cache_lookup
+    ON cache_entries (symbol, data_type, market_type, data_source, cached_at);
+CREATE INDEX IF NOT EXISTS idx_cache_range
+    ON cache_entries (symbol, data_type, start_date, end_date);
+CREATE INDEX IF NOT EXISTS idx_cache_cached_at
+    ON cache_entries (cached_at);
+CREATE TABLE IF NOT EXISTS index_state (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+ENTRY_COLUMNS = [
+    'cache_key', 'symbol', 'data_type', 'market_type', 'data_source',
+    'start_date', 'end_date', 'cached_at', 'file_path', 'file_format',
+    'file_size', 'content_length',
+]
+
+
+class CacheMetadataIndex:
+    """文件缓存元数据的 SQLite 索引
+
+    元数据侧文件（*_meta.json）仍然保留，作为单键读取和兼容旧工具的数据来源；
+    按股票/类型/数据源的部分匹配、过期清理和统计查询都走本索引。
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            # WAL 模式允许多个进程同时读，写入不阻塞读取
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(INDEX_SCHEMA)
+            self._conn.commit()
+
+    @staticmethod
+    def _entry_from_metadata(cache_key: str, metadata: Dict[str, Any]) -> tuple:
+        file_path = metadata.get('file_path')
+        file_size = None
+        if file_path:
+            try:
+                file_size = Path(file_path).stat().st_size
+            except OSError:
+                file_size = None
+
+        return (
+            cache_key,
+            metadata.get('symbol'),
+            metadata.get('data_type'),
+            metadata.get('market_type'),
+            metadata.get('data_source'),
+            metadata.get('start_date'),
+            metadata.get('end_date'),
+            metadata.get('cached_at'),
+            file_path,
+            metadata.get('file_format'),
+            file_size,
+            metadata.get('content_length'),
+        )
+
+    def upsert(self, cache_key: str, metadata: Dict[str, Any]):
+        """写入或更新一条元数据"""
+        self.upsert_many([(cache_key, metadata)])
+
+    def upsert_many(self, items: Iterable[tuple]):
+        """批量写入元数据，items 为 (cache_key, metadata) 序列"""
+        rows = [self._entry_from_metadata(key, meta) for key, meta in items if meta.get('cached_at')]
+        if not rows:
+            return
+        placeholders = ", ".join("?" for _ in ENTRY_COLUMNS)
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO cache_entries ({', '.join(ENTRY_COLUMNS)}) VALUES ({placeholders})",
+                rows,
+            )
+            self._conn.commit()
+
+    def delete(self, cache_keys: Iterable[str]):
+        """删除索引条目"""
+        keys = [(key,) for key in cache_keys]
+        if not keys:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM cache_entries WHERE cache_key = ?", keys)
+            self._conn.commit()
+
+    def find(self, symbol: str, data_type: str, market_type: str = None,
+             data_source: str = None, min_cached_at: str = None,
+             limit: int = None) -> List[Dict[str, Any]]:
+        """按 (symbol, data_type, market_type, data_source) 查找条目，最新的在前
+
+        Args:
+            min_cached_at: ISO 时间字符串，只返回在此之后缓存的条目（用于TTL过滤）
+        """
+        sql = "SELECT * FROM cache_entries WHERE symbol = ? AND data_type = ?"
+        params: List[Any] = [symbol, data_type]
+        if market_type is not None:
+            sql += " AND market_type = ?"
+            params.append(market_type)
+        if data_source is not None:
+            sql += " AND data_source = ?"
+            params.append(data_source)
+        if min_cached_at is not None:
+            sql += " AND cached_at >= ?"
+            params.append(min_cached_at)
+        sql += " ORDER BY cached_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_expired(self, cutoff: str) -> List[Dict[str, Any]]:
+        """返回 cached_at 早于 cutoff 的条目"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cache_key, file_path FROM cache_entries WHERE cached_at < ?",
+                (cutoff,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """按数据类型聚合条目数和文件大小"""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT data_type,
+                       COUNT(*) AS count,
+                       COALESCE(SUM(file_size), 0) AS total_size,
+                       SUM(CASE WHEN file_size IS NULL THEN 1 ELSE 0 END) AS skipped
+                FROM cache_entries
+                GROUP BY data_type
+                """
+            ).fetchall()
+        return {
+            row['data_type']: {
+                'count': row['count'],
+                'total_size': row['total_size'],
+                'skipped': row['skipped'] or 0,
+            }
+            for row in rows
+        }
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+    def is_migrated(self) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM index_state WHERE name = 'sidecar_migrated'"
+            ).fetchone()
+        return row is not None
+
+    def migrate_from_sidecars(self, metadata_dir: Path, batch_size: int = 1000) -> int:
+        """一次性导入已有的 *_meta.json 侧文件，返回导入条数"""
+        migrated = 0
+        batch = []
+        for metadata_file in Path(metadata_dir).glob("*_meta.json"):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except Exception as e:
+                logger.warning(f"⚠️ 跳过无法解析的元数据文件 {metadata_file.name}: {e}")
+                continue
+
+            batch.append((metadata_file.stem.replace('_meta', ''), metadata))
+            if len(batch) >= batch_size:
+                self.upsert_many(batch)
+                migrated += len(batch)
+                batch = []
+
+        if batch:
+            self.upsert_many(batch)
+            migrated += len(batch)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_state (name, value) VALUES ('sidecar_migrated', ?)",
+                (str(migrated),),
+            )
+            self._conn.commit()
+
+        logger.info(f"🗂️ 缓存元数据索引迁移完成: {migrated} 条")
+        return migrated
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
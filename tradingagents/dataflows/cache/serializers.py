@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+DataFrame 缓存序列化器
+文件、Redis、MongoDB 缓存后端共用的 DataFrame 序列化层
+
+支持的格式：
+- arrow:   Arrow IPC（默认，需 pyarrow）- 保留 dtype 和日期索引，文件后端支持内存映射读取
+- parquet: Parquet（需 pyarrow）- 压缩率更高，适合长期存储
+- csv:     旧版文件缓存格式（兼容读取）
+- json:    旧版数据库缓存格式（to_json(orient='records')，兼容读取）
+
+配置：
+    export TA_CACHE_DATAFRAME_FORMAT=arrow    # arrow / parquet / csv / json
+"""
+
+import base64
+import io
+import os
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# pyarrow（可选）
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pa_ipc = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+
+Payload = Union[bytes, str]
+
+
+class DataFrameSerializer:
+    """DataFrame 序列化器基类"""
+
+    name = "base"
+    file_extension = "bin"
+    binary = True
+
+    def dumps(self, df: pd.DataFrame) -> Payload:
+        raise NotImplementedError
+
+    def loads(self, payload: Payload) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def write_file(self, df: pd.DataFrame, path: Path):
+        payload = self.dumps(df)
+        if self.binary:
+            Path(path).write_bytes(payload)
+        else:
+            Path(path).write_text(payload, encoding='utf-8')
+
+    def read_file(self, path: Path, memory_map: bool = False) -> pd.DataFrame:
+        if self.binary:
+            return self.loads(Path(path).read_bytes())
+        return self.loads(Path(path).read_text(encoding='utf-8'))
+
+    def encode_text(self, payload: Payload) -> str:
+        """将序列化结果转换为可放入 JSON 的字符串（用于 decode_responses=True 的 Redis）"""
+        if isinstance(payload, bytes):
+            return base64.b64encode(payload).decode('ascii')
+        return payload
+
+    def decode_text(self, text: str) -> Payload:
+        """encode_text 的逆操作"""
+        if self.binary:
+            return base64.b64decode(text)
+        return text
+
+
+class ArrowIPCSerializer(DataFrameSerializer):
+    """Arrow IPC 文件格式，保留 dtype 和索引，支持内存映射读取"""
+
+    name = "arrow"
+    file_extension = "arrow"
+
+    def __init__(self, compression: Optional[str] = None):
+        # 文件后端默认不压缩以便内存映射；数据库后端可使用 lz4/zstd 减小体积
+        self.compression = compression
+
+    def _write(self, df: pd.DataFrame, sink):
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        options = pa_ipc.IpcWriteOptions(compression=self.compression)
+        with pa_ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+    def dumps(self, df: pd.DataFrame) -> bytes:
+        sink = pa.BufferOutputStream()
+        self._write(df, sink)
+        return sink.getvalue().to_pybytes()
+
+    def loads(self, payload: Payload) -> pd.DataFrame:
+        return pa_ipc.open_file(pa.py_buffer(payload)).read_all().to_pandas()
+
+    def write_file(self, df: pd.DataFrame, path: Path):
+        with pa.OSFile(str(path), 'wb') as sink:
+            self._write(df, sink)
+
+    def read_file(self, path: Path, memory_map: bool = False) -> pd.DataFrame:
+        source = pa.memory_map(str(path), 'r') if memory_map else pa.OSFile(str(path), 'rb')
+        with source:
+            return pa_ipc.open_file(source).read_all().to_pandas()
+
+
+class ParquetSerializer(DataFrameSerializer):
+    """Parquet 格式，保留 dtype 和索引"""
+
+    name = "parquet"
+    file_extension = "parquet"
+
+    def __init__(self, compression: str = "snappy"):
+        self.compression = compression
+
+    def dumps(self, df: pd.DataFrame) -> bytes:
+        sink = pa.BufferOutputStream()
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=True), sink,
+                       compression=self.compression)
+        return sink.getvalue().to_pybytes()
+
+    def loads(self, payload: Payload) -> pd.DataFrame:
+        return pq.read_table(pa.BufferReader(payload)).to_pandas()
+
+    def write_file(self, df: pd.DataFrame, path: Path):
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=True), str(path),
+                       compression=self.compression)
+
+    def read_file(self, path: Path, memory_map: bool = False) -> pd.DataFrame:
+        return pq.read_table(str(path), memory_map=memory_map).to_pandas()
+
+
+class CSVSerializer(DataFrameSerializer):
+    """旧版文件缓存格式（to_csv / read_csv），不保留 dtype"""
+
+    name = "csv"
+    file_extension = "csv"
+    binary = False
+
+    def dumps(self, df: pd.DataFrame) -> str:
+        return df.to_csv(index=True)
+
+    def loads(self, payload: Payload) -> pd.DataFrame:
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8')
+        return pd.read_csv(io.StringIO(payload), index_col=0)
+
+    def write_file(self, df: pd.DataFrame, path: Path):
+        df.to_csv(path, index=True)
+
+    def read_file(self, path: Path, memory_map: bool = False) -> pd.DataFrame:
+        return pd.read_csv(path, index_col=0)
+
+
+class JSONRecordsSerializer(DataFrameSerializer):
+    """旧版数据库缓存格式（to_json(orient='records')），丢失索引和 dtype"""
+
+    name = "json"
+    file_extension = "json"
+    binary = False
+
+    def dumps(self, df: pd.DataFrame) -> str:
+        return df.to_json(orient='records', date_format='iso')
+
+    def loads(self, payload: Payload) -> pd.DataFrame:
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8')
+        return pd.read_json(io.StringIO(payload), orient='records')
+
+
+_SERIALIZER_CLASSES = {
+    "arrow": ArrowIPCSerializer,
+    "parquet": ParquetSerializer,
+    "csv": CSVSerializer,
+    "json": JSONRecordsSerializer,
+}
+
+_ARROW_FORMATS = {"arrow", "parquet"}
+
+_serializer_instances: Dict[str, DataFrameSerializer] = {}
+
+
+def get_serializer(name: str) -> DataFrameSerializer:
+    """按格式名获取序列化器（用于读取元数据中记录的格式）"""
+    if name not in _SERIALIZER_CLASSES:
+        raise ValueError(f"不支持的DataFrame缓存格式: {name}")
+    if name in _ARROW_FORMATS and not PYARROW_AVAILABLE:
+        raise ImportError(f"DataFrame缓存格式 {name} 需要安装 pyarrow")
+
+    if name not in _serializer_instances:
+        _serializer_instances[name] = _SERIALIZER_CLASSES[name]()
+    return _serializer_instances[name]
+
+
+def get_default_serializer(legacy_format: str, compression: Optional[str] = None) -> DataFrameSerializer:
+    """获取写入时使用的序列化器
+
+    Args:
+        legacy_format: pyarrow 不可用或配置无效时回退的旧格式（文件后端为 csv，数据库后端为 json）
+        compression: Arrow IPC 压缩算法（lz4/zstd），None 表示不压缩
+    """
+    name = os.getenv("TA_CACHE_DATAFRAME_FORMAT", "arrow").lower()
+
+    if name in _ARROW_FORMATS and not PYARROW_AVAILABLE:
+        logger.warning(f"⚠️ pyarrow 未安装，DataFrame缓存回退到 {legacy_format} 格式")
+        name = legacy_format
+    elif name not in _SERIALIZER_CLASSES:
+        logger.warning(f"⚠️ 未知的DataFrame缓存格式 {name}，回退到 {legacy_format} 格式")
+        name = legacy_format
+
+    if name == "arrow" and compression:
+        return ArrowIPCSerializer(compression=compression)
+    return get_serializer(name)
@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 from typing import Optional, Tuple, List
 import pandas as pd
 
+from tradingagents.dataflows.trading_calendar import get_trading_calendar
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,6 +52,7 @@ class DataCompletenessChecker:
             "data_rows": 0,
             "expected_rows": 0,
             "missing_days": 0,
+            "missing_trade_days": 0,
             "has_latest_trade_date": False,
             "latest_date_in_data": None,
             "latest_trade_date": None,
@@ -102,23 +105,24 @@ class DataCompletenessChecker:
                 latest_trade_dt = datetime.strptime(latest_trade_date, '%Y-%m-%d')
                 details["has_latest_trade_date"] = data_end_date.date() >= latest_trade_dt.date()
             
-            # 6. 计算预期交易日数量（粗略估算）
-            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            total_days = (end_dt - start_dt).days + 1
-            
-            # 假设交易日约占总天数的 70%（考虑周末和节假日）
-            expected_trade_days = int(total_days * 0.7)
+            # 6. 按交易日历计算预期交易日数量（日历不可用时按周一至周五估算）
+            calendar = get_trading_calendar(market)
+            expected_trade_days = calendar.count_trading_days(start_date, end_date)
             details["expected_rows"] = expected_trade_days
             
             # 7. 计算完整性比率
+            completeness_ratio = 0.0
             if expected_trade_days > 0:
                 completeness_ratio = len(df) / expected_trade_days
                 details["completeness_ratio"] = completeness_ratio
             
             # 8. 检查数据缺口
-            missing_days = self._check_data_gaps(df, date_col)
+            missing_days = self._check_data_gaps(df, date_col, calendar)
             details["missing_days"] = len(missing_days)
+            if calendar.exact:
+                details["missing_trade_days"] = max(
+                    0, calendar.count_trading_days(data_start_date, data_end_date) - df[date_col].dt.normalize().nunique()
+                )
             
             # 9. 综合判断
             is_complete = True
@@ -205,36 +209,35 @@ class DataCompletenessChecker:
                     if latest_date:
                         return latest_date
             
-            # 备用方案：假设最新交易日是今天或昨天（如果今天是周末则往前推）
-            today = datetime.now()
-            for delta in range(0, 5):  # 最多回溯5天
-                check_date = today - timedelta(days=delta)
-                # 跳过周末
-                if check_date.weekday() < 5:  # 0-4 是周一到周五
-                    return check_date.strftime('%Y-%m-%d')
-            
-            return None
+            # 备用方案：按交易日历取今天或之前最近的交易日
+            return get_trading_calendar(market).latest_trading_day().strftime('%Y-%m-%d')
             
         except Exception as e:
             self.logger.error(f"❌ 获取最新交易日失败: {e}")
             return None
     
-    def _check_data_gaps(self, df: pd.DataFrame, date_col: str) -> List[str]:
-        """检查数据缺口"""
+    def _check_data_gaps(self, df: pd.DataFrame, date_col: str, calendar=None) -> List[str]:
+        """检查数据缺口（相邻两条记录之间缺少交易日即为一个缺口）"""
         try:
             df = df.sort_values(date_col)
             dates = df[date_col].tolist()
+            # 没有节假日信息时只能按日期差粗略判断，否则长假会被误判为缺口
+            exact = calendar is not None and calendar.exact
             
             missing_dates = []
             for i in range(len(dates) - 1):
                 current_date = dates[i]
                 next_date = dates[i + 1]
                 
-                # 计算日期差
-                delta = (next_date - current_date).days
+                if exact:
+                    has_gap = calendar.count_trading_days(
+                        current_date + timedelta(days=1), next_date - timedelta(days=1)
+                    ) > 0
+                else:
+                    # 如果差距大于3天（考虑周末），可能有缺口
+                    has_gap = (next_date - current_date).days > 3
                 
-                # 如果差距大于3天（考虑周末），可能有缺口
-                if delta > 3:
+                if has_gap:
                     missing_dates.append(f"{current_date.strftime('%Y-%m-%d')} 到 {next_date.strftime('%Y-%m-%d')}")
             
             return missing_dates
@@ -14,6 +14,7 @@ import numpy as np
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.async_runner import run_coro
 logger = get_logger('agents')
 warnings.filterwarnings('ignore')
 
@@ -923,6 +924,41 @@ class DataSourceManager:
         """
         logger.info(f"📊 [DataFrame接口] 获取股票数据: {symbol} ({start_date} 到 {end_date})")
 
+        # 区间感知K线缓存：已覆盖的日期直接切片返回，只向数据源请求未覆盖的缺口
+        if start_date and end_date:
+            from .cache.bar_store import bar_store_enabled, get_bar_store
+            if bar_store_enabled():
+                try:
+                    df = get_bar_store().get_range(
+                        symbol, start_date, end_date,
+                        fetcher=lambda sym, gap_start, gap_end: self._fetch_stock_dataframe(sym, gap_start, gap_end, period),
+                        period=period,
+                        source='dataframe',
+                        market='CN',
+                    )
+                    if df is None or df.empty:
+                        return pd.DataFrame()
+                    df = df.reset_index(drop=True)
+                    # 各缺口分别获取时，缺口首行的涨跌幅为空，用合并后的收盘价补齐
+                    if 'pct_change' in df.columns and 'close' in df.columns:
+                        df['pct_change'] = df['pct_change'].fillna(df['close'].pct_change() * 100.0)
+                    return df
+                except Exception as e:
+                    logger.warning(f"⚠️ [DataFrame接口] 区间缓存不可用，直接请求数据源: {e}")
+
+        df = self._fetch_stock_dataframe(symbol, start_date, end_date, period)
+        return df if df is not None else pd.DataFrame()
+
+    def _fetch_stock_dataframe(self, symbol: str, start_date: str, end_date: str, period: str = "daily") -> Optional[pd.DataFrame]:
+        """
+        按当前数据源和降级顺序获取标准化后的 DataFrame
+
+        Returns:
+            Optional[pd.DataFrame]: 标准化后的 DataFrame；数据源正常返回但区间内没有K线时返回空 DataFrame，
+            所有数据源都失败时返回 None
+        """
+        # 有在线数据源正常返回了空结果（停牌、未上市等），区间内确实没有K线
+        answered_empty = False
         try:
             # 尝试当前数据源
             df = None
@@ -946,6 +982,9 @@ class DataSourceManager:
             if df is not None and not df.empty:
                 logger.info(f"✅ [DataFrame接口] 从 {self.current_source.value} 获取成功: {len(df)}条")
                 return self._standardize_dataframe(df)
+            # MongoDB 缓存为空只说明尚未同步，不代表区间内没有K线
+            if df is not None and self.current_source != ChinaDataSource.MONGODB:
+                answered_empty = True
 
             # 降级到其他数据源
             logger.warning(f"⚠️ [DataFrame接口] {self.current_source.value} 失败，尝试降级")
@@ -973,16 +1012,21 @@ class DataSourceManager:
                     if df is not None and not df.empty:
                         logger.info(f"✅ [DataFrame接口] 降级到 {source.value} 成功: {len(df)}条")
                         return self._standardize_dataframe(df)
+                    if df is not None and source != ChinaDataSource.MONGODB:
+                        answered_empty = True
                 except Exception as e:
                     logger.warning(f"⚠️ [DataFrame接口] {source.value} 失败: {e}")
                     continue
 
+            if answered_empty:
+                logger.info(f"ℹ️ [DataFrame接口] {symbol} {start_date}~{end_date} 区间内没有K线")
+                return pd.DataFrame()
             logger.error(f"❌ [DataFrame接口] 所有数据源都失败: {symbol}")
-            return pd.DataFrame()
+            return None
 
         except Exception as e:
             logger.error(f"❌ [DataFrame接口] 获取失败: {e}", exc_info=True)
-            return pd.DataFrame()
+            return pd.DataFrame() if answered_empty else None
 
     def _standardize_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -1200,18 +1244,7 @@ class DataSourceManager:
                 # 获取股票基本信息
                 provider = self._get_tushare_adapter()
                 if provider:
-                    import asyncio
-                    try:
-                        loop = asyncio.get_event_loop()
-                        if loop.is_closed():
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                    except RuntimeError:
-                        # 在线程池中没有事件循环，创建新的
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-
-                    stock_info = loop.run_until_complete(provider.get_stock_basic_info(symbol))
+                    stock_info = run_coro(provider.get_stock_basic_info(symbol))
                     stock_name = stock_info.get('name', f'股票{symbol}') if stock_info else f'股票{symbol}'
                 else:
                     stock_name = f'股票{symbol}'
@@ -1228,25 +1261,15 @@ class DataSourceManager:
                 return f"❌ Tushare提供器不可用"
 
             # 使用异步方法获取历史数据
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-            except RuntimeError:
-                # 在线程池中没有事件循环，创建新的
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
 
-            data = loop.run_until_complete(provider.get_historical_data(symbol, start_date, end_date))
+            data = run_coro(provider.get_historical_data(symbol, start_date, end_date))
 
             if data is not None and not data.empty:
                 # 保存到缓存
                 self._save_to_cache(symbol, data, start_date, end_date)
 
                 # 获取股票基本信息（异步）
-                stock_info = loop.run_until_complete(provider.get_stock_basic_info(symbol))
+                stock_info = run_coro(provider.get_stock_basic_info(symbol))
                 stock_name = stock_info.get('name', f'股票{symbol}') if stock_info else f'股票{symbol}'
 
                 # 格式化返回
@@ -1283,25 +1306,15 @@ class DataSourceManager:
             provider = get_akshare_provider()
 
             # 使用异步方法获取历史数据
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-            except RuntimeError:
-                # 在线程池中没有事件循环，创建新的
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
 
-            data = loop.run_until_complete(provider.get_historical_data(symbol, start_date, end_date, period))
+            data = run_coro(provider.get_historical_data(symbol, start_date, end_date, period))
 
             duration = time.time() - start_time
 
             if data is not None and not data.empty:
                 # 🔧 修复：使用统一的格式化方法，包含技术指标计算
                 # 获取股票基本信息
-                stock_info = loop.run_until_complete(provider.get_stock_basic_info(symbol))
+                stock_info = run_coro(provider.get_stock_basic_info(symbol))
                 stock_name = stock_info.get('name', f'股票{symbol}') if stock_info else f'股票{symbol}'
 
                 # 调用统一的格式化方法（包含技术指标计算）
@@ -1327,23 +1340,13 @@ class DataSourceManager:
         provider = get_baostock_provider()
 
         # 使用异步方法获取历史数据
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_closed():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-        except RuntimeError:
-            # 在线程池中没有事件循环，创建新的
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
 
-        data = loop.run_until_complete(provider.get_historical_data(symbol, start_date, end_date, period))
+        data = run_coro(provider.get_historical_data(symbol, start_date, end_date, period))
 
         if data is not None and not data.empty:
             # 🔧 修复：使用统一的格式化方法，包含技术指标计算
             # 获取股票基本信息
-            stock_info = loop.run_until_complete(provider.get_stock_basic_info(symbol))
+            stock_info = run_coro(provider.get_stock_basic_info(symbol))
             stock_name = stock_info.get('name', f'股票{symbol}') if stock_info else f'股票{symbol}'
 
             # 调用统一的格式化方法（包含技术指标计算）
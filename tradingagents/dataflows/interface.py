@@ -1,4 +1,4 @@
-from typing import Annotated, Dict
+from typing import Annotated, Any, Dict, Optional
 import time
 import os
 from datetime import datetime
@@ -742,6 +742,14 @@ def get_stock_stats_indicators_window(
     curr_date = datetime.strptime(curr_date, "%Y-%m-%d")
     before = curr_date - relativedelta(days=look_back_days)
 
+    # 指标列只计算一次，窗口内每天直接取值（以前每天都重新读取并计算整份历史数据）
+    indicator_values = get_stockstats_indicator_values(symbol, indicator, online)
+
+    def format_value(date_str):
+        if indicator_values is None:
+            return ""
+        return str(indicator_values.get(date_str, NOT_TRADING_DAY))
+
     if not online:
         # read from YFin data
         data = pd.read_csv(
@@ -751,28 +759,22 @@ def get_stock_stats_indicators_window(
             )
         )
         data["Date"] = pd.to_datetime(data["Date"], utc=True)
-        dates_in_df = data["Date"].astype(str).str[:10]
+        trading_dates = set(data["Date"].astype(str).str[:10])
 
         ind_string = ""
         while curr_date >= before:
             # only do the trading dates
-            if curr_date.strftime("%Y-%m-%d") in dates_in_df.values:
-                indicator_value = get_stockstats_indicator(
-                    symbol, indicator, curr_date.strftime("%Y-%m-%d"), online
-                )
-
-                ind_string += f"{curr_date.strftime('%Y-%m-%d')}: {indicator_value}\n"
+            date_str = curr_date.strftime("%Y-%m-%d")
+            if date_str in trading_dates:
+                ind_string += f"{date_str}: {format_value(date_str)}\n"
 
             curr_date = curr_date - relativedelta(days=1)
     else:
         # online gathering
         ind_string = ""
         while curr_date >= before:
-            indicator_value = get_stockstats_indicator(
-                symbol, indicator, curr_date.strftime("%Y-%m-%d"), online
-            )
-
-            ind_string += f"{curr_date.strftime('%Y-%m-%d')}: {indicator_value}\n"
+            date_str = curr_date.strftime("%Y-%m-%d")
+            ind_string += f"{date_str}: {format_value(date_str)}\n"
 
             curr_date = curr_date - relativedelta(days=1)
 
@@ -815,6 +817,26 @@ def get_stockstats_indicator(
     return str(indicator_value)
 
 
+def get_stockstats_indicator_values(
+    symbol: Annotated[str, "ticker symbol of the company"],
+    indicator: Annotated[str, "technical indicator to get the analysis and report of"],
+    online: Annotated[bool, "to fetch data online or offline"],
+) -> Optional[Dict[str, Any]]:
+    """整段历史的指标值 {YYYY-mm-dd: 值}；失败时返回 None（与逐日查询失败时返回空字符串对应）"""
+    try:
+        return StockstatsUtils.get_indicator_values(
+            symbol,
+            indicator,
+            os.path.join(DATA_DIR, "market_data", "price_data"),
+            online=online,
+        )
+    except Exception as e:
+        print(
+            f"Error getting stockstats indicator data for indicator {indicator}: {e}"
+        )
+        return None
+
+
 def get_YFin_data_window(
     symbol: Annotated[str, "ticker symbol of the company"],
     curr_date: Annotated[str, "Start date in yyyy-mm-dd format"],
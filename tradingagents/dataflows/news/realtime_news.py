@@ -9,15 +9,18 @@ import json
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 import time
 import os
-from dataclasses import dataclass
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 
 # 导入日志模块
 from tradingagents.config.runtime_settings import get_timezone_name
 
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.news_dedup import dedupe_near_duplicates
 logger = get_logger('agents')
 
 
@@ -34,10 +37,79 @@ class NewsItem:
     relevance_score: float
 
 
+@dataclass
+class NewsSourceStats:
+    """单个新闻源的调用统计"""
+    calls: int = 0
+    hits: int = 0          # 返回了至少一条新闻
+    timeouts: int = 0      # 超过总截止时间仍未返回
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    last_latency: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, latency: float, count: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.hits += 1 if count > 0 else 0
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.last_latency = latency
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def to_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'hits': self.hits,
+                'timeouts': self.timeouts,
+                'hit_rate': self.hits / self.calls if self.calls else 0.0,
+                'avg_latency': self.total_latency / self.calls if self.calls else 0.0,
+                'max_latency': self.max_latency,
+                'last_latency': self.last_latency,
+            }
+
+
+# 进程级的新闻源统计
+_SOURCE_STATS: Dict[str, NewsSourceStats] = {}
+_SOURCE_STATS_LOCK = threading.Lock()
+
+
+def _get_source_stats(source: str) -> NewsSourceStats:
+    with _SOURCE_STATS_LOCK:
+        if source not in _SOURCE_STATS:
+            _SOURCE_STATS[source] = NewsSourceStats()
+        return _SOURCE_STATS[source]
+
+
+def get_news_source_stats() -> Dict[str, Dict[str, float]]:
+    """各新闻源的调用次数、命中率、超时次数与耗时统计"""
+    with _SOURCE_STATS_LOCK:
+        sources = list(_SOURCE_STATS.items())
+    return {name: stats.to_dict() for name, stats in sources}
+
+
+def reset_news_source_stats() -> None:
+    with _SOURCE_STATS_LOCK:
+        _SOURCE_STATS.clear()
+
+
 class RealtimeNewsAggregator:
     """实时新闻聚合器"""
 
-    def __init__(self):
+    FINNHUB_URL = "https://finnhub.io/api/v1/company-news"
+    ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+    NEWSAPI_URL = "https://newsapi.org/v2/everything"
+
+    def __init__(self, source_timeout: Optional[float] = None, deadline: Optional[float] = None):
+        """
+        Args:
+            source_timeout: 单个新闻源 HTTP 请求超时（秒），默认 NEWS_SOURCE_TIMEOUT_SECONDS 或 8
+            deadline: 所有新闻源的总截止时间（秒），默认 NEWS_AGGREGATE_DEADLINE_SECONDS 或 12
+        """
         self.headers = {
             'User-Agent': 'TradingAgents-CN/1.0'
         }
@@ -47,6 +119,9 @@ class RealtimeNewsAggregator:
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY')
         self.newsapi_key = os.getenv('NEWSAPI_KEY')
 
+        self.source_timeout = source_timeout if source_timeout is not None else float(os.getenv('NEWS_SOURCE_TIMEOUT_SECONDS', '8'))
+        self.deadline = deadline if deadline is not None else float(os.getenv('NEWS_AGGREGATE_DEADLINE_SECONDS', '12'))
+
     def get_realtime_stock_news(self, ticker: str, hours_back: int = 6, max_news: int = 10) -> List[NewsItem]:
         """
         获取实时股票新闻
@@ -59,62 +134,19 @@ class RealtimeNewsAggregator:
         """
         logger.info(f"[新闻聚合器] 开始获取 {ticker} 的实时新闻，回溯时间: {hours_back}小时")
         start_time = datetime.now(ZoneInfo(get_timezone_name()))
-        all_news = []
-
-        # 1. FinnHub实时新闻 (最高优先级)
-        logger.info(f"[新闻聚合器] 尝试从 FinnHub 获取 {ticker} 的新闻")
-        finnhub_start = datetime.now(ZoneInfo(get_timezone_name()))
-        finnhub_news = self._get_finnhub_realtime_news(ticker, hours_back)
-        finnhub_time = (datetime.now(ZoneInfo(get_timezone_name())) - finnhub_start).total_seconds()
-
-        if finnhub_news:
-            logger.info(f"[新闻聚合器] 成功从 FinnHub 获取 {len(finnhub_news)} 条新闻，耗时: {finnhub_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] FinnHub 未返回新闻，耗时: {finnhub_time:.2f}秒")
-
-        all_news.extend(finnhub_news)
 
-        # 2. Alpha Vantage新闻
-        logger.info(f"[新闻聚合器] 尝试从 Alpha Vantage 获取 {ticker} 的新闻")
-        av_start = datetime.now(ZoneInfo(get_timezone_name()))
-        av_news = self._get_alpha_vantage_news(ticker, hours_back)
-        av_time = (datetime.now(ZoneInfo(get_timezone_name())) - av_start).total_seconds()
-
-        if av_news:
-            logger.info(f"[新闻聚合器] 成功从 Alpha Vantage 获取 {len(av_news)} 条新闻，耗时: {av_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] Alpha Vantage 未返回新闻，耗时: {av_time:.2f}秒")
-
-        all_news.extend(av_news)
-
-        # 3. NewsAPI (如果配置了)
+        sources: List[Tuple[str, Callable[[str, int], List[NewsItem]]]] = [
+            ("FinnHub", self._get_finnhub_realtime_news),
+            ("Alpha Vantage", self._get_alpha_vantage_news),
+        ]
         if self.newsapi_key:
-            logger.info(f"[新闻聚合器] 尝试从 NewsAPI 获取 {ticker} 的新闻")
-            newsapi_start = datetime.now(ZoneInfo(get_timezone_name()))
-            newsapi_news = self._get_newsapi_news(ticker, hours_back)
-            newsapi_time = (datetime.now(ZoneInfo(get_timezone_name())) - newsapi_start).total_seconds()
-
-            if newsapi_news:
-                logger.info(f"[新闻聚合器] 成功从 NewsAPI 获取 {len(newsapi_news)} 条新闻，耗时: {newsapi_time:.2f}秒")
-            else:
-                logger.info(f"[新闻聚合器] NewsAPI 未返回新闻，耗时: {newsapi_time:.2f}秒")
-
-            all_news.extend(newsapi_news)
+            sources.append(("NewsAPI", self._get_newsapi_news))
         else:
             logger.info(f"[新闻聚合器] NewsAPI 密钥未配置，跳过此新闻源")
+        sources.append(("中文财经", self._get_chinese_finance_news))
 
-        # 4. 中文财经新闻源
-        logger.info(f"[新闻聚合器] 尝试获取 {ticker} 的中文财经新闻")
-        chinese_start = datetime.now(ZoneInfo(get_timezone_name()))
-        chinese_news = self._get_chinese_finance_news(ticker, hours_back)
-        chinese_time = (datetime.now(ZoneInfo(get_timezone_name())) - chinese_start).total_seconds()
-
-        if chinese_news:
-            logger.info(f"[新闻聚合器] 成功获取 {len(chinese_news)} 条中文财经新闻，耗时: {chinese_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] 未获取到中文财经新闻，耗时: {chinese_time:.2f}秒")
-
-        all_news.extend(chinese_news)
+        # 各新闻源并发获取，总耗时取决于最慢的源（且不超过截止时间）
+        all_news = self._fetch_sources_concurrently(ticker, hours_back, sources)
 
         # 去重和排序
         logger.info(f"[新闻聚合器] 开始对 {len(all_news)} 条新闻进行去重和排序")
@@ -144,6 +176,48 @@ class RealtimeNewsAggregator:
 
         return sorted_news
 
+    def _fetch_sources_concurrently(
+        self,
+        ticker: str,
+        hours_back: int,
+        sources: List[Tuple[str, Callable[[str, int], List[NewsItem]]]]
+    ) -> List[NewsItem]:
+        """并发调用各新闻源，返回截止时间内到达的结果（按 sources 顺序合并）"""
+
+        def timed_fetch(name: str, fetch: Callable[[str, int], List[NewsItem]]) -> List[NewsItem]:
+            fetch_start = time.perf_counter()
+            try:
+                items = fetch(ticker, hours_back) or []
+            except Exception as e:
+                logger.error(f"[新闻聚合器] {name} 获取异常: {e}")
+                items = []
+            latency = time.perf_counter() - fetch_start
+            _get_source_stats(name).record(latency, len(items))
+            if items:
+                logger.info(f"[新闻聚合器] 成功从 {name} 获取 {len(items)} 条新闻，耗时: {latency:.2f}秒")
+            else:
+                logger.info(f"[新闻聚合器] {name} 未返回新闻，耗时: {latency:.2f}秒")
+            return items
+
+        # 每次调用使用独立的线程池：超时的源无法取消，只能在后台执行到 HTTP 超时为止，
+        # 共享的有界线程池会被这些线程占满，之后的调用只能排队直到截止时间
+        executor = ThreadPoolExecutor(max_workers=max(1, len(sources)), thread_name_prefix='news-source')
+        try:
+            futures = [(name, executor.submit(timed_fetch, name, fetch)) for name, fetch in sources]
+            wait([future for _, future in futures], timeout=self.deadline)
+        finally:
+            executor.shutdown(wait=False)
+
+        all_news: List[NewsItem] = []
+        for name, future in futures:
+            if future.done():
+                all_news.extend(future.result())
+            else:
+                # 超时的源在后台继续执行（结果丢弃），只记录超时
+                _get_source_stats(name).record_timeout()
+                logger.warning(f"[新闻聚合器] {name} 超过截止时间 {self.deadline:.1f}秒，本次跳过")
+        return all_news
+
     def _get_finnhub_realtime_news(self, ticker: str, hours_back: int) -> List[NewsItem]:
         """获取FinnHub实时新闻"""
         if not self.finnhub_key:
@@ -155,7 +229,7 @@ class RealtimeNewsAggregator:
             start_time = end_time - timedelta(hours=hours_back)
 
             # FinnHub API调用
-            url = "https://finnhub.io/api/v1/company-news"
+            url = self.FINNHUB_URL
             params = {
                 'symbol': ticker,
                 'from': start_time.strftime('%Y-%m-%d'),
@@ -163,7 +237,7 @@ class RealtimeNewsAggregator:
                 'token': self.finnhub_key
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = requests.get(url, params=params, headers=self.headers, timeout=self.source_timeout)
             response.raise_for_status()
 
             news_data = response.json()
@@ -200,7 +274,7 @@ class RealtimeNewsAggregator:
             return []
 
         try:
-            url = "https://www.alphavantage.co/query"
+            url = self.ALPHA_VANTAGE_URL
             params = {
                 'function': 'NEWS_SENTIMENT',
                 'tickers': ticker,
@@ -208,7 +282,7 @@ class RealtimeNewsAggregator:
                 'limit': 50
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = requests.get(url, params=params, headers=self.headers, timeout=self.source_timeout)
             response.raise_for_status()
 
             data = response.json()
@@ -259,7 +333,7 @@ class RealtimeNewsAggregator:
 
             query = f"{ticker} OR {company_names.get(ticker, ticker)}"
 
-            url = "https://newsapi.org/v2/everything"
+            url = self.NEWSAPI_URL
             params = {
                 'q': query,
                 'language': 'en',
@@ -268,7 +342,7 @@ class RealtimeNewsAggregator:
                 'apiKey': self.newsapi_key
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = requests.get(url, params=params, headers=self.headers, timeout=self.source_timeout)
             response.raise_for_status()
 
             data = response.json()
@@ -442,7 +516,10 @@ class RealtimeNewsAggregator:
             import feedparser
 
             logger.info(f"[RSS解析] 尝试获取RSS源内容")
-            feed = feedparser.parse(rss_url)
+            # feedparser 直接请求 URL 时没有超时，先用 requests 下载再解析
+            response = requests.get(rss_url, headers=self.headers, timeout=self.source_timeout)
+            response.raise_for_status()
+            feed = feedparser.parse(response.content)
 
             if not feed or not feed.entries:
                 logger.warning(f"[RSS解析] RSS源未返回有效内容")
@@ -598,10 +675,22 @@ class RealtimeNewsAggregator:
             seen_titles.add(title_key)
             unique_news.append(item)
 
+        # 近似重复：多家门户转载同一稿件时标题略有改动，按 MinHash 签名做 LSH 分桶聚类后每簇保留最权威/最早的一条
+        exact_unique_count = len(unique_news)
+        unique_news = dedupe_near_duplicates(
+            unique_news,
+            title=lambda n: n.title,
+            content=lambda n: n.content,
+            publish_time=lambda n: n.publish_time,
+            source=lambda n: n.source,
+            keep="authority",
+        )
+        near_duplicate_count = exact_unique_count - len(unique_news)
+
         # 记录去重结果
         time_taken = (datetime.now(ZoneInfo(get_timezone_name())) - start_time).total_seconds()
         logger.info(f"[新闻去重] 去重完成，原始新闻: {len(news_items)}条，去重后: {len(unique_news)}条，")
-        logger.info(f"[新闻去重] 去除重复: {duplicate_count}条，标题过短: {short_title_count}条，耗时: {time_taken:.2f}秒")
+        logger.info(f"[新闻去重] 去除重复: {duplicate_count}条，近似重复: {near_duplicate_count}条，标题过短: {short_title_count}条，耗时: {time_taken:.2f}秒")
 
         return unique_news
 
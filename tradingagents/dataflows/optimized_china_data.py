@@ -31,11 +31,26 @@ class OptimizedChinaDataProvider:
         self.config = config_manager.load_settings()
         self.last_api_call = 0
         self.min_api_interval = get_float("TA_CHINA_MIN_API_INTERVAL_SECONDS", "ta_china_min_api_interval_seconds", 0.5)
+        self._rate_limiter = self._get_shared_rate_limiter()
 
         logger.info(f"📊 优化A股数据提供器初始化完成")
 
+    def _get_shared_rate_limiter(self):
+        """所有进程共享的调用间隔限制（Redis 滑动窗口）；Web 后端不可用时返回 None，使用进程内间隔"""
+        if self.min_api_interval <= 0:
+            return None
+        try:
+            from app.core.rate_limiter import get_rate_limiter
+            return get_rate_limiter("china_data", 1, self.min_api_interval)
+        except ImportError:
+            return None
+
     def _wait_for_rate_limit(self):
         """等待API限制"""
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire_sync()
+            return
+
         current_time = time.time()
         time_since_last_call = current_time - self.last_api_call
 
@@ -4,11 +4,13 @@ AKShare统一数据提供器
 """
 import asyncio
 import logging
+import os
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional, Union
 import pandas as pd
 
 from ..base_provider import BaseStockDataProvider
+from .market_snapshot import get_market_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +56,15 @@ class AKShareProvider(BaseStockDataProvider):
             # AKShare的stock_news_em()函数没有设置必要的headers，导致API返回空响应
             if not hasattr(requests, '_akshare_headers_patched'):
                 original_get = requests.get
+                # AKShare 的大部分接口（如 stock_news_em）请求时不设置超时，服务端挂起时调用线程会一直阻塞
+                default_timeout = float(os.getenv('AKSHARE_HTTP_TIMEOUT_SECONDS', '15'))
                 last_request_time = {'time': 0}  # 使用字典以便在闭包中修改
+                # 东方财富请求间隔在所有进程之间共享（Redis 滑动窗口），Web 后端不可用时使用进程内间隔
+                try:
+                    from app.core.rate_limiter import get_rate_limiter
+                    eastmoney_limiter = get_rate_limiter("akshare:eastmoney", 1, 0.5)
+                except ImportError:
+                    eastmoney_limiter = None
 
                 def patched_get(url, **kwargs):
                     """
@@ -64,7 +74,9 @@ class AKShareProvider(BaseStockDataProvider):
                     """
                     # 添加请求延迟，避免被反爬虫封禁
                     # 只对东方财富网的请求添加延迟
-                    if 'eastmoney.com' in url:
+                    if 'eastmoney.com' in url and eastmoney_limiter is not None:
+                        eastmoney_limiter.acquire_sync()
+                    elif 'eastmoney.com' in url:
                         current_time = time.time()
                         time_since_last_request = current_time - last_request_time['time']
                         if time_since_last_request < 0.5:  # 至少间隔0.5秒
@@ -122,6 +134,8 @@ class AKShareProvider(BaseStockDataProvider):
                         if 'Accept-Language' not in kwargs['headers']:
                             kwargs['headers']['Accept-Language'] = 'zh-CN,zh;q=0.9,en;q=0.8'
 
+                    kwargs.setdefault('timeout', default_timeout)
+
                     # 添加重试机制（最多3次）
                     max_retries = 3
                     for attempt in range(max_retries):
@@ -575,107 +589,61 @@ class AKShareProvider(BaseStockDataProvider):
             try:
                 logger.debug(f"📊 批量获取 {len(codes)} 只股票的实时行情... (尝试 {attempt + 1}/{max_retries})")
 
-                # 优先使用新浪财经接口（更稳定，不容易被封）
-                def fetch_spot_data_sina():
-                    import time
-                    time.sleep(0.3)  # 添加延迟避免频率限制
-                    return self.ak.stock_zh_a_spot()
-
+                # 优先使用新浪财经接口（更稳定，不容易被封），快照在进程内共享，短时间内不会重复下载
                 try:
-                    spot_df = await asyncio.to_thread(fetch_spot_data_sina)
-                    data_source = "sina"
+                    snapshot = await asyncio.to_thread(get_market_snapshot, "sina")
                     logger.debug("✅ 使用新浪财经接口获取数据")
                 except Exception as e:
                     logger.warning(f"⚠️ 新浪财经接口失败: {e}，尝试东方财富接口...")
                     # 回退到东方财富接口
-                    def fetch_spot_data_em():
-                        import time
-                        time.sleep(0.5)
-                        return self.ak.stock_zh_a_spot_em()
-                    spot_df = await asyncio.to_thread(fetch_spot_data_em)
-                    data_source = "eastmoney"
+                    snapshot = await asyncio.to_thread(get_market_snapshot, "eastmoney")
                     logger.debug("✅ 使用东方财富接口获取数据")
 
-                if spot_df is None or spot_df.empty:
+                if snapshot is None or len(snapshot) == 0:
                     logger.warning("⚠️ 全市场快照为空")
                     if attempt < max_retries - 1:
                         await asyncio.sleep(retry_delay)
                         continue
                     return {}
 
-                # 构建代码到行情的映射
+                # 按代码索引直接取出请求的股票
                 quotes_map = {}
                 codes_set = set(codes)
 
-                # 构建代码映射表（支持带前缀的代码匹配）
-                # 例如：sh600000 -> 600000, sz000001 -> 000001
-                code_mapping = {}
-                for code in codes:
-                    code_mapping[code] = code  # 原始代码
-                    # 添加可能的前缀变体
-                    for prefix in ['sh', 'sz', 'bj']:
-                        code_mapping[f"{prefix}{code}"] = code
-
-                for _, row in spot_df.iterrows():
-                    raw_code = str(row.get("代码", ""))
-
-                    # 尝试匹配代码（支持带前缀和不带前缀）
-                    matched_code = None
-                    if raw_code in code_mapping:
-                        matched_code = code_mapping[raw_code]
-                    elif raw_code in codes_set:
-                        matched_code = raw_code
-
-                    if matched_code:
-                        quotes_data = {
-                            "name": str(row.get("名称", f"股票{matched_code}")),
-                            "price": self._safe_float(row.get("最新价", 0)),
-                            "change": self._safe_float(row.get("涨跌额", 0)),
-                            "change_percent": self._safe_float(row.get("涨跌幅", 0)),
-                            "volume": self._safe_int(row.get("成交量", 0)),
-                            "amount": self._safe_float(row.get("成交额", 0)),
-                            "open": self._safe_float(row.get("今开", 0)),
-                            "high": self._safe_float(row.get("最高", 0)),
-                            "low": self._safe_float(row.get("最低", 0)),
-                            "pre_close": self._safe_float(row.get("昨收", 0)),
-                            # 🔥 新增：财务指标字段
-                            "turnover_rate": self._safe_float(row.get("换手率", None)),  # 换手率（%）
-                            "volume_ratio": self._safe_float(row.get("量比", None)),  # 量比
-                            "pe": self._safe_float(row.get("市盈率-动态", None)),  # 动态市盈率
-                            "pb": self._safe_float(row.get("市净率", None)),  # 市净率
-                            "total_mv": self._safe_float(row.get("总市值", None)),  # 总市值（元）
-                            "circ_mv": self._safe_float(row.get("流通市值", None)),  # 流通市值（元）
-                        }
-
-                        # 转换为标准化字典（使用匹配后的代码）
-                        quotes_map[matched_code] = {
-                            "code": matched_code,
-                            "symbol": matched_code,
-                            "name": quotes_data.get("name", f"股票{matched_code}"),
-                            "price": float(quotes_data.get("price", 0)),
-                            "change": float(quotes_data.get("change", 0)),
-                            "change_percent": float(quotes_data.get("change_percent", 0)),
-                            "volume": int(quotes_data.get("volume", 0)),
-                            "amount": float(quotes_data.get("amount", 0)),
-                            "open_price": float(quotes_data.get("open", 0)),
-                            "high_price": float(quotes_data.get("high", 0)),
-                            "low_price": float(quotes_data.get("low", 0)),
-                            "pre_close": float(quotes_data.get("pre_close", 0)),
-                            # 🔥 新增：财务指标字段
-                            "turnover_rate": quotes_data.get("turnover_rate"),  # 换手率（%）
-                            "volume_ratio": quotes_data.get("volume_ratio"),  # 量比
-                            "pe": quotes_data.get("pe"),  # 动态市盈率
-                            "pe_ttm": quotes_data.get("pe"),  # TTM市盈率（与动态市盈率相同）
-                            "pb": quotes_data.get("pb"),  # 市净率
-                            "total_mv": quotes_data.get("total_mv") / 1e8 if quotes_data.get("total_mv") else None,  # 总市值（转换为亿元）
-                            "circ_mv": quotes_data.get("circ_mv") / 1e8 if quotes_data.get("circ_mv") else None,  # 流通市值（转换为亿元）
-                            # 扩展字段
-                            "full_symbol": self._get_full_symbol(matched_code),
-                            "market_info": self._get_market_info(matched_code),
-                            "data_source": "akshare",
-                            "last_sync": datetime.now(timezone.utc),
-                            "sync_status": "success"
-                        }
+                for matched_code, row in snapshot.get_many(codes).items():
+                    total_mv = self._safe_float(row.get("total_mv"))
+                    circ_mv = self._safe_float(row.get("circ_mv"))
+                    pe = self._safe_float(row.get("pe"))
+
+                    # 转换为标准化字典（使用请求的代码）
+                    quotes_map[matched_code] = {
+                        "code": matched_code,
+                        "symbol": matched_code,
+                        "name": row.get("name") or f"股票{matched_code}",
+                        "price": self._safe_float(row.get("price")),
+                        "change": self._safe_float(row.get("change")),
+                        "change_percent": self._safe_float(row.get("change_percent")),
+                        "volume": self._safe_int(row.get("volume")),
+                        "amount": self._safe_float(row.get("amount")),
+                        "open_price": self._safe_float(row.get("open")),
+                        "high_price": self._safe_float(row.get("high")),
+                        "low_price": self._safe_float(row.get("low")),
+                        "pre_close": self._safe_float(row.get("pre_close")),
+                        # 🔥 新增：财务指标字段
+                        "turnover_rate": self._safe_float(row.get("turnover_rate")),  # 换手率（%）
+                        "volume_ratio": self._safe_float(row.get("volume_ratio")),  # 量比
+                        "pe": pe,  # 动态市盈率
+                        "pe_ttm": pe,  # TTM市盈率（与动态市盈率相同）
+                        "pb": self._safe_float(row.get("pb")),  # 市净率
+                        "total_mv": total_mv / 1e8 if total_mv else None,  # 总市值（转换为亿元）
+                        "circ_mv": circ_mv / 1e8 if circ_mv else None,  # 流通市值（转换为亿元）
+                        # 扩展字段
+                        "full_symbol": self._get_full_symbol(matched_code),
+                        "market_info": self._get_market_info(matched_code),
+                        "data_source": "akshare",
+                        "last_sync": datetime.now(timezone.utc),
+                        "sync_status": "success"
+                    }
 
                 found_count = len(quotes_map)
                 missing_count = len(codes) - found_count
@@ -799,40 +767,32 @@ class AKShareProvider(BaseStockDataProvider):
     async def _get_realtime_quotes_data(self, code: str) -> Dict[str, Any]:
         """获取实时行情数据"""
         try:
-            # 方法1: 获取A股实时行情
-            def fetch_spot_data():
-                return self.ak.stock_zh_a_spot_em()
-
+            # 方法1: 从共享的A股全市场快照中按代码查找
             try:
-                spot_df = await asyncio.to_thread(fetch_spot_data)
-
-                if spot_df is not None and not spot_df.empty:
-                    # 查找对应股票
-                    stock_data = spot_df[spot_df['代码'] == code]
+                snapshot = await asyncio.to_thread(get_market_snapshot, "eastmoney")
+                row = snapshot.get(code)
 
-                    if not stock_data.empty:
-                        row = stock_data.iloc[0]
-
-                        # 解析行情数据
-                        return {
-                            "name": str(row.get("名称", f"股票{code}")),
-                            "price": self._safe_float(row.get("最新价", 0)),
-                            "change": self._safe_float(row.get("涨跌额", 0)),
-                            "change_percent": self._safe_float(row.get("涨跌幅", 0)),
-                            "volume": self._safe_int(row.get("成交量", 0)),
-                            "amount": self._safe_float(row.get("成交额", 0)),
-                            "open": self._safe_float(row.get("今开", 0)),
-                            "high": self._safe_float(row.get("最高", 0)),
-                            "low": self._safe_float(row.get("最低", 0)),
-                            "pre_close": self._safe_float(row.get("昨收", 0)),
-                            # 🔥 新增：财务指标字段
-                            "turnover_rate": self._safe_float(row.get("换手率", None)),  # 换手率（%）
-                            "volume_ratio": self._safe_float(row.get("量比", None)),  # 量比
-                            "pe": self._safe_float(row.get("市盈率-动态", None)),  # 动态市盈率
-                            "pb": self._safe_float(row.get("市净率", None)),  # 市净率
-                            "total_mv": self._safe_float(row.get("总市值", None)),  # 总市值（元）
-                            "circ_mv": self._safe_float(row.get("流通市值", None)),  # 流通市值（元）
-                        }
+                if row is not None:
+                    # 解析行情数据
+                    return {
+                        "name": row.get("name") or f"股票{code}",
+                        "price": self._safe_float(row.get("price")),
+                        "change": self._safe_float(row.get("change")),
+                        "change_percent": self._safe_float(row.get("change_percent")),
+                        "volume": self._safe_int(row.get("volume")),
+                        "amount": self._safe_float(row.get("amount")),
+                        "open": self._safe_float(row.get("open")),
+                        "high": self._safe_float(row.get("high")),
+                        "low": self._safe_float(row.get("low")),
+                        "pre_close": self._safe_float(row.get("pre_close")),
+                        # 🔥 新增：财务指标字段
+                        "turnover_rate": self._safe_float(row.get("turnover_rate")),  # 换手率（%）
+                        "volume_ratio": self._safe_float(row.get("volume_ratio")),  # 量比
+                        "pe": self._safe_float(row.get("pe")),  # 动态市盈率
+                        "pb": self._safe_float(row.get("pb")),  # 市净率
+                        "total_mv": self._safe_float(row.get("total_mv")),  # 总市值（元）
+                        "circ_mv": self._safe_float(row.get("circ_mv")),  # 流通市值（元）
+                    }
             except Exception as e:
                 logger.debug(f"获取{code}A股实时行情失败: {e}")
 
@@ -0,0 +1,247 @@
+"""
+A股全市场行情快照（进程内共享，单航班刷新）
+
+AKShare 的 stock_zh_a_spot_em / stock_zh_a_spot 每次返回全市场约 5000 行数据，
+单股行情、批量同步、行情入库和筛选富集都只需要其中的少数几行。这里把快照在进程内缓存一个短 TTL：
+- 同一数据源同时只有一个请求在下载，并发调用方等待同一次下载的结果（单航班）
+- 下载完成后按列向量化提取标准字段，并建立 6位代码 -> 行号 的索引，查询为 O(1)
+
+环境变量：
+- MARKET_SNAPSHOT_TTL_SECONDS: 快照有效期，默认 15 秒
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+DEFAULT_TTL_SECONDS = 15.0
+
+# 标准字段 -> 两个接口（东方财富/新浪）及不同版本中可能出现的列名
+FIELD_COLUMNS: Dict[str, List[str]] = {
+    "code": ["代码", "code", "symbol", "股票代码"],
+    "name": ["名称", "name", "股票名称"],
+    "price": ["最新价", "现价", "最新价(元)", "price", "最新", "trade"],
+    "change": ["涨跌额", "change", "pricechange"],
+    "change_percent": ["涨跌幅", "涨跌幅(%)", "涨幅", "pct_chg", "changepercent"],
+    "volume": ["成交量", "成交量(手)", "volume", "成交量(股)", "vol"],
+    "amount": ["成交额", "成交额(元)", "amount", "成交额(万元)", "amount(万元)"],
+    "open": ["今开", "开盘", "open", "今开(元)"],
+    "high": ["最高", "high"],
+    "low": ["最低", "low"],
+    "pre_close": ["昨收", "昨收(元)", "pre_close", "昨收价", "settlement"],
+    "turnover_rate": ["换手率", "turnoverratio"],
+    "volume_ratio": ["量比"],
+    "pe": ["市盈率-动态", "per"],
+    "pb": ["市净率", "pb"],
+    "total_mv": ["总市值", "mktcap"],
+    "circ_mv": ["流通市值", "nmc"],
+}
+NUMERIC_FIELDS = [f for f in FIELD_COLUMNS if f not in ("code", "name")]
+
+
+def normalize_code(code: Any) -> str:
+    """sh600000 / 600000 / 1 -> 6位数字代码；无法识别时返回空字符串"""
+    digits = "".join(ch for ch in str(code).strip() if ch.isdigit())
+    return digits.zfill(6) if digits else ""
+
+
+def _resolve_column(df: pd.DataFrame, field: str) -> Optional[str]:
+    return next((c for c in FIELD_COLUMNS[field] if c in df.columns), None)
+
+
+def _numeric_values(series: pd.Series) -> List[Optional[float]]:
+    """整列转换为浮点数（兼容 "1,234"、"5.6%"、"-" 等字符串），缺失值为 None"""
+    if series.dtype == object:
+        series = series.astype(str).str.strip().str.replace(",", "", regex=False).str.rstrip("%")
+    values = pd.to_numeric(series, errors="coerce")
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+class MarketSnapshot:
+    """一次全市场快照的只读视图"""
+
+    def __init__(self, df: pd.DataFrame, source: str, fetched_at: Optional[float] = None):
+        self.source = source
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.columns: Dict[str, List[Any]] = {}
+        self._index: Dict[str, int] = {}
+
+        code_col = _resolve_column(df, "code")
+        if code_col is None or df.empty:
+            logger.warning(f"⚠️ [行情快照] {source} 缺少代码列或数据为空: columns={list(df.columns)}")
+            return
+
+        codes = df[code_col].astype(str).str.replace(r"\D", "", regex=True).str.zfill(6)
+        valid = (df[code_col].notna() & (codes != "000000")).tolist()
+        codes = codes.tolist()
+        # 重复代码保留第一行，与逐行匹配时的行为一致
+        for i in range(len(codes) - 1, -1, -1):
+            if valid[i]:
+                self._index[codes[i]] = i
+
+        name_col = _resolve_column(df, "name")
+        if name_col is not None:
+            self.columns["name"] = df[name_col].astype(str).tolist()
+        for field in NUMERIC_FIELDS:
+            column = _resolve_column(df, field)
+            if column is not None:
+                self.columns[field] = _numeric_values(df[column])
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, code: str) -> bool:
+        return normalize_code(code) in self._index
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def codes(self) -> List[str]:
+        return list(self._index)
+
+    def has_field(self, field: str) -> bool:
+        return field in self.columns
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """按代码取一行标准字段，接口未提供的字段为 None"""
+        row = self._index.get(normalize_code(code))
+        if row is None:
+            return None
+        quote = {"code": normalize_code(code)}
+        for field in FIELD_COLUMNS:
+            if field != "code":
+                values = self.columns.get(field)
+                quote[field] = values[row] if values is not None else None
+        return quote
+
+    def get_many(self, codes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """返回 {请求的代码: 行情}，快照中没有的代码不在结果中"""
+        result = {}
+        for code in codes:
+            quote = self.get(code)
+            if quote is not None:
+                result[code] = quote
+        return result
+
+    def records(self, fields: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """全市场 {代码: {输出字段: 值}}，fields 为 输出字段 -> 标准字段"""
+        empty = [None] * (max(self._index.values()) + 1 if self._index else 0)
+        selected = [(out, self.columns.get(field, empty)) for out, field in fields.items()]
+        return {code: {out: values[row] for out, values in selected} for code, row in self._index.items()}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.snapshot: Optional[MarketSnapshot] = None
+        self.error: Optional[BaseException] = None
+
+
+def _fetch_akshare_spot(source: str) -> pd.DataFrame:
+    import akshare as ak
+    if source == "sina":
+        return ak.stock_zh_a_spot()
+    return ak.stock_zh_a_spot_em()
+
+
+class MarketSnapshotCache:
+    """按数据源缓存快照；过期后第一个调用方下载，其余调用方等待同一次下载"""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 fetcher: Optional[Callable[[str], pd.DataFrame]] = None):
+        self.ttl_seconds = ttl_seconds
+        self._fetcher = fetcher or _fetch_akshare_spot
+        self._snapshots: Dict[str, MarketSnapshot] = {}
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.hits = 0
+        self.waits = 0
+
+    def get(self, source: str = "eastmoney", max_age: Optional[float] = None) -> MarketSnapshot:
+        """获取快照（同步阻塞）；下载失败时异常抛给本次航班的所有调用方"""
+        ttl = self.ttl_seconds if max_age is None else max_age
+        with self._lock:
+            snapshot = self._snapshots.get(source)
+            if snapshot is not None and snapshot.age < ttl:
+                self.hits += 1
+                return snapshot
+            flight = self._flights.get(source)
+            leader = flight is None
+            if leader:
+                flight = self._flights[source] = _Flight()
+            else:
+                self.waits += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.snapshot
+
+        try:
+            start = time.perf_counter()
+            df = self._fetcher(source)
+            if df is None:
+                df = pd.DataFrame()
+            flight.snapshot = MarketSnapshot(df, source)
+            logger.info(
+                f"📸 [行情快照] {source} 刷新完成: {len(flight.snapshot)} 只股票, "
+                f"耗时 {time.perf_counter() - start:.2f}s"
+            )
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self.fetches += 1
+                if flight.snapshot is not None and len(flight.snapshot) > 0:
+                    self._snapshots[source] = flight.snapshot
+                self._flights.pop(source, None)
+            flight.done.set()
+        return flight.snapshot
+
+    def invalidate(self, source: Optional[str] = None) -> None:
+        with self._lock:
+            if source is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(source, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "fetches": self.fetches,
+                "hits": self.hits,
+                "waits": self.waits,
+                "snapshots": {s: {"size": len(snap), "age": round(snap.age, 1)} for s, snap in self._snapshots.items()},
+            }
+
+
+_cache: Optional[MarketSnapshotCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_market_snapshot_cache() -> MarketSnapshotCache:
+    """进程级共享的全市场快照缓存"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = MarketSnapshotCache(
+                    ttl_seconds=float(os.getenv("MARKET_SNAPSHOT_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+                )
+    return _cache
+
+
+def get_market_snapshot(source: str = "eastmoney", max_age: Optional[float] = None) -> MarketSnapshot:
+    """获取全市场快照（source: eastmoney | sina）"""
+    return get_market_snapshot_cache().get(source, max_age=max_age)
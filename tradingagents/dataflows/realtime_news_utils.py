@@ -7,12 +7,14 @@
 from tradingagents.dataflows.news.realtime_news import (
     get_realtime_stock_news,
     RealtimeNewsAggregator,
-    NewsItem
+    NewsItem,
+    get_news_source_stats
 )
 
 __all__ = [
     'get_realtime_stock_news',
     'RealtimeNewsAggregator',
-    'NewsItem'
+    'NewsItem',
+    'get_news_source_stats'
 ]
 
@@ -1,8 +1,10 @@
 import pandas as pd
 import yfinance as yf
 from stockstats import wrap
-from typing import Annotated
+from typing import Annotated, Any, Dict, Tuple
 import os
+import threading
+from collections import OrderedDict
 from tradingagents.config.config_manager import config_manager
 
 def get_config():
@@ -10,6 +12,24 @@ def get_config():
     return config_manager.load_settings()
 
 
+NOT_TRADING_DAY = "N/A: Not a trading day (weekend or holiday)"
+
+# 进程内缓存：同一数据文件（路径+修改时间+大小）只读取并 wrap 一次，同一指标列只计算一次
+# _memo_lock 只保护缓存字典的查找和写入；指标计算会给数据帧增加列，由每个数据帧自己的锁串行，
+# 不同数据文件的计算互不阻塞
+_MEMO_SIZE = 16
+_wrapped_frames: "OrderedDict[Tuple, Tuple[Any, threading.Lock]]" = OrderedDict()
+_indicator_values: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+_memo_lock = threading.RLock()
+
+
+def _remember(memo: OrderedDict, key: Tuple, value: Any) -> None:
+    memo[key] = value
+    memo.move_to_end(key)
+    while len(memo) > _MEMO_SIZE:
+        memo.popitem(last=False)
+
+
 class StockstatsUtils:
     @staticmethod
     def get_stock_stats(
@@ -29,63 +49,126 @@ class StockstatsUtils:
             "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
         ] = False,
     ):
-        df = None
-        data = None
+        if online:
+            curr_date = pd.to_datetime(curr_date).strftime("%Y-%m-%d")
 
-        if not online:
-            try:
-                data = pd.read_csv(
-                    os.path.join(
-                        data_dir,
-                        f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-                    )
-                )
-                df = wrap(data)
-            except FileNotFoundError:
-                raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
+        values = StockstatsUtils.get_indicator_values(symbol, indicator, data_dir, online)
+        if curr_date in values:
+            return values[curr_date]
         else:
-            # Get today's date as YYYY-mm-dd to add to cache
-            today_date = pd.Timestamp.today()
-            curr_date = pd.to_datetime(curr_date)
+            return NOT_TRADING_DAY
 
-            end_date = today_date
-            start_date = today_date - pd.DateOffset(years=15)
-            start_date = start_date.strftime("%Y-%m-%d")
-            end_date = end_date.strftime("%Y-%m-%d")
+    @staticmethod
+    def get_indicator_values(
+        symbol: Annotated[str, "ticker symbol for the company"],
+        indicator: Annotated[
+            str, "quantitative indicators based off of the stock data for the company"
+        ],
+        data_dir: Annotated[
+            str,
+            "directory where the stock data is stored.",
+        ],
+        online: Annotated[
+            bool,
+            "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
+        ] = False,
+    ) -> Dict[str, Any]:
+        """整列计算指标，返回 {YYYY-mm-dd: 指标值}（同一日期有多行时取第一行）"""
+        data_file = StockstatsUtils._get_data_file(symbol, data_dir, online)
+        frame_key, df, frame_lock = StockstatsUtils._get_wrapped_frame(data_file, online)
+        memo_key = frame_key + (indicator,)
 
-            # Get config and ensure cache directory exists
-            config = get_config()
-            os.makedirs(config["data_cache_dir"], exist_ok=True)
+        values = StockstatsUtils._cached_values(memo_key)
+        if values is not None:
+            return values
 
+        with frame_lock:
+            # 等锁期间其他线程可能已算好同一指标
+            values = StockstatsUtils._cached_values(memo_key)
+            if values is not None:
+                return values
+            df[indicator]  # trigger stockstats to calculate the indicator
+            values = {}
+            for date, value in zip(df["Date"].str[:10].tolist(), df[indicator].values):
+                values.setdefault(date, value)
+
+        with _memo_lock:
+            _remember(_indicator_values, memo_key, values)
+        return values
+
+    @staticmethod
+    def _cached_values(memo_key: Tuple):
+        with _memo_lock:
+            values = _indicator_values.get(memo_key)
+            if values is not None:
+                _indicator_values.move_to_end(memo_key)
+            return values
+
+    @staticmethod
+    def _get_data_file(symbol: str, data_dir: str, online: bool) -> str:
+        if not online:
             data_file = os.path.join(
-                config["data_cache_dir"],
-                f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
+                data_dir,
+                f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
             )
+            if not os.path.exists(data_file):
+                raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
+            return data_file
 
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                data["Date"] = pd.to_datetime(data["Date"])
-            else:
-                data = yf.download(
-                    symbol,
-                    start=start_date,
-                    end=end_date,
-                    multi_level_index=False,
-                    progress=False,
-                    auto_adjust=True,
-                )
-                data = data.reset_index()
-                data.to_csv(data_file, index=False)
-
-            df = wrap(data)
-            df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
-            curr_date = curr_date.strftime("%Y-%m-%d")
+        # Get today's date as YYYY-mm-dd to add to cache
+        today_date = pd.Timestamp.today()
 
-        df[indicator]  # trigger stockstats to calculate the indicator
-        matching_rows = df[df["Date"].str.startswith(curr_date)]
+        end_date = today_date
+        start_date = today_date - pd.DateOffset(years=15)
+        start_date = start_date.strftime("%Y-%m-%d")
+        end_date = end_date.strftime("%Y-%m-%d")
 
-        if not matching_rows.empty:
-            indicator_value = matching_rows[indicator].values[0]
-            return indicator_value
-        else:
-            return "N/A: Not a trading day (weekend or holiday)"
+        # Get config and ensure cache directory exists
+        config = get_config()
+        os.makedirs(config["data_cache_dir"], exist_ok=True)
+
+        data_file = os.path.join(
+            config["data_cache_dir"],
+            f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
+        )
+
+        if not os.path.exists(data_file):
+            data = yf.download(
+                symbol,
+                start=start_date,
+                end=end_date,
+                multi_level_index=False,
+                progress=False,
+                auto_adjust=True,
+            )
+            data = data.reset_index()
+            data.to_csv(data_file, index=False)
+
+        return data_file
+
+    @staticmethod
+    def _get_wrapped_frame(data_file: str, online: bool) -> Tuple[Tuple, Any, threading.Lock]:
+        """读取并 wrap 数据文件，返回 (缓存键, 数据帧, 数据帧的计算锁)；文件被重新下载或修改后缓存自动失效"""
+        stat = os.stat(data_file)
+        frame_key = (data_file, stat.st_mtime_ns, stat.st_size)
+
+        with _memo_lock:
+            entry = _wrapped_frames.get(frame_key)
+            if entry is not None:
+                _wrapped_frames.move_to_end(frame_key)
+                return (frame_key,) + entry
+
+        data = pd.read_csv(data_file)
+        if online:
+            data["Date"] = pd.to_datetime(data["Date"])
+        df = wrap(data)
+        if online:
+            df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
+
+        with _memo_lock:
+            # 并发读取同一文件时以先写入的为准，保证同一数据帧只有一把锁
+            entry = _wrapped_frames.get(frame_key)
+            if entry is None:
+                entry = (df, threading.Lock())
+                _remember(_wrapped_frames, frame_key, entry)
+        return (frame_key,) + entry
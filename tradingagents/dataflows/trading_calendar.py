@@ -0,0 +1,350 @@
+"""
+交易日历（CN / HK / US）
+
+完整性检查和增量同步都需要回答"某天是不是交易日"、"两个日期之间有几个交易日"。
+以前分别用 70% 日历天数估算、按周末推算，无法区分节假日和真正缺失的数据。
+这里为每个市场维护一张交易日表：
+- 交易日以 date.toordinal() 升序保存在 array 中，另有覆盖区间内逐日的前缀计数
+- is_trading_day / prev_trading_day / next_trading_day / count_trading_days 均为 O(1)
+- 覆盖区间之外按"周一至周五为交易日"回退，exact 为 False 的日历整体都是这种回退
+
+数据来源（同步后缓存为 JSON，进程重启直接加载）：
+- CN: AKShare tool_trade_date_hist_sina，失败时用 Tushare trade_cal
+- HK / US: 安装了 exchange_calendars 时使用 XHKG / XNYS，否则使用周末规则
+
+环境变量：
+- TRADING_CALENDAR_CACHE_DIR: 缓存目录，默认 ./data/cache/trading_calendar
+"""
+
+import json
+import os
+import threading
+import time
+from array import array
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+try:
+    import exchange_calendars as xcals
+    EXCHANGE_CALENDARS_AVAILABLE = True
+except ImportError:
+    xcals = None
+    EXCHANGE_CALENDARS_AVAILABLE = False
+
+DEFAULT_CACHE_DIR = "./data/cache/trading_calendar"
+# 覆盖区间落后于今天时，最多每隔这么久重新同步一次
+RESYNC_INTERVAL_SECONDS = 3600
+WEEKDAY_SOURCE = "weekday"
+
+EXCHANGE_CODES = {"HK": "XHKG", "US": "XNYS"}
+
+
+def _to_ordinal(value: Any) -> int:
+    """date / datetime / pandas.Timestamp / 'YYYY-MM-DD' / 'YYYYMMDD' -> 公历序数"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    text = str(value).strip()[:10]
+    if len(text) >= 8 and text[:8].isdigit():
+        return date(int(text[:4]), int(text[4:6]), int(text[6:8])).toordinal()
+    return datetime.strptime(text, '%Y-%m-%d').date().toordinal()
+
+
+def _is_weekday(ordinal: int) -> bool:
+    # date.fromordinal(1) 是周一，(ordinal - 1) % 7 即 weekday()
+    return (ordinal - 1) % 7 < 5
+
+
+def _count_weekdays(first: int, last: int) -> int:
+    """[first, last] 内周一至周五的天数"""
+    if last < first:
+        return 0
+    total = last - first + 1
+    weeks, rest = divmod(total, 7)
+    return weeks * 5 + sum(1 for o in range(last - rest + 1, last + 1) if _is_weekday(o))
+
+
+class TradingCalendar:
+    """单个市场的交易日表"""
+
+    def __init__(self, market: str, days: Iterable[Any], source: str,
+                 start: Any = None, end: Any = None):
+        """
+        Args:
+            market: 市场类型 (CN/HK/US)
+            days: 覆盖区间内的全部交易日
+            source: 数据来源，weekday 表示没有节假日信息
+            start, end: 覆盖区间，默认取首个/最后一个交易日
+        """
+        self.market = market
+        self.source = source
+        ordinals = sorted({_to_ordinal(d) for d in days})
+        self._start = _to_ordinal(start) if start is not None else (ordinals[0] if ordinals else 0)
+        self._end = _to_ordinal(end) if end is not None else (ordinals[-1] if ordinals else -1)
+        self._days = array('l', (o for o in ordinals if self._start <= o <= self._end))
+
+        # _prefix[k]: 覆盖区间内 <= start + k 的交易日个数
+        self._prefix = array('l', [0]) * max(0, self._end - self._start + 1)
+        count, pos = 0, 0
+        for k in range(len(self._prefix)):
+            if pos < len(self._days) and self._days[pos] == self._start + k:
+                count += 1
+                pos += 1
+            self._prefix[k] = count
+
+    @classmethod
+    def weekday_calendar(cls, market: str) -> "TradingCalendar":
+        """不含节假日信息的回退日历"""
+        return cls(market, [], WEEKDAY_SOURCE)
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    @property
+    def exact(self) -> bool:
+        return self.source != WEEKDAY_SOURCE and len(self._days) > 0
+
+    @property
+    def start(self) -> Optional[date]:
+        return date.fromordinal(self._start) if self.exact else None
+
+    @property
+    def end(self) -> Optional[date]:
+        return date.fromordinal(self._end) if self.exact else None
+
+    def covers(self, start: Any, end: Any = None) -> bool:
+        """[start, end] 是否完全落在有节假日信息的覆盖区间内"""
+        end = start if end is None else end
+        return self.exact and self._start <= _to_ordinal(start) and _to_ordinal(end) <= self._end
+
+    def _count_le(self, ordinal: int) -> int:
+        """覆盖区间内 <= ordinal 的交易日个数"""
+        if ordinal < self._start:
+            return 0
+        if ordinal > self._end:
+            return len(self._days)
+        return self._prefix[ordinal - self._start]
+
+    def is_trading_day(self, day: Any) -> bool:
+        o = _to_ordinal(day)
+        if self._start <= o <= self._end:
+            k = o - self._start
+            return self._prefix[k] > (self._prefix[k - 1] if k else 0)
+        return _is_weekday(o)
+
+    def next_trading_day(self, day: Any) -> date:
+        """严格晚于 day 的第一个交易日"""
+        o = _to_ordinal(day)
+        if self._start <= o < self._end:
+            idx = self._prefix[o - self._start]
+            if idx < len(self._days):
+                return date.fromordinal(self._days[idx])
+            o = self._end
+        o += 1
+        while not self.is_trading_day(o):
+            o += 1
+        return date.fromordinal(o)
+
+    def prev_trading_day(self, day: Any) -> date:
+        """严格早于 day 的最后一个交易日"""
+        o = _to_ordinal(day)
+        if self._start < o <= self._end:
+            idx = self._prefix[o - 1 - self._start]
+            if idx > 0:
+                return date.fromordinal(self._days[idx - 1])
+            o = self._start
+        o -= 1
+        while not self.is_trading_day(o):
+            o -= 1
+        return date.fromordinal(o)
+
+    def latest_trading_day(self, day: Any = None) -> date:
+        """day（默认今天）当天若是交易日则返回当天，否则返回之前最近的交易日"""
+        day = date.today() if day is None else day
+        return date.fromordinal(_to_ordinal(day)) if self.is_trading_day(day) else self.prev_trading_day(day)
+
+    def count_trading_days(self, start: Any, end: Any) -> int:
+        """[start, end] 闭区间内的交易日个数"""
+        a, b = _to_ordinal(start), _to_ordinal(end)
+        if b < a:
+            return 0
+        if not self.exact:
+            return _count_weekdays(a, b)
+        inside = self._count_le(b) - self._count_le(a - 1)
+        before = _count_weekdays(a, min(b, self._start - 1))
+        after = _count_weekdays(max(a, self._end + 1), b)
+        return inside + before + after
+
+    def trading_days(self, start: Any, end: Any) -> List[date]:
+        """[start, end] 闭区间内的全部交易日"""
+        a, b = _to_ordinal(start), _to_ordinal(end)
+        if b < a:
+            return []
+        if not self.exact:
+            return [date.fromordinal(o) for o in range(a, b + 1) if _is_weekday(o)]
+        result = [date.fromordinal(o) for o in range(a, min(b, self._start - 1) + 1) if _is_weekday(o)]
+        result.extend(date.fromordinal(o) for o in self._days[self._count_le(a - 1):self._count_le(b)])
+        result.extend(date.fromordinal(o) for o in range(max(a, self._end + 1), b + 1) if _is_weekday(o))
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "market": self.market,
+            "source": self.source,
+            "start": date.fromordinal(self._start).isoformat(),
+            "end": date.fromordinal(self._end).isoformat(),
+            "days": [date.fromordinal(o).strftime('%Y%m%d') for o in self._days],
+            "synced_at": datetime.now().isoformat(timespec='seconds'),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "TradingCalendar":
+        return cls(payload["market"], payload["days"], payload["source"],
+                   start=payload.get("start"), end=payload.get("end"))
+
+
+def _fetch_cn_akshare() -> TradingCalendar:
+    import akshare as ak
+    df = ak.tool_trade_date_hist_sina()
+    return TradingCalendar("CN", df["trade_date"].tolist(), "akshare")
+
+
+def _fetch_cn_tushare() -> TradingCalendar:
+    from tradingagents.dataflows.providers.china.tushare import get_tushare_provider
+
+    api = get_tushare_provider().api
+    if api is None:
+        raise RuntimeError("Tushare API unavailable")
+    end = f"{date.today().year}1231"
+    df = api.trade_cal(exchange='SSE', start_date='19901219', end_date=end, fields='cal_date,is_open')
+    open_days = df.loc[df["is_open"].astype(int) == 1, "cal_date"].tolist()
+    return TradingCalendar("CN", open_days, "tushare", start=df["cal_date"].min(), end=df["cal_date"].max())
+
+
+def _fetch_exchange_calendar(market: str) -> TradingCalendar:
+    if not EXCHANGE_CALENDARS_AVAILABLE:
+        raise RuntimeError("exchange_calendars 未安装")
+    calendar = xcals.get_calendar(EXCHANGE_CODES[market])
+    sessions = calendar.sessions
+    return TradingCalendar(market, [s.date() for s in sessions], f"exchange_calendars:{EXCHANGE_CODES[market]}",
+                           start=calendar.first_session.date(), end=calendar.last_session.date())
+
+
+FETCHERS: Dict[str, List[Callable[[], TradingCalendar]]] = {
+    "CN": [_fetch_cn_akshare, _fetch_cn_tushare],
+    "HK": [lambda: _fetch_exchange_calendar("HK")],
+    "US": [lambda: _fetch_exchange_calendar("US")],
+}
+
+
+class TradingCalendarStore:
+    """按市场缓存交易日历：内存 -> JSON 文件 -> 数据源同步 -> 周末规则"""
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 fetchers: Optional[Dict[str, List[Callable[[], TradingCalendar]]]] = None):
+        self.cache_dir = cache_dir or None
+        self._fetchers = FETCHERS if fetchers is None else fetchers
+        self._calendars: Dict[str, TradingCalendar] = {}
+        self._last_sync: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _cache_path(self, market: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, f"{market.lower()}.json") if self.cache_dir else None
+
+    def _load_file(self, market: str) -> Optional[TradingCalendar]:
+        path = self._cache_path(market)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return TradingCalendar.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ [交易日历] 缓存文件损坏，忽略: {path}: {e}")
+            return None
+
+    def _save_file(self, calendar: TradingCalendar) -> None:
+        path = self._cache_path(calendar.market)
+        if not path:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(calendar.to_dict(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ [交易日历] 写入缓存失败: {path}: {e}")
+
+    def sync(self, market: str) -> Optional[TradingCalendar]:
+        """从数据源同步并写入缓存；所有数据源失败时返回 None"""
+        self._last_sync[market] = time.time()
+        for fetcher in self._fetchers.get(market, []):
+            try:
+                calendar = fetcher()
+            except Exception as e:
+                logger.debug(f"🔍 [交易日历] {market} 数据源失败: {e}")
+                continue
+            if calendar.exact:
+                logger.info(
+                    f"📅 [交易日历] {market} 同步完成: {calendar.source}, {len(calendar)} 个交易日, "
+                    f"{calendar.start} ~ {calendar.end}"
+                )
+                self._save_file(calendar)
+                return calendar
+        return None
+
+    def _stale(self, calendar: TradingCalendar) -> bool:
+        return not calendar.exact or calendar.end < date.today()
+
+    def get(self, market: str = "CN") -> TradingCalendar:
+        market = (market or "CN").upper()
+        calendar = self._calendars.get(market)
+        if calendar is not None and not self._stale(calendar):
+            return calendar
+
+        with self._lock:
+            calendar = self._calendars.get(market)
+            if calendar is None:
+                calendar = self._load_file(market)
+            if calendar is None or self._stale(calendar):
+                if time.time() - self._last_sync.get(market, 0) >= RESYNC_INTERVAL_SECONDS:
+                    calendar = self.sync(market) or calendar
+            if calendar is None:
+                logger.warning(f"⚠️ [交易日历] {market} 无可用数据源，按周一至周五估算交易日")
+                calendar = TradingCalendar.weekday_calendar(market)
+            self._calendars[market] = calendar
+            return calendar
+
+    def invalidate(self, market: Optional[str] = None) -> None:
+        with self._lock:
+            if market is None:
+                self._calendars.clear()
+                self._last_sync.clear()
+            else:
+                self._calendars.pop(market.upper(), None)
+                self._last_sync.pop(market.upper(), None)
+
+
+_store: Optional[TradingCalendarStore] = None
+_store_lock = threading.Lock()
+
+
+def get_trading_calendar_store() -> TradingCalendarStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TradingCalendarStore(os.getenv("TRADING_CALENDAR_CACHE_DIR", DEFAULT_CACHE_DIR))
+    return _store
+
+
+def get_trading_calendar(market: str = "CN") -> TradingCalendar:
+    """获取市场交易日历（CN/HK/US），首次调用可能触发同步"""
+    return get_trading_calendar_store().get(market)
@@ -0,0 +1,156 @@
+"""
+编译图复用池
+
+每次分析都新建 TradingAgentsGraph 意味着重新创建 LLM 客户端、五个 FinancialSituationMemory、
+ToolNode，并重新编译 LangGraph。图实例不再保存单次运行的状态（见 TradingAgentsGraph.propagate），
+因此可以按配置缓存编译好的图，在多个任务/线程之间共享。
+
+池键由分析师列表（保持顺序，串行模式下顺序决定拓扑）、快速/深度模型的供应商与名称、研究深度，
+以及完整配置的摘要组成；配置中任何字段（API Key、模型参数、辩论轮次等）变化都会得到新的图。
+
+- TRADING_GRAPH_POOL_SIZE: 最多缓存的图数量，超出后淘汰最久未使用的，默认 8
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from tradingagents.utils.logging_manager import get_logger
+
+from .trading_graph import TradingAgentsGraph
+
+logger = get_logger('agents')
+
+DEFAULT_POOL_SIZE = 8
+
+
+def graph_pool_key(config: Dict[str, Any]) -> Tuple:
+    """(分析师, 快速供应商, 快速模型, 深度供应商, 深度模型, 研究深度, 配置摘要)"""
+    analysts = tuple(config.get("selected_analysts") or ("market", "fundamentals"))
+    provider = config.get("llm_provider")
+    digest = hashlib.sha256(
+        json.dumps(config, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    return (
+        analysts,
+        config.get("quick_provider") or provider,
+        config.get("quick_think_llm"),
+        config.get("deep_provider") or provider,
+        config.get("deep_think_llm"),
+        config.get("research_depth"),
+        digest,
+    )
+
+
+def _build_trading_graph(config: Dict[str, Any]) -> TradingAgentsGraph:
+    return TradingAgentsGraph(
+        selected_analysts=config.get("selected_analysts", ["market", "fundamentals"]),
+        debug=config.get("debug", False),
+        config=config,
+    )
+
+
+class TradingGraphPool:
+    """线程安全的编译图缓存（LRU），同一配置并发首次请求时只构建一次"""
+
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE,
+                 factory: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        self.max_size = max(1, max_size)
+        self._factory = factory or _build_trading_graph
+        self._graphs: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._building: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, config: Dict[str, Any]) -> Any:
+        """返回与配置对应的共享图实例，不存在时构建"""
+        key = graph_pool_key(config)
+        graph = self._lookup(key)
+        if graph is None:
+            with self._lock:
+                build_lock = self._building.setdefault(key, threading.Lock())
+            with build_lock:
+                # 等待期间其它线程可能已经构建完成
+                graph = self._lookup(key)
+                if graph is None:
+                    try:
+                        graph = self._build(key, config)
+                    finally:
+                        with self._lock:
+                            self._building.pop(key, None)
+                    return graph
+
+        self._reactivate(graph)
+        return graph
+
+    def _lookup(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is not None:
+                self._graphs.move_to_end(key)
+                self.hits += 1
+            return graph
+
+    def _build(self, key: Tuple, config: Dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        # 复制一份配置，调用方之后修改自己的字典不会影响缓存中的图
+        graph = self._factory(copy.deepcopy(config))
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.misses += 1
+            self._graphs[key] = graph
+            while len(self._graphs) > self.max_size:
+                evicted_key, _ = self._graphs.popitem(last=False)
+                self.evictions += 1
+                logger.info(f"♻️ [图复用池] 淘汰: analysts={list(evicted_key[0])}, models={evicted_key[2]}/{evicted_key[4]}")
+
+        logger.info(
+            f"🏗️ [图复用池] 新建图实例: analysts={list(key[0])}, quick={key[1]}/{key[2]}, "
+            f"deep={key[3]}/{key[4]}, depth={key[5]}, 耗时 {elapsed:.2f}s"
+        )
+        return graph
+
+    @staticmethod
+    def _reactivate(graph: Any) -> None:
+        """Toolkit 的配置是类级共享的，复用时重新应用，与新建实例时的行为一致"""
+        toolkit = getattr(graph, "toolkit", None)
+        if toolkit is not None:
+            toolkit.update_config(graph.config)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._graphs),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._graphs.clear()
+
+
+_pool: Optional[TradingGraphPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_graph_pool() -> TradingGraphPool:
+    """进程级共享的图复用池"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = TradingGraphPool(max_size=int(os.getenv("TRADING_GRAPH_POOL_SIZE", DEFAULT_POOL_SIZE)))
+    return _pool
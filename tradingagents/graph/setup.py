@@ -1,5 +1,6 @@
 # TradingAgents/graph/setup.py
 
+import time
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph, START
@@ -15,6 +16,14 @@ from .conditional_logic import ConditionalLogic
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
+# 分析师类型 -> (报告字段, 工具调用计数字段)
+ANALYST_STATE_KEYS = {
+    "market": ("market_report", "market_tool_call_count"),
+    "social": ("sentiment_report", "sentiment_tool_call_count"),
+    "news": ("news_report", "news_tool_call_count"),
+    "fundamentals": ("fundamentals_report", "fundamentals_tool_call_count"),
+}
+
 
 class GraphSetup:
     """Handles the setup and configuration of the agent graph."""
@@ -48,8 +57,64 @@ class GraphSetup:
         self.config = config or {}
         self.react_llm = react_llm
 
+    def _add_analyst_loop(self, workflow, analyst_type, analyst_node, delete_node, tool_node):
+        """在 workflow 中添加单个分析师的 分析师 -> 工具 -> 消息清理 循环"""
+        current_analyst = f"{analyst_type.capitalize()} Analyst"
+        current_tools = f"tools_{analyst_type}"
+        current_clear = f"Msg Clear {analyst_type.capitalize()}"
+
+        workflow.add_node(current_analyst, analyst_node)
+        workflow.add_node(current_clear, delete_node)
+        workflow.add_node(current_tools, tool_node)
+
+        workflow.add_conditional_edges(
+            current_analyst,
+            getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
+            [current_tools, current_clear],
+        )
+        workflow.add_edge(current_tools, current_analyst)
+        return current_analyst, current_clear
+
+    def _create_parallel_analyst_node(self, analyst_type, analyst_node, delete_node, tool_node):
+        """将单个分析师的工具循环编译为子图，包装成并行分支节点
+
+        子图拥有独立的 messages 通道，分支之间不会互相看到工具调用消息；
+        返回给主图的只有该分析师的报告、工具调用计数和计时信息。
+        """
+        subgraph = StateGraph(AgentState)
+        current_analyst, current_clear = self._add_analyst_loop(
+            subgraph, analyst_type, analyst_node, delete_node, tool_node
+        )
+        subgraph.add_edge(START, current_analyst)
+        subgraph.add_edge(current_clear, END)
+        compiled = subgraph.compile()
+
+        report_key, count_key = ANALYST_STATE_KEYS[analyst_type]
+
+        def parallel_analyst_node(state, config):
+            start = time.time()
+            branch_state = dict(state)
+            branch_state["messages"] = list(state.get("messages", []))
+            branch_state.pop("analyst_timings", None)
+
+            result = compiled.invoke(branch_state, config)
+
+            elapsed = time.time() - start
+            logger.info(f"⏱️ [并行分析师] {current_analyst} 分支耗时: {elapsed:.2f}秒")
+            return {
+                report_key: result.get(report_key, ""),
+                count_key: result.get(count_key, 0),
+                "analyst_timings": {
+                    current_analyst: {"start": start, "elapsed": elapsed}
+                },
+            }
+
+        return parallel_analyst_node
+
     def setup_graph(
-        self, selected_analysts=["market", "social", "news", "fundamentals"]
+        self,
+        selected_analysts=["market", "social", "news", "fundamentals"],
+        parallel_analysts=None,
     ):
         """Set up and compile the agent workflow graph.
 
@@ -59,10 +124,15 @@ class GraphSetup:
                 - "social": Social media analyst
                 - "news": News analyst
                 - "fundamentals": Fundamentals analyst
+            parallel_analysts (bool): 分析师是否从 START 并行分叉、在 Bull Researcher 前汇合。
+                为 None 时读取配置项 ``parallel_analysts``（默认关闭，按顺序串行执行）。
         """
         if len(selected_analysts) == 0:
             raise ValueError("Trading Agents Graph Setup Error: no analysts selected!")
 
+        if parallel_analysts is None:
+            parallel_analysts = self.config.get("parallel_analysts", False)
+
         # Create analyst nodes
         analyst_nodes = {}
         delete_nodes = {}
@@ -160,12 +230,15 @@ class GraphSetup:
         workflow = StateGraph(AgentState)
 
         # Add analyst nodes to the graph
-        for analyst_type, node in analyst_nodes.items():
-            workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
-            workflow.add_node(
-                f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
-            )
-            workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
+        if parallel_analysts:
+            logger.info(f"🔀 [图构建] 分析师并行模式: {selected_analysts}")
+            for analyst_type, node in analyst_nodes.items():
+                workflow.add_node(
+                    f"{analyst_type.capitalize()} Analyst",
+                    self._create_parallel_analyst_node(
+                        analyst_type, node, delete_nodes[analyst_type], tool_nodes[analyst_type]
+                    ),
+                )
 
         # Add other nodes
         workflow.add_node("Bull Researcher", bull_researcher_node)
@@ -178,30 +251,33 @@ class GraphSetup:
         workflow.add_node("Risk Judge", risk_manager_node)
 
         # Define edges
-        # Start with the first analyst
-        first_analyst = selected_analysts[0]
-        workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
-
-        # Connect analysts in sequence
-        for i, analyst_type in enumerate(selected_analysts):
-            current_analyst = f"{analyst_type.capitalize()} Analyst"
-            current_tools = f"tools_{analyst_type}"
-            current_clear = f"Msg Clear {analyst_type.capitalize()}"
-
-            # Add conditional edges for current analyst
-            workflow.add_conditional_edges(
-                current_analyst,
-                getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
-                [current_tools, current_clear],
-            )
-            workflow.add_edge(current_tools, current_analyst)
-
-            # Connect to next analyst or to Bull Researcher if this is the last analyst
-            if i < len(selected_analysts) - 1:
-                next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
-                workflow.add_edge(current_clear, next_analyst)
-            else:
-                workflow.add_edge(current_clear, "Bull Researcher")
+        if parallel_analysts:
+            # 所有分析师同时从 START 出发，全部完成后再进入 Bull Researcher
+            analyst_names = [f"{analyst_type.capitalize()} Analyst" for analyst_type in selected_analysts]
+            for analyst_name in analyst_names:
+                workflow.add_edge(START, analyst_name)
+            workflow.add_edge(analyst_names, "Bull Researcher")
+        else:
+            # Start with the first analyst
+            first_analyst = selected_analysts[0]
+            workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
+
+            # Connect analysts in sequence
+            for i, analyst_type in enumerate(selected_analysts):
+                _, current_clear = self._add_analyst_loop(
+                    workflow,
+                    analyst_type,
+                    analyst_nodes[analyst_type],
+                    delete_nodes[analyst_type],
+                    tool_nodes[analyst_type],
+                )
+
+                # Connect to next analyst or to Bull Researcher if this is the last analyst
+                if i < len(selected_analysts) - 1:
+                    next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
+                    workflow.add_edge(current_clear, next_analyst)
+                else:
+                    workflow.add_edge(current_clear, "Bull Researcher")
 
         # Add remaining edges
         workflow.add_conditional_edges(
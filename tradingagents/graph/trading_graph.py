@@ -3,6 +3,7 @@
 import os
 from pathlib import Path
 import json
+import threading
 from datetime import date
 from typing import Dict, Any, Tuple, List, Optional
 import time
@@ -37,6 +38,9 @@ from .propagation import Propagator
 from .reflection import Reflector
 from .signal_processing import SignalProcessor
 
+# 多个图实例/线程可能同时写同一股票的状态日志
+_STATE_LOG_LOCK = threading.Lock()
+
 
 def create_llm_by_provider(provider: str, model: str, backend_url: str, temperature: float, max_tokens: int, timeout: int, api_key: str = None):
     """
@@ -803,14 +807,21 @@ class TradingAgentsGraph:
         self.reflector = Reflector(self.quick_thinking_llm)
         self.signal_processor = SignalProcessor(self.quick_thinking_llm)
 
-        # State tracking
-        self.curr_state = None
-        self.ticker = None
-        self.log_states_dict = {}  # date to full state dict
+        # 单次运行的状态按线程保存，编译好的图可以被多个任务并发复用
+        self._run_local = threading.local()
 
         # Set up the graph
         self.graph = self.graph_setup.setup_graph(selected_analysts)
 
+    @property
+    def curr_state(self) -> Optional[Dict[str, Any]]:
+        """当前线程最近一次 propagate 的最终状态（供 reflect_and_remember 使用）"""
+        return getattr(self._run_local, "final_state", None)
+
+    @curr_state.setter
+    def curr_state(self, value: Optional[Dict[str, Any]]):
+        self._run_local.final_state = value
+
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
         """Create tool nodes for different data sources.
 
@@ -877,6 +888,8 @@ class TradingAgentsGraph:
             trade_date: Date for analysis
             progress_callback: Optional callback function for progress updates
             task_id: Optional task ID for tracking performance data
+
+        单次运行的状态只保存在局部变量和当前线程中，同一实例可以在多个线程中并发调用。
         """
 
         # 添加详细的接收日志
@@ -885,9 +898,6 @@ class TradingAgentsGraph:
         logger.debug(f"🔍 [GRAPH DEBUG] 接收到的trade_date: '{trade_date}' (类型: {type(trade_date)})")
         logger.debug(f"🔍 [GRAPH DEBUG] 接收到的task_id: '{task_id}'")
 
-        self.ticker = company_name
-        logger.debug(f"🔍 [GRAPH DEBUG] 设置self.ticker: '{self.ticker}'")
-
         # Initialize state
         logger.debug(f"🔍 [GRAPH DEBUG] 创建初始状态，传递参数: company_name='{company_name}', trade_date='{trade_date}'")
         init_agent_state = self.propagator.create_initial_state(
@@ -902,9 +912,6 @@ class TradingAgentsGraph:
         current_node_start = None  # 当前节点开始时间
         current_node_name = None  # 当前节点名称
 
-        # 保存task_id用于后续保存性能数据
-        self._current_task_id = task_id
-
         # 根据是否有进度回调选择不同的stream_mode
         args = self.propagator.get_graph_args(use_progress_callback=bool(progress_callback))
 
@@ -937,7 +944,7 @@ class TradingAgentsGraph:
                         final_state = init_agent_state.copy()
                     for node_name, node_update in chunk.items():
                         if not node_name.startswith('__'):
-                            final_state.update(node_update)
+                            self._accumulate_state_update(final_state, node_update)
                 else:
                     # values 模式：chunk = {"messages": [...], ...}
                     if len(chunk.get("messages", [])) > 0:
@@ -979,7 +986,7 @@ class TradingAgentsGraph:
                         final_state = init_agent_state.copy()
                     for node_name, node_update in chunk.items():
                         if not node_name.startswith('__'):
-                            final_state.update(node_update)
+                            self._accumulate_state_update(final_state, node_update)
             else:
                 # 原有的invoke模式（也需要计时）
                 logger.info("⏱️ 使用 invoke 模式执行分析（无进度回调）")
@@ -1006,7 +1013,7 @@ class TradingAgentsGraph:
                         final_state = init_agent_state.copy()
                     for node_name, node_update in chunk.items():
                         if not node_name.startswith('__'):
-                            final_state.update(node_update)
+                            self._accumulate_state_update(final_state, node_update)
 
         # 记录最后一个节点的时间
         if current_node_name and current_node_start:
@@ -1017,6 +1024,11 @@ class TradingAgentsGraph:
         # 计算总时间
         total_elapsed = time.time() - total_start_time
 
+        # 并行分析师模式：用各分支自测的耗时替换按 chunk 间隔推算的耗时
+        analyst_phase = self._apply_parallel_analyst_timings(
+            node_timings, (final_state or {}).get("analyst_timings")
+        )
+
         # 调试日志
         logger.info(f"🔍 [TIMING DEBUG] 节点计时数量: {len(node_timings)}")
         logger.info(f"🔍 [TIMING DEBUG] 总耗时: {total_elapsed:.2f}秒")
@@ -1029,6 +1041,8 @@ class TradingAgentsGraph:
 
         # 构建性能数据
         performance_data = self._build_performance_data(node_timings, total_elapsed)
+        if analyst_phase:
+            performance_data["parallel_analysts"] = analyst_phase
 
         # 将性能数据添加到状态中
         final_state['performance_metrics'] = performance_data
@@ -1037,7 +1051,7 @@ class TradingAgentsGraph:
         self.curr_state = final_state
 
         # Log state
-        self._log_state(trade_date, final_state)
+        self._log_state(company_name, trade_date, final_state)
 
         # 获取模型信息
         model_info = ""
@@ -1056,6 +1070,48 @@ class TradingAgentsGraph:
         # Return decision and processed signal
         return final_state, decision
 
+    @staticmethod
+    def _accumulate_state_update(final_state: Dict[str, Any], node_update: Dict[str, Any]):
+        """将 updates 模式下的节点增量合并到累积状态
+
+        并行分支的计时信息需要合并而不是覆盖，其余字段保持原有的覆盖语义。
+        """
+        if not node_update:
+            return
+        for key, value in node_update.items():
+            if key == "analyst_timings" and isinstance(value, dict):
+                merged = dict(final_state.get("analyst_timings") or {})
+                merged.update(value)
+                final_state[key] = merged
+            else:
+                final_state[key] = value
+
+    def _apply_parallel_analyst_timings(
+        self, node_timings: Dict[str, float], analyst_timings: Optional[Dict[str, Dict[str, float]]]
+    ) -> Optional[Dict[str, Any]]:
+        """并行模式下写入各分析师分支的真实耗时，并返回分析师阶段的墙钟统计"""
+        if not analyst_timings:
+            return None
+
+        for node_name, timing in analyst_timings.items():
+            node_timings[node_name] = timing["elapsed"]
+
+        phase_start = min(t["start"] for t in analyst_timings.values())
+        phase_end = max(t["start"] + t["elapsed"] for t in analyst_timings.values())
+        wall_clock = phase_end - phase_start
+        sequential = sum(t["elapsed"] for t in analyst_timings.values())
+
+        logger.info(
+            f"⏱️ [并行分析师] 墙钟耗时: {wall_clock:.2f}秒, 串行累计: {sequential:.2f}秒, "
+            f"节省: {sequential - wall_clock:.2f}秒"
+        )
+        return {
+            "analyst_count": len(analyst_timings),
+            "wall_clock_time": round(wall_clock, 2),
+            "sequential_time": round(sequential, 2),
+            "saved_time": round(sequential - wall_clock, 2),
+        }
+
     def _send_progress_update(self, chunk, progress_callback):
         """发送进度更新到回调函数
 
@@ -1332,9 +1388,9 @@ class TradingAgentsGraph:
         logger.info(f"  • 快速思考模型: {self.config.get('quick_think_llm', 'unknown')}")
         logger.info("=" * 80)
 
-    def _log_state(self, trade_date, final_state):
+    def _log_state(self, ticker, trade_date, final_state):
         """Log the final state to a JSON file."""
-        self.log_states_dict[str(trade_date)] = {
+        state_log = {
             "company_of_interest": final_state["company_of_interest"],
             "trade_date": final_state["trade_date"],
             "market_report": final_state["market_report"],
@@ -1364,32 +1420,49 @@ class TradingAgentsGraph:
             "final_trade_decision": final_state["final_trade_decision"],
         }
 
-        # Save to file
-        directory = Path(f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/")
+        # Save to file（按日期合并到已有日志，图实例可能被不同股票的任务复用）
+        directory = Path(f"eval_results/{ticker}/TradingAgentsStrategy_logs/")
         directory.mkdir(parents=True, exist_ok=True)
+        log_path = directory / "full_states_log.json"
 
-        with open(
-            f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/full_states_log.json",
-            "w",
-        ) as f:
-            json.dump(self.log_states_dict, f, indent=4)
+        with _STATE_LOG_LOCK:
+            log_states_dict = {}
+            if log_path.exists():
+                try:
+                    with open(log_path, "r") as f:
+                        log_states_dict = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ 状态日志读取失败，将重新写入: {log_path} - {e}")
+            log_states_dict[str(trade_date)] = state_log
+
+            with open(log_path, "w") as f:
+                json.dump(log_states_dict, f, indent=4)
+
+    def reflect_and_remember(self, returns_losses, final_state=None):
+        """Reflect on decisions and update memory based on returns.
+
+        Args:
+            returns_losses: 持仓收益
+            final_state: propagate 返回的状态；不传时使用当前线程最近一次运行的状态
+        """
+        state = final_state if final_state is not None else self.curr_state
+        if state is None:
+            raise ValueError("reflect_and_remember 需要先调用 propagate 或传入 final_state")
 
-    def reflect_and_remember(self, returns_losses):
-        """Reflect on decisions and update memory based on returns."""
         self.reflector.reflect_bull_researcher(
-            self.curr_state, returns_losses, self.bull_memory
+            state, returns_losses, self.bull_memory
         )
         self.reflector.reflect_bear_researcher(
-            self.curr_state, returns_losses, self.bear_memory
+            state, returns_losses, self.bear_memory
         )
         self.reflector.reflect_trader(
-            self.curr_state, returns_losses, self.trader_memory
+            state, returns_losses, self.trader_memory
         )
         self.reflector.reflect_invest_judge(
-            self.curr_state, returns_losses, self.invest_judge_memory
+            state, returns_losses, self.invest_judge_memory
         )
         self.reflector.reflect_risk_manager(
-            self.curr_state, returns_losses, self.risk_manager_memory
+            state, returns_losses, self.risk_manager_memory
         )
 
     def process_signal(self, full_signal, stock_symbol=None):
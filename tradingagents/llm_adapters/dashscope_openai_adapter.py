@@ -10,6 +10,7 @@ from langchain_openai import ChatOpenAI
 from langchain_core.tools import BaseTool
 from pydantic import Field, SecretStr
 from ..config.config_manager import token_tracker
+from .response_cache import cached_generate
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -99,11 +100,17 @@ class ChatDashScopeOpenAI(ChatOpenAI):
         api_base = getattr(self, 'base_url', None) or getattr(self, 'openai_api_base', None) or kwargs.get('base_url', 'unknown')
         logger.info(f"   API Base: {api_base}")
     
-    def _generate(self, *args, **kwargs):
-        """重写生成方法，添加 token 使用量追踪"""
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        """重写生成方法，添加响应缓存与 token 使用量追踪"""
         
-        # 调用父类的生成方法
-        result = super()._generate(*args, **kwargs)
+        # 调用父类的生成方法（启用响应缓存时相同请求直接复用）
+        parent_generate = super()._generate
+        result, cache_hit = cached_generate(
+            self, "dashscope", self.model_name, messages, stop, kwargs,
+            lambda: parent_generate(messages, stop, run_manager, **kwargs)
+        )
+        if cache_hit:
+            return result
         
         # 追踪 token 使用量
         try:
@@ -116,7 +123,7 @@ class ChatDashScopeOpenAI(ChatOpenAI):
                 
                 if input_tokens > 0 or output_tokens > 0:
                     # 生成会话ID
-                    session_id = kwargs.get('session_id', f"dashscope_openai_{hash(str(args))%10000}")
+                    session_id = kwargs.get('session_id', f"dashscope_openai_{hash(str(messages))%10000}")
                     analysis_type = kwargs.get('analysis_type', 'stock_analysis')
                     
                     # 使用 TokenTracker 记录使用量
@@ -10,6 +10,8 @@ from langchain_core.outputs import ChatGeneration, ChatResult
 from langchain_openai import ChatOpenAI
 from langchain_core.callbacks import CallbackManagerForLLMRun
 
+from .response_cache import cached_generate
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
 
@@ -123,8 +125,14 @@ class ChatDeepSeek(ChatOpenAI):
         analysis_type = kwargs.pop('analysis_type', None)
 
         try:
-            # 调用父类方法生成响应
-            result = super()._generate(messages, stop, run_manager, **kwargs)
+            # 调用父类方法生成响应（启用响应缓存时相同请求直接复用）
+            parent_generate = super()._generate
+            result, cache_hit = cached_generate(
+                self, "deepseek", self.model_name, messages, stop, kwargs,
+                lambda: parent_generate(messages, stop, run_manager, **kwargs)
+            )
+            if cache_hit:
+                return result
             
             # 提取token使用量
             input_tokens = 0
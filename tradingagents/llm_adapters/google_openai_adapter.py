@@ -12,6 +12,7 @@ from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, System
 from langchain_core.outputs import LLMResult
 from pydantic import Field, SecretStr
 from ..config.config_manager import token_tracker
+from .response_cache import LLMCacheMissError, cached_generate
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -160,8 +161,12 @@ class ChatGoogleOpenAI(ChatGoogleGenerativeAI):
         """重写生成方法，优化工具调用处理和内容格式"""
 
         try:
-            # 调用父类的生成方法
-            result = super()._generate(messages, stop, **kwargs)
+            # 调用父类的生成方法（启用响应缓存时相同请求直接复用）
+            parent_generate = super()._generate
+            result, cache_hit = cached_generate(
+                self, "google", self.model_name, messages, stop, kwargs,
+                lambda: parent_generate(messages, stop, **kwargs)
+            )
 
             # 优化返回内容格式
             # 注意：result.generations 是二维列表 [[ChatGeneration]]
@@ -177,11 +182,14 @@ class ChatGoogleOpenAI(ChatGoogleGenerativeAI):
                         if hasattr(generation_list, 'message') and generation_list.message:
                             self._optimize_message_content(generation_list.message)
 
-            # 追踪 token 使用量
-            self._track_token_usage(result, kwargs)
+            # 追踪 token 使用量（缓存命中没有新的消耗）
+            if not cache_hit:
+                self._track_token_usage(result, kwargs)
 
             return result
 
+        except LLMCacheMissError:
+            raise
         except Exception as e:
             logger.error(f"❌ Google AI 生成失败: {e}")
             logger.exception(e)  # 打印完整的堆栈跟踪
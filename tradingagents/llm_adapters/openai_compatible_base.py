@@ -19,6 +19,8 @@ from tradingagents.utils.logging_manager import get_logger, get_logger_manager
 logger = get_logger('agents')
 logger = setup_llm_logging()
 
+from .response_cache import cached_generate
+
 # 导入token跟踪器
 try:
     from tradingagents.config.config_manager import token_tracker
@@ -166,11 +168,16 @@ class OpenAICompatibleBase(ChatOpenAI):
         # 记录开始时间
         start_time = time.time()
         
-        # 调用父类生成方法
-        result = super()._generate(messages, stop, run_manager, **kwargs)
+        # 调用父类生成方法（启用响应缓存时相同请求直接复用）
+        parent_generate = super()._generate
+        result, cache_hit = cached_generate(
+            self, self.provider_name or "openai_compatible", self.model_name, messages, stop, kwargs,
+            lambda: parent_generate(messages, stop, run_manager, **kwargs)
+        )
         
-        # 记录token使用
-        self._track_token_usage(result, kwargs, start_time)
+        # 记录token使用（缓存命中没有新的消耗）
+        if not cache_hit:
+            self._track_token_usage(result, kwargs, start_time)
         
         return result
 
@@ -0,0 +1,229 @@
+"""
+LLM 响应缓存（按请求内容寻址，SQLite 存储）
+
+对同一股票、同一日期重复分析时（Risk Judge 失败后重试、回归检查、调试 SignalProcessor），
+相同的提示词不必再次调用远程模型。缓存键由 (provider, model, temperature, 其它生成参数,
+规范化后的消息, 绑定的工具) 计算 SHA-256 得到。
+
+默认关闭，通过环境变量启用：
+- LLM_RESPONSE_CACHE: off（默认）| on（命中则复用，未命中调用远程并写入）| replay（只读缓存，未命中直接报错，用于离线重放）
+- LLM_RESPONSE_CACHE_PATH: SQLite 文件路径，默认 ./data/cache/llm_responses.sqlite
+- LLM_RESPONSE_CACHE_TTL_SECONDS: 过期时间，默认 7 天
+- LLM_RESPONSE_CACHE_MAX_ENTRIES: 最大条目数，超出后按最近访问时间淘汰，默认 5000
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+DEFAULT_CACHE_PATH = "./data/cache/llm_responses.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+# 不影响模型输出、只用于记账的参数
+_NON_SEMANTIC_KWARGS = {"session_id", "analysis_type", "run_manager", "callbacks"}
+
+
+class LLMCacheMissError(RuntimeError):
+    """replay 模式下缓存未命中"""
+
+
+def _normalize_message(message: BaseMessage) -> Dict[str, Any]:
+    """只保留影响模型输出的字段（去掉随机生成的消息ID和工具调用ID）"""
+    normalized: Dict[str, Any] = {"type": message.type, "content": message.content}
+    name = getattr(message, "name", None)
+    if name:
+        normalized["name"] = name
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        normalized["tool_calls"] = [{"name": c.get("name"), "args": c.get("args")} for c in tool_calls]
+    return normalized
+
+
+def make_cache_key(provider: str, model: str, temperature: Optional[float],
+                   messages: Sequence[BaseMessage], stop: Optional[List[str]] = None,
+                   params: Optional[Dict[str, Any]] = None) -> str:
+    """请求内容的 SHA-256 摘要"""
+    payload = {
+        "provider": provider,
+        "model": model,
+        "temperature": temperature,
+        "stop": stop,
+        "params": {k: v for k, v in (params or {}).items() if k not in _NON_SEMANTIC_KWARGS},
+        "messages": [_normalize_message(m) for m in messages],
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _dump_result(result: ChatResult) -> str:
+    return json.dumps({
+        "generations": [
+            {"message": message_to_dict(g.message), "generation_info": g.generation_info}
+            for g in result.generations
+        ],
+        "llm_output": result.llm_output,
+    }, ensure_ascii=False, default=str)
+
+
+def _load_result(raw: str) -> ChatResult:
+    data = json.loads(raw)
+    generations = []
+    for g in data["generations"]:
+        message = messages_from_dict([g["message"]])[0]
+        generations.append(ChatGeneration(message=message, generation_info=g.get("generation_info")))
+    return ChatResult(generations=generations, llm_output=data.get("llm_output"))
+
+
+class LLMResponseCache:
+    """SQLite 响应缓存，带 TTL、条目上限与命中统计"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, replay_only: bool = False):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._evict_interval = max(1, min(50, self.max_entries // 10))
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, provider TEXT, model TEXT, response TEXT NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+
+    def get(self, key: str) -> Optional[ChatResult]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return _load_result(row[0])
+
+    def put(self, key: str, result: ChatResult, provider: str = "", model: str = "") -> None:
+        raw = _dump_result(result)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, model, response, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, provider, model, raw, now, now),
+            )
+            self.writes += 1
+            # 每写入一定数量才检查一次上限，淘汰到上限的 90%
+            if self.writes % self._evict_interval == 0:
+                self._evict_locked(now)
+
+    def _evict_locked(self, now: float) -> None:
+        expired = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = 0
+        if count > self.max_entries:
+            overflow = count - int(self.max_entries * 0.9)
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+        self.evictions += max(expired, 0) + overflow
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """按环境变量创建的进程级缓存；未启用时返回 None"""
+    global _cache
+    mode = os.getenv("LLM_RESPONSE_CACHE", "off").lower()
+    if mode not in ("on", "true", "replay"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache(
+                    path=os.getenv("LLM_RESPONSE_CACHE_PATH", DEFAULT_CACHE_PATH),
+                    ttl_seconds=float(os.getenv("LLM_RESPONSE_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+                    max_entries=int(os.getenv("LLM_RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                    replay_only=(mode == "replay"),
+                )
+                logger.info(f"🗄️ [LLM缓存] 已启用: mode={mode}, path={_cache.path}")
+    return _cache
+
+
+def cached_generate(llm: Any, provider: str, model: str, messages: Sequence[BaseMessage],
+                    stop: Optional[List[str]], kwargs: Dict[str, Any],
+                    generate: Callable[[], ChatResult]) -> Tuple[ChatResult, bool]:
+    """适配器 _generate 的缓存包装，返回 (结果, 是否命中缓存)
+
+    命中缓存时没有产生新的 token 消耗，调用方应跳过 token 记录。
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return generate(), False
+
+    params = dict(kwargs)
+    max_tokens = getattr(llm, "max_tokens", None)
+    if max_tokens is not None:
+        params.setdefault("max_tokens", max_tokens)
+    key = make_cache_key(provider, model, getattr(llm, "temperature", None), messages, stop, params)
+
+    try:
+        cached = cache.get(key)
+    except Exception as e:
+        logger.warning(f"⚠️ [LLM缓存] 读取失败，直接调用模型: {e}")
+        cached = None
+    if cached is not None:
+        logger.info(f"🗄️ [LLM缓存] 命中: {provider}/{model} key={key[:12]}")
+        return cached, True
+    if cache.replay_only:
+        raise LLMCacheMissError(f"LLM响应缓存未命中（replay 模式）: {provider}/{model} key={key[:12]}")
+
+    result = generate()
+    try:
+        cache.put(key, result, provider=provider, model=model)
+    except Exception as e:
+        logger.warning(f"⚠️ [LLM缓存] 写入失败: {e}")
+    return result, False
@@ -6,6 +6,14 @@ from typing import Any, Dict, Iterable, List, Optional
 import numpy as np
 import pandas as pd
 
+# scipy（可选）：递推滤波的向量化实现，缺失时回退到逐元素循环
+try:
+    from scipy.signal import lfilter
+    SCIPY_AVAILABLE = True
+except ImportError:
+    lfilter = None
+    SCIPY_AVAILABLE = False
+
 
 @dataclass(frozen=True)
 class IndicatorSpec:
@@ -22,6 +30,64 @@ def _require_cols(df: pd.DataFrame, cols: Iterable[str]):
         raise ValueError(f"DataFrame缺少必要列: {missing}, 现有列: {list(df.columns)[:10]}...")
 
 
+def _recursive_filter(x: np.ndarray, alpha: float, init: float) -> np.ndarray:
+    """
+    一阶递推滤波：y[t] = (1 - alpha) * y[t-1] + alpha * x[t]，y[-1] = init
+
+    EMA(adjust=False)、Wilder 平滑、KDJ 的 K/D 线都是该递推的特例。x 不能含 NaN。
+    """
+    x = np.ascontiguousarray(x, dtype=float)
+    if x.size == 0:
+        return x.copy()
+    beta = 1.0 - alpha
+    if SCIPY_AVAILABLE:
+        y, _ = lfilter([alpha], [1.0, -beta], x, zi=[beta * init])
+        return y
+    y = np.empty_like(x)
+    last = init
+    for i, v in enumerate(x.tolist()):
+        last = beta * last + alpha * v
+        y[i] = last
+    return y
+
+
+def _recursive_filter_skip_nan(x: np.ndarray, alpha: float, init: float) -> np.ndarray:
+    """NaN 位置输出 NaN 且不更新状态（等价于逐行跳过 NaN 的递推）"""
+    out = np.full(x.shape, np.nan)
+    valid = ~np.isnan(x)
+    out[valid] = _recursive_filter(x[valid], alpha, init)
+    return out
+
+
+def _ewm_mean_array(x: np.ndarray, alpha: float) -> np.ndarray:
+    """与 Series.ewm(alpha=alpha, adjust=False).mean() 一致的数组实现"""
+    valid = ~np.isnan(x)
+    if not valid.any():
+        return np.full(x.shape, np.nan)
+    first = int(np.argmax(valid))
+    if not valid[first:].all():
+        # 中间存在 NaN 时 pandas 会按间隔调整权重，直接沿用 pandas 实现
+        return pd.Series(x).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    out = np.full(x.shape, np.nan)
+    out[first:] = _recursive_filter(x[first:], alpha, x[first])
+    return out
+
+
+def _sma_china_array(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    中国式SMA(X, N, 1)，与 Series.ewm(com=N-1, adjust=True).mean() 一致
+
+    adjust=True 的加权平均可写成两个递推之比：
+        S[t] = x[t] + (1 - a) * S[t-1],  W[t] = 1 + (1 - a) * W[t-1]
+    其中 a * S 即一阶递推滤波结果，W[t] = (1 - (1 - a)^(t+1)) / a。
+    """
+    if np.isnan(x).any():
+        return pd.Series(x).ewm(com=int(n) - 1, adjust=True).mean().to_numpy()
+    alpha = 1.0 / float(n)
+    steps = np.arange(1, x.size + 1)
+    return _recursive_filter(x, alpha, 0.0) / (1.0 - (1.0 - alpha) ** steps)
+
+
 def ma(close: pd.Series, n: int, min_periods: int = None) -> pd.Series:
     """
     计算移动平均线（Moving Average）
@@ -111,8 +177,13 @@ def rsi(close: pd.Series, n: int = 14, method: str = 'ema') -> pd.Series:
         # 中国式SMA：同花顺/通达信风格
         # SMA(X, N, 1) = ewm(com=N-1, adjust=True).mean()
         # 参考：https://blog.csdn.net/u011218867/article/details/117427927
-        avg_gain = gain.ewm(com=int(n) - 1, adjust=True).mean()
-        avg_loss = loss.ewm(com=int(n) - 1, adjust=True).mean()
+        if isinstance(close, pd.Series):
+            # 递推滤波实现，结果与 ewm(com=n-1, adjust=True) 一致
+            avg_gain = pd.Series(_sma_china_array(gain.to_numpy(dtype=float), n), index=close.index, name=gain.name)
+            avg_loss = pd.Series(_sma_china_array(loss.to_numpy(dtype=float), n), index=close.index, name=loss.name)
+        else:
+            avg_gain = gain.ewm(com=int(n) - 1, adjust=True).mean()
+            avg_loss = loss.ewm(com=int(n) - 1, adjust=True).mean()
     else:
         raise ValueError(f"不支持的RSI计算方法: {method}，支持的方法: 'ema', 'sma', 'china'")
 
@@ -157,32 +228,27 @@ def atr(high: pd.Series, low: pd.Series, close: pd.Series, n: int = 14) -> pd.Se
 
 
 def kdj(high: pd.Series, low: pd.Series, close: pd.Series, n: int = 9, m1: int = 3, m2: int = 3) -> pd.DataFrame:
-    lowest_low = low.rolling(window=int(n), min_periods=int(n)).min()
-    highest_high = high.rolling(window=int(n), min_periods=int(n)).max()
-    rsv = (close - lowest_low) / (highest_high - lowest_low) * 100
+    k, d, j = _kdj_arrays(
+        high.to_numpy(dtype=float), low.to_numpy(dtype=float), close.to_numpy(dtype=float),
+        n=n, m1=m1, m2=m2,
+    )
+    return pd.DataFrame({"kdj_k": k, "kdj_d": d, "kdj_j": j}, index=close.index)
+
+
+def _kdj_arrays(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                n: int = 9, m1: int = 3, m2: int = 3):
+    lowest_low = pd.Series(low).rolling(window=int(n), min_periods=int(n)).min().to_numpy()
+    highest_high = pd.Series(high).rolling(window=int(n), min_periods=int(n)).max().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsv = (close - lowest_low) / (highest_high - lowest_low) * 100
     # 处理除零与起始NaN
-    rsv = rsv.replace([np.inf, -np.inf], np.nan)
-
-    # 按经典公式递推（初始化 50）
-    k = pd.Series(np.nan, index=close.index)
-    d = pd.Series(np.nan, index=close.index)
-    alpha_k = 1 / float(m1)
-    alpha_d = 1 / float(m2)
-    last_k = 50.0
-    last_d = 50.0
-    for i in range(len(close)):
-        rv = rsv.iloc[i]
-        if np.isnan(rv):
-            k.iloc[i] = np.nan
-            d.iloc[i] = np.nan
-            continue
-        curr_k = (1 - alpha_k) * last_k + alpha_k * rv
-        curr_d = (1 - alpha_d) * last_d + alpha_d * curr_k
-        k.iloc[i] = curr_k
-        d.iloc[i] = curr_d
-        last_k, last_d = curr_k, curr_d
+    rsv[~np.isfinite(rsv)] = np.nan
+
+    # 按经典公式递推（初始化 50），RSV 为 NaN 的bar输出 NaN 且不更新 K/D
+    k = _recursive_filter_skip_nan(rsv, 1 / float(m1), 50.0)
+    d = _recursive_filter_skip_nan(k, 1 / float(m2), 50.0)
     j = 3 * k - 2 * d
-    return pd.DataFrame({"kdj_k": k, "kdj_d": d, "kdj_j": j})
+    return k, d, j
 
 
 def compute_indicator(df: pd.DataFrame, spec: IndicatorSpec) -> pd.DataFrame:
@@ -246,6 +312,116 @@ def compute_indicator(df: pd.DataFrame, spec: IndicatorSpec) -> pd.DataFrame:
     raise ValueError(f"不支持的指标: {name}")
 
 
+class _IndicatorKernel:
+    """
+    compute_many 的单次计算上下文
+
+    输入列只转换一次为连续的 float64 数组；EMA、滚动均值等中间结果按参数缓存，
+    在多个指标之间共享（如 ema12/ema26 与 MACD、ma20 与布林带中轨）。
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._cache: Dict[Any, np.ndarray] = {}
+
+    def col(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            self._arrays[name] = np.ascontiguousarray(self.df[name].to_numpy(dtype=float))
+        return self._arrays[name]
+
+    def _cached(self, key, fn) -> np.ndarray:
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def ema(self, n: int) -> np.ndarray:
+        return self._cached(("ema", n), lambda: _ewm_mean_array(self.col("close"), 2.0 / (n + 1)))
+
+    def rolling_mean(self, n: int) -> np.ndarray:
+        return self._cached(
+            ("mean", n),
+            lambda: pd.Series(self.col("close")).rolling(window=n, min_periods=1).mean().to_numpy(),
+        )
+
+    def rolling_std(self, n: int) -> np.ndarray:
+        return self._cached(
+            ("std", n),
+            lambda: pd.Series(self.col("close")).rolling(window=n, min_periods=1).std().to_numpy(),
+        )
+
+    def delta(self) -> np.ndarray:
+        def _delta():
+            close = self.col("close")
+            out = np.empty_like(close)
+            out[0:1] = np.nan
+            out[1:] = close[1:] - close[:-1]
+            return out
+        return self._cached(("delta",), _delta)
+
+    def compute(self, spec: IndicatorSpec) -> Dict[str, np.ndarray]:
+        name = spec.name.lower()
+        params = spec.params or {}
+
+        if name == "ma":
+            _require_cols(self.df, ["close"])
+            n = int(params.get("n", params.get("period", 20)))
+            return {f"ma{n}": self.rolling_mean(n)}
+
+        if name == "ema":
+            _require_cols(self.df, ["close"])
+            n = int(params.get("n", params.get("period", 20)))
+            return {f"ema{n}": self.ema(n)}
+
+        if name == "macd":
+            _require_cols(self.df, ["close"])
+            fast = int(params.get("fast", 12))
+            slow = int(params.get("slow", 26))
+            signal = int(params.get("signal", 9))
+            dif = self.ema(fast) - self.ema(slow)
+            dea = _ewm_mean_array(dif, 2.0 / (signal + 1))
+            return {"dif": dif, "dea": dea, "macd_hist": dif - dea}
+
+        if name == "rsi":
+            _require_cols(self.df, ["close"])
+            n = int(params.get("n", params.get("period", 14)))
+            delta = self.delta()
+            gain = np.where(delta > 0, delta, 0.0)
+            loss = np.where(delta < 0, -delta, 0.0)
+            avg_gain = _ewm_mean_array(gain, 1 / float(n))
+            avg_loss = _ewm_mean_array(loss, 1 / float(n))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rs = avg_gain / np.where(avg_loss == 0, np.nan, avg_loss)
+            return {f"rsi{n}": 100 - (100 / (1 + rs))}
+
+        if name == "boll":
+            _require_cols(self.df, ["close"])
+            n = int(params.get("n", 20))
+            k = float(params.get("k", 2.0))
+            mid = self.rolling_mean(n)
+            std = self.rolling_std(n)
+            return {"boll_mid": mid, "boll_upper": mid + k * std, "boll_lower": mid - k * std}
+
+        if name == "atr":
+            _require_cols(self.df, ["high", "low", "close"])
+            n = int(params.get("n", 14))
+            high, low, close = self.col("high"), self.col("low"), self.col("close")
+            prev_close = np.concatenate(([np.nan], close[:-1]))
+            # fmax 忽略 NaN，与 concat(...).max(axis=1) 一致
+            tr = np.fmax(np.fmax(np.abs(high - low), np.abs(high - prev_close)), np.abs(low - prev_close))
+            return {f"atr{n}": pd.Series(tr).rolling(window=n, min_periods=n).mean().to_numpy()}
+
+        if name == "kdj":
+            _require_cols(self.df, ["high", "low", "close"])
+            n = int(params.get("n", 9))
+            m1 = int(params.get("m1", 3))
+            m2 = int(params.get("m2", 3))
+            k, d, j = _kdj_arrays(self.col("high"), self.col("low"), self.col("close"), n=n, m1=m1, m2=m2)
+            return {"kdj_k": k, "kdj_d": d, "kdj_j": j}
+
+        raise ValueError(f"不支持的指标: {name}")
+
+
 def compute_many(df: pd.DataFrame, specs: List[IndicatorSpec]) -> pd.DataFrame:
     if not specs:
         return df.copy()
@@ -263,9 +439,20 @@ def compute_many(df: pd.DataFrame, specs: List[IndicatorSpec]) -> pd.DataFrame:
             seen.add(k)
             unique_specs.append(s)
 
-    out = df.copy()
+    # 单次计算所有指标，结果一次性拼接（不再为每个指标复制 DataFrame）
+    kernel = _IndicatorKernel(df)
+    columns: Dict[str, np.ndarray] = {}
     for s in unique_specs:
-        out = compute_indicator(out, s)
+        columns.update(kernel.compute(s))
+
+    new_columns = {name: v for name, v in columns.items() if name not in df.columns}
+    if new_columns:
+        out = pd.concat([df, pd.DataFrame(new_columns, index=df.index)], axis=1)
+    else:
+        out = df.copy()
+    for name, values in columns.items():
+        if name in df.columns:
+            out[name] = values
     return out
 
 
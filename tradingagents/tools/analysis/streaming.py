@@ -0,0 +1,453 @@
+"""
+增量（流式）技术指标
+
+行情同步每天只追加一根K线，盘中刷新只改写最后一根K线，没有必要每次都在全部历史上
+重新计算 compute_many。本模块为 indicators.py 中的每个指标提供一个保存运行状态的
+增量版本，每根新K线只做一次 O(窗口长度) 的更新，结果与批量计算一致：
+
+    engine = IncrementalIndicatorEngine(specs)
+    engine.warm_up(history_df)                  # 一次性用历史K线建立状态
+    row = engine.update({"date": ..., "high": ..., "low": ..., "close": ...})
+
+同一交易日的K线重复 update 时（盘中刷新）会回滚到该K线之前的状态再重新计算。
+引擎状态可以通过 IndicatorStateStore 按 (股票代码, 周期) 持久化。
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .indicators import IndicatorSpec
+
+NAN = float("nan")
+
+# 行情同步维护、选股使用的指标集合（与选股服务的技术指标列一致）
+DEFAULT_SPECS: List[IndicatorSpec] = [
+    IndicatorSpec("ma", {"n": 5}),
+    IndicatorSpec("ma", {"n": 10}),
+    IndicatorSpec("ma", {"n": 20}),
+    IndicatorSpec("ema", {"n": 12}),
+    IndicatorSpec("ema", {"n": 26}),
+    IndicatorSpec("macd"),
+    IndicatorSpec("rsi", {"n": 14}),
+    IndicatorSpec("boll", {"n": 20, "k": 2}),
+    IndicatorSpec("atr", {"n": 14}),
+    IndicatorSpec("kdj", {"n": 9, "m1": 3, "m2": 3}),
+]
+
+
+class _Rolling:
+    """固定窗口的滑动缓冲区"""
+
+    def __init__(self, n: int, values: Optional[List[float]] = None):
+        self.n = int(n)
+        self.buf = deque(values or [], maxlen=self.n)
+
+    def push(self, v: float):
+        self.buf.append(v)
+
+    def mean(self, min_periods: int) -> float:
+        if len(self.buf) < min_periods:
+            return NAN
+        return math.fsum(self.buf) / len(self.buf)
+
+    def std(self, min_periods: int) -> float:
+        # 与 pandas rolling().std() 一致：样本标准差（ddof=1）
+        count = len(self.buf)
+        if count < max(min_periods, 2):
+            return NAN
+        mean = math.fsum(self.buf) / count
+        return math.sqrt(math.fsum((v - mean) ** 2 for v in self.buf) / (count - 1))
+
+
+class _EMA:
+    """y[t] = (1 - alpha) * y[t-1] + alpha * x[t]，首个值为 x[0]（ewm(adjust=False)）"""
+
+    def __init__(self, alpha: float, value: Optional[float] = None):
+        self.alpha = alpha
+        self.value = value
+
+    def push(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+
+class StreamingIndicator:
+    """增量指标基类"""
+
+    #: 输出列名列表
+    columns: List[str] = []
+
+    def update(self, bar: Dict[str, float]) -> Dict[str, float]:
+        raise NotImplementedError
+
+    def get_state(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def set_state(self, state: Dict[str, Any]):
+        raise NotImplementedError
+
+
+class StreamingMA(StreamingIndicator):
+    def __init__(self, n: int = 20):
+        self.n = int(n)
+        self.columns = [f"ma{self.n}"]
+        self._win = _Rolling(self.n)
+
+    def update(self, bar):
+        self._win.push(bar["close"])
+        return {self.columns[0]: self._win.mean(min_periods=1)}
+
+    def get_state(self):
+        return {"win": list(self._win.buf)}
+
+    def set_state(self, state):
+        self._win = _Rolling(self.n, state["win"])
+
+
+class StreamingEMA(StreamingIndicator):
+    def __init__(self, n: int = 20):
+        self.n = int(n)
+        self.columns = [f"ema{self.n}"]
+        self._ema = _EMA(2.0 / (self.n + 1))
+
+    def update(self, bar):
+        return {self.columns[0]: self._ema.push(bar["close"])}
+
+    def get_state(self):
+        return {"value": self._ema.value}
+
+    def set_state(self, state):
+        self._ema.value = state["value"]
+
+
+class StreamingMACD(StreamingIndicator):
+    columns = ["dif", "dea", "macd_hist"]
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = _EMA(2.0 / (int(fast) + 1))
+        self._slow = _EMA(2.0 / (int(slow) + 1))
+        self._signal = _EMA(2.0 / (int(signal) + 1))
+
+    def update(self, bar):
+        dif = self._fast.push(bar["close"]) - self._slow.push(bar["close"])
+        dea = self._signal.push(dif)
+        return {"dif": dif, "dea": dea, "macd_hist": dif - dea}
+
+    def get_state(self):
+        return {"fast": self._fast.value, "slow": self._slow.value, "signal": self._signal.value}
+
+    def set_state(self, state):
+        self._fast.value, self._slow.value, self._signal.value = state["fast"], state["slow"], state["signal"]
+
+
+class StreamingRSI(StreamingIndicator):
+    """Wilder RSI（对应 rsi(method='ema')）"""
+
+    def __init__(self, n: int = 14):
+        self.n = int(n)
+        self.columns = [f"rsi{self.n}"]
+        self._prev_close: Optional[float] = None
+        self._gain = _EMA(1 / float(self.n))
+        self._loss = _EMA(1 / float(self.n))
+
+    def update(self, bar):
+        close = bar["close"]
+        # 首根K线的涨跌为 NaN，批量实现中按 0 处理
+        delta = 0.0 if self._prev_close is None else close - self._prev_close
+        self._prev_close = close
+        avg_gain = self._gain.push(delta if delta > 0 else 0.0)
+        avg_loss = self._loss.push(-delta if delta < 0 else 0.0)
+        if avg_loss == 0:
+            return {self.columns[0]: NAN}
+        return {self.columns[0]: 100 - (100 / (1 + avg_gain / avg_loss))}
+
+    def get_state(self):
+        return {"prev_close": self._prev_close, "gain": self._gain.value, "loss": self._loss.value}
+
+    def set_state(self, state):
+        self._prev_close = state["prev_close"]
+        self._gain.value, self._loss.value = state["gain"], state["loss"]
+
+
+class StreamingBOLL(StreamingIndicator):
+    columns = ["boll_mid", "boll_upper", "boll_lower"]
+
+    def __init__(self, n: int = 20, k: float = 2.0):
+        self.n = int(n)
+        self.k = float(k)
+        self._win = _Rolling(self.n)
+
+    def update(self, bar):
+        self._win.push(bar["close"])
+        mid = self._win.mean(min_periods=1)
+        std = self._win.std(min_periods=1)
+        return {"boll_mid": mid, "boll_upper": mid + self.k * std, "boll_lower": mid - self.k * std}
+
+    def get_state(self):
+        return {"win": list(self._win.buf)}
+
+    def set_state(self, state):
+        self._win = _Rolling(self.n, state["win"])
+
+
+class StreamingATR(StreamingIndicator):
+    def __init__(self, n: int = 14):
+        self.n = int(n)
+        self.columns = [f"atr{self.n}"]
+        self._prev_close: Optional[float] = None
+        self._win = _Rolling(self.n)
+
+    def update(self, bar):
+        high, low, close = bar["high"], bar["low"], bar["close"]
+        tr = abs(high - low)
+        if self._prev_close is not None:
+            tr = max(tr, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        self._win.push(tr)
+        return {self.columns[0]: self._win.mean(min_periods=self.n)}
+
+    def get_state(self):
+        return {"prev_close": self._prev_close, "win": list(self._win.buf)}
+
+    def set_state(self, state):
+        self._prev_close = state["prev_close"]
+        self._win = _Rolling(self.n, state["win"])
+
+
+class StreamingKDJ(StreamingIndicator):
+    columns = ["kdj_k", "kdj_d", "kdj_j"]
+
+    def __init__(self, n: int = 9, m1: int = 3, m2: int = 3):
+        self.n = int(n)
+        self.alpha_k = 1 / float(m1)
+        self.alpha_d = 1 / float(m2)
+        self._highs = _Rolling(self.n)
+        self._lows = _Rolling(self.n)
+        self._k = 50.0
+        self._d = 50.0
+
+    def update(self, bar):
+        self._highs.push(bar["high"])
+        self._lows.push(bar["low"])
+        if len(self._highs.buf) < self.n:
+            return {"kdj_k": NAN, "kdj_d": NAN, "kdj_j": NAN}
+
+        lowest, highest = min(self._lows.buf), max(self._highs.buf)
+        if highest == lowest:
+            # RSV 无定义：输出 NaN，且不更新 K/D（与批量实现一致）
+            return {"kdj_k": NAN, "kdj_d": NAN, "kdj_j": NAN}
+        rsv = (bar["close"] - lowest) / (highest - lowest) * 100
+        self._k = (1 - self.alpha_k) * self._k + self.alpha_k * rsv
+        self._d = (1 - self.alpha_d) * self._d + self.alpha_d * self._k
+        return {"kdj_k": self._k, "kdj_d": self._d, "kdj_j": 3 * self._k - 2 * self._d}
+
+    def get_state(self):
+        return {"highs": list(self._highs.buf), "lows": list(self._lows.buf), "k": self._k, "d": self._d}
+
+    def set_state(self, state):
+        self._highs = _Rolling(self.n, state["highs"])
+        self._lows = _Rolling(self.n, state["lows"])
+        self._k, self._d = state["k"], state["d"]
+
+
+def create_streaming_indicator(spec: IndicatorSpec) -> StreamingIndicator:
+    """按 IndicatorSpec 创建增量指标（参数与 compute_indicator 相同）"""
+    name = spec.name.lower()
+    params = spec.params or {}
+    if name == "ma":
+        return StreamingMA(int(params.get("n", params.get("period", 20))))
+    if name == "ema":
+        return StreamingEMA(int(params.get("n", params.get("period", 20))))
+    if name == "macd":
+        return StreamingMACD(int(params.get("fast", 12)), int(params.get("slow", 26)), int(params.get("signal", 9)))
+    if name == "rsi":
+        return StreamingRSI(int(params.get("n", params.get("period", 14))))
+    if name == "boll":
+        return StreamingBOLL(int(params.get("n", 20)), float(params.get("k", 2.0)))
+    if name == "atr":
+        return StreamingATR(int(params.get("n", 14)))
+    if name == "kdj":
+        return StreamingKDJ(int(params.get("n", 9)), int(params.get("m1", 3)), int(params.get("m2", 3)))
+    raise ValueError(f"不支持的指标: {name}")
+
+
+def _spec_key(spec: IndicatorSpec) -> str:
+    params = spec.params or {}
+    return json.dumps([spec.name.lower(), sorted(params.items())], default=str)
+
+
+class IncrementalIndicatorEngine:
+    """一组增量指标的运行状态，K线需按日期顺序输入"""
+
+    def __init__(self, specs: List[IndicatorSpec]):
+        self.specs: List[IndicatorSpec] = []
+        self.indicators: List[StreamingIndicator] = []
+        seen = set()
+        for spec in specs:
+            key = _spec_key(spec)
+            if key not in seen:
+                seen.add(key)
+                self.specs.append(spec)
+                self.indicators.append(create_streaming_indicator(spec))
+
+        self.last_date: Optional[str] = None
+        self.last_row: Dict[str, float] = {}
+        # 最后一根K线之前的状态，用于盘中改写最后一根K线
+        self._state_before_last: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def columns(self) -> List[str]:
+        cols: List[str] = []
+        for ind in self.indicators:
+            cols.extend(c for c in ind.columns if c not in cols)
+        return cols
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        return [dict(ind.get_state()) for ind in self.indicators]
+
+    def _restore(self, states: List[Dict[str, Any]]):
+        for ind, state in zip(self.indicators, states):
+            ind.set_state(state)
+
+    def update(self, bar: Dict[str, Any]) -> Dict[str, float]:
+        """输入一根K线（需包含 close，ATR/KDJ 还需要 high/low），返回该K线的指标值
+
+        bar 中的 date 与上一根相同时视为盘中改写：先回滚再计算；早于上一根的K线会被拒绝。
+        """
+        bar_date = bar.get("date")
+        bar_date = None if bar_date is None else str(pd.Timestamp(bar_date).date())
+
+        if bar_date is not None and self.last_date is not None:
+            if bar_date < self.last_date:
+                raise ValueError(f"K线日期 {bar_date} 早于已处理的最后日期 {self.last_date}")
+            if bar_date == self.last_date and self._state_before_last is not None:
+                self._restore(self._state_before_last)
+            else:
+                self._state_before_last = self._snapshot()
+        else:
+            self._state_before_last = self._snapshot()
+
+        values = {k: float(bar[k]) for k in ("open", "high", "low", "close") if k in bar and bar[k] is not None}
+        row: Dict[str, float] = {}
+        for ind in self.indicators:
+            row.update(ind.update(values))
+
+        self.last_date = bar_date
+        self.last_row = row
+        return row
+
+    def warm_up(self, df: pd.DataFrame, date_column: str = "date") -> pd.DataFrame:
+        """用历史K线建立状态，返回与 df 行对齐的指标列"""
+        if date_column in df.columns:
+            dates = list(df[date_column])
+        elif isinstance(df.index, pd.DatetimeIndex):
+            dates = list(df.index)
+        else:
+            dates = [None] * len(df)
+
+        cols = [c for c in ("open", "high", "low", "close") if c in df.columns]
+        arrays = {c: df[c].to_numpy(dtype=float) for c in cols}
+        rows = []
+        for i in range(len(df)):
+            bar = {c: arrays[c][i] for c in cols}
+            bar["date"] = dates[i]
+            rows.append(self.update(bar))
+        return pd.DataFrame(rows, index=df.index, columns=self.columns)
+
+    def append_to(self, df: pd.DataFrame, bars: pd.DataFrame, date_column: str = "date") -> pd.DataFrame:
+        """把新K线（含指标列）追加到已带指标的 df 后面；与 df 最后一根同日期的K线会替换它"""
+        new_rows = pd.concat([bars, self.warm_up(bars, date_column=date_column)], axis=1)
+        if df is None or df.empty:
+            return new_rows
+        if date_column in df.columns and date_column in bars.columns and len(bars):
+            df = df[pd.to_datetime(df[date_column]) < pd.to_datetime(bars[date_column]).min()]
+        return pd.concat([df, new_rows], ignore_index=date_column in df.columns)
+
+    # ==================== 状态持久化 ====================
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "specs": [{"name": s.name, "params": s.params or {}} for s in self.specs],
+            "states": self._snapshot(),
+            "state_before_last": self._state_before_last,
+            "last_date": self.last_date,
+            "last_row": self.last_row,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IncrementalIndicatorEngine":
+        engine = cls([IndicatorSpec(s["name"], s["params"] or None) for s in data["specs"]])
+        engine._restore(data["states"])
+        engine._state_before_last = data.get("state_before_last")
+        engine.last_date = data.get("last_date")
+        engine.last_row = data.get("last_row") or {}
+        return engine
+
+
+class IndicatorStateStore:
+    """按 (股票代码, 周期) 持久化增量指标状态（JSON 文件）"""
+
+    def __init__(self, state_dir: Optional[str] = None):
+        if state_dir is None:
+            from tradingagents.default_config import DEFAULT_CONFIG
+            state_dir = os.getenv(
+                "TA_INDICATOR_STATE_DIR",
+                os.path.join(DEFAULT_CONFIG["data_cache_dir"], "indicator_state"),
+            )
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str, period: str) -> Path:
+        safe_symbol = re.sub(r"[^0-9A-Za-z._-]", "_", str(symbol))
+        return self.state_dir / period / f"{safe_symbol}.json"
+
+    def load(self, symbol: str, period: str, specs: List[IndicatorSpec]) -> Optional[IncrementalIndicatorEngine]:
+        """读取状态；不存在或指标集合不一致时返回 None"""
+        path = self._path(symbol, period)
+        if not path.exists():
+            return None
+        with self._lock:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        engine = IncrementalIndicatorEngine.from_dict(data)
+        if sorted(_spec_key(s) for s in engine.specs) != sorted({_spec_key(s) for s in specs}):
+            return None
+        return engine
+
+    def save(self, symbol: str, period: str, engine: IncrementalIndicatorEngine):
+        path = self._path(symbol, period)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(engine.to_dict(), f)
+            os.replace(tmp_path, path)
+
+    def delete(self, symbol: str, period: str):
+        with self._lock:
+            self._path(symbol, period).unlink(missing_ok=True)
+
+    def get_or_build(self, symbol: str, period: str, specs: List[IndicatorSpec],
+                     history_loader: Callable[[], pd.DataFrame]) -> IncrementalIndicatorEngine:
+        """读取已有状态，没有时用 history_loader() 返回的全部历史K线建立并保存"""
+        engine = self.load(symbol, period, specs)
+        if engine is None:
+            engine = IncrementalIndicatorEngine(specs)
+            history = history_loader()
+            if history is not None and not history.empty:
+                engine.warm_up(history)
+            self.save(symbol, period, engine)
+        return engine
@@ -5,6 +5,7 @@
 让大模型只需要调用一个工具就能获取所有类型股票的新闻数据
 """
 
+import concurrent.futures
 import logging
 from datetime import datetime
 import re
@@ -187,7 +188,7 @@ class UnifiedNewsAnalyzer:
     def _sync_news_from_akshare(self, stock_code: str, max_news: int = 10) -> bool:
         """
         从AKShare同步新闻到数据库（同步方法）
-        使用同步的数据库客户端和新线程中的事件循环，避免事件循环冲突
+        异步获取在共享的后台事件循环中执行，保存使用同步的数据库客户端，避免事件循环冲突
 
         Args:
             stock_code: 股票代码
@@ -197,8 +198,8 @@ class UnifiedNewsAnalyzer:
             bool: 是否同步成功
         """
         try:
-            import asyncio
-            import concurrent.futures
+            from tradingagents.utils.async_runner import run_coro
+            from tradingagents.dataflows.providers.china.akshare import get_akshare_provider
 
             # 标准化股票代码（去除后缀）
             clean_code = stock_code.replace('.SH', '').replace('.SZ', '').replace('.SS', '')\
@@ -206,69 +207,36 @@ class UnifiedNewsAnalyzer:
 
             logger.info(f"[统一新闻工具] 🔄 开始同步 {clean_code} 的新闻...")
 
-            # 🔥 在新线程中运行，使用同步数据库客户端
-            def run_sync_in_new_thread():
-                """在新线程中创建新的事件循环并运行同步任务"""
-                # 创建新的事件循环
-                new_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(new_loop)
-
-                try:
-                    # 定义异步获取新闻任务
-                    async def get_news_task():
-                        try:
-                            # 动态导入 AKShare provider（正确的导入路径）
-                            from tradingagents.dataflows.providers.china.akshare import AKShareProvider
-
-                            # 创建 provider 实例
-                            provider = AKShareProvider()
-
-                            # 调用 provider 获取新闻
-                            news_data = await provider.get_stock_news(
-                                symbol=clean_code,
-                                limit=max_news
-                            )
-
-                            return news_data
-
-                        except Exception as e:
-                            logger.error(f"[统一新闻工具] ❌ 获取新闻失败: {e}")
-                            import traceback
-                            logger.error(traceback.format_exc())
-                            return None
-
-                    # 在新的事件循环中获取新闻
-                    news_data = new_loop.run_until_complete(get_news_task())
-
-                    if not news_data:
-                        logger.warning(f"[统一新闻工具] ⚠️ 未获取到新闻数据")
-                        return False
-
-                    logger.info(f"[统一新闻工具] 📥 获取到 {len(news_data)} 条新闻")
-
-                    # 🔥 使用同步方法保存到数据库（不依赖事件循环）
-                    from app.services.news_data_service import NewsDataService
-
-                    news_service = NewsDataService()
-                    saved_count = news_service.save_news_data_sync(
-                        news_data=news_data,
-                        data_source="akshare",
-                        market="CN"
-                    )
-
-                    logger.info(f"[统一新闻工具] ✅ 同步成功: {saved_count} 条新闻")
-                    return saved_count > 0
-
-                finally:
-                    # 清理事件循环
-                    new_loop.close()
-
-            # 在线程池中执行
-            logger.info(f"[统一新闻工具] 在新线程中运行同步任务，避免事件循环冲突")
-            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(run_sync_in_new_thread)
-                result = future.result(timeout=30)  # 30秒超时
-                return result
+            # 🔥 复用全局 AKShare provider，在后台事件循环中获取新闻
+            provider = get_akshare_provider()
+            try:
+                news_data = run_coro(provider.get_stock_news(symbol=clean_code, limit=max_news), timeout=30)
+            except concurrent.futures.TimeoutError:
+                raise
+            except Exception as e:
+                logger.error(f"[统一新闻工具] ❌ 获取新闻失败: {e}")
+                import traceback
+                logger.error(traceback.format_exc())
+                news_data = None
+
+            if not news_data:
+                logger.warning(f"[统一新闻工具] ⚠️ 未获取到新闻数据")
+                return False
+
+            logger.info(f"[统一新闻工具] 📥 获取到 {len(news_data)} 条新闻")
+
+            # 🔥 使用同步方法保存到数据库（不依赖事件循环）
+            from app.services.news_data_service import NewsDataService
+
+            news_service = NewsDataService()
+            saved_count = news_service.save_news_data_sync(
+                news_data=news_data,
+                data_source="akshare",
+                market="CN"
+            )
+
+            logger.info(f"[统一新闻工具] ✅ 同步成功: {saved_count} 条新闻")
+            return saved_count > 0
 
         except concurrent.futures.TimeoutError:
             logger.error(f"[统一新闻工具] ❌ 同步新闻超时（30秒）")
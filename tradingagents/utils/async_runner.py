@@ -0,0 +1,108 @@
+"""
+同步代码调用异步接口的桥接（进程内共享的后台事件循环）
+
+工具层与数据源管理器是同步代码，而数据提供器（AKShare/Tushare/BaoStock）是异步接口。
+以前每次调用都新建线程池、事件循环甚至提供器实例；这里改为一个常驻的后台事件循环线程，
+所有同步调用方通过 run_coro 把协程提交到该循环执行，提供器实例及其连接可在调用之间复用。
+
+注意：提交到后台循环的协程中不要再调用 run_coro（会等待自身而死锁）。
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Any, Awaitable, Optional
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+
+class BackgroundLoop:
+    """在守护线程中常驻运行的事件循环"""
+
+    def __init__(self, name: str = "tradingagents-async"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """后台事件循环（首次访问时启动；fork 出的子进程中会重新启动）"""
+        if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                    self._start()
+        return self._loop
+
+    def _start(self) -> None:
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, name=self.name, daemon=True)
+        thread.start()
+        ready.wait()
+        self._loop, self._thread, self._pid = loop, thread, os.getpid()
+        logger.debug(f"🔁 [后台事件循环] 已启动: {self.name}")
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """在后台循环中执行协程并阻塞等待结果
+
+        Raises:
+            concurrent.futures.TimeoutError: 超时（协程会被取消）
+            RuntimeError: 在后台循环线程内调用
+        """
+        if self.in_loop_thread():
+            if asyncio.iscoroutine(coro):
+                coro.close()
+            raise RuntimeError("run_coro 不能在后台事件循环线程内调用，请直接 await")
+
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = self._pid = None
+        if loop is None or threading.current_thread() is thread:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+
+_background_loop = BackgroundLoop()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """进程级共享的后台事件循环"""
+    return _background_loop
+
+
+def run_coro(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """在共享的后台事件循环中执行协程，阻塞等待结果
+
+    可在任意同步上下文中调用（包括 asyncio.to_thread 线程和已有事件循环的线程）。
+
+    Args:
+        coro: 要执行的协程
+        timeout: 最长等待秒数，超时后取消协程并抛出 concurrent.futures.TimeoutError
+    """
+    return _background_loop.run(coro, timeout=timeout)
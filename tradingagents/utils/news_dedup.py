@@ -0,0 +1,200 @@
+"""
+新闻近似重复检测（MinHash + LSH 分桶）
+
+同一篇稿件被多个门户转载时，标题常有细微改动（加来源前缀、改标点、增删个别字），
+按标题精确匹配无法去重。这里对标题和正文开头的字符 n-gram 计算 MinHash 签名，
+再用 LSH 分段分桶只比较可能相近的签名，整体近似线性时间。
+
+财经新闻标题很短，单个字的改动就会让 SimHash 翻转多个比特；MinHash 估计的是
+n-gram 集合的 Jaccard 相似度，对短文本更稳定。
+"""
+
+import hashlib
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import logging
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 64
+DEFAULT_BANDS = 16          # 16 段 × 4 行：Jaccard ≥ 0.7 的一对几乎必然进入同一桶
+DEFAULT_THRESHOLD = 0.6     # 估计 Jaccard 达到该值即视为近似重复
+DEFAULT_SHINGLE_SIZE = 2
+DEFAULT_CONTENT_CHARS = 120
+
+# 转载较多的中文财经来源权威度（数值越小越权威），用于 keep="authority"
+DEFAULT_SOURCE_PRIORITY = {
+    '新华社': 0, '证券时报': 1, '中国证券报': 1, '上海证券报': 1, '证券日报': 1,
+    '财联社': 2, '第一财经': 2, '21世纪经济报道': 2, '经济观察报': 2,
+    '东方财富': 3, '新浪财经': 3, '同花顺': 3, '腾讯财经': 3, '网易财经': 3,
+}
+
+_BRACKET_TAG = re.compile(r'[【\[［(（][^】\]］)）]{0,12}[】\]］)）]')
+_NON_WORD = re.compile(r'[^0-9a-z\u4e00-\u9fff]+')
+
+# multiply-shift 哈希族：h_i(x) = (a_i * x + b_i) mod 2^64 的高 32 位（a_i 为奇数）
+_rng = np.random.default_rng(20240601)
+_PERM_A = (_rng.integers(1, 2**63 - 1, NUM_PERMUTATIONS, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63 - 1, NUM_PERMUTATIONS, dtype=np.uint64)
+_EMPTY_SIGNATURE = np.full(NUM_PERMUTATIONS, np.iinfo(np.uint32).max, dtype=np.uint32)
+
+
+def normalize_text(text: str) -> str:
+    """去掉来源标签（如【财联社】）、标点和空白，统一小写"""
+    if not text:
+        return ""
+    text = _BRACKET_TAG.sub('', str(text).lower())
+    return _NON_WORD.sub('', text)
+
+
+def shingles(title: str, content: str = "", size: int = DEFAULT_SHINGLE_SIZE,
+             content_chars: int = DEFAULT_CONTENT_CHARS) -> set:
+    """标题与正文开头的字符 n-gram 集合"""
+    result = set()
+    for text in (normalize_text(title), normalize_text(content)[:content_chars] if content else ""):
+        if not text:
+            continue
+        if len(text) <= size:
+            result.add(text)
+        else:
+            result.update(text[i:i + size] for i in range(len(text) - size + 1))
+    return result
+
+
+def _hash32(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+def minhash_signature(tokens: set) -> np.ndarray:
+    """n-gram 集合的 MinHash 签名（NUM_PERMUTATIONS 个 uint32）"""
+    if not tokens:
+        return _EMPTY_SIGNATURE
+    x = np.fromiter((_hash32(t) for t in tokens), dtype=np.uint64, count=len(tokens))
+    with np.errstate(over='ignore'):
+        hashed = (x[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def estimate_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def cluster_signatures(
+    signatures: Sequence[np.ndarray],
+    threshold: float = DEFAULT_THRESHOLD,
+    bands: int = DEFAULT_BANDS
+) -> List[List[int]]:
+    """将估计 Jaccard ≥ threshold 的签名聚为一簇（单链接），返回按首元素排序的下标列表"""
+    if NUM_PERMUTATIONS % bands:
+        raise ValueError(f"bands ({bands}) 必须整除签名长度 {NUM_PERMUTATIONS}")
+
+    n = len(signatures)
+    uf = _UnionFind(n)
+    rows = NUM_PERMUTATIONS // bands
+
+    # 完全相同的签名先合并
+    first_by_sig: Dict[bytes, int] = {}
+    for i, sig in enumerate(signatures):
+        key = sig.tobytes()
+        if key in first_by_sig:
+            uf.union(first_by_sig[key], i)
+        else:
+            first_by_sig[key] = i
+
+    # 桶内只保存尚未并入其它成员的代表，避免大簇造成平方级比较
+    buckets: Dict[tuple, List[int]] = {}
+    for i in first_by_sig.values():
+        sig = signatures[i]
+        for band in range(bands):
+            key = (band, sig[band * rows:(band + 1) * rows].tobytes())
+            bucket = buckets.setdefault(key, [])
+            merged = False
+            for j in bucket:
+                if uf.find(i) == uf.find(j):
+                    merged = True
+                    continue
+                if estimate_jaccard(sig, signatures[j]) >= threshold:
+                    uf.union(i, j)
+                    merged = True
+            if not merged:
+                bucket.append(i)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(n):
+        clusters.setdefault(uf.find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def _time_key(value: Any) -> float:
+    if isinstance(value, datetime):
+        try:
+            return value.timestamp()
+        except (OverflowError, OSError, ValueError):
+            return float('inf')
+    return float('inf')
+
+
+def dedupe_near_duplicates(
+    items: Sequence[Any],
+    title: Callable[[Any], str],
+    content: Optional[Callable[[Any], str]] = None,
+    publish_time: Optional[Callable[[Any], Optional[datetime]]] = None,
+    source: Optional[Callable[[Any], str]] = None,
+    keep: str = "earliest",
+    source_priority: Optional[Dict[str, int]] = None,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Any]:
+    """
+    近似重复去重，每簇保留一条，结果保持原有顺序
+
+    Args:
+        items: 新闻对象或字典
+        title/content/publish_time/source: 字段取值函数
+        keep: "earliest" 保留最早发布的一条；"authority" 优先保留权威来源，同级再比发布时间
+        source_priority: 来源权威度（数值越小越权威），默认 DEFAULT_SOURCE_PRIORITY
+        threshold: 判定为近似重复的最小估计 Jaccard 相似度
+    """
+    if len(items) < 2:
+        return list(items)
+    if keep not in ("earliest", "authority"):
+        raise ValueError(f"不支持的 keep 策略: {keep}")
+
+    token_sets = [shingles(title(item) or "", (content(item) or "") if content else "") for item in items]
+    # 没有可比较文本的条目各自成簇，不参与聚类
+    comparable = [i for i, tokens in enumerate(token_sets) if tokens]
+    signatures = [minhash_signature(token_sets[i]) for i in comparable]
+    clusters = [[comparable[k] for k in members] for members in cluster_signatures(signatures, threshold=threshold)]
+    clusters.extend([i] for i, tokens in enumerate(token_sets) if not tokens)
+
+    priority = source_priority if source_priority is not None else DEFAULT_SOURCE_PRIORITY
+    unknown_rank = max(priority.values(), default=0) + 1
+
+    def rank(i: int) -> tuple:
+        when = _time_key(publish_time(items[i])) if publish_time else float('inf')
+        if keep == "authority" and source:
+            return (priority.get(source(items[i]) or '', unknown_rank), when, i)
+        return (when, i)
+
+    kept = sorted(min(members, key=rank) for members in clusters)
+    if len(kept) < len(items):
+        logger.debug(f"[近似去重] {len(items)} 条新闻聚为 {len(kept)} 簇")
+    return [items[i] for i in kept]